@@ -0,0 +1,36 @@
+"""Add FTS5 full-text index for chat_messages (SQLite only)
+
+Revision ID: 9a1f3c7d2e4b
+Revises: 82b5e0195490
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from sqlalchemy import text
+
+from alembic import op
+from src.infrastructure.database.chat_message_fts import (
+    CHAT_MESSAGE_FTS_DROP,
+    ensure_chat_message_fts,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "9a1f3c7d2e4b"
+down_revision: str | None = "82b5e0195490"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # 仅 SQLite：创建 trigram 全文索引与同步触发器，并回填已有消息
+    ensure_chat_message_fts(op.get_bind())
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for statement in CHAT_MESSAGE_FTS_DROP:
+        bind.execute(text(statement))
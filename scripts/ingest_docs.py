@@ -8,10 +8,19 @@
 3. 生成向量嵌入
 4. 存储到向量数据库
 
+目录导入是一条流水线，各阶段之间使用有界队列（背压，内存占用可控）：
+    扫描 → 解析（进程池）→ 切分（线程）→ 嵌入（跨文档批量 + 并发请求）→ 写入（批量提交）
+
+增量导入：导入清单（ingest_manifest 表）记录每个文件的 (路径, mtime, 大小, sha256, 文档ID)
+- mtime 与大小均未变化的文件直接跳过（不读取内容）
+- mtime 变化但 sha256 未变化的文件只更新清单
+- 清单中存在但目录中已删除的文件，删除其文档与分块
+
 使用方法：
     python scripts/ingest_docs.py --path data/docs --workflow-id wf_xxx
     python scripts/ingest_docs.py --file doc.pdf --workflow-id wf_xxx
     python scripts/ingest_docs.py --url https://example.com --workflow-id wf_xxx
+    python scripts/ingest_docs.py --path data/docs --parse-workers 8 --embed-concurrency 8
 """
 
 import argparse
@@ -19,9 +28,14 @@ import asyncio
 import hashlib
 import logging
 import os
+import sqlite3
 import sys
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Any, NamedTuple
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -51,6 +65,194 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 支持的文件扩展名
+SUPPORTED_EXTENSIONS = {
+    ".pdf",
+    ".doc",
+    ".docx",
+    ".md",
+    ".markdown",
+    ".html",
+    ".htm",
+    ".txt",
+}
+
+# 阶段间队列的结束标记
+_DONE = object()
+
+
+# ==================== 解析（进程池任务，必须是模块级函数） ====================
+
+
+def load_file_content(file_path: str) -> str | None:
+    """从文件加载文档内容（多页/多段合并为一个字符串）"""
+    file_ext = Path(file_path).suffix.lower()
+
+    # 根据文件类型选择加载器
+    if file_ext == ".pdf":
+        loader = PyPDFLoader(file_path)
+    elif file_ext in [".doc", ".docx"]:
+        loader = UnstructuredWordDocumentLoader(file_path)
+    elif file_ext in [".md", ".markdown"]:
+        loader = UnstructuredMarkdownLoader(file_path)
+    elif file_ext in [".html", ".htm"]:
+        loader = UnstructuredHTMLLoader(file_path)
+    elif file_ext in [".txt"]:
+        loader = TextLoader(file_path, encoding="utf-8")
+    else:
+        logger.warning(f"Unsupported file type: {file_ext}")
+        return None
+
+    documents = loader.load()
+    if documents:
+        # 合并所有页面
+        return "\n\n".join([doc.page_content for doc in documents])
+    return None
+
+
+def file_sha256(file_path: str) -> str:
+    """流式计算文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ParsedFile:
+    """解析阶段的结果（content 为 None 且无 error 表示内容未变化）"""
+
+    path: str
+    sha256: str
+    content: str | None = None
+    error: str | None = None
+
+
+def parse_file(file_path: str, known_sha256: str | None = None) -> ParsedFile:
+    """进程池任务：计算 sha256，内容有变化时才解析文档"""
+    sha256 = file_sha256(file_path)
+    if sha256 == known_sha256:
+        return ParsedFile(path=file_path, sha256=sha256)
+    try:
+        content = load_file_content(file_path)
+    except Exception as e:  # noqa: BLE001 - 单个文件失败不影响其他文件
+        return ParsedFile(path=file_path, sha256=sha256, error=str(e))
+    if not content or not content.strip():
+        return ParsedFile(path=file_path, sha256=sha256, error="empty or unsupported document")
+    return ParsedFile(path=file_path, sha256=sha256, content=content)
+
+
+# ==================== 导入清单 ====================
+
+
+class ManifestEntry(NamedTuple):
+    """导入清单中的一条记录"""
+
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    document_id: str
+
+
+class IngestManifest:
+    """导入清单（与知识库同一个 SQLite 文件，按 (路径, 工作流) 记录）"""
+
+    def __init__(self, db_path: str):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA busy_timeout = 5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_manifest (
+                path TEXT NOT NULL,
+                workflow_id TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                PRIMARY KEY (path, workflow_id)
+            )
+        """)
+        self._conn.commit()
+
+    def load(self, workflow_id: str | None, root: str | None = None) -> dict[str, ManifestEntry]:
+        """读取指定工作流（可限定目录前缀）的清单"""
+        sql = "SELECT path, mtime_ns, size, sha256, document_id FROM ingest_manifest"
+        sql += " WHERE workflow_id = ?"
+        params: list[Any] = [workflow_id or ""]
+        if root is not None:
+            sql += " AND substr(path, 1, ?) = ?"
+            prefix = os.path.join(root, "")
+            params.extend([len(prefix), prefix])
+        rows = self._conn.execute(sql, params).fetchall()
+        return {row[0]: ManifestEntry(*row) for row in rows}
+
+    def upsert(self, workflow_id: str | None, entries: list[ManifestEntry]) -> None:
+        if not entries:
+            return
+        self._conn.executemany(
+            """
+            INSERT OR REPLACE INTO ingest_manifest
+            (path, workflow_id, mtime_ns, size, sha256, document_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (e.path, workflow_id or "", e.mtime_ns, e.size, e.sha256, e.document_id)
+                for e in entries
+            ],
+        )
+        self._conn.commit()
+
+    def remove(self, workflow_id: str | None, paths: list[str]) -> None:
+        if not paths:
+            return
+        self._conn.executemany(
+            "DELETE FROM ingest_manifest WHERE path = ? AND workflow_id = ?",
+            [(path, workflow_id or "") for path in paths],
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ==================== 流水线数据 ====================
+
+
+@dataclass
+class _Candidate:
+    """扫描阶段发现的待处理文件"""
+
+    path: str
+    mtime_ns: int
+    size: int
+    previous: ManifestEntry | None
+
+
+@dataclass
+class _PreparedDocument:
+    """切分完成、等待嵌入/写入的文档"""
+
+    candidate: _Candidate
+    sha256: str
+    document: Document
+    chunks: list[str]
+    token_counts: list[int]
+    embeddings: list[list[float]] = field(default_factory=list)
+
+
+@dataclass
+class IngestReport:
+    """目录导入统计"""
+
+    scanned: int = 0
+    unchanged: int = 0
+    touched: int = 0
+    ingested: int = 0
+    failed: int = 0
+    removed: int = 0
+    document_ids: list[str] = field(default_factory=list)
+
 
 class DocumentIngester:
     """文档导入器"""
@@ -62,6 +264,12 @@ class DocumentIngester:
         model_name: str = "text-embedding-3-small",
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        parse_workers: int | None = None,
+        chunk_workers: int = 4,
+        embed_batch_size: int = 64,
+        embed_concurrency: int = 4,
+        commit_batch_size: int = 100,
+        queue_size: int = 64,
     ):
         """初始化文档导入器
 
@@ -71,14 +279,30 @@ class DocumentIngester:
             model_name: 嵌入模型名称
             chunk_size: 分块大小
             chunk_overlap: 分块重叠大小
+            parse_workers: 解析进程数（默认 CPU 核数；0 表示在线程中解析）
+            chunk_workers: 并发切分的线程数
+            embed_batch_size: 每个嵌入请求的分块数量（跨文档合批）
+            embed_concurrency: 并发嵌入请求数
+            commit_batch_size: 每次批量提交的文档数量
+            queue_size: 阶段间队列容量
         """
         self.db_path = db_path
         self.model_name = model_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.chunk_workers = max(1, chunk_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.embed_concurrency = max(1, embed_concurrency)
+        self.commit_batch_size = max(1, commit_batch_size)
+        self.queue_size = max(1, queue_size)
+
+        # 确保数据库目录存在
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
 
         # 初始化组件
         self.repository = SQLiteKnowledgeRepository(db_path)
+        self.manifest = IngestManifest(db_path)
         self.embeddings = OpenAIEmbeddings(
             model=model_name, openai_api_key=openai_api_key or os.getenv("OPENAI_API_KEY")
         )
@@ -89,8 +313,10 @@ class DocumentIngester:
         )
         self.tokenizer = tiktoken.encoding_for_model(model_name)
 
-        # 确保数据库目录存在
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    async def close(self) -> None:
+        """释放数据库连接"""
+        await self.repository.close()
+        self.manifest.close()
 
     def _count_tokens(self, text: str) -> int:
         """计算文本的token数量"""
@@ -103,32 +329,7 @@ class DocumentIngester:
     async def _load_document_from_file(self, file_path: str) -> str | None:
         """从文件加载文档内容"""
         try:
-            file_ext = Path(file_path).suffix.lower()
-
-            # 根据文件类型选择加载器
-            if file_ext == ".pdf":
-                loader = PyPDFLoader(file_path)
-            elif file_ext in [".doc", ".docx"]:
-                loader = UnstructuredWordDocumentLoader(file_path)
-            elif file_ext in [".md", ".markdown"]:
-                loader = UnstructuredMarkdownLoader(file_path)
-            elif file_ext in [".html", ".htm"]:
-                loader = UnstructuredHTMLLoader(file_path)
-            elif file_ext in [".txt"]:
-                loader = TextLoader(file_path, encoding="utf-8")
-            else:
-                logger.warning(f"Unsupported file type: {file_ext}")
-                return None
-
-            # 加载文档
-            documents = loader.load()
-            if documents:
-                # 合并所有页面
-                content = "\n\n".join([doc.page_content for doc in documents])
-                return content
-
-            return None
-
+            return await asyncio.to_thread(load_file_content, file_path)
         except Exception as e:
             logger.error(f"Failed to load document {file_path}: {str(e)}")
             return None
@@ -146,8 +347,8 @@ class DocumentIngester:
             logger.error(f"Failed to load document from URL {url}: {str(e)}")
             return None
 
-    async def _chunk_document(self, content: str) -> list[str]:
-        """将文档切分为多个块"""
+    def _split_text(self, content: str) -> list[str]:
+        """将文档切分为多个块（同步实现，流水线中在工作线程执行）"""
         # 使用token数量来更精确地切分
         chunks = []
         current_chunk = ""
@@ -179,92 +380,75 @@ class DocumentIngester:
         if not chunks:
             chunks = self.text_splitter.split_text(content)
 
+        return [chunk for chunk in chunks if chunk]
+
+    def _split_and_count(self, content: str) -> tuple[list[str], list[int]]:
+        """切分文档并统计每个分块的token数量"""
+        chunks = self._split_text(content)
+        return chunks, [self._count_tokens(chunk) for chunk in chunks]
+
+    async def _chunk_document(self, content: str) -> list[str]:
+        """将文档切分为多个块"""
+        chunks = await asyncio.to_thread(self._split_text, content)
         logger.info(f"Split document into {len(chunks)} chunks")
         return chunks
 
     async def _generate_embeddings(self, chunks: list[str]) -> list[list[float]]:
-        """生成文本块的向量嵌入"""
+        """生成文本块的向量嵌入（按 embed_batch_size 分批并发请求）"""
         logger.info(f"Generating embeddings for {len(chunks)} chunks...")
 
-        # 批量生成嵌入（OpenAI支持批量处理）
-        embeddings = await self.embeddings.aembed_documents(chunks)
-
-        logger.info(f"Generated {len(embeddings)} embeddings")
-        return embeddings
-
-    async def ingest_file(self, file_path: str, workflow_id: str | None = None) -> str:
-        """导入单个文件"""
-        logger.info(f"Ingesting file: {file_path}")
-
-        # 加载文档内容
-        content = await self._load_document_from_file(file_path)
-        if not content:
-            raise ValueError(f"Failed to load document: {file_path}")
-
-        # 生成文档ID和哈希
-        doc_id = hashlib.md5(f"{file_path}:{workflow_id}".encode()).hexdigest()
-        content_hash = await self._generate_document_hash(content)
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
 
-        # 检查文档是否已存在
-        existing_doc = await self.repository.find_document_by_id(doc_id)
-        if existing_doc:
-            # 检查内容是否有变化
-            existing_hash = (
-                existing_doc.metadata.get("content_hash") if existing_doc.metadata else None
-            )
-            if existing_hash == content_hash:
-                logger.info(f"Document {file_path} already exists and unchanged")
-                return doc_id
+        async def embed(batch: list[str]) -> list[list[float]]:
+            async with semaphore:
+                return await self.embeddings.aembed_documents(batch)
 
-        # 创建文档实体
-        document = Document.create(
-            title=Path(file_path).name,
-            content=content,
-            source=DocumentSource.FILESYSTEM,
-            file_path=file_path,
-            workflow_id=workflow_id,
-            metadata={
-                "content_hash": content_hash,
-                "file_size": os.path.getsize(file_path),
-                "ingestion_time": datetime.now().isoformat(),
-            },
+        step = self.embed_batch_size
+        batches = await asyncio.gather(
+            *(embed(chunks[i : i + step]) for i in range(0, len(chunks), step))
         )
+        embeddings = [vector for batch in batches for vector in batch]
 
-        # 切分文档
-        chunks = await self._chunk_document(content)
-        if not chunks:
-            raise ValueError(f"Failed to chunk document: {file_path}")
+        logger.info(f"Generated {len(embeddings)} embeddings")
+        return embeddings
 
-        # 生成嵌入
-        embeddings = await self._generate_embeddings(chunks)
+    def _build_chunks(
+        self,
+        document_id: str,
+        chunks: list[str],
+        embeddings: list[list[float]],
+        token_counts: list[int] | None = None,
+    ) -> list[DocumentChunk]:
+        """构建分块实体"""
         if len(embeddings) != len(chunks):
             raise ValueError(f"Embedding count mismatch: {len(embeddings)} != {len(chunks)}")
-
-        # 保存文档和分块
-        await self.repository.save_document(document)
-
-        # 删除旧的分块（如果存在）
-        await self.repository.delete_chunks_by_document_id(document.id)
-
-        # 保存新的分块
-        for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings, strict=False)):
-            chunk = DocumentChunk.create(
-                document_id=document.id,
+        token_counts = token_counts or [self._count_tokens(chunk) for chunk in chunks]
+        return [
+            DocumentChunk.create(
+                document_id=document_id,
                 content=chunk_text,
                 embedding=embedding,
                 chunk_index=i,
-                metadata={
-                    "token_count": self._count_tokens(chunk_text),
-                },
+                metadata={"token_count": token_count},
             )
-            await self.repository.save_document_chunk(chunk)
+            for i, (chunk_text, embedding, token_count) in enumerate(
+                zip(chunks, embeddings, token_counts, strict=True)
+            )
+        ]
 
-        # 更新文档状态
-        document.mark_processed()
-        await self.repository.update_document(document)
+    @staticmethod
+    def _file_document_id(file_path: str, workflow_id: str | None) -> str:
+        """文件文档的确定性ID（同一路径重复导入时覆盖原文档）"""
+        return hashlib.md5(f"{file_path}:{workflow_id}".encode()).hexdigest()
 
-        logger.info(f"Successfully ingested {file_path} with {len(chunks)} chunks")
-        return document.id
+    async def ingest_file(self, file_path: str, workflow_id: str | None = None) -> str:
+        """导入单个文件（走与目录导入相同的增量流水线）"""
+        logger.info(f"Ingesting file: {file_path}")
+        path = os.path.abspath(file_path)
+        report = await self.ingest_paths([path], workflow_id)
+        if report.failed:
+            raise ValueError(f"Failed to ingest document: {file_path}")
+        return self._file_document_id(path, workflow_id)
 
     async def ingest_url(self, url: str, workflow_id: str | None = None) -> str:
         """导入URL文档"""
@@ -300,70 +484,307 @@ class DocumentIngester:
                 "ingestion_time": datetime.now().isoformat(),
             },
         )
+        document.id = doc_id
 
         # 切分文档、生成嵌入并保存
         chunks = await self._chunk_document(content)
         embeddings = await self._generate_embeddings(chunks)
 
-        await self.repository.save_document(document)
         await self.repository.delete_chunks_by_document_id(document.id)
-
-        for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings, strict=False)):
-            chunk = DocumentChunk.create(
-                document_id=document.id,
-                content=chunk_text,
-                embedding=embedding,
-                chunk_index=i,
-                metadata={
-                    "token_count": self._count_tokens(chunk_text),
-                },
-            )
-            await self.repository.save_document_chunk(chunk)
-
         document.mark_processed()
-        await self.repository.update_document(document)
+        await self.repository.save_document(document)
+        await self.repository.save_document_chunks(
+            self._build_chunks(document.id, chunks, embeddings)
+        )
 
         logger.info(f"Successfully ingested URL {url} with {len(chunks)} chunks")
         return document.id
 
-    async def ingest_directory(self, dir_path: str, workflow_id: str | None = None) -> list[str]:
-        """导入整个目录"""
-        logger.info(f"Ingesting directory: {dir_path}")
+    async def ingest_directory(
+        self,
+        dir_path: str,
+        workflow_id: str | None = None,
+        full: bool = False,
+        remove_missing: bool = True,
+    ) -> list[str]:
+        """增量导入整个目录
+
+        参数：
+            dir_path: 目录路径
+            workflow_id: 关联的工作流ID
+            full: 忽略导入清单，重新处理所有文件
+            remove_missing: 删除清单中存在但目录中已不存在的文件对应的文档
 
-        # 支持的文件扩展名
-        supported_extensions = {
-            ".pdf",
-            ".doc",
-            ".docx",
-            ".md",
-            ".markdown",
-            ".html",
-            ".htm",
-            ".txt",
-        }
+        返回：
+            本次新导入或更新的文档ID列表
+        """
+        logger.info(f"Ingesting directory: {dir_path}")
+        root = os.path.abspath(dir_path)
 
         # 扫描目录
         file_paths = []
-        for root, _, files in os.walk(dir_path):
+        for current, _, files in os.walk(root):
             for file in files:
-                file_path = os.path.join(root, file)
-                if Path(file_path).suffix.lower() in supported_extensions:
+                file_path = os.path.join(current, file)
+                if Path(file_path).suffix.lower() in SUPPORTED_EXTENSIONS:
                     file_paths.append(file_path)
 
         logger.info(f"Found {len(file_paths)} supported files")
 
-        # 批量导入
-        doc_ids = []
-        for file_path in file_paths:
+        report = await self.ingest_paths(file_paths, workflow_id, full=full)
+
+        if remove_missing:
+            present = set(file_paths)
+            previous = await asyncio.to_thread(self.manifest.load, workflow_id, root)
+            missing = [entry for path, entry in previous.items() if path not in present]
+            for entry in missing:
+                await self.repository.delete_document(entry.document_id)
+            await asyncio.to_thread(
+                self.manifest.remove, workflow_id, [entry.path for entry in missing]
+            )
+            report.removed = len(missing)
+
+        logger.info(
+            f"Directory {dir_path}: scanned={report.scanned} ingested={report.ingested} "
+            f"unchanged={report.unchanged} touched={report.touched} "
+            f"failed={report.failed} removed={report.removed}"
+        )
+        return report.document_ids
+
+    async def ingest_paths(
+        self,
+        file_paths: list[str],
+        workflow_id: str | None = None,
+        full: bool = False,
+    ) -> IngestReport:
+        """通过流水线导入一组文件（路径应为绝对路径）
+
+        参数：
+            file_paths: 文件路径列表
+            workflow_id: 关联的工作流ID
+            full: 忽略导入清单，重新处理所有文件
+
+        返回：
+            IngestReport 导入统计
+        """
+        report = IngestReport(scanned=len(file_paths))
+        manifest = {} if full else await asyncio.to_thread(self.manifest.load, workflow_id)
+
+        candidates: list[_Candidate] = []
+        for path in file_paths:
             try:
-                doc_id = await self.ingest_file(file_path, workflow_id)
-                doc_ids.append(doc_id)
-            except Exception as e:
-                logger.error(f"Failed to ingest {file_path}: {str(e)}")
+                stat = os.stat(path)
+            except OSError as e:
+                logger.error(f"Failed to stat {path}: {e}")
+                report.failed += 1
+                continue
+            previous = manifest.get(path)
+            if (
+                previous is not None
+                and previous.mtime_ns == stat.st_mtime_ns
+                and previous.size == stat.st_size
+            ):
+                report.unchanged += 1
                 continue
+            candidates.append(_Candidate(path, stat.st_mtime_ns, stat.st_size, previous))
+
+        if not candidates:
+            return report
+
+        path_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parsed_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        chunked_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        embedded_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        touched: list[ManifestEntry] = []
 
-        logger.info(f"Successfully ingested {len(doc_ids)} files from {dir_path}")
-        return doc_ids
+        executor: Executor | None = (
+            ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        )
+        loop = asyncio.get_running_loop()
+
+        async def feed() -> None:
+            for candidate in candidates:
+                await path_queue.put(candidate)
+            await path_queue.put(_DONE)
+
+        async def parse(candidate: _Candidate) -> tuple[_Candidate, ParsedFile] | None:
+            known = candidate.previous.sha256 if candidate.previous else None
+            parsed = await loop.run_in_executor(executor, parse_file, candidate.path, known)
+            if parsed.error:
+                logger.error(f"Failed to load document {candidate.path}: {parsed.error}")
+                report.failed += 1
+                return None
+            if parsed.content is None:
+                # 只有 mtime 变化，内容未变
+                assert candidate.previous is not None
+                touched.append(
+                    candidate.previous._replace(mtime_ns=candidate.mtime_ns, size=candidate.size)
+                )
+                report.touched += 1
+                return None
+            return candidate, parsed
+
+        async def chunk(item: tuple[_Candidate, ParsedFile]) -> _PreparedDocument | None:
+            candidate, parsed = item
+            assert parsed.content is not None
+            chunks, token_counts = await asyncio.to_thread(self._split_and_count, parsed.content)
+            if not chunks:
+                logger.error(f"Failed to chunk document: {candidate.path}")
+                report.failed += 1
+                return None
+            document = Document.create(
+                title=Path(candidate.path).name,
+                content=parsed.content,
+                source=DocumentSource.FILESYSTEM,
+                file_path=candidate.path,
+                workflow_id=workflow_id,
+                metadata={
+                    "content_hash": parsed.sha256,
+                    "file_size": candidate.size,
+                    "ingestion_time": datetime.now().isoformat(),
+                },
+            )
+            document.id = self._file_document_id(candidate.path, workflow_id)
+            return _PreparedDocument(candidate, parsed.sha256, document, chunks, token_counts)
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(feed())
+                tg.create_task(
+                    self._run_stage(path_queue, parsed_queue, parse, self._parse_concurrency)
+                )
+                tg.create_task(
+                    self._run_stage(parsed_queue, chunked_queue, chunk, self.chunk_workers)
+                )
+                tg.create_task(self._embed_stage(chunked_queue, embedded_queue, report))
+                tg.create_task(self._write_stage(embedded_queue, workflow_id, report))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        await asyncio.to_thread(self.manifest.upsert, workflow_id, touched)
+        return report
+
+    @property
+    def _parse_concurrency(self) -> int:
+        return max(1, self.parse_workers)
+
+    @staticmethod
+    async def _run_stage(
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        worker: Callable[[Any], Awaitable[Any]],
+        concurrency: int,
+    ) -> None:
+        """通用阶段：concurrency 个协程从 inbox 取任务，结果放入 outbox"""
+
+        async def run() -> None:
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # 放回结束标记，让同阶段的其他协程也能退出
+                    await inbox.put(_DONE)
+                    return
+                result = await worker(item)
+                if result is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(run() for _ in range(concurrency)))
+        await outbox.put(_DONE)
+
+    async def _embed_stage(
+        self, inbox: asyncio.Queue, outbox: asyncio.Queue, report: IngestReport
+    ) -> None:
+        """嵌入阶段：跨文档累积到 embed_batch_size 个分块后发起一次请求，最多并发 embed_concurrency 个"""
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
+        in_flight: set[asyncio.Task] = set()
+
+        async def embed(batch: list[_PreparedDocument]) -> None:
+            try:
+                texts = [text for prepared in batch for text in prepared.chunks]
+                vectors = await self.embeddings.aembed_documents(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Embedding count mismatch: {len(vectors)} != {len(texts)}")
+                offset = 0
+                for prepared in batch:
+                    prepared.embeddings = vectors[offset : offset + len(prepared.chunks)]
+                    offset += len(prepared.chunks)
+                    await outbox.put(prepared)
+            except Exception as e:  # noqa: BLE001 - 失败的文档下次运行时重试
+                logger.error(f"Failed to embed {len(batch)} documents: {e}")
+                report.failed += len(batch)
+            finally:
+                semaphore.release()
+
+        async def dispatch(batch: list[_PreparedDocument]) -> None:
+            await semaphore.acquire()
+            task = asyncio.create_task(embed(batch))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        pending: list[_PreparedDocument] = []
+        pending_chunks = 0
+        while (item := await inbox.get()) is not _DONE:
+            pending.append(item)
+            pending_chunks += len(item.chunks)
+            if pending_chunks >= self.embed_batch_size:
+                await dispatch(pending)
+                pending, pending_chunks = [], 0
+        if pending:
+            await dispatch(pending)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        await outbox.put(_DONE)
+
+    async def _write_stage(
+        self, inbox: asyncio.Queue, workflow_id: str | None, report: IngestReport
+    ) -> None:
+        """写入阶段：累积 commit_batch_size 个文档后批量提交（文档、分块、清单）"""
+        batch: list[_PreparedDocument] = []
+
+        async def flush() -> None:
+            for prepared in batch:
+                # 文档ID由路径确定，重新导入时先移除旧分块
+                await self.repository.delete_chunks_by_document_id(prepared.document.id)
+                prepared.document.mark_processed()
+            await self.repository.save_documents([prepared.document for prepared in batch])
+            await self.repository.save_document_chunks(
+                [
+                    chunk
+                    for prepared in batch
+                    for chunk in self._build_chunks(
+                        prepared.document.id,
+                        prepared.chunks,
+                        prepared.embeddings,
+                        prepared.token_counts,
+                    )
+                ]
+            )
+            await asyncio.to_thread(
+                self.manifest.upsert,
+                workflow_id,
+                [
+                    ManifestEntry(
+                        path=prepared.candidate.path,
+                        mtime_ns=prepared.candidate.mtime_ns,
+                        size=prepared.candidate.size,
+                        sha256=prepared.sha256,
+                        document_id=prepared.document.id,
+                    )
+                    for prepared in batch
+                ],
+            )
+            report.ingested += len(batch)
+            report.document_ids.extend(prepared.document.id for prepared in batch)
+            logger.info(f"Committed {len(batch)} documents ({report.ingested} so far)")
+            batch.clear()
+
+        while (item := await inbox.get()) is not _DONE:
+            batch.append(item)
+            if len(batch) >= self.commit_batch_size:
+                await flush()
+        if batch:
+            await flush()
 
     async def create_knowledge_base(
         self,
@@ -400,6 +821,25 @@ async def main():
     parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size in tokens")
     parser.add_argument("--chunk-overlap", type=int, default=200, help="Chunk overlap in tokens")
 
+    # 流水线参数
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="Parser processes (default: CPU count; 0 parses in threads)",
+    )
+    parser.add_argument("--chunk-workers", type=int, default=4, help="Chunking threads")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Chunks per request")
+    parser.add_argument("--embed-concurrency", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--commit-batch", type=int, default=100, help="Documents per commit")
+    parser.add_argument("--queue-size", type=int, default=64, help="Inter-stage queue capacity")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest, re-ingest all")
+    parser.add_argument(
+        "--keep-removed",
+        action="store_true",
+        help="Keep documents whose source files were removed",
+    )
+
     args = parser.parse_args()
 
     # 创建导入器
@@ -408,12 +848,23 @@ async def main():
         model_name=args.model,
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
+        parse_workers=args.parse_workers,
+        chunk_workers=args.chunk_workers,
+        embed_batch_size=args.embed_batch_size,
+        embed_concurrency=args.embed_concurrency,
+        commit_batch_size=args.commit_batch,
+        queue_size=args.queue_size,
     )
 
     try:
         # 根据输入类型执行导入
         if args.path:
-            doc_ids = await ingester.ingest_directory(args.path, args.workflow_id)
+            doc_ids = await ingester.ingest_directory(
+                args.path,
+                args.workflow_id,
+                full=args.full,
+                remove_missing=not args.keep_removed,
+            )
             logger.info(f"Ingested {len(doc_ids)} documents from directory")
 
         elif args.file:
@@ -427,6 +878,8 @@ async def main():
     except Exception as e:
         logger.error(f"Ingestion failed: {str(e)}")
         sys.exit(1)
+    finally:
+        await ingester.close()
 
 
 if __name__ == "__main__":
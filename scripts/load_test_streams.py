@@ -0,0 +1,871 @@
+#!/usr/bin/env python
+"""流式接口压测脚本
+
+用并发客户端压测 SSE 接口，统计端到端延迟并按阈值判定是否回归：
+- execute_stream: POST /api/workflows/{id}/execute/stream（先 seed 工作流，每个请求新建 run）
+- chat_create_stream: POST /api/workflows/chat-create/stream
+
+指标（按场景汇总 p50/p95/p99/max）：
+- ttfb_ms: 发出请求到收到首个字节
+- inter_arrival_ms: 相邻两个 SSE 事件的到达间隔
+- duration_ms: 整个流结束的耗时
+- error_rate: HTTP 错误、传输异常、空流或 error/workflow_error 事件的比例
+
+目标：
+- 进程内（默认）：直接驱动 ASGI app（不经过网络），使用临时 SQLite 库；
+  workflow chat 的 LLM 替换为 stub / replay 适配器，可在无网络的机器上运行
+- 本机服务：--base-url http://127.0.0.1:8000（服务端需开启 ENABLE_TEST_SEED_API，
+  且 --project-id 指向已存在的项目）
+
+用法:
+    python -m scripts.load_test_streams --concurrency 8 --requests 200
+    python -m scripts.load_test_streams --scenario chat_create_stream --llm replay \\
+        --replay-file tests/fixtures/llm_recordings.json --replay-normalize
+    python -m scripts.load_test_streams --json-out perf.json --markdown-out perf.md \\
+        --thresholds perf_thresholds.json --baseline perf_baseline.json --max-regression 0.2
+
+阈值文件格式（指标路径 -> 允许的最大值）:
+    {"execute_stream": {"ttfb_ms.p99": 200, "duration_ms.p99": 1000, "error_rate": 0.0}}
+
+存在阈值违规或相对 baseline 的回归时以退出码 1 结束，可直接用于 CI 门禁。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Protocol
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx  # noqa: E402
+
+ERROR_EVENT_TYPES = frozenset({"error", "workflow_error"})
+DEFAULT_REGRESSION_METRICS = (
+    "ttfb_ms.p50",
+    "ttfb_ms.p99",
+    "duration_ms.p50",
+    "duration_ms.p99",
+    "inter_arrival_ms.p99",
+)
+EMPTY_MODIFICATIONS = {
+    "nodes_to_add": [],
+    "nodes_to_update": [],
+    "nodes_to_delete": [],
+    "edges_to_add": [],
+    "edges_to_delete": [],
+}
+
+
+# ==================== 传输层 ====================
+
+
+class StreamTransport(Protocol):
+    """压测客户端传输层（进程内 ASGI / 本机 HTTP）"""
+
+    async def request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, Any]:
+        """发送普通请求（用于 seed / 创建 run 等准备步骤）"""
+        ...
+
+    def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> Any:
+        """发送流式请求，返回 async context manager，产出 (status, 字节块迭代器)"""
+        ...
+
+    async def aclose(self) -> None: ...
+
+
+class ASGIStreamTransport:
+    """直接驱动 ASGI app 的传输层
+
+    httpx.ASGITransport 会等应用写完整个响应体才返回，测不出首字节时间；
+    这里自己实现 ASGI 调用，body 消息一到就交给调用方。
+    """
+
+    def __init__(self, app: Any, host: str = "loadtest") -> None:
+        self._app = app
+        self._host = host
+        self._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url=f"http://{host}"
+        )
+
+    async def request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, Any]:
+        response = await self._client.request(method, path, json=json_body, headers=headers)
+        return response.status_code, _safe_json(response.content)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> AsyncIterator[tuple[int, AsyncIterator[bytes]]]:
+        body = json.dumps(json_body if json_body is not None else {}).encode("utf-8")
+        raw_headers = [
+            (b"host", self._host.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ] + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 0),
+            "server": (self._host, 80),
+        }
+
+        messages: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            await messages.put(message)
+
+        async def run_app() -> None:
+            try:
+                await self._app(scope, receive, send)
+            finally:
+                await messages.put(None)
+
+        task = asyncio.create_task(run_app())
+        try:
+            start = await messages.get()
+            if start is None:
+                await task  # 应用在返回响应前抛出异常
+                raise RuntimeError("ASGI app finished without sending a response")
+
+            async def body_chunks() -> AsyncIterator[bytes]:
+                while True:
+                    message = await messages.get()
+                    if message is None:
+                        return
+                    if message["type"] != "http.response.body":
+                        continue
+                    chunk = message.get("body", b"")
+                    if chunk:
+                        yield chunk
+                    if not message.get("more_body", False):
+                        return
+
+            yield start["status"], body_chunks()
+        finally:
+            disconnected.set()
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class HTTPStreamTransport:
+    """通过本机 HTTP 连接压测已启动的服务"""
+
+    def __init__(self, base_url: str, *, concurrency: int, timeout_s: float) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout_s),
+            limits=httpx.Limits(max_connections=concurrency * 2),
+        )
+
+    async def request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, Any]:
+        response = await self._client.request(method, path, json=json_body, headers=headers)
+        return response.status_code, _safe_json(response.content)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> AsyncIterator[tuple[int, AsyncIterator[bytes]]]:
+        async with self._client.stream(method, path, json=json_body, headers=headers) as response:
+            yield response.status_code, response.aiter_raw()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def _safe_json(content: bytes) -> Any:
+    try:
+        return json.loads(content)
+    except (ValueError, UnicodeDecodeError):
+        return content.decode("utf-8", errors="replace")
+
+
+# ==================== SSE 解析 ====================
+
+
+class SSEEventSplitter:
+    """把字节流切分为完整的 SSE 事件（以空行结尾）"""
+
+    def __init__(self) -> None:
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> list[str]:
+        """追加字节块，返回本次凑齐的事件文本"""
+        self._buffer += chunk.replace(b"\r\n", b"\n")
+        *events, self._buffer = self._buffer.split(b"\n\n")
+        return [event.decode("utf-8", errors="replace") for event in events if event.strip()]
+
+
+def sse_error_message(event: str) -> str | None:
+    """事件为 error / workflow_error 时返回错误描述"""
+    data = "\n".join(
+        line[len("data:") :].strip() for line in event.splitlines() if line.startswith("data:")
+    )
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None
+    if isinstance(payload, dict) and payload.get("type") in ERROR_EVENT_TYPES:
+        detail = payload.get("error") or payload.get("content") or payload.get("type")
+        return str(detail)[:200]
+    return None
+
+
+# ==================== 场景 ====================
+
+
+@dataclass(frozen=True)
+class StreamRequest:
+    """一次流式请求"""
+
+    method: str
+    path: str
+    json_body: Any = None
+    headers: dict[str, str] | None = None
+
+
+class Scenario(Protocol):
+    """压测场景：setup 只执行一次；prepare 为每个请求生成参数（耗时不计入指标）"""
+
+    name: str
+
+    async def setup(self, transport: StreamTransport) -> None: ...
+
+    async def prepare(self, transport: StreamTransport, index: int) -> StreamRequest: ...
+
+
+class ExecuteStreamScenario:
+    """POST /api/workflows/{id}/execute/stream：seed 若干工作流，每个请求新建一个 run"""
+
+    name = "execute_stream"
+
+    def __init__(
+        self,
+        *,
+        project_id: str = "e2e_test_project",
+        fixture_type: str = "main_subgraph_only",
+        workflows: int = 4,
+        initial_input: Any = None,
+    ) -> None:
+        self.project_id = project_id
+        self.fixture_type = fixture_type
+        self.workflows = workflows
+        self.initial_input = initial_input if initial_input is not None else {"load_test": True}
+        self.workflow_ids: list[str] = []
+
+    async def setup(self, transport: StreamTransport) -> None:
+        for _ in range(self.workflows):
+            status, body = await transport.request_json(
+                "POST",
+                "/api/test/workflows/seed",
+                json_body={"fixture_type": self.fixture_type, "project_id": self.project_id},
+                headers={"X-Test-Mode": "true"},
+            )
+            if status != 201:
+                raise RuntimeError(f"seed workflow failed ({status}): {body}")
+            self.workflow_ids.append(body["workflow_id"])
+
+    async def prepare(self, transport: StreamTransport, index: int) -> StreamRequest:
+        workflow_id = self.workflow_ids[index % len(self.workflow_ids)]
+        status, body = await transport.request_json(
+            "POST", f"/api/projects/{self.project_id}/workflows/{workflow_id}/runs", json_body={}
+        )
+        if status not in (200, 201):
+            raise RuntimeError(f"create run failed ({status}): {body}")
+        return StreamRequest(
+            "POST",
+            f"/api/workflows/{workflow_id}/execute/stream",
+            {"run_id": body["id"], "initial_input": self.initial_input},
+        )
+
+
+class ChatCreateStreamScenario:
+    """POST /api/workflows/chat-create/stream：轮流发送给定的用户消息"""
+
+    name = "chat_create_stream"
+
+    def __init__(
+        self, messages: Sequence[str] = ("创建一个获取天气并发送邮件通知的工作流",)
+    ) -> None:
+        self.messages = list(messages)
+
+    async def setup(self, transport: StreamTransport) -> None:
+        return None
+
+    async def prepare(self, transport: StreamTransport, index: int) -> StreamRequest:
+        return StreamRequest(
+            "POST",
+            "/api/workflows/chat-create/stream",
+            {"message": self.messages[index % len(self.messages)]},
+        )
+
+
+# ==================== 执行与统计 ====================
+
+
+@dataclass
+class StreamSample:
+    """单次流式请求的测量结果"""
+
+    ok: bool
+    status: int | None = None
+    ttfb_ms: float | None = None
+    duration_ms: float = 0.0
+    inter_arrival_ms: list[float] = field(default_factory=list)
+    events: int = 0
+    error: str | None = None
+
+
+async def measure_stream(
+    transport: StreamTransport,
+    request: StreamRequest,
+    *,
+    clock: Callable[[], float] = time.perf_counter,
+) -> StreamSample:
+    """发送一次流式请求并测量 TTFB / 事件间隔 / 总耗时"""
+    started = clock()
+    sample = StreamSample(ok=False)
+    splitter = SSEEventSplitter()
+    last_event_at: float | None = None
+    try:
+        async with transport.stream(
+            request.method, request.path, json_body=request.json_body, headers=request.headers
+        ) as (status, chunks):
+            sample.status = status
+            async for chunk in chunks:
+                now = clock()
+                if sample.ttfb_ms is None:
+                    sample.ttfb_ms = (now - started) * 1000
+                for event in splitter.feed(chunk):
+                    if last_event_at is not None:
+                        sample.inter_arrival_ms.append((now - last_event_at) * 1000)
+                    last_event_at = now
+                    sample.events += 1
+                    if sample.error is None:
+                        sample.error = sse_error_message(event)
+    except Exception as exc:  # noqa: BLE001 - 压测中任何异常都计为失败样本
+        sample.error = f"{type(exc).__name__}: {exc}"
+
+    sample.duration_ms = (clock() - started) * 1000
+    if sample.error is None:
+        if sample.status is not None and sample.status >= 400:
+            sample.error = f"HTTP {sample.status}"
+        elif sample.events == 0:
+            sample.error = "empty stream"
+    sample.ok = sample.error is None
+    return sample
+
+
+async def run_scenario(
+    transport: StreamTransport,
+    scenario: Scenario,
+    *,
+    concurrency: int,
+    requests: int,
+    warmup: int = 0,
+    timeout_s: float = 60.0,
+) -> dict[str, Any]:
+    """以固定并发执行 warmup + requests 次请求，返回场景汇总"""
+    await scenario.setup(transport)
+
+    async def drive(total: int, offset: int) -> tuple[list[StreamSample], float]:
+        samples: list[StreamSample] = []
+        next_index = 0
+
+        async def worker() -> None:
+            nonlocal next_index
+            while next_index < total:
+                index = offset + next_index
+                next_index += 1
+                try:
+                    request = await scenario.prepare(transport, index)
+                except Exception as exc:  # noqa: BLE001
+                    samples.append(StreamSample(ok=False, error=f"prepare failed: {exc}"))
+                    continue
+                try:
+                    samples.append(
+                        await asyncio.wait_for(measure_stream(transport, request), timeout_s)
+                    )
+                except TimeoutError:
+                    samples.append(
+                        StreamSample(ok=False, duration_ms=timeout_s * 1000, error="timeout")
+                    )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        return samples, time.perf_counter() - started
+
+    if warmup:
+        await drive(warmup, 0)
+    samples, elapsed_s = await drive(requests, warmup)
+    return summarize_samples(samples, elapsed_s=elapsed_s, concurrency=concurrency)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """线性插值百分位（pct 取 0-100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _distribution(values: Sequence[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def summarize_samples(
+    samples: Sequence[StreamSample], *, elapsed_s: float, concurrency: int
+) -> dict[str, Any]:
+    """汇总样本为场景指标（延迟只统计成功的请求）"""
+    succeeded = [s for s in samples if s.ok]
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if not sample.ok:
+            key = (sample.error or "unknown")[:120]
+            errors[key] = errors.get(key, 0) + 1
+
+    return {
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "errors": len(samples) - len(succeeded),
+        "error_rate": round((len(samples) - len(succeeded)) / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed_s, 3) if elapsed_s > 0 else 0.0,
+        "ttfb_ms": _distribution([s.ttfb_ms for s in succeeded if s.ttfb_ms is not None]),
+        "duration_ms": _distribution([s.duration_ms for s in succeeded]),
+        "inter_arrival_ms": _distribution([gap for s in succeeded for gap in s.inter_arrival_ms]),
+        "events_per_stream": (
+            round(sum(s.events for s in succeeded) / len(succeeded), 2) if succeeded else 0.0
+        ),
+        "error_samples": errors,
+    }
+
+
+# ==================== 报告与门禁 ====================
+
+
+def _metric(summary: dict[str, Any], path: str) -> float | None:
+    value: Any = summary
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return float(value) if isinstance(value, int | float) else None
+
+
+def check_thresholds(
+    scenarios: dict[str, dict[str, Any]], thresholds: dict[str, dict[str, float]]
+) -> list[str]:
+    """检查绝对阈值（指标路径 -> 允许的最大值），返回违规描述"""
+    violations = []
+    for name, limits in thresholds.items():
+        summary = scenarios.get(name)
+        if summary is None:
+            continue
+        for path, limit in limits.items():
+            value = _metric(summary, path)
+            if value is None:
+                violations.append(f"{name}: unknown metric '{path}'")
+            elif value > limit:
+                violations.append(f"{name}: {path}={value:g} exceeds threshold {limit:g}")
+    return violations
+
+
+def check_regressions(
+    scenarios: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    *,
+    max_regression: float = 0.2,
+    min_delta_ms: float = 5.0,
+    metrics: Sequence[str] = DEFAULT_REGRESSION_METRICS,
+) -> list[str]:
+    """与 baseline 报告比较，延迟超过 (1 + max_regression) 倍且差值大于 min_delta_ms 视为回归
+
+    错误率任何上升都视为回归。
+    """
+    violations = []
+    for name, summary in scenarios.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for path in metrics:
+            current, before = _metric(summary, path), _metric(previous, path)
+            if current is None or before is None:
+                continue
+            if current > before * (1 + max_regression) and current - before > min_delta_ms:
+                violations.append(
+                    f"{name}: {path} regressed {before:g} -> {current:g} "
+                    f"(+{(current - before) / before if before else float('inf'):.0%})"
+                )
+        current_rate, before_rate = _metric(summary, "error_rate"), _metric(previous, "error_rate")
+        if current_rate is not None and before_rate is not None and current_rate > before_rate:
+            violations.append(f"{name}: error_rate regressed {before_rate:g} -> {current_rate:g}")
+    return violations
+
+
+def build_report(
+    scenarios: dict[str, dict[str, Any]],
+    *,
+    config: dict[str, Any],
+    violations: Sequence[str] = (),
+) -> dict[str, Any]:
+    """组装 JSON 报告"""
+    return {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "config": config,
+        "scenarios": scenarios,
+        "violations": list(violations),
+        "passed": not violations,
+    }
+
+
+def render_markdown(report: dict[str, Any]) -> str:
+    """把 JSON 报告渲染为 Markdown 表格"""
+    config = report.get("config", {})
+    lines = [
+        "# Streaming Load Test Report",
+        "",
+        f"- generated_at: {report.get('generated_at', '')}",
+        f"- target: {config.get('target', '')}",
+        f"- llm: {config.get('llm', '')}",
+        "",
+        "| scenario | requests | conc | err% | rps | ttfb p50/p99 (ms) "
+        "| duration p50/p99 (ms) | inter-arrival p50/p99 (ms) | events |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for name, s in report.get("scenarios", {}).items():
+        lines.append(
+            f"| {name} | {s['requests']} | {s['concurrency']} | {s['error_rate'] * 100:.2f} "
+            f"| {s['throughput_rps']:.1f} "
+            f"| {s['ttfb_ms']['p50']:.1f} / {s['ttfb_ms']['p99']:.1f} "
+            f"| {s['duration_ms']['p50']:.1f} / {s['duration_ms']['p99']:.1f} "
+            f"| {s['inter_arrival_ms']['p50']:.1f} / {s['inter_arrival_ms']['p99']:.1f} "
+            f"| {s['events_per_stream']:.1f} |"
+        )
+
+    errors = [
+        (name, error, count)
+        for name, s in report.get("scenarios", {}).items()
+        for error, count in s.get("error_samples", {}).items()
+    ]
+    if errors:
+        lines += ["", "## Errors", ""]
+        lines += [f"- {name}: {error} (x{count})" for name, error, count in errors]
+
+    lines += ["", "## Gate", ""]
+    violations = report.get("violations", [])
+    if violations:
+        lines += [f"- FAIL: {violation}" for violation in violations]
+    else:
+        lines.append("- PASS")
+    return "\n".join(lines) + "\n"
+
+
+# ==================== 进程内目标 ====================
+
+
+class PortBackedWorkflowChatLLM:
+    """用 LLMPort（stub / replay）实现 WorkflowChatLLM，供进程内压测替换真实模型"""
+
+    def __init__(self, llm: Any) -> None:
+        self._llm = llm
+
+    @staticmethod
+    def _parse(text: str) -> dict[str, Any]:
+        parsed = _safe_json(text.encode("utf-8"))
+        result = dict(parsed) if isinstance(parsed, dict) else {}
+        for key, value in EMPTY_MODIFICATIONS.items():
+            result.setdefault(key, list(value))
+        return result
+
+    def generate_modifications(self, system_prompt: str, user_prompt: str) -> dict:
+        # 线上同步路径会阻塞调用线程；在独立线程的事件循环里执行以保持同样的阻塞语义
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(
+                asyncio.run, self.generate_modifications_async(system_prompt, user_prompt)
+            ).result()
+
+    async def generate_modifications_async(self, system_prompt: str, user_prompt: str) -> dict:
+        text = await self._llm.generate(f"{system_prompt}\n\n{user_prompt}", temperature=0.0)
+        return self._parse(text)
+
+
+def configure_inprocess_environment(
+    *,
+    llm: str,
+    database_url: str,
+    replay_file: str = "",
+    replay_time_scale: float = 1.0,
+    replay_normalize: bool = False,
+) -> None:
+    """设置进程内目标的环境变量（必须在导入 src.config 之前调用）"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ENABLE_TEST_SEED_API"] = "true"
+    os.environ["DISABLE_RUN_PERSISTENCE"] = "false"
+    os.environ["LLM_ADAPTER"] = llm
+    os.environ["E2E_TEST_MODE"] = "hybrid" if llm == "replay" else "deterministic"
+    if llm == "replay":
+        os.environ["LLM_REPLAY_FILE"] = replay_file
+        os.environ["LLM_REPLAY_TIME_SCALE"] = str(replay_time_scale)
+        os.environ["LLM_REPLAY_NORMALIZE"] = "true" if replay_normalize else "false"
+
+
+def build_inprocess_app(*, project_id: str, replay_default_response: str | None = None) -> Any:
+    """导入 ASGI app，替换 workflow chat LLM，并确保压测项目存在"""
+    from src.infrastructure.adapters.llm_stub_adapter import LLMStubAdapter
+    from src.infrastructure.database.engine import SessionLocal
+    from src.infrastructure.database.models import ProjectModel
+    from src.interfaces.api.container import AdapterFactory
+    from src.interfaces.api.main import app
+    from src.interfaces.api.routes import workflows as workflows_routes
+
+    llm = AdapterFactory.create_llm_adapter()
+    if isinstance(llm, LLMStubAdapter):
+        llm.default_response = json.dumps(EMPTY_MODIFICATIONS)
+    elif replay_default_response is not None:
+        llm.default_response = replay_default_response
+    chat_llm = PortBackedWorkflowChatLLM(llm)
+    app.dependency_overrides[workflows_routes.get_workflow_chat_llm] = lambda: chat_llm
+
+    async def ensure_project() -> None:
+        # runs.project_id 外键指向 projects；seed API 不创建项目
+        with SessionLocal() as db:
+            if db.get(ProjectModel, project_id) is None:
+                db.add(ProjectModel(id=project_id, name="load test project"))
+                db.commit()
+
+    app.state.load_test_ensure_project = ensure_project
+    return app
+
+
+# ==================== CLI ====================
+
+
+SCENARIOS = ("execute_stream", "chat_create_stream")
+
+
+def _build_scenarios(args: argparse.Namespace) -> list[Scenario]:
+    scenarios: list[Scenario] = []
+    for name in args.scenario or SCENARIOS:
+        if name == "execute_stream":
+            scenarios.append(
+                ExecuteStreamScenario(project_id=args.project_id, workflows=args.workflows)
+            )
+        else:
+            scenarios.append(
+                ChatCreateStreamScenario(args.message)
+                if args.message
+                else ChatCreateStreamScenario()
+            )
+    return scenarios
+
+
+async def run_load_test(args: argparse.Namespace) -> dict[str, Any]:
+    """按命令行参数执行全部场景并生成报告"""
+    if args.base_url:
+        transport: StreamTransport = HTTPStreamTransport(
+            args.base_url, concurrency=args.concurrency, timeout_s=args.timeout
+        )
+        lifespan = None
+    else:
+        app = build_inprocess_app(
+            project_id=args.project_id, replay_default_response=args.replay_default_response
+        )
+        transport = ASGIStreamTransport(app)
+        lifespan = app.router.lifespan_context(app)
+
+    results: dict[str, dict[str, Any]] = {}
+    try:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+            await app.state.load_test_ensure_project()
+        for scenario in _build_scenarios(args):
+            print(
+                f"[LOAD] {scenario.name}: {args.requests} requests @ concurrency {args.concurrency}"
+            )
+            results[scenario.name] = await run_scenario(
+                transport,
+                scenario,
+                concurrency=args.concurrency,
+                requests=args.requests,
+                warmup=args.warmup,
+                timeout_s=args.timeout,
+            )
+    finally:
+        await transport.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+    violations = check_thresholds(
+        results, {name: {"error_rate": args.max_error_rate} for name in results}
+    )
+    if args.thresholds:
+        violations += check_thresholds(results, json.loads(Path(args.thresholds).read_text()))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        violations += check_regressions(
+            results, baseline.get("scenarios", baseline), max_regression=args.max_regression
+        )
+
+    return build_report(
+        results,
+        config={
+            "target": args.base_url or "in-process",
+            "llm": args.llm if not args.base_url else "server",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        violations=violations,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="流式接口压测（TTFB / 事件间隔 / 总耗时 / 错误率）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="压测场景（可重复）")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发客户端数 (默认: 8)")
+    parser.add_argument("--requests", type=int, default=100, help="每个场景的请求数 (默认: 100)")
+    parser.add_argument("--warmup", type=int, default=5, help="预热请求数，不计入统计 (默认: 5)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个流的超时秒数")
+    parser.add_argument("--base-url", help="压测已启动的服务（默认进程内驱动 ASGI app）")
+    parser.add_argument("--project-id", default="e2e_test_project", help="seed 工作流所属项目")
+    parser.add_argument("--workflows", type=int, default=4, help="execute_stream seed 的工作流数")
+    parser.add_argument(
+        "--message", action="append", help="chat_create_stream 的用户消息（可重复）"
+    )
+    parser.add_argument(
+        "--llm", choices=("stub", "replay"), default="stub", help="进程内 LLM 适配器"
+    )
+    parser.add_argument("--replay-file", default="", help="replay 录制文件")
+    parser.add_argument("--replay-time-scale", type=float, default=1.0, help="录制耗时回放倍率")
+    parser.add_argument("--replay-normalize", action="store_true", help="按归一化 prompt 匹配录制")
+    parser.add_argument("--replay-default-response", help="未命中录制时的响应（默认报错）")
+    parser.add_argument("--database-url", help="进程内目标的数据库（默认临时 SQLite）")
+    parser.add_argument("--json-out", help="JSON 报告输出路径")
+    parser.add_argument("--markdown-out", help="Markdown 报告输出路径")
+    parser.add_argument(
+        "--max-error-rate", type=float, default=0.01, help="各场景允许的错误率 (默认: 0.01)"
+    )
+    parser.add_argument("--thresholds", help="阈值文件（JSON）")
+    parser.add_argument("--baseline", help="baseline JSON 报告，用于回归比较")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.2, help="允许的相对回归 (默认: 0.2)"
+    )
+
+    args = parser.parse_args()
+    if args.llm == "replay" and not args.replay_file:
+        parser.error("--replay-file is required when --llm replay")
+
+    for name in ("json_out", "markdown_out", "thresholds", "baseline", "replay_file"):
+        if getattr(args, name):
+            setattr(args, name, str(Path(getattr(args, name)).resolve()))
+
+    with tempfile.TemporaryDirectory(prefix="feagent_load_") as tmp_dir:
+        if not args.base_url:
+            # app 启动时按相对路径加载 definitions/ 等目录
+            os.chdir(project_root)
+            configure_inprocess_environment(
+                llm=args.llm,
+                database_url=args.database_url
+                or f"sqlite+aiosqlite:///{Path(tmp_dir) / 'load_test.db'}",
+                replay_file=args.replay_file,
+                replay_time_scale=args.replay_time_scale,
+                replay_normalize=args.replay_normalize,
+            )
+        report = asyncio.run(run_load_test(args))
+
+    markdown = render_markdown(report)
+    if args.json_out:
+        Path(args.json_out).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    if args.markdown_out:
+        Path(args.markdown_out).write_text(markdown, encoding="utf-8")
+    print(markdown)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
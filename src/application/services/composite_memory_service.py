@@ -13,9 +13,13 @@ from dataclasses import dataclass, field
 from datetime import datetime
 
 from src.domain.entities.chat_message import ChatMessage
+from src.domain.ports.memory_cache import MemoryCache
 from src.infrastructure.memory.database_memory_store import DatabaseMemoryStore
-from src.infrastructure.memory.in_memory_cache import InMemoryCache
 from src.infrastructure.memory.tfidf_compressor import TFIDFCompressor
+from src.infrastructure.memory.write_behind_journal import (
+    JournalFlushError,
+    WriteBehindJournal,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,10 @@ class MemoryMetrics:
         fallback_count: 回溯到数据库的次数
         compression_ratio: 平均压缩比（压缩后/压缩前）
         avg_fallback_time_ms: 平均回溯耗时（毫秒）
+        cache_hits: 缓存命中次数
+        cache_misses: 缓存未命中次数
+        cache_evictions: 因数量/字节预算被淘汰的缓存条目数
+        cache_bytes: 缓存当前估算内存占用（字节）
         last_updated: 最后更新时间
     """
 
@@ -37,6 +45,10 @@ class MemoryMetrics:
     fallback_count: int
     compression_ratio: float
     avg_fallback_time_ms: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_evictions: int = 0
+    cache_bytes: int = 0
     last_updated: datetime = field(default_factory=datetime.utcnow)
 
 
@@ -48,12 +60,15 @@ class CompositeMemoryService:
     1. 原子双写：DB → Cache（DB 失败则回滚，Cache 失败标记失效）
     2. 智能读取：Cache 命中直接返回，未命中回溯到 DB + 压缩 + 更新缓存
     3. 性能监控：追踪命中率、回溯次数、压缩比
+    4. 写后模式（可选）：传入 journal 时 append 只写本地日志 + 缓存，
+       由后台批量刷库；读取时合并尚未落库的消息，保证读到自己的写入
 
     Architecture:
         CompositeMemoryService (Application Layer)
             ├─ DatabaseMemoryStore (Infrastructure)
-            ├─ InMemoryCache (Infrastructure)
-            └─ TFIDFCompressor (Infrastructure)
+            ├─ MemoryCache (InMemoryCache / SQLiteSharedMemoryCache)
+            ├─ TFIDFCompressor (Infrastructure)
+            └─ WriteBehindJournal (Infrastructure, 可选)
 
     Example:
         >>> service = CompositeMemoryService(db_store, cache, compressor)
@@ -66,23 +81,26 @@ class CompositeMemoryService:
     def __init__(
         self,
         db_store: DatabaseMemoryStore,
-        cache: InMemoryCache,
+        cache: MemoryCache,
         compressor: TFIDFCompressor,
         max_context_tokens: int = 4000,
+        journal: WriteBehindJournal | None = None,
     ):
         """
         初始化组合式内存服务
 
         Args:
             db_store: 数据库存储适配器
-            cache: 缓存层
+            cache: 缓存层（InMemoryCache 或跨进程共享的 SQLiteSharedMemoryCache）
             compressor: 压缩算法
             max_context_tokens: 最大上下文 token 数（默认 4000）
+            journal: 写后日志（None 时同步写数据库）
         """
         self._db = db_store
         self._cache = cache
         self._compressor = compressor
         self._max_tokens = max_context_tokens
+        self._journal = journal
 
         # 监控指标
         self._fallback_times = []
@@ -93,40 +111,38 @@ class CompositeMemoryService:
         追加消息（原子双写：DB → Cache）
 
         流程：
-        1. 写入数据库（失败则抛异常）
-        2. 更新缓存（失败不影响主流程，但标记失效）
+        1. 写入数据库（写后模式下改为写本地日志，由后台批量刷库；失败则抛异常）
+        2. 追加到缓存（失败不影响主流程，但标记失效）
+        3. 更新压缩器的增量 TF-IDF 统计
 
         Args:
             message: 要追加的聊天消息
 
         Raises:
-            Exception: 数据库写入失败时
+            Exception: 数据库（或写后日志）写入失败时
         """
-        # 1. 写入数据库（失败则抛异常）
+        # 1. 写入数据库 / 写后日志（失败则抛异常）
         try:
-            self._db.append(message)
+            if self._journal is not None:
+                self._journal.append(message)
+            else:
+                self._db.append(message)
         except Exception as e:
-            logger.error(f"Database write failed for message {message.id}: {e}")
+            logger.error(f"Durable write failed for message {message.id}: {e}")
             raise
 
-        # 2. 更新缓存（失败不影响主流程）
+        # 2. 追加到缓存（O(1)；无缓存条目时不创建，下次读取回溯数据库）
         try:
-            # 读取当前缓存
-            cached = self._cache.get(message.workflow_id)
-            if cached is None:
-                cached = []
-
-            # 追加新消息
-            cached.append(message)
-
-            # 更新缓存
-            self._cache.put(message.workflow_id, cached)
-            logger.debug(f"Message {message.id} cached successfully")
+            if self._cache.append(message.workflow_id, message):
+                logger.debug(f"Message {message.id} cached successfully")
         except Exception as e:
             logger.warning(f"Cache write failed for workflow {message.workflow_id}: {e}")
             # 标记缓存失效，触发下次回溯
             self._cache.invalidate(message.workflow_id)
 
+        # 3. 增量更新压缩统计（下次回溯压缩时无需重新分词）
+        self._compressor.observe(message)
+
     def load_recent(self, workflow_id: str, last_n: int = 10) -> list[ChatMessage]:
         """
         加载最近消息（缓存优先 + 自动回溯）
@@ -154,8 +170,14 @@ class CompositeMemoryService:
 
         start_time = datetime.utcnow()
 
-        # 3. 从数据库加载（多取一些用于压缩）
+        # 3. 从数据库加载（多取一些用于压缩），并合并尚未落库的消息
+        # 先取待写快照再查库：两者之间刷库的消息会同时出现在两边，按 id 去重即可
+        pending = self._journal.pending(workflow_id) if self._journal is not None else []
         messages = self._db.load_recent(workflow_id, last_n=100)
+        if pending:
+            merged = {msg.id: msg for msg in messages}
+            merged.update((msg.id, msg) for msg in pending)
+            messages = sorted(merged.values(), key=lambda msg: msg.timestamp)[-100:]
 
         if not messages:
             return []
@@ -196,19 +218,31 @@ class CompositeMemoryService:
 
         Returns:
             (message, relevance_score) 元组列表，按相关度降序
+
+        Raises:
+            JournalFlushError: 写后模式下待写消息刷库失败时（避免返回缺失最新消息的结果）
         """
-        # 搜索操作直接查询 DB，因为需要全量数据
+        # 搜索操作直接查询 DB，因为需要全量数据（写后模式下先把待写消息刷库）
+        if self._journal is not None and self._journal.pending(workflow_id):
+            if not self._journal.flush():
+                raise JournalFlushError(f"Pending messages of workflow {workflow_id} not flushed")
         return self._db.search(query, workflow_id, threshold)
 
     def clear(self, workflow_id: str) -> None:
         """
         清空记忆（DB + Cache）
 
+        写后模式下先丢弃该 workflow 的待写消息（不依赖刷库成功），
+        避免清空后待写消息落库或在崩溃恢复时被重放。
+
         Args:
             workflow_id: 工作流 ID
         """
+        if self._journal is not None:
+            self._journal.discard(workflow_id)
         self._db.clear(workflow_id)
         self._cache.invalidate(workflow_id)
+        self._compressor.forget(workflow_id)
         logger.info(f"Cleared memory for workflow {workflow_id}")
 
     def get_metrics(self) -> MemoryMetrics:
@@ -221,6 +255,7 @@ class CompositeMemoryService:
             - fallback_count: 回溯次数
             - compression_ratio: 平均压缩比
             - avg_fallback_time_ms: 平均回溯耗时
+            - cache_hits / cache_misses / cache_evictions / cache_bytes: 缓存统计
         """
         cache_stats = self._cache.get_stats()
 
@@ -239,4 +274,8 @@ class CompositeMemoryService:
             fallback_count=len(self._fallback_times),
             compression_ratio=avg_compression_ratio,
             avg_fallback_time_ms=avg_fallback_time,
+            cache_hits=cache_stats.get("hits", 0),
+            cache_misses=cache_stats.get("misses", 0),
+            cache_evictions=cache_stats.get("evictions", 0),
+            cache_bytes=cache_stats.get("bytes", 0),
         )
@@ -6,6 +6,7 @@ from src.domain.agents.conversation_agent import ConversationAgent
 from src.domain.agents.conversation_agent_config import (
     ConversationAgentConfig,
     LLMConfig,
+    ReActConfig,
     StreamingConfig,
     WorkflowConfig,
 )
@@ -33,6 +34,7 @@ def create_conversation_agent(
     config = ConversationAgentConfig(
         session_context=session_context,
         llm=LLMConfig(llm=llm, model="fallback"),
+        react=ReActConfig(fused_step=True, enable_parallel_actions=True),
         workflow=WorkflowConfig(coordinator=coordinator),
         streaming=StreamingConfig(enable_save_request_channel=True),
         event_bus=event_bus,
@@ -56,6 +56,14 @@ class FallbackConversationAgentLLM:
     async def should_continue(self, context: dict[str, Any]) -> bool:
         return False
 
+    async def react_step(self, context: dict[str, Any]) -> dict[str, Any]:
+        """Fused ReAct step: same outputs as think/decide_action/should_continue in one call."""
+        return {
+            "thought": await self.think(context),
+            "action": await self.decide_action(context),
+            "should_continue": await self.should_continue(context),
+        }
+
     async def decompose_goal(self, goal: str) -> list[dict[str, Any]]:
         goal = goal.strip()
         if not goal:
@@ -7,7 +7,7 @@
 """
 
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
 from src.domain.knowledge_base.entities.document import Document
 from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
@@ -15,6 +15,7 @@ from src.domain.knowledge_base.ports.knowledge_repository import KnowledgeReposi
 from src.domain.knowledge_base.ports.retriever_service import RetrieverService
 from src.domain.value_objects.document_source import DocumentSource
 from src.domain.value_objects.query_context import QueryContext
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
 
 logger = logging.getLogger(__name__)
 
@@ -52,15 +53,21 @@ class RAGService:
         self,
         knowledge_repository: KnowledgeRepository,
         retriever_service: RetrieverService,
+        ingest_batch_size: int = 64,
+        retrieval_cache: RetrievalCache | None = None,
     ):
         """初始化RAG服务
 
         参数：
             knowledge_repository: 知识库仓储
             retriever_service: 检索服务
+            ingest_batch_size: 导入文档时每批写入的分块数
+            retrieval_cache: 可选的检索结果缓存（导入/删除文档时按工作流失效）
         """
         self.repository = knowledge_repository
         self.retriever = retriever_service
+        self.ingest_batch_size = max(1, ingest_batch_size)
+        self.retrieval_cache = retrieval_cache
 
     async def retrieve_context(self, query_context: QueryContext) -> RetrievedContext:
         """检索查询上下文
@@ -71,6 +78,26 @@ class RAGService:
         返回：
             检索到的上下文
         """
+        cache = self.retrieval_cache
+        cache_key: tuple = ()
+        if cache is not None:
+            cache_key = cache.make_key(
+                "rag_context",
+                query_context.workflow_id,
+                query_context.query,
+                query_context.top_k,
+                query_context.filters,
+                query_context.max_context_length,
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                # 返回副本，避免调用方修改缓存中的列表
+                return replace(
+                    cached,
+                    chunks=list(cached.chunks),
+                    sources=[dict(source) for source in cached.sources],
+                )
+
         logger.info(f"Retrieving context for query: {query_context.query[:50]}...")
 
         # 检索相关文档块
@@ -103,20 +130,32 @@ class RAGService:
                         "title": doc.title,
                         "source": doc.source.value,
                         "relevance_score": score,
-                        "chunk_preview": chunk.content[:100] + "..."
-                        if len(chunk.content) > 100
-                        else chunk.content,
+                        "chunk_preview": (
+                            chunk.content[:100] + "..."
+                            if len(chunk.content) > 100
+                            else chunk.content
+                        ),
                     }
                 )
 
         logger.info(f"Retrieved {len(chunks_with_scores)} chunks, {total_tokens} tokens")
 
-        return RetrievedContext(
+        context = RetrievedContext(
             chunks=chunks_with_scores,
             formatted_context=formatted_context,
             total_tokens=total_tokens,
             sources=sources,
         )
+        if cache is not None:
+            cache.put(
+                cache_key,
+                replace(
+                    context,
+                    chunks=list(chunks_with_scores),
+                    sources=[dict(source) for source in sources],
+                ),
+            )
+        return context
 
     async def search_documents(
         self,
@@ -199,23 +238,31 @@ class RAGService:
         # 切分文档
         chunk_texts = await self.retriever.chunk_document(content)
 
-        # 为每个块生成嵌入
-        chunk_embeddings = []
-        for chunk_text in chunk_texts:
-            embedding = await self.retriever.generate_embedding(chunk_text)
-            chunk_embeddings.append(embedding)
-
-        # 保存文档块
-        for i, (chunk_text, embedding) in enumerate(
-            zip(chunk_texts, chunk_embeddings, strict=False)
-        ):
-            chunk = DocumentChunk.create(
+        # 批量生成嵌入（检索服务负责去重、分批与并发）
+        chunk_embeddings = await self.retriever.embed_many(chunk_texts)
+
+        chunks = [
+            DocumentChunk.create(
                 document_id=document.id,
                 content=chunk_text,
                 embedding=embedding,
                 chunk_index=i,
+                metadata={"workflow_id": workflow_id} if workflow_id else None,
             )
-            await self.repository.save_document_chunk(chunk)
+            for i, (chunk_text, embedding) in enumerate(
+                zip(chunk_texts, chunk_embeddings, strict=True)
+            )
+        ]
+
+        # 按批保存文档块（仓储与检索服务的向量存储各写一次）
+        for start in range(0, len(chunks), self.ingest_batch_size):
+            batch = chunks[start : start + self.ingest_batch_size]
+            await self.repository.save_document_chunks(batch)
+            await self.retriever.add_document_chunks(batch)
+
+        # 语料变更：使该工作流的检索缓存失效
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.bump(workflow_id)
 
         # 更新文档状态
         document.mark_processed()
@@ -234,8 +281,22 @@ class RAGService:
             是否成功删除
         """
         try:
-            # 删除文档（会级联删除文档块）
+            document = (
+                await self.repository.find_document_by_id(document_id)
+                if self.retrieval_cache is not None
+                else None
+            )
+
+            # 删除文档（会级联删除文档块），再删除检索服务自身向量存储中的副本
             await self.repository.delete_document(document_id)
+            await self.retriever.delete_document_chunks(document_id)
+
+            # 语料变更：使检索缓存失效（找不到文档时无法定位工作流，全部失效）
+            if self.retrieval_cache is not None:
+                if document is not None:
+                    self.retrieval_cache.bump(document.workflow_id)
+                else:
+                    self.retrieval_cache.bump_all()
             logger.info(f"Successfully deleted document {document_id}")
             return True
         except Exception as e:
@@ -113,6 +113,22 @@ class Settings(BaseSettings):
     rag_max_context_tokens: int = Field(default=4000, description="最大上下文Token数")
     rag_chunk_size: int = Field(default=1000, description="文档分块大小")
     rag_chunk_overlap: int = Field(default=200, description="文档分块重叠大小")
+    rag_hybrid_enabled: bool = Field(default=True, description="是否启用词法+向量混合检索")
+    rag_rrf_k: int = Field(default=60, description="混合检索RRF平滑常数")
+    rag_lexical_prefilter_min_chunks: int = Field(
+        default=20000, description="分块数达到该值时使用词法预筛选缩小向量打分范围"
+    )
+    rag_ann_min_vectors: int = Field(
+        default=0, description="分区向量数达到该值时启用IVF-PQ近似检索（0表示始终精确检索）"
+    )
+    rag_ann_nprobe: int = Field(default=16, description="IVF-PQ近似检索扫描的倒排列表数量")
+    rag_reranker: Literal["cosine", "mmr", "cross_encoder"] = Field(
+        default="cosine", description="重排序策略"
+    )
+    rag_mmr_lambda: float = Field(default=0.5, description="MMR相关性权重（越小越强调多样性）")
+    rag_cross_encoder_model: str = Field(
+        default="", description="本地交叉编码器模型（为空时使用词项重叠替身）"
+    )
 
     # Document Processing
     max_document_size_mb: int = Field(default=50, description="最大文档大小（MB）")
@@ -129,6 +145,77 @@ class Settings(BaseSettings):
     rag_cache_enabled: bool = Field(default=True, description="是否启用RAG缓存")
     rag_cache_ttl: int = Field(default=3600, description="RAG缓存TTL（秒）")
     rag_metrics_enabled: bool = Field(default=True, description="是否启用RAG指标收集")
+    rag_retrieval_cache_entries: int = Field(default=1024, description="检索结果缓存容量（条目数）")
+    embedding_cache_path: str = Field(
+        default="data/embedding_cache.db", description="嵌入缓存SQLite路径（为空则仅内存缓存）"
+    )
+    embedding_cache_memory_entries: int = Field(
+        default=10000, description="嵌入缓存内存LRU容量（向量条数）"
+    )
+
+    # Shared HTTP / LLM Clients
+    http_pool_max_connections: int = Field(default=100, description="共享连接池最大连接数")
+    http_pool_max_keepalive_connections: int = Field(
+        default=20, description="共享连接池保持的空闲连接数"
+    )
+    http_pool_keepalive_expiry_seconds: float = Field(
+        default=30.0, description="空闲连接保活时间（秒）"
+    )
+    http_pool_http2: bool = Field(default=True, description="安装 h2 时对共享客户端启用 HTTP/2")
+
+    # LLM Rate Limiting（提供商级配置见 LLMProvider.config["rate_limits"]）
+    # 默认关闭：开启后即使未配置速率，每个 provider/model 也受 max_concurrency 并发上限约束
+    llm_rate_limit_enabled: bool = Field(default=False, description="LLM客户端限流开关")
+    llm_rate_limit_max_concurrency: int = Field(
+        default=16, description="默认每个 provider/model 的最大并发（AIMD 上限）"
+    )
+    llm_rate_limit_requests_per_minute: float = Field(
+        default=0, description="默认 requests/min（0 表示不限）"
+    )
+    llm_rate_limit_tokens_per_minute: float = Field(
+        default=0, description="默认 tokens/min（0 表示不限）"
+    )
+    llm_rate_limit_max_retries: int = Field(default=2, description="429 时的最大重试次数")
+
+    # LLM Response Cache
+    # 默认关闭：缓存键不含租户/用户，开启后相同 prompt 的响应会在所有调用方之间共享
+    llm_response_cache_enabled: bool = Field(
+        default=False, description="LLM响应缓存开关（仅缓存 temperature <= 0 的确定性请求）"
+    )
+    llm_response_cache_path: str = Field(
+        default="data/llm_response_cache.db",
+        description="LLM响应缓存SQLite路径（为空则仅内存缓存）",
+    )
+    llm_response_cache_ttl_seconds: int = Field(
+        default=24 * 3600, description="LLM响应缓存默认TTL（秒，可被工作流/节点配置覆盖）"
+    )
+    llm_response_cache_memory_entries: int = Field(
+        default=2000, description="LLM响应缓存内存LRU容量（响应条数）"
+    )
+
+    # Chat Memory
+    memory_cache_backend: Literal["memory", "sqlite"] = Field(
+        default="memory",
+        description="对话记忆缓存后端（memory: 进程内；sqlite: 同主机多 worker 共享）",
+    )
+    memory_cache_path: str = Field(
+        default="data/memory_cache.db", description="共享对话记忆缓存的SQLite路径"
+    )
+    memory_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, description="对话记忆缓存的内存预算（字节，按消息估算）"
+    )
+    memory_write_behind: bool = Field(
+        default=False,
+        description="对话记忆写后模式（追加只写本地日志，后台批量刷库）",
+    )
+    memory_journal_dir: str = Field(
+        default="data/memory_journal", description="写后日志目录（每个 worker 独占一个槽位文件）"
+    )
+    memory_journal_fsync: bool = Field(
+        default=True, description="写后日志每次追加是否 fsync（关闭后仅保证进程崩溃不丢）"
+    )
+    memory_write_behind_batch_size: int = Field(default=200, description="写后模式单批刷库消息数")
+    memory_write_behind_interval_ms: int = Field(default=50, description="写后模式刷库间隔（毫秒）")
 
     # Feature Flags / Rollback
     disable_run_persistence: bool = Field(
@@ -192,6 +279,19 @@ class Settings(BaseSettings):
         default="",
         description="LLM回放文件路径(当llm_adapter=replay时必需)",
     )
+    llm_replay_normalize: bool = Field(
+        default=False,
+        description="LLM回放时按归一化prompt匹配(折叠空白, 屏蔽UUID/时间戳)",
+    )
+    llm_replay_time_scale: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="LLM回放时录制耗时(TTFT/token间隔)的倍率, 0表示不等待",
+    )
+    llm_record_file: str = Field(
+        default="",
+        description="LLM录制文件路径(llm_adapter=openai时设置, 按JSONL追加录制真实会话供replay回放)",
+    )
     wiremock_url: str = Field(
         default="http://localhost:8080",
         description="WireMock服务器地址(当http_adapter=wiremock时使用)",
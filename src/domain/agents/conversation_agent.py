@@ -289,6 +289,8 @@ class ConversationAgent(
             model_metadata_port = final_config.model_metadata_port  # P1-1
             max_iterations = final_config.react.max_iterations  # type: ignore[assignment]
             timeout_seconds = final_config.react.timeout_seconds
+            fused_react_step = final_config.react.fused_step
+            parallel_tool_calls = final_config.react.enable_parallel_actions
             max_tokens = final_config.resource.max_tokens
             max_cost = final_config.resource.max_cost
             coordinator = final_config.workflow.coordinator
@@ -311,6 +313,10 @@ class ConversationAgent(
         self.max_iterations = max_iterations
         # 阶段5新增:循环控制配置
         self.timeout_seconds = timeout_seconds
+        # 单次调用 ReAct 步骤（思考 + 决策 + 继续判断）
+        self.fused_react_step = fused_react_step
+        # 同一轮中互不依赖的工具调用并发执行
+        self.parallel_tool_calls = parallel_tool_calls
         self.max_tokens = max_tokens
         self.max_cost = max_cost
         self.coordinator = coordinator
@@ -79,13 +79,16 @@ class ReActConfig:
         max_iterations: 最大迭代次数
         timeout_seconds: 单次运行超时时间（秒）
         enable_reasoning_trace: 是否记录推理轨迹
-        enable_parallel_actions: 是否启用并行 Action 执行
+        enable_parallel_actions: 是否启用并行 Action 执行（同一轮 tool_calls 中互不依赖的调用并发执行）
+        fused_step: 是否单次调用完成 思考 + 决策 + 继续判断（LLM 需实现 react_step，
+            输出无法解析时回退到三次调用）
     """
 
     max_iterations: int = 10
     timeout_seconds: float | None = None
     enable_reasoning_trace: bool = True
     enable_parallel_actions: bool = False
+    fused_step: bool = False
 
     def __post_init__(self) -> None:
         """验证配置"""
@@ -392,6 +395,7 @@ class ConversationAgentConfig:
                 "timeout_seconds": self.react.timeout_seconds,
                 "enable_reasoning_trace": self.react.enable_reasoning_trace,
                 "enable_parallel_actions": self.react.enable_parallel_actions,
+                "fused_step": self.react.fused_step,
             },
             "intent": {
                 "enable_intent_classification": self.intent.enable_intent_classification,
@@ -136,16 +136,18 @@ class ConversationAgentHelpersMixin:
         返回：
             包含完整上下文的字典
         """
+        # 稳定前缀布局：跨轮次不变的全局信息在前，每轮变化的历史 / 决策 / 反馈在后
+        # （序列化进提示词时前缀保持一致，可命中提供商的前缀缓存）
         context = {
-            "conversation_history": self.session_context.conversation_history.copy(),
+            "user_id": self.session_context.global_context.user_id,
+            "user_preferences": self.session_context.global_context.user_preferences,
+            "system_config": self.session_context.global_context.system_config,
             "current_goal": self.session_context.current_goal(),
             "goal_stack": [
                 {"id": g.id, "description": g.description} for g in self.session_context.goal_stack
             ],
+            "conversation_history": self.session_context.conversation_history.copy(),
             "decision_history": self.session_context.decision_history.copy(),
-            "user_id": self.session_context.global_context.user_id,
-            "user_preferences": self.session_context.global_context.user_preferences,
-            "system_config": self.session_context.global_context.system_config,
             # Phase 13: 添加待处理的反馈
             "pending_feedbacks": self.pending_feedbacks.copy(),
         }
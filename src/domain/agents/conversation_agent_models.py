@@ -131,6 +131,25 @@ class ReActStep:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+@dataclass(frozen=True)
+class ToolCallRequest:
+    """ReAct 行动中请求的单个工具调用
+
+    属性：
+    - tool_name: 工具名称
+    - tool_call_id: 工具调用 ID（同一批调用内唯一）
+    - arguments: 调用参数
+    - timeout_seconds: 超时时间（可选）
+    - depends_on: 需要先完成的同批调用 ID
+    """
+
+    tool_name: str
+    tool_call_id: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+    timeout_seconds: Any = None
+    depends_on: tuple[str, ...] = ()
+
+
 @dataclass
 class ReActResult:
     """ReAct循环的最终结果
@@ -33,6 +33,13 @@ Required attributes:
 - _coordinator_context: Any | None (cached coordinator context)
 - _decision_metadata: list[dict[str, Any]] (P1 Fix: self-managed metadata)
 
+Optional attributes:
+- fused_react_step: bool (single-call think + decide + continue, see
+  conversation_agent_react_step; requires llm.react_step / llm.react_step_stream)
+- parallel_tool_calls: bool (run independent calls of a tool_calls batch concurrently)
+- tool_concurrency_controller: ToolConcurrencyController | None (slots for concurrent
+  tool calls; a default controller is created on first use)
+
 Required methods (from other mixins):
 - get_context_for_reasoning() -> dict[str, Any] (from HelpersMixin)
 - _initialize_model_info() -> None (from HelpersMixin)
@@ -46,8 +53,11 @@ Required methods (from other mixins):
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import re
 import time
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
@@ -57,13 +67,62 @@ from src.domain.agents.conversation_agent_models import (
     ReActResult,
     ReActStep,
     StepType,
+    ToolCallRequest,
     get_decision_type_map,
 )
+from src.domain.agents.conversation_agent_react_step import (
+    FusedReActStep,
+    PartialThoughtExtractor,
+    collect_react_step_stream,
+    parse_fused_react_step,
+)
+from src.domain.services.tool_concurrency_controller import ToolConcurrencyController
 
 if TYPE_CHECKING:
     from src.domain.services.context_manager import SessionContext
 
 
+def _format_observation(outcome: tuple[bool, dict[str, Any], str | None]) -> str:
+    success, tool_result, error_message = outcome
+    if not success:
+        return f"error: {error_message}"
+    return f"ok: {tool_result}" if tool_result else "ok"
+
+
+def plan_tool_call_waves(calls: list[ToolCallRequest]) -> list[list[ToolCallRequest]]:
+    """按依赖关系把同一批工具调用分层，同一层内的调用互不依赖、可以并发
+
+    依赖来源：显式的 depends_on，或参数中引用了同批其他调用的 tool_call_id
+    （例如 "{{tool_1.result}}"）。依赖无法满足（未知 ID / 循环）的调用按请求顺序
+    单独成层，保证不会丢失。
+    """
+    ids = {call.tool_call_id for call in calls}
+    deps: dict[str, set[str]] = {}
+    for call in calls:
+        referenced = set(call.depends_on)
+        if len(ids) > 1:
+            encoded = json.dumps(call.arguments, ensure_ascii=False, default=str)
+            referenced |= {
+                other
+                for other in ids
+                if re.search(rf"(?<![\w-]){re.escape(other)}(?![\w-])", encoded)
+            }
+        referenced.discard(call.tool_call_id)
+        deps[call.tool_call_id] = referenced & ids
+
+    waves: list[list[ToolCallRequest]] = []
+    done: set[str] = set()
+    pending = list(calls)
+    while pending:
+        wave = [call for call in pending if deps[call.tool_call_id] <= done]
+        if not wave:
+            wave = [pending[0]]
+        waves.append(wave)
+        done |= {call.tool_call_id for call in wave}
+        pending = [call for call in pending if all(call is not member for member in wave)]
+    return waves
+
+
 class ConversationAgentReActCoreMixin:
     """ReAct core mixin for ConversationAgent (P1-6 Phase 6 Step 3).
 
@@ -348,29 +407,34 @@ class ConversationAgentReActCoreMixin:
             context["user_input"] = user_input
             context["iteration"] = iteration_count + 1
 
-            # 思考
-            try:
-                thought = await self.llm.think(context)
-
-                # Phase 2: 发送思考步骤到 emitter
-                if self.emitter:
-                    await self.emitter.emit_thinking(thought)
-            except Exception as e:
-                # Phase 2: 发送错误到 emitter
-                if self.emitter:
-                    await self.emitter.emit_error(str(e), error_code="LLM_THINK_ERROR")
-                    await self.emitter.complete()
-                raise
-
-            # 决定行动
-            try:
-                action = await self.llm.decide_action(context)
-            except Exception as e:
-                # P0-4 Fix: 捕获 decide_action 异常，emit_error 并 complete
-                if self.emitter:
-                    await self.emitter.emit_error(str(e), error_code="DECIDE_ACTION_ERROR")
-                    await self.emitter.complete()
-                raise
+            # 融合模式：一次调用同时得到 思考 / 行动 / 是否继续（解析失败返回 None）
+            fused, thinking_streamed = await self._run_fused_react_step(context)
+            if fused is not None:
+                thought, action = fused.thought, fused.action
+            else:
+                # 思考
+                try:
+                    thought = await self.llm.think(context)
+
+                    # Phase 2: 发送思考步骤到 emitter（融合步骤已推送过部分思考时不再重复推送）
+                    if self.emitter and not thinking_streamed:
+                        await self.emitter.emit_thinking(thought)
+                except Exception as e:
+                    # Phase 2: 发送错误到 emitter
+                    if self.emitter:
+                        await self.emitter.emit_error(str(e), error_code="LLM_THINK_ERROR")
+                        await self.emitter.complete()
+                    raise
+
+                # 决定行动
+                try:
+                    action = await self.llm.decide_action(context)
+                except Exception as e:
+                    # P0-4 Fix: 捕获 decide_action 异常，emit_error 并 complete
+                    if self.emitter:
+                        await self.emitter.emit_error(str(e), error_code="DECIDE_ACTION_ERROR")
+                        await self.emitter.complete()
+                    raise
 
             # 阶段5：累计 token 和成本
             # Step 1: 记录每轮的 token 使用情况
@@ -434,123 +498,12 @@ class ConversationAgentReActCoreMixin:
 
                 return result
 
-            # Phase 2: 处理工具调用
+            # Phase 2: 处理工具调用（单个或一批 tool_calls）
             if action_type == "tool_call":
-                tool_name = str(action.get("tool_name", "") or "").strip()
-                tool_call_id = str(action.get("tool_id", "") or "").strip()
-                arguments = action.get("arguments", {})
-                if not isinstance(arguments, dict):
-                    arguments = {}
-
-                if not tool_call_id:
-                    tool_call_id = f"tool_{iteration_count + 1}"
-
-                if self.coordinator is not None:
-                    from src.domain.services.coordinator_policy_chain import (
-                        CoordinatorPolicyChain,
-                        CoordinatorRejectedError,
-                    )
-
-                    policy = getattr(self, "_tool_call_policy", None)
-                    if policy is None:
-                        policy = CoordinatorPolicyChain(
-                            coordinator=self.coordinator,
-                            event_bus=self.event_bus,
-                            source="conversation_agent_tool_call",
-                            fail_closed=True,
-                            supervised_decision_types={"tool_call"},
-                        )
-                        self._tool_call_policy = policy
-
-                    args_keys = sorted(str(key) for key in arguments.keys())[:20]
-                    args_types = {
-                        str(key): type(value).__name__
-                        for key, value in list(arguments.items())[:20]
-                    }
-
-                    session_id = str(getattr(self.session_context, "session_id", "") or "").strip()
-                    correlation_id = session_id or tool_call_id
-                    try:
-                        await policy.enforce_action_or_raise(
-                            decision_type="tool_call",
-                            decision={
-                                "decision_type": "tool_call",
-                                "action": "tool_call",
-                                "tool_name": tool_name,
-                                "tool_call_id": tool_call_id,
-                                "args_keys": args_keys,
-                                "args_types": args_types,
-                                "args_count": len(arguments),
-                            },
-                            correlation_id=correlation_id,
-                            original_decision_id=tool_call_id,
-                        )
-                    except CoordinatorRejectedError as exc:
-                        if self.emitter:
-                            await self.emitter.emit_error(
-                                str(exc),
-                                error_code="COORDINATOR_REJECTED",
-                                recoverable=False,
-                                decision_type="tool_call",
-                                tool_id=tool_call_id,
-                                correlation_id=correlation_id,
-                            )
-                            await self.emitter.complete()
-                        raise
-
-                if self.emitter:
-                    await self.emitter.emit_tool_call(
-                        tool_name=tool_name,
-                        tool_id=tool_call_id,
-                        arguments=arguments,
-                    )
-
-                success, tool_result, error_message = await self._execute_tool_call(
-                    tool_name=tool_name,
-                    tool_call_id=tool_call_id,
-                    arguments=arguments,
-                    timeout_seconds=action.get("timeout_seconds"),
-                )
-                observation = (
-                    f"error: {error_message}"
-                    if not success
-                    else f"ok: {tool_result}"
-                    if tool_result
-                    else "ok"
+                await self._handle_tool_call_action(
+                    action, step=step, context=context, iteration=iteration_count + 1
                 )
 
-                # Record observation for this ReAct iteration and feed it back into the loop.
-                step.observation = observation
-                context["last_observation"] = observation
-
-                # Best-effort audit trail (equivalent to a persisted observation record in session context).
-                try:
-                    add_message = getattr(self.session_context, "add_message", None)
-                    if callable(add_message):
-                        add_message(
-                            {
-                                "role": "tool",
-                                "tool_name": tool_name,
-                                "tool_call_id": tool_call_id,
-                                "arguments": arguments,
-                                "content": observation,
-                                "timestamp": datetime.now().isoformat(),
-                                "success": success,
-                            }
-                        )
-                except Exception:
-                    # Never let audit recording break the ReAct loop (fail-closed applies to tool execution).
-                    pass
-
-                if self.emitter:
-                    await self.emitter.emit_tool_result(
-                        tool_id=tool_call_id,
-                        result=tool_result,
-                        success=success,
-                        error=error_message,
-                        tool_name=tool_name,
-                    )
-
             # 记录决策并发布事件（P0-2 Phase 2: 使用async staged版本）
             if action_type in ["create_node", "execute_workflow", "request_clarification"]:
                 decision = await self._record_decision_async(action)
@@ -558,15 +511,18 @@ class ConversationAgentReActCoreMixin:
                 if self.event_bus:
                     await self.publish_decision(decision)
 
-            # 判断是否继续
-            try:
-                should_continue = await self.llm.should_continue(context)
-            except Exception as e:
-                # P0-4 Fix: 捕获 should_continue 异常，emit_error 并 complete
-                if self.emitter:
-                    await self.emitter.emit_error(str(e), error_code="SHOULD_CONTINUE_ERROR")
-                    await self.emitter.complete()
-                raise
+            # 判断是否继续（融合模式已在同一次调用中给出）
+            if fused is not None:
+                should_continue = fused.should_continue
+            else:
+                try:
+                    should_continue = await self.llm.should_continue(context)
+                except Exception as e:
+                    # P0-4 Fix: 捕获 should_continue 异常，emit_error 并 complete
+                    if self.emitter:
+                        await self.emitter.emit_error(str(e), error_code="SHOULD_CONTINUE_ERROR")
+                        await self.emitter.complete()
+                    raise
 
             if not should_continue:
                 result.completed = True
@@ -601,6 +557,303 @@ class ConversationAgentReActCoreMixin:
 
         return result
 
+    async def _run_fused_react_step(
+        self, context: dict[str, Any]
+    ) -> tuple[FusedReActStep | None, bool]:
+        """单次调用完成 思考 + 决策 + 继续判断
+
+        返回:
+            (融合步骤, 是否已向 emitter 推送过思考)。未启用融合模式、LLM 不支持或输出
+            无法解析时融合步骤为 None，由调用方回退到 think / decide_action /
+            should_continue 三次调用；已推送过部分思考时回退路径不再推送思考
+        """
+        if not getattr(self, "fused_react_step", False):
+            return None, False
+        stream = getattr(self.llm, "react_step_stream", None) if self.emitter else None
+        react_step = getattr(self.llm, "react_step", None)
+        if not callable(stream) and not callable(react_step):
+            return None, False
+
+        streamed = False
+        try:
+            if callable(stream):
+                # 边接收边推送思考增量，完整文本留在 extractor.buffer 中
+                extractor = PartialThoughtExtractor()
+                async for delta in collect_react_step_stream(stream(context), extractor):
+                    streamed = True
+                    await self.emitter.emit_thinking(delta, partial=True)  # type: ignore[union-attr]
+                payload: Any = extractor.buffer
+            else:
+                payload = await react_step(context)  # type: ignore[misc]
+        except Exception as e:
+            if self.emitter:
+                await self.emitter.emit_error(str(e), error_code="LLM_REACT_STEP_ERROR")
+                await self.emitter.complete()
+            raise
+
+        try:
+            fused = parse_fused_react_step(payload)
+        except ValueError as e:
+            self._fused_step_fallbacks = getattr(self, "_fused_step_fallbacks", 0) + 1
+            logging.warning(f"Fused ReAct step unparseable, falling back to three calls: {e}")
+            return None, streamed
+
+        if self.emitter and not streamed:
+            await self.emitter.emit_thinking(fused.thought)
+        return fused, True
+
+    # =========================================================================
+    # Tool Calls
+    # =========================================================================
+
+    async def _handle_tool_call_action(
+        self,
+        action: dict[str, Any],
+        *,
+        step: ReActStep,
+        context: dict[str, Any],
+        iteration: int,
+    ) -> None:
+        """执行 tool_call 行动并把观察结果写回本轮步骤与上下文
+
+        action 可以是单个工具调用（tool_name / tool_id / arguments），也可以通过
+        tool_calls 列表一次请求多个调用。启用 enable_parallel_actions 时，互不依赖的
+        调用在 ToolConcurrencyController 槽位下并发执行，结果按完成顺序推送给
+        emitter，而观察记录始终按请求顺序写入。
+        """
+        calls = self._normalize_tool_calls(action, iteration)
+        if len(calls) == 1:
+            call = calls[0]
+            await self._enforce_tool_call_policy(call)
+            if self.emitter:
+                await self.emitter.emit_tool_call(
+                    tool_name=call.tool_name,
+                    tool_id=call.tool_call_id,
+                    arguments=call.arguments,
+                )
+            outcome = await self._execute_tool_call(
+                tool_name=call.tool_name,
+                tool_call_id=call.tool_call_id,
+                arguments=call.arguments,
+                timeout_seconds=call.timeout_seconds,
+            )
+            observation = _format_observation(outcome)
+
+            # Record observation for this ReAct iteration and feed it back into the loop.
+            step.observation = observation
+            context["last_observation"] = observation
+            self._record_tool_observation(call, outcome[0], observation)
+            await self._emit_tool_result(call, outcome)
+            return
+
+        for call in calls:
+            await self._enforce_tool_call_policy(call)
+        if self.emitter:
+            for call in calls:
+                await self.emitter.emit_tool_call(
+                    tool_name=call.tool_name,
+                    tool_id=call.tool_call_id,
+                    arguments=call.arguments,
+                )
+
+        outcomes: dict[str, tuple[bool, dict[str, Any], str | None]] = {}
+        parallel = bool(getattr(self, "parallel_tool_calls", False))
+        for wave in plan_tool_call_waves(calls) if parallel else [[call] for call in calls]:
+            if len(wave) == 1:
+                call = wave[0]
+                outcomes[call.tool_call_id] = await self._execute_tool_call(
+                    tool_name=call.tool_name,
+                    tool_call_id=call.tool_call_id,
+                    arguments=call.arguments,
+                    timeout_seconds=call.timeout_seconds,
+                )
+                await self._emit_tool_result(call, outcomes[call.tool_call_id])
+                continue
+            async for call, outcome in self._execute_tool_calls_concurrently(wave):
+                outcomes[call.tool_call_id] = outcome
+                await self._emit_tool_result(call, outcome)
+
+        # 按请求顺序写入观察记录，保证 transcript 确定
+        observations = []
+        for call in calls:
+            outcome = outcomes[call.tool_call_id]
+            observation = _format_observation(outcome)
+            self._record_tool_observation(call, outcome[0], observation)
+            observations.append(f"{call.tool_name}[{call.tool_call_id}] {observation}")
+        step.observation = "\n".join(observations)
+        context["last_observation"] = step.observation
+
+    def _normalize_tool_calls(
+        self, action: dict[str, Any], iteration: int
+    ) -> list[ToolCallRequest]:
+        """把 action 中的单个调用或 tool_calls 列表规整为 ToolCallRequest 列表"""
+        raw_calls = action.get("tool_calls")
+        if not isinstance(raw_calls, list) or not raw_calls:
+            raw_calls = [action]
+
+        calls = []
+        for index, raw in enumerate(raw_calls):
+            if not isinstance(raw, dict):
+                continue
+            arguments = raw.get("arguments", {})
+            if not isinstance(arguments, dict):
+                arguments = {}
+            tool_call_id = str(raw.get("tool_id", "") or "").strip()
+            if not tool_call_id:
+                tool_call_id = (
+                    f"tool_{iteration}" if len(raw_calls) == 1 else f"tool_{iteration}_{index + 1}"
+                )
+            if any(call.tool_call_id == tool_call_id for call in calls):
+                tool_call_id = f"{tool_call_id}_{index + 1}"
+            depends_on = raw.get("depends_on") or []
+            calls.append(
+                ToolCallRequest(
+                    tool_name=str(raw.get("tool_name", "") or "").strip(),
+                    tool_call_id=tool_call_id,
+                    arguments=arguments,
+                    timeout_seconds=raw.get("timeout_seconds", action.get("timeout_seconds")),
+                    depends_on=(
+                        tuple(str(dep) for dep in depends_on)
+                        if isinstance(depends_on, list | tuple)
+                        else ()
+                    ),
+                )
+            )
+        return calls or [ToolCallRequest(tool_name="", tool_call_id=f"tool_{iteration}")]
+
+    async def _enforce_tool_call_policy(self, call: ToolCallRequest) -> None:
+        """Coordinator 监督工具调用（拒绝时推送错误并抛出 CoordinatorRejectedError）"""
+        if self.coordinator is None:
+            return
+
+        from src.domain.services.coordinator_policy_chain import (
+            CoordinatorPolicyChain,
+            CoordinatorRejectedError,
+        )
+
+        tool_name, tool_call_id, arguments = call.tool_name, call.tool_call_id, call.arguments
+        policy = getattr(self, "_tool_call_policy", None)
+        if policy is None:
+            policy = CoordinatorPolicyChain(
+                coordinator=self.coordinator,
+                event_bus=self.event_bus,
+                source="conversation_agent_tool_call",
+                fail_closed=True,
+                supervised_decision_types={"tool_call"},
+            )
+            self._tool_call_policy = policy
+
+        args_keys = sorted(str(key) for key in arguments.keys())[:20]
+        args_types = {str(key): type(value).__name__ for key, value in list(arguments.items())[:20]}
+
+        session_id = str(getattr(self.session_context, "session_id", "") or "").strip()
+        correlation_id = session_id or tool_call_id
+        try:
+            await policy.enforce_action_or_raise(
+                decision_type="tool_call",
+                decision={
+                    "decision_type": "tool_call",
+                    "action": "tool_call",
+                    "tool_name": tool_name,
+                    "tool_call_id": tool_call_id,
+                    "args_keys": args_keys,
+                    "args_types": args_types,
+                    "args_count": len(arguments),
+                },
+                correlation_id=correlation_id,
+                original_decision_id=tool_call_id,
+            )
+        except CoordinatorRejectedError as exc:
+            if self.emitter:
+                await self.emitter.emit_error(
+                    str(exc),
+                    error_code="COORDINATOR_REJECTED",
+                    recoverable=False,
+                    decision_type="tool_call",
+                    tool_id=tool_call_id,
+                    correlation_id=correlation_id,
+                )
+                await self.emitter.complete()
+            raise
+
+    async def _execute_tool_calls_concurrently(
+        self, calls: list[ToolCallRequest]
+    ) -> AsyncIterator[tuple[ToolCallRequest, tuple[bool, dict[str, Any], str | None]]]:
+        """并发执行一组互不依赖的调用，按完成顺序产出 (call, outcome)"""
+        controller = self._get_tool_concurrency_controller()
+        caller_id = str(getattr(self.session_context, "session_id", "") or "conversation_agent")
+
+        async def run(
+            call: ToolCallRequest,
+        ) -> tuple[ToolCallRequest, tuple[bool, dict[str, Any], str | None]]:
+            slot = await controller.acquire_slot_wait(
+                tool_name=call.tool_name,
+                caller_id=caller_id,
+                caller_type="conversation_agent",
+            )
+            try:
+                outcome = await self._execute_tool_call(
+                    tool_name=call.tool_name,
+                    tool_call_id=call.tool_call_id,
+                    arguments=call.arguments,
+                    timeout_seconds=call.timeout_seconds,
+                )
+            finally:
+                await controller.release_slot(slot.slot_id)
+            return call, outcome
+
+        tasks = [asyncio.ensure_future(run(call)) for call in calls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _get_tool_concurrency_controller(self) -> ToolConcurrencyController:
+        """获取注入的并发控制器（未注入时按默认配置创建并缓存）"""
+        controller = getattr(self, "tool_concurrency_controller", None)
+        if controller is None:
+            controller = ToolConcurrencyController()
+            self.tool_concurrency_controller = controller
+        return controller
+
+    def _record_tool_observation(
+        self, call: ToolCallRequest, success: bool, observation: str
+    ) -> None:
+        """Best-effort audit trail (equivalent to a persisted observation record in session context)."""
+        try:
+            add_message = getattr(self.session_context, "add_message", None)
+            if callable(add_message):
+                add_message(
+                    {
+                        "role": "tool",
+                        "tool_name": call.tool_name,
+                        "tool_call_id": call.tool_call_id,
+                        "arguments": call.arguments,
+                        "content": observation,
+                        "timestamp": datetime.now().isoformat(),
+                        "success": success,
+                    }
+                )
+        except Exception:
+            # Never let audit recording break the ReAct loop (fail-closed applies to tool execution).
+            pass
+
+    async def _emit_tool_result(
+        self, call: ToolCallRequest, outcome: tuple[bool, dict[str, Any], str | None]
+    ) -> None:
+        if self.emitter:
+            success, tool_result, error_message = outcome
+            await self.emitter.emit_tool_result(
+                tool_id=call.tool_call_id,
+                result=tool_result,
+                success=success,
+                error=error_message,
+                tool_name=call.tool_name,
+            )
+
     async def _execute_tool_call(
         self,
         *,
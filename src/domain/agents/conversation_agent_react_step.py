@@ -0,0 +1,197 @@
+"""Fused ReAct step - 单次调用完成 思考 + 决策 + 继续判断
+
+ReAct 循环每轮原本要依次调用 think / decide_action / should_continue 三次，
+每次都重新发送几乎相同的上下文。融合模式下 LLM 通过一次结构化输出同时返回
+三者，每轮往返次数与 prompt tokens 约降为原来的 1/3：
+
+    {"thought": "...", "action": {"action_type": "...", ...}, "should_continue": false}
+
+LLM 可选实现的能力（见 FusedReActStepLLM）：
+- react_step(context): 返回上述 dict（或 JSON 字符串）
+- react_step_stream(context): 逐块返回 JSON 文本，"thought" 字段放在最前，
+  ReAct core 边接收边用 PartialThoughtExtractor 解析出思考增量并推送给 emitter
+
+输出无法解析时由 ReAct core 回退到原有的三次调用路径。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import dataclass
+from typing import Any, Protocol, runtime_checkable
+
+# 结构化输出 schema（供 LLM 适配器作为 response_format / tool schema 使用）
+REACT_STEP_OUTPUT_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "thought": {"type": "string", "description": "本轮推理内容"},
+        "action": {
+            "type": "object",
+            "properties": {"action_type": {"type": "string"}},
+            "required": ["action_type"],
+        },
+        "should_continue": {"type": "boolean", "description": "执行该行动后是否继续循环"},
+    },
+    "required": ["thought", "action", "should_continue"],
+}
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+_THOUGHT_KEY = re.compile(r'"thought"\s*:\s*"')
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+@runtime_checkable
+class FusedReActStepLLM(Protocol):
+    """支持单次调用 ReAct 步骤的 LLM（ConversationAgentLLM 的可选扩展）"""
+
+    async def react_step(self, context: dict[str, Any]) -> dict[str, Any] | str:
+        """一次调用返回 thought / action / should_continue"""
+        ...
+
+
+@dataclass(frozen=True)
+class FusedReActStep:
+    """融合步骤的解析结果"""
+
+    thought: str
+    action: dict[str, Any]
+    should_continue: bool
+
+
+def parse_fused_react_step(payload: Any) -> FusedReActStep:
+    """解析融合步骤输出
+
+    参数:
+        payload: LLM 返回的 dict 或 JSON 字符串（允许 ```json 代码块包裹）
+
+    返回:
+        FusedReActStep
+
+    异常:
+        ValueError: 输出不是合法的融合步骤（调用方据此回退到三次调用）
+    """
+    if isinstance(payload, str):
+        text = payload.strip()
+        fenced = _CODE_FENCE.match(text)
+        if fenced:
+            text = fenced.group(1)
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"fused step output is not valid JSON: {e}") from e
+
+    if not isinstance(payload, Mapping):
+        raise ValueError(f"fused step output must be an object, got {type(payload).__name__}")
+
+    thought = payload.get("thought")
+    action = payload.get("action")
+    should_continue = payload.get("should_continue")
+    if not isinstance(thought, str):
+        raise ValueError("fused step output missing string field 'thought'")
+    if not isinstance(action, Mapping) or not isinstance(action.get("action_type"), str):
+        raise ValueError("fused step output missing 'action.action_type'")
+    if not isinstance(should_continue, bool):
+        raise ValueError("fused step output missing boolean field 'should_continue'")
+    return FusedReActStep(thought=thought, action=dict(action), should_continue=should_continue)
+
+
+class PartialThoughtExtractor:
+    """从不完整的 JSON 文本中增量解析 "thought" 字符串字段
+
+    Example:
+        >>> extractor = PartialThoughtExtractor()
+        >>> extractor.feed('{"thought": "先查')
+        '先查'
+        >>> extractor.feed('询天气", "action": {')
+        '询天气'
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self._start: int | None = None  # thought 字符串值在 buffer 中的起始位置
+        self._pos = 0  # 已解析到的位置
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        """追加一段输出文本，返回本次新解析出的思考内容（可能为空串）"""
+        self.buffer += chunk
+        if self._done:
+            return ""
+        if self._start is None:
+            match = _THOUGHT_KEY.search(self.buffer)
+            if match is None:
+                return ""
+            self._start = self._pos = match.end()
+
+        out: list[str] = []
+        buffer, pos = self.buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self._done = True
+                pos += 1
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            # 转义序列不完整时等待下一块
+            if pos + 1 >= len(buffer):
+                break
+            escape = buffer[pos + 1]
+            if escape == "u":
+                if pos + 6 > len(buffer):
+                    break
+                code = _hex4(buffer[pos + 2 : pos + 6])
+                if code is None:
+                    # 非法 \u 转义：停止增量解析，由完整解析判定输出不可用并回退
+                    self._done = True
+                    break
+                end = pos + 6
+                if 0xD800 <= code < 0xDC00:
+                    # 高代理项与紧随的低代理项合并为一个字符（低代理项未到齐时等待下一块）
+                    tail = buffer[end : end + 6]
+                    if len(tail) < 6 and "\\u".startswith(tail[:2]):
+                        break
+                    low = _hex4(tail[2:]) if tail.startswith("\\u") else None
+                    if low is not None and 0xDC00 <= low < 0xE000:
+                        code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                        end += 6
+                if 0xD800 <= code < 0xE000:
+                    code = 0xFFFD  # 孤立代理项无法编码，替换为 U+FFFD
+                out.append(chr(code))
+                pos = end
+            else:
+                out.append(_ESCAPES.get(escape, escape))
+                pos += 2
+        self._pos = pos
+        return "".join(out)
+
+
+def _hex4(text: str) -> int | None:
+    """解析 \\u 转义的 4 位十六进制码点（非法时返回 None）"""
+    if len(text) != 4 or not all(c in "0123456789abcdefABCDEF" for c in text):
+        return None
+    return int(text, 16)
+
+
+async def collect_react_step_stream(
+    chunks: AsyncIterator[str], extractor: PartialThoughtExtractor
+) -> AsyncIterator[str]:
+    """消费流式输出：逐块产出思考增量，结束后完整文本保存在 extractor.buffer"""
+    async for chunk in chunks:
+        delta = extractor.feed(chunk)
+        if delta:
+            yield delta
+
+
+__all__ = [
+    "REACT_STEP_OUTPUT_SCHEMA",
+    "FusedReActStep",
+    "FusedReActStepLLM",
+    "PartialThoughtExtractor",
+    "collect_react_step_stream",
+    "parse_fused_react_step",
+]
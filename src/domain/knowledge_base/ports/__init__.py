@@ -1,6 +1,7 @@
 """Knowledge base ports"""
 
 from .knowledge_repository import KnowledgeRepository
+from .reranker import Reranker
 from .retriever_service import RetrieverService
 
-__all__ = ["KnowledgeRepository", "RetrieverService"]
+__all__ = ["KnowledgeRepository", "Reranker", "RetrieverService"]
@@ -53,6 +53,22 @@ class KnowledgeRepository(ABC):
         """更新文档"""
         pass
 
+    async def save_documents(self, documents: list[Document]) -> None:
+        """批量保存文档
+
+        默认逐条调用 save_document；支持批量写入的实现应覆盖此方法。
+        """
+        for document in documents:
+            await self.save_document(document)
+
+    async def update_documents(self, documents: list[Document]) -> None:
+        """批量更新文档
+
+        默认逐条调用 update_document；支持批量写入的实现应覆盖此方法。
+        """
+        for document in documents:
+            await self.update_document(document)
+
     @abstractmethod
     async def delete_document(self, id: str) -> None:
         """删除文档"""
@@ -63,6 +79,14 @@ class KnowledgeRepository(ABC):
         """保存文档分块"""
         pass
 
+    async def save_document_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """批量保存文档分块
+
+        默认逐条调用 save_document_chunk；支持批量写入的实现应覆盖此方法。
+        """
+        for chunk in chunks:
+            await self.save_document_chunk(chunk)
+
     @abstractmethod
     async def find_chunks_by_document_id(self, document_id: str) -> list[DocumentChunk]:
         """查找指定文档的所有分块"""
@@ -75,6 +99,7 @@ class KnowledgeRepository(ABC):
         workflow_id: str | None = None,
         limit: int = 5,
         threshold: float = 0.7,
+        candidate_ids: list[str] | None = None,
     ) -> list[tuple[DocumentChunk, float]]:
         """搜索相似的文档分块
 
@@ -83,12 +108,37 @@ class KnowledgeRepository(ABC):
             workflow_id: 可选的工作流ID，用于限定搜索范围
             limit: 返回结果数量限制
             threshold: 相似度阈值
+            candidate_ids: 可选的候选分块ID，只在候选集合内打分
 
         返回：
             (DocumentChunk, 相似度分数) 的列表
         """
         pass
 
+    async def search_chunks_lexical(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        limit: int = 50,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """词法（关键词）检索文档分块
+
+        默认不支持词法检索，返回空列表；维护倒排索引的实现应覆盖此方法。
+
+        参数：
+            query: 查询文本
+            workflow_id: 可选的工作流ID，用于限定搜索范围
+            limit: 返回结果数量限制
+
+        返回：
+            (DocumentChunk, 词法相关性分数) 的列表，按分数降序
+        """
+        return []
+
+    async def count_chunks(self, workflow_id: str | None = None) -> int:
+        """统计分块数量（默认未知，返回 0）"""
+        return 0
+
     @abstractmethod
     async def count_documents_by_workflow(self, workflow_id: str) -> int:
         """统计指定工作流的文档数量"""
@@ -98,3 +148,7 @@ class KnowledgeRepository(ABC):
     async def delete_chunks_by_document_id(self, document_id: str) -> None:
         """删除指定文档的所有分块"""
         pass
+
+    async def close(self) -> None:
+        """释放仓储持有的资源（如连接池）；默认无操作"""
+        return None
@@ -0,0 +1,38 @@
+"""Reranker port - 重排序阶段接口
+
+DDD规则：
+- 使用ABC定义接口
+- 检索服务召回候选后，由可替换的重排序器给出最终顺序与分数
+"""
+
+from abc import ABC, abstractmethod
+
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+
+
+class Reranker(ABC):
+    """重排序器接口
+
+    实现可以基于向量（余弦、MMR 多样化），也可以基于查询-文本对（交叉编码器）。
+    """
+
+    @abstractmethod
+    async def rerank(
+        self,
+        query: str,
+        query_embedding: list[float],
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """对候选文档块重排序
+
+        参数：
+            query: 查询文本
+            query_embedding: 查询向量（不需要向量的实现可以忽略）
+            chunks: 候选文档块
+            top_k: 返回数量
+
+        返回：
+            (DocumentChunk, 重排序分数) 的列表，按最终顺序排列
+        """
+        pass
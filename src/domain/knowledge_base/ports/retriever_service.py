@@ -29,6 +29,19 @@ class RetrieverService(ABC):
         """
         pass
 
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """批量生成向量嵌入
+
+        默认逐条调用 generate_embedding；支持批量接口的实现应覆盖此方法。
+
+        参数：
+            texts: 输入文本列表
+
+        返回：
+            与输入一一对应的向量嵌入列表
+        """
+        return [await self.generate_embedding(text) for text in texts]
+
     @abstractmethod
     async def chunk_document(
         self,
@@ -88,6 +101,27 @@ class RetrieverService(ABC):
         """
         pass
 
+    async def add_document_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """将文档块写入检索服务自身的向量存储
+
+        默认无操作（向量由 KnowledgeRepository 管理）；自带向量存储的实现应覆盖此方法。
+
+        参数：
+            chunks: 文档块列表
+        """
+        return None
+
+    async def delete_document_chunks(self, document_id: str) -> None:
+        """从检索服务自身的向量存储中删除指定文档的所有块
+
+        默认无操作（向量由 KnowledgeRepository 管理，删除文档时级联删除）；
+        自带向量存储的实现应覆盖此方法。
+
+        参数：
+            document_id: 文档ID
+        """
+        return None
+
     @abstractmethod
     async def get_context_for_query(
         self,
@@ -90,7 +90,7 @@ class ChatMessageRepository(Protocol):
         ...
 
     def search(
-        self, workflow_id: str, query: str, threshold: float = 0.5
+        self, workflow_id: str, query: str, threshold: float = 0.5, limit: int = 50
     ) -> list[tuple[ChatMessage, float]]:
         """在工作流的历史记录中搜索消息
 
@@ -110,6 +110,7 @@ class ChatMessageRepository(Protocol):
             workflow_id: 工作流 ID
             query: 搜索关键词
             threshold: 相关性阈值（0-1），低于此值的结果会被过滤
+            limit: 最多参与打分的候选消息数（按索引相关性取前 limit 条）
 
         返回：
             [(ChatMessage, relevance_score), ...] 按相关性降序排列
@@ -8,7 +8,7 @@ Author: Claude Code
 Date: 2025-11-30
 """
 
-from typing import Protocol
+from typing import Any, Protocol
 
 from src.domain.entities.chat_message import ChatMessage
 
@@ -21,6 +21,11 @@ class MemoryCache(Protocol):
     - TTL（Time-To-Live）过期机制
     - 主动失效（Invalidation）
     - 有效性检查
+    - 增量追加（只追加到已存在的有效条目）
+
+    实现：
+    - InMemoryCache：进程内 TTL + LRU + 字节预算
+    - SQLiteSharedMemoryCache：同一主机多个 worker 进程共享的 SQLite(WAL) 缓存
 
     设计原则：
     1. 纯 Python Protocol，无框架依赖
@@ -68,6 +73,20 @@ class MemoryCache(Protocol):
         """
         ...
 
+    def append(self, workflow_id: str, message: ChatMessage) -> bool:
+        """
+        向已缓存的 workflow 追加一条消息
+
+        Args:
+            workflow_id: 工作流 ID
+            message: 要追加的消息
+
+        Returns:
+            - True: 条目存在且有效，已追加
+            - False: 条目不存在/已过期，未创建新条目（下次读取回溯数据库）
+        """
+        ...
+
     def invalidate(self, workflow_id: str) -> None:
         """
         主动失效指定 workflow 的缓存
@@ -111,3 +130,12 @@ class MemoryCache(Protocol):
             ...     messages = db.load_recent("wf_123")
         """
         ...
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        获取缓存统计指标
+
+        Returns:
+            至少包含 hits、misses、hit_rate 的字典
+        """
+        ...
@@ -23,6 +23,8 @@ from typing import Any
 
 import yaml
 
+from src.domain.services.stable_prompt import PromptRenderCache
+
 # =============================================================================
 # 异常定义
 # =============================================================================
@@ -364,16 +366,28 @@ class PromptTemplateRegistry:
 class PromptTemplateComposer:
     """提示词模板组合器
 
-    将多个模块组合成完整的提示词。
+    将多个模块组合成完整的提示词。模块渲染结果按 (模块, 版本, 模板, 变量) 缓存，
+    变量不变的模块（角色、准则、工具、输出格式）跨轮次无需重复渲染。
     """
 
-    def __init__(self, registry: PromptTemplateRegistry) -> None:
+    def __init__(
+        self,
+        registry: PromptTemplateRegistry,
+        render_cache: PromptRenderCache | None = None,
+    ) -> None:
         """初始化组合器
 
         参数：
             registry: 模板注册表
+            render_cache: 模块渲染缓存（默认每个组合器独立一份）
         """
         self._registry = registry
+        self._render_cache = render_cache or PromptRenderCache()
+
+    @property
+    def render_cache(self) -> PromptRenderCache:
+        """模块渲染缓存"""
+        return self._render_cache
 
     def compose(
         self,
@@ -400,8 +414,17 @@ class PromptTemplateComposer:
 
             # 只传递该模块需要的变量
             module_vars = {k: v for k, v in variables.items() if k in module.variables}
-            rendered = module.render(**module_vars)
-            rendered_parts.append(rendered)
+            key = (
+                module.name,
+                module.version,
+                module.template,
+                tuple(sorted((k, repr(v)) for k, v in module_vars.items())),
+            )
+            rendered_parts.append(
+                self._render_cache.get_or_render(
+                    key, lambda module=module, module_vars=module_vars: module.render(**module_vars)
+                )
+            )
 
         return separator.join(rendered_parts)
 
@@ -0,0 +1,203 @@
+"""稳定前缀提示词 (Stable-Prefix Prompt)
+
+LLM 提供商的提示词缓存（prompt caching）按前缀匹配：只要本次请求的开头与之前
+某次请求逐字节相同，这段前缀就不必重新计算，首 token 延迟和费用都会下降。
+如果把时间戳、RAG 检索结果、当前工作流状态等每轮都会变化的内容放在系统提示词
+开头，后面再长的固定规则也无法命中缓存。
+
+这里约定提示词按两段组装：
+1. static：角色、规则、工具 schema、输出格式——跨轮次逐字节不变
+2. volatile：工作流状态、RAG 上下文、迭代计数等每轮变化的内容，始终追加在最后
+
+- StablePrompt：两段式提示词，text 为最终文本
+- PromptRenderCache：缓存 static 段的渲染结果（同样的输入返回同一字符串）
+- PromptPrefixMetrics：记录每次请求的可缓存前缀长度，以及同一来源 static 段
+  发生变化（缓存失效）的次数
+
+创建日期：2026-10-18
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StablePrompt:
+    """两段式提示词：固定前缀 + 易变后缀
+
+    属性：
+        static: 跨轮次逐字节不变的前缀
+        volatile: 每轮变化的内容（为空时 text 即 static）
+        separator: 两段之间的分隔符
+    """
+
+    static: str
+    volatile: str = ""
+    separator: str = "\n\n"
+
+    @property
+    def text(self) -> str:
+        """最终提示词文本"""
+        if not self.volatile:
+            return self.static
+        if not self.static:
+            return self.volatile
+        return f"{self.static}{self.separator}{self.volatile}"
+
+    @property
+    def cacheable_prefix_chars(self) -> int:
+        """可被提供商前缀缓存复用的字符数"""
+        return len(self.static)
+
+
+class PromptRenderCache:
+    """static 段渲染结果的 LRU 缓存
+
+    Example:
+        >>> cache = PromptRenderCache(max_entries=128)
+        >>> static = cache.get_or_render(("role", "v1"), lambda: render_role())
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """初始化缓存
+
+        参数：
+            max_entries: 最多缓存的渲染结果数
+        """
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        """返回 key 对应的渲染结果，未命中时调用 render 并缓存"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cached
+
+        rendered = render()
+        with self._lock:
+            self._misses += 1
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+@dataclass
+class _SourceStats:
+    requests: int = 0
+    prefix_chars_total: int = 0
+    total_chars_total: int = 0
+    last_prefix_chars: int = 0
+    prefix_changes: int = 0
+    last_prefix_digest: str = ""
+
+
+class PromptPrefixMetrics:
+    """按来源统计每次请求的可缓存前缀长度
+
+    prefix_changes 统计同一来源相邻两次请求 static 段不一致的次数——非零说明有
+    易变内容混入了前缀，提供商侧的前缀缓存会失效。
+    """
+
+    def __init__(self) -> None:
+        self._sources: dict[str, _SourceStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, prompt: StablePrompt) -> dict[str, Any]:
+        """记录一次请求，返回本次请求的前缀指标"""
+        prefix_chars = prompt.cacheable_prefix_chars
+        total_chars = len(prompt.text)
+        digest = hashlib.sha256(prompt.static.encode("utf-8")).hexdigest()[:16]
+
+        with self._lock:
+            stats = self._sources.setdefault(source, _SourceStats())
+            if stats.last_prefix_digest and stats.last_prefix_digest != digest:
+                stats.prefix_changes += 1
+            stats.requests += 1
+            stats.prefix_chars_total += prefix_chars
+            stats.total_chars_total += total_chars
+            stats.last_prefix_chars = prefix_chars
+            stats.last_prefix_digest = digest
+
+        report = {
+            "source": source,
+            "prefix_chars": prefix_chars,
+            "total_chars": total_chars,
+            "prefix_ratio": prefix_chars / total_chars if total_chars else 0.0,
+        }
+        logger.debug(
+            f"Prompt prefix [{source}]: {prefix_chars}/{total_chars} chars cacheable "
+            f"({report['prefix_ratio']:.0%})"
+        )
+        return report
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._sources.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取各来源的前缀统计"""
+        with self._lock:
+            return {
+                source: {
+                    "requests": stats.requests,
+                    "last_prefix_chars": stats.last_prefix_chars,
+                    "avg_prefix_chars": stats.prefix_chars_total / stats.requests,
+                    "avg_prefix_ratio": (
+                        stats.prefix_chars_total / stats.total_chars_total
+                        if stats.total_chars_total
+                        else 0.0
+                    ),
+                    "prefix_changes": stats.prefix_changes,
+                }
+                for source, stats in self._sources.items()
+            }
+
+
+_prompt_prefix_metrics = PromptPrefixMetrics()
+
+
+def get_prompt_prefix_metrics() -> PromptPrefixMetrics:
+    """获取进程级的前缀指标记录器"""
+    return _prompt_prefix_metrics
+
+
+__all__ = [
+    "PromptPrefixMetrics",
+    "PromptRenderCache",
+    "StablePrompt",
+    "get_prompt_prefix_metrics",
+]
@@ -230,6 +230,8 @@ class ToolConcurrencyController:
         """
         self._config = config or ConcurrencyConfig()
         self._lock = asyncio.Lock()
+        # 与 _lock 共用同一把锁：槽位释放时唤醒 acquire_slot_wait 的等待者
+        self._slot_released = asyncio.Condition(self._lock)
 
         # 槽位管理
         self._active_slots: dict[str, ExecutionSlot] = {}
@@ -291,50 +293,104 @@ class ToolConcurrencyController:
             ExecutionSlot 或 None（被拒绝时）
         """
         async with self._lock:
-            # Workflow 节点不受限制
-            if caller_type == "workflow_node":
-                return self._create_slot(
+            return self._try_acquire_locked(
+                tool_name=tool_name,
+                caller_id=caller_id,
+                caller_type=caller_type,
+                bucket=bucket,
+                timeout=timeout,
+            )
+
+    async def acquire_slot_wait(
+        self,
+        tool_name: str,
+        caller_id: str,
+        caller_type: str,
+        bucket: str | None = None,
+        timeout: float | None = None,
+    ) -> ExecutionSlot:
+        """获取执行槽位，并发 / 分桶已满时等待其他槽位释放（而不是直接拒绝）
+
+        参数：
+            tool_name: 工具名称
+            caller_id: 调用者 ID
+            caller_type: 调用者类型
+            bucket: 分桶（可选）
+            timeout: 槽位超时时间（可选）
+
+        返回：
+            ExecutionSlot
+        """
+        async with self._slot_released:
+            while True:
+                slot = self._try_acquire_locked(
                     tool_name=tool_name,
                     caller_id=caller_id,
                     caller_type=caller_type,
                     bucket=bucket,
                     timeout=timeout,
-                    count_concurrent=False,
+                    count_rejected=False,
                 )
+                if slot is not None:
+                    return slot
+                await self._slot_released.wait()
 
-            # 检查是否达到并发限制
-            if self._metrics.current_concurrent >= self._config.max_concurrent:
-                self._metrics.total_rejected += 1
-                logger.debug(
-                    f"Slot rejected: concurrent={self._metrics.current_concurrent}, "
-                    f"max={self._config.max_concurrent}"
-                )
-                return None
-
-            # 检查分桶限制
-            actual_bucket = bucket or DEFAULT_BUCKET
-            if actual_bucket != DEFAULT_BUCKET:
-                bucket_limit = self._config.bucket_limits.get(actual_bucket)
-                if bucket_limit is not None:
-                    current_bucket_count = len(self._bucket_slots.get(actual_bucket, {}))
-                    if current_bucket_count >= bucket_limit:
-                        self._metrics.total_rejected += 1
-                        logger.debug(
-                            f"Bucket '{actual_bucket}' limit reached: "
-                            f"current={current_bucket_count}, limit={bucket_limit}"
-                        )
-                        return None
-
-            # 创建槽位
+    def _try_acquire_locked(
+        self,
+        tool_name: str,
+        caller_id: str,
+        caller_type: str,
+        bucket: str | None,
+        timeout: float | None,
+        count_rejected: bool = True,
+    ) -> ExecutionSlot | None:
+        """尝试获取槽位（调用方需持有 _lock）"""
+        # Workflow 节点不受限制
+        if caller_type == "workflow_node":
             return self._create_slot(
                 tool_name=tool_name,
                 caller_id=caller_id,
                 caller_type=caller_type,
                 bucket=bucket,
                 timeout=timeout,
-                count_concurrent=True,
+                count_concurrent=False,
             )
 
+        # 检查是否达到并发限制
+        if self._metrics.current_concurrent >= self._config.max_concurrent:
+            if count_rejected:
+                self._metrics.total_rejected += 1
+            logger.debug(
+                f"Slot rejected: concurrent={self._metrics.current_concurrent}, "
+                f"max={self._config.max_concurrent}"
+            )
+            return None
+
+        # 检查分桶限制
+        actual_bucket = bucket or DEFAULT_BUCKET
+        if actual_bucket != DEFAULT_BUCKET:
+            bucket_limit = self._config.bucket_limits.get(actual_bucket)
+            if bucket_limit is not None:
+                current_bucket_count = len(self._bucket_slots.get(actual_bucket, {}))
+                if current_bucket_count >= bucket_limit:
+                    if count_rejected:
+                        self._metrics.total_rejected += 1
+                    logger.debug(
+                        f"Bucket '{actual_bucket}' limit reached: "
+                        f"current={current_bucket_count}, limit={bucket_limit}"
+                    )
+                    return None
+
+        # 创建槽位
+        return self._create_slot(
+            tool_name=tool_name,
+            caller_id=caller_id,
+            caller_type=caller_type,
+            bucket=bucket,
+            timeout=timeout,
+            count_concurrent=True,
+        )
+
     def _create_slot(
         self,
         tool_name: str,
@@ -404,6 +460,7 @@ class ToolConcurrencyController:
             if slot.caller_type == "conversation_agent":
                 self._metrics.current_concurrent = max(0, self._metrics.current_concurrent - 1)
 
+            self._slot_released.notify_all()
             logger.debug(f"Slot released: {slot_id}, execution_time={execution_time:.3f}s")
             return execution_time
 
@@ -526,6 +583,8 @@ class ToolConcurrencyController:
                 cancelled.append(slot)
                 logger.warning(f"Slot cancelled due to timeout: {slot.slot_id}")
 
+            if cancelled:
+                self._slot_released.notify_all()
             return cancelled
 
     # =========================================================================
@@ -591,6 +650,7 @@ class ToolConcurrencyController:
             self._queue.clear()
             self._bucket_slots.clear()
             self._metrics = ConcurrencyMetrics()
+            self._slot_released.notify_all()
             logger.info("Concurrency controller reset")
 
 
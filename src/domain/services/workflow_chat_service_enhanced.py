@@ -24,11 +24,117 @@ from src.domain.exceptions import DomainError, DomainValidationError
 from src.domain.ports.chat_message_repository import ChatMessageRepository
 from src.domain.ports.tool_repository import ToolRepository
 from src.domain.ports.workflow_chat_llm import WorkflowChatLLM
+from src.domain.services.stable_prompt import (
+    PromptRenderCache,
+    StablePrompt,
+    get_prompt_prefix_metrics,
+)
 from src.domain.value_objects.node_type import NodeType
 from src.domain.value_objects.position import Position
 from src.domain.value_objects.workflow_modification_result import ModificationResult
 from src.domain.value_objects.workflow_status import WorkflowStatus
 
+# 系统提示词的固定部分（{tool_candidates} 为允许工具列表，其余内容不随轮次变化）
+_SYSTEM_PROMPT_STATIC_TEMPLATE = """你是一个工作流编辑助手。用户会告诉你如何修改工作流，你需要：
+
+1. 理解用户意图
+2. 识别用户的主要意图（add_node, delete_node, add_edge, modify_node等）
+3. 生成工作流修改指令
+4. 返回 JSON 格式的修改指令
+
+支持的节点类型：
+- start: 开始节点
+- end: 结束节点
+- httpRequest: HTTP 请求节点
+- transform: 数据转换节点
+- database: 数据库操作节点
+- conditional: 条件分支节点
+- loop: 循环节点
+- python: Python 代码执行节点
+- textModel: LLM 调用节点（文本）
+- prompt: 提示词节点
+- file: 文件操作节点
+- notification: 消息通知节点
+- tool: 工具节点（必须在 config.tool_id 指定 Tool ID）
+
+工具节点约束：
+- 工具节点（type="tool"）必须包含 config.tool_id，且 tool_id 必须来自"允许工具列表"
+- 严禁把工具 name 当作 tool_id；严禁根据 name 猜测/映射 tool_id
+- 如果用户只描述了工具名称/功能但无法确定 tool_id，请返回 intent 为 "ask_clarification" 并在 ai_message 中要求用户提供 tool_id
+
+允许工具列表（仅 id/name/category/description，不包含任何实现配置）：
+{tool_candidates}
+
+返回格式（JSON）：
+{
+  "intent": "add_node|delete_node|add_edge|delete_edge|modify_node|ask_clarification",
+  "confidence": 0.95,
+  "action": "add_node" | "delete_node" | "add_edge" | "delete_edge" | "modify_node",
+  "nodes_to_add": [
+    {
+      "type": "httpRequest",
+      "name": "节点名称",
+      "config": {},
+      "position": {"x": 100, "y": 100}
+    }
+  ],
+  "nodes_to_delete": ["node_id"],
+  "nodes_to_update": [
+    {
+      "id": "node_id",
+      "name": "可选：新名称",
+      "position": {"x": 120, "y": 140},
+      "config_patch": {}
+    }
+  ],
+  "edges_to_add": [
+    {
+      "source": "node_id_1",
+      "target": "node_id_2",
+      "condition": null
+    }
+  ],
+  "edges_to_delete": ["edge_id"],
+  "edges_to_update": [
+    {
+      "id": "edge_id",
+      "condition": "可选：条件表达式或 null"
+    }
+  ],
+  "ai_message": "我已经添加了一个HTTP节点用于获取天气数据",
+  "react_steps": [
+    {
+      "step": 1,
+      "thought": "用户需要添加HTTP节点来处理HTTP请求",
+      "action": {
+        "type": "add_node",
+        "node": {
+          "type": "httpRequest",
+          "name": "节点名称",
+          "config": {},
+          "position": {"x": 100, "y": 100}
+        }
+      },
+      "observation": "HTTP请求节点已成功添加"
+    }
+  ]
+}
+
+要求：
+- intent 字段必须包含用户的主要意图
+- confidence 字段表示你对这个意图的信心度（0-1）
+- 新节点的位置应该合理（避免重叠）
+- 添加节点时通常需要同时添加边
+- 修改节点配置必须优先使用 nodes_to_update.config_patch；如确需整体替换可使用 nodes_to_update.config
+- 删除节点时需要同时删除相关的边
+- ai_message 应该简洁地描述做了什么修改
+- react_steps 字段包含ReAct推理步骤（思考→行动→观察），用于展示AI的推理过程
+- 每个react_step应包含：step（步骤号）、thought（思考内容）、action（执行的操作）、observation（执行结果的观察）
+- 如果无法理解用户意图，设置 intent 为 "ask_clarification"，react_steps 可以为空"""
+
+# 按工具列表缓存渲染后的固定部分
+_SYSTEM_PROMPT_RENDER_CACHE = PromptRenderCache(max_entries=32)
+
 
 def extract_main_subgraph(workflow: Workflow) -> tuple[set[str], set[str]]:
     """提取 start->end 主连通子图（纯函数）
@@ -451,8 +557,10 @@ class EnhancedWorkflowChatService:
                 # RAG检索失败时不中断流程，仅记录
                 print(f"RAG检索失败: {str(e)}")
 
-        # 1. 构造提示词（包含历史上下文和RAG上下文）
-        system_prompt = self._build_system_prompt(workflow, rag_context)
+        # 1. 构造提示词（稳定前缀在前，工作流状态与 RAG 上下文在后）
+        stable_prompt = self._build_stable_system_prompt(workflow, rag_context)
+        get_prompt_prefix_metrics().record("workflow_chat_enhanced", stable_prompt)
+        system_prompt = stable_prompt.text
         user_prompt = self._build_user_prompt_with_context(user_message)
 
         # 2. 调用 LLM 解析用户意图
@@ -561,6 +669,23 @@ class EnhancedWorkflowChatService:
         返回：
             系统提示词
         """
+        return self._build_stable_system_prompt(workflow, rag_context).text
+
+    def _build_stable_system_prompt(
+        self, workflow: Workflow, rag_context: str = ""
+    ) -> StablePrompt:
+        """构造稳定前缀布局的系统提示词
+
+        角色、节点类型、工具列表、返回格式在前（工具列表不变时逐字节一致，渲染结果走缓存），
+        当前工作流状态与 RAG 上下文追加在后。
+
+        参数：
+            workflow: 当前工作流
+            rag_context: RAG检索到的上下文（可选）
+
+        返回：
+            StablePrompt
+        """
         main_node_ids, main_edge_ids = extract_main_subgraph(workflow)
 
         # 序列化当前工作流状态（仅包含 start->end 主连通子图）
@@ -591,121 +716,27 @@ class EnhancedWorkflowChatService:
         }
 
         tool_candidates = self._build_tool_candidates_prompt()
-        base_prompt = f"""你是一个工作流编辑助手。用户会告诉你如何修改工作流，你需要：
-
-1. 理解用户意图
-2. 识别用户的主要意图（add_node, delete_node, add_edge, modify_node等）
-3. 生成工作流修改指令
-4. 返回 JSON 格式的修改指令
+        static = _SYSTEM_PROMPT_RENDER_CACHE.get_or_render(
+            tool_candidates,
+            lambda: _SYSTEM_PROMPT_STATIC_TEMPLATE.replace("{tool_candidates}", tool_candidates),
+        )
 
-当前工作流状态：
+        volatile = f"""当前工作流状态：
 ```json
 {json.dumps(workflow_state, ensure_ascii=False, indent=2)}
-```
-
-支持的节点类型：
-- start: 开始节点
-- end: 结束节点
-- httpRequest: HTTP 请求节点
-- transform: 数据转换节点
-- database: 数据库操作节点
-- conditional: 条件分支节点
-- loop: 循环节点
-- python: Python 代码执行节点
-- textModel: LLM 调用节点（文本）
-- prompt: 提示词节点
-- file: 文件操作节点
-- notification: 消息通知节点
-- tool: 工具节点（必须在 config.tool_id 指定 Tool ID）
-
-工具节点约束：
-- 工具节点（type="tool"）必须包含 config.tool_id，且 tool_id 必须来自"允许工具列表"
-- 严禁把工具 name 当作 tool_id；严禁根据 name 猜测/映射 tool_id
-- 如果用户只描述了工具名称/功能但无法确定 tool_id，请返回 intent 为 "ask_clarification" 并在 ai_message 中要求用户提供 tool_id
-
-允许工具列表（仅 id/name/category/description，不包含任何实现配置）：
-{tool_candidates}
-
-返回格式（JSON）：
-{{
-  "intent": "add_node|delete_node|add_edge|delete_edge|modify_node|ask_clarification",
-  "confidence": 0.95,
-  "action": "add_node" | "delete_node" | "add_edge" | "delete_edge" | "modify_node",
-  "nodes_to_add": [
-    {{
-      "type": "httpRequest",
-      "name": "节点名称",
-      "config": {{}},
-      "position": {{"x": 100, "y": 100}}
-    }}
-  ],
-  "nodes_to_delete": ["node_id"],
-  "nodes_to_update": [
-    {{
-      "id": "node_id",
-      "name": "可选：新名称",
-      "position": {{"x": 120, "y": 140}},
-      "config_patch": {{}}
-    }}
-  ],
-  "edges_to_add": [
-    {{
-      "source": "node_id_1",
-      "target": "node_id_2",
-      "condition": null
-    }}
-  ],
-  "edges_to_delete": ["edge_id"],
-  "edges_to_update": [
-    {{
-      "id": "edge_id",
-      "condition": "可选：条件表达式或 null"
-    }}
-  ],
-  "ai_message": "我已经添加了一个HTTP节点用于获取天气数据",
-  "react_steps": [
-    {{
-      "step": 1,
-      "thought": "用户需要添加HTTP节点来处理HTTP请求",
-      "action": {{
-        "type": "add_node",
-        "node": {{
-          "type": "httpRequest",
-          "name": "节点名称",
-          "config": {{}},
-          "position": {{"x": 100, "y": 100}}
-        }}
-      }},
-      "observation": "HTTP请求节点已成功添加"
-    }}
-  ]
-}}
-
-要求：
-- intent 字段必须包含用户的主要意图
-- confidence 字段表示你对这个意图的信心度（0-1）
-- 新节点的位置应该合理（避免重叠）
-- 添加节点时通常需要同时添加边
-- 修改节点配置必须优先使用 nodes_to_update.config_patch；如确需整体替换可使用 nodes_to_update.config
-- 删除节点时需要同时删除相关的边
-- ai_message 应该简洁地描述做了什么修改
-- react_steps 字段包含ReAct推理步骤（思考→行动→观察），用于展示AI的推理过程
-- 每个react_step应包含：step（步骤号）、thought（思考内容）、action（执行的操作）、observation（执行结果的观察）
-- 如果无法理解用户意图，设置 intent 为 "ask_clarification"，react_steps 可以为空
-"""
+```"""
 
-        # 如果有RAG上下文，添加到提示词中
+        # 如果有RAG上下文，追加在工作流状态之后
         if rag_context:
-            rag_prompt = f"""
+            volatile += f"""
 
 相关知识库内容：
 {rag_context}
 
 请结合以上知识库内容来回答用户的问题。如果知识库中有相关的工作流模板或最佳实践，请参考它们进行修改。
 """
-            base_prompt += rag_prompt
 
-        return base_prompt
+        return StablePrompt(static=static, volatile=volatile)
 
     def _build_user_prompt_with_context(self, user_message: str) -> str:
         """构造包含历史上下文的用户提示词
@@ -11,9 +11,54 @@ from src.domain.entities.node import Node
 from src.domain.entities.workflow import Workflow
 from src.domain.exceptions import DomainError
 from src.domain.ports.workflow_chat_llm import WorkflowChatLLM
+from src.domain.services.stable_prompt import StablePrompt, get_prompt_prefix_metrics
 from src.domain.value_objects.node_type import NodeType
 from src.domain.value_objects.position import Position
 
+# 系统提示词的固定部分（不含任何随轮次变化的内容）
+_SYSTEM_PROMPT_STATIC = """你是一个工作流编辑助手。用户会告诉你如何修改工作流，你需要：
+
+1. 理解用户意图
+2. 生成工作流修改指令
+3. 返回 JSON 格式的修改指令
+
+支持的节点类型：
+- start: 开始节点
+- end: 结束节点
+- http: HTTP 请求节点
+- transform: 数据转换节点
+- database: 数据库操作节点
+- llm: LLM 调用节点
+- python: Python 代码执行节点
+
+返回格式（JSON）：
+{
+  "action": "add_node" | "delete_node" | "add_edge" | "delete_edge" | "modify_node",
+  "nodes_to_add": [
+    {
+      "type": "http",
+      "name": "节点名称",
+      "config": {},
+      "position": {"x": 100, "y": 100}
+    }
+  ],
+  "nodes_to_delete": ["node_id"],
+  "edges_to_add": [
+    {
+      "source": "node_id_1",
+      "target": "node_id_2"
+    }
+  ],
+  "edges_to_delete": ["edge_id"],
+  "ai_message": "我已经添加了一个HTTP节点用于获取天气数据"
+}
+
+注意：
+- 新节点的位置应该合理（避免重叠）
+- 添加节点时通常需要同时添加边
+- 删除节点时需要同时删除相关的边
+- ai_message 应该简洁地描述做了什么修改"""
+
 
 class WorkflowChatServiceWithRAG:
     """集成RAG的工作流对话服务
@@ -96,8 +141,10 @@ class WorkflowChatServiceWithRAG:
                 print(f"RAG检索失败，继续使用原有逻辑: {str(e)}")
                 rag_context = ""
 
-        # 2. 构造提示词
-        system_prompt = self._build_system_prompt(workflow, rag_context)
+        # 2. 构造提示词（稳定前缀在前，工作流状态与 RAG 上下文在后）
+        stable_prompt = self._build_stable_system_prompt(workflow, rag_context)
+        get_prompt_prefix_metrics().record("workflow_chat_rag", stable_prompt)
+        system_prompt = stable_prompt.text
         user_prompt = self._build_user_prompt(user_message, rag_context)
 
         # 3. 调用 LLM 解析用户意图
@@ -158,6 +205,23 @@ class WorkflowChatServiceWithRAG:
         返回：
             系统提示词
         """
+        return self._build_stable_system_prompt(workflow, rag_context).text
+
+    def _build_stable_system_prompt(
+        self, workflow: Workflow, rag_context: str = ""
+    ) -> StablePrompt:
+        """构造稳定前缀布局的系统提示词
+
+        固定的角色、节点类型、返回格式在前（跨轮次逐字节一致，可命中提供商前缀缓存），
+        当前工作流状态与 RAG 上下文追加在后。
+
+        参数：
+            workflow: 当前工作流
+            rag_context: RAG检索到的上下文
+
+        返回：
+            StablePrompt
+        """
         # 序列化当前工作流状态
         workflow_state = {
             "name": workflow.name,
@@ -183,66 +247,21 @@ class WorkflowChatServiceWithRAG:
             ],
         }
 
-        base_prompt = f"""你是一个工作流编辑助手。用户会告诉你如何修改工作流，你需要：
-
-1. 理解用户意图
-2. 生成工作流修改指令
-3. 返回 JSON 格式的修改指令
-
-当前工作流状态：
+        volatile = f"""当前工作流状态：
 ```json
 {json.dumps(workflow_state, ensure_ascii=False, indent=2)}
-```
-
-支持的节点类型：
-- start: 开始节点
-- end: 结束节点
-- http: HTTP 请求节点
-- transform: 数据转换节点
-- database: 数据库操作节点
-- llm: LLM 调用节点
-- python: Python 代码执行节点
+```"""
 
-返回格式（JSON）：
-{{
-  "action": "add_node" | "delete_node" | "add_edge" | "delete_edge" | "modify_node",
-  "nodes_to_add": [
-    {{
-      "type": "http",
-      "name": "节点名称",
-      "config": {{}},
-      "position": {{"x": 100, "y": 100}}
-    }}
-  ],
-  "nodes_to_delete": ["node_id"],
-  "edges_to_add": [
-    {{
-      "source": "node_id_1",
-      "target": "node_id_2"
-    }}
-  ],
-  "edges_to_delete": ["edge_id"],
-  "ai_message": "我已经添加了一个HTTP节点用于获取天气数据"
-}}
-
-注意：
-- 新节点的位置应该合理（避免重叠）
-- 添加节点时通常需要同时添加边
-- 删除节点时需要同时删除相关的边
-- ai_message 应该简洁地描述做了什么修改"""
-
-        # 如果有RAG上下文，添加到提示词中
+        # 如果有RAG上下文，追加在工作流状态之后
         if rag_context:
-            rag_prompt = f"""
+            volatile += f"""
 
 相关知识库内容：
 {rag_context}
 
 请结合以上知识库内容来回答用户的问题。如果知识库中有相关的工作流模板或最佳实践，请参考它们进行修改。"""
 
-            base_prompt += rag_prompt
-
-        return base_prompt
+        return StablePrompt(static=_SYSTEM_PROMPT_STATIC, volatile=volatile)
 
     def _build_user_prompt(self, user_message: str, rag_context: str = "") -> str:
         """构造用户提示词
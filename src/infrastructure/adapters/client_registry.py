@@ -0,0 +1,221 @@
+"""ClientRegistry - 进程级共享的 LLM / HTTP 客户端池
+
+每次节点执行都新建 `AsyncOpenAI` / `httpx.AsyncClient` 会让每个请求都重新做
+DNS 解析、TCP + TLS 握手，且拿不到 keep-alive。这里按
+(provider, base_url, 凭据指纹) 复用客户端：
+
+- HTTP：一个调优过连接上限 / keep-alive 的 httpx.AsyncClient（安装 h2 时启用 HTTP/2）
+- LLM：每组 (provider, base_url, api_key) 一个 SDK 客户端，底层使用独立的连接池
+- 生命周期：FastAPI lifespan 关闭时调用 aclose() 释放所有连接
+- 事件循环：httpx 连接绑定到创建时的事件循环，客户端按事件循环分别缓存（主循环与调度器
+  线程循环各用各的，互不关闭）；某个循环关闭后（脚本 / 测试 / 线程退出），它的客户端在下次
+  获取时被移除并尽力关闭
+- Cookie：共享客户端不保存任何 Cookie，避免一个工作流拿到的会话被另一个工作流 / 租户带上
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+from collections.abc import Callable
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# LLM 响应可能很长，读超时按 SDK 默认（10 分钟）；连接超时要短，尽快失败
+_LLM_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+class _RejectAllCookiesPolicy(DefaultCookiePolicy):
+    """拒绝保存和回传任何 Cookie"""
+
+    def set_ok(self, cookie: Any, request: Any) -> bool:
+        return False
+
+    def return_ok(self, cookie: Any, request: Any) -> bool:
+        return False
+
+
+def _no_cookie_jar() -> CookieJar:
+    """共享客户端使用的 Cookie jar（不保存响应中的 Set-Cookie）
+
+    需要 Cookie 的调用方请在每次请求的 headers 中显式传入。
+    """
+    return CookieJar(policy=_RejectAllCookiesPolicy())
+
+
+def _fingerprint(secret: str | None) -> str:
+    """凭据指纹（不把明文 key 保存在注册表键里）"""
+    if not secret:
+        return ""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:16]
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ClientRegistry:
+    """按 (provider, base_url, 凭据) 复用的客户端注册表
+
+    Example:
+        >>> registry = ClientRegistry(max_connections=100)
+        >>> client = registry.http_client()
+        >>> response = await client.get("https://example.com", timeout=10)
+        >>> openai = registry.openai_client(api_key="sk-...")
+        >>> await registry.aclose()
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool | None = None,
+    ):
+        """初始化注册表
+
+        参数：
+            max_connections: 单个连接池的最大连接数
+            max_keepalive_connections: 单个连接池保持的空闲连接数
+            keepalive_expiry: 空闲连接保活时间（秒）
+            http2: 是否启用 HTTP/2；None 表示安装了 h2 时自动启用
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        # 事件循环 -> (provider, base_url, 凭据指纹) -> 客户端；None 为在事件循环外创建的客户端
+        self._clients: dict[asyncio.AbstractEventLoop | None, dict[tuple[str, ...], Any]] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._closing: set[asyncio.Task[None]] = set()
+
+    # ==================== 客户端获取 ====================
+
+    def http_client(self, base_url: str | None = None) -> httpx.AsyncClient:
+        """获取共享的 httpx.AsyncClient（超时请在每次请求时传入）"""
+        return self._get(
+            ("http", base_url or "", ""),
+            lambda: self._new_httpx_client(base_url=base_url or "", cookies=_no_cookie_jar()),
+        )
+
+    def openai_client(self, api_key: str | None, base_url: str | None = None) -> Any:
+        """获取共享的 AsyncOpenAI 客户端"""
+        from openai import AsyncOpenAI
+
+        def factory() -> Any:
+            kwargs: dict[str, Any] = {"api_key": api_key, "http_client": self._new_llm_client()}
+            if base_url:
+                kwargs["base_url"] = base_url
+            return AsyncOpenAI(**kwargs)
+
+        return self._get(("openai", base_url or "", _fingerprint(api_key)), factory)
+
+    def anthropic_client(self, api_key: str | None, base_url: str | None = None) -> Any:
+        """获取共享的 AsyncAnthropic 客户端"""
+        from anthropic import AsyncAnthropic
+
+        def factory() -> Any:
+            kwargs: dict[str, Any] = {"api_key": api_key, "http_client": self._new_llm_client()}
+            if base_url:
+                kwargs["base_url"] = base_url
+            return AsyncAnthropic(**kwargs)
+
+        return self._get(("anthropic", base_url or "", _fingerprint(api_key)), factory)
+
+    # ==================== 生命周期 ====================
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的客户端并释放连接（FastAPI lifespan 关闭时调用）
+
+        其他仍在运行的事件循环的客户端保持可用（由各自的循环关闭，或在循环关闭后被移除）。
+        """
+        loop = _running_loop()
+        with self._lock:
+            clients = list(self._clients.pop(loop, {}).values())
+            clients.extend(self._clients.pop(None, {}).values())
+            stale = self._evict_closed_loops()
+        for client in clients:
+            await _aclose_client(client)
+        for client in stale:
+            await _aclose_quietly(client)
+
+    def get_stats(self) -> dict:
+        """获取注册表统计指标"""
+        with self._lock:
+            return {
+                "clients": sum(len(clients) for clients in self._clients.values()),
+                "created": self._created,
+                "reused": self._reused,
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _get(self, key: tuple[str, ...], factory: Callable[[], Any]) -> Any:
+        loop = _running_loop()
+        with self._lock:
+            stale = self._evict_closed_loops()
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is not None:
+                self._reused += 1
+            else:
+                client = clients[key] = factory()
+                self._created += 1
+        if stale and loop is not None:
+            self._close_stale(stale, loop)
+        return client
+
+    def _evict_closed_loops(self) -> list[Any]:
+        """移除已关闭事件循环的客户端（调用方持有 self._lock），返回被移除的客户端"""
+        stale: list[Any] = []
+        for loop in [loop for loop in self._clients if loop is not None and loop.is_closed()]:
+            stale.extend(self._clients.pop(loop).values())
+        return stale
+
+    def _close_stale(self, clients: list[Any], loop: asyncio.AbstractEventLoop) -> None:
+        """在当前循环中尽力关闭已关闭事件循环遗留的客户端（连接已不可用，忽略错误）"""
+        for client in clients:
+            task = loop.create_task(_aclose_quietly(client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def _new_httpx_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        return httpx.AsyncClient(limits=self.limits, http2=self.http2, **kwargs)
+
+    def _new_llm_client(self) -> httpx.AsyncClient:
+        return self._new_httpx_client(
+            timeout=_LLM_TIMEOUT, follow_redirects=True, cookies=_no_cookie_jar()
+        )
+
+
+async def _aclose_quietly(client: Any) -> None:
+    try:
+        await _aclose_client(client)
+    except Exception as exc:  # noqa: BLE001 - 绑定在已关闭循环上的连接可能无法正常关闭
+        logger.debug(f"Failed to close stale client: {exc}")
+
+
+async def _aclose_client(client: Any) -> None:
+    close = getattr(client, "aclose", None) or getattr(client, "close", None)
+    if close is None:
+        return
+    result = close()
+    if asyncio.iscoroutine(result):
+        await result
@@ -11,7 +11,12 @@
 - 真实外部服务调用
 """
 
-from typing import Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from src.infrastructure.adapters.client_registry import ClientRegistry
 
 
 class HTTPHttpxAdapter:
@@ -20,6 +25,14 @@ class HTTPHttpxAdapter:
     模式C (Full-real)的核心组件。
     """
 
+    def __init__(self, client_registry: ClientRegistry | None = None) -> None:
+        """初始化Httpx Adapter.
+
+        参数:
+            client_registry: 进程级客户端注册表(可选,注入时复用keep-alive连接池)
+        """
+        self.client_registry = client_registry
+
     async def request(
         self,
         method: str,
@@ -51,19 +64,28 @@ class HTTPHttpxAdapter:
         import httpx
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.request(
+            if self.client_registry is not None:
+                response = await self.client_registry.http_client().request(
                     method=method.upper(),
                     url=url,
                     headers=headers,
                     json=json_body,
+                    timeout=timeout,
                 )
-
-                # 检查HTTP状态码
-                response.raise_for_status()
-
-                # 解析JSON响应
-                return response.json()
+            else:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    response = await client.request(
+                        method=method.upper(),
+                        url=url,
+                        headers=headers,
+                        json=json_body,
+                    )
+
+            # 检查HTTP状态码
+            response.raise_for_status()
+
+            # 解析JSON响应
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             # HTTP错误(4xx/5xx)
@@ -4,6 +4,9 @@
 - 调用OpenAI Chat Completions API
 - 支持同步和流式生成
 - 提供生产级错误处理
+- 可选响应缓存：确定性请求（temperature <= 0）命中时不走网络，流式调用方得到回放的流
+- 在途请求合并：并发的相同请求只调用一次API，结果/流分发给所有调用方（cache=False 时不合并）
+- 可选客户端限流：上游调用按模型排队（令牌桶 + AIMD 并发 + 优先级通道），流式调用在整个流期间占用并发
 
 适用场景:
 - 生产环境
@@ -14,6 +17,16 @@
 from collections.abc import AsyncIterator
 from typing import Any
 
+from src.infrastructure.adapters.client_registry import ClientRegistry
+from src.infrastructure.adapters.llm_rate_limiter import LLMRateLimiter, is_rate_limit_error
+from src.infrastructure.adapters.llm_response_cache import (
+    LLMResponseCache,
+    llm_cache_key,
+    replay_stream,
+)
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.lc_adapters.token_counter import estimate_tokens
+
 
 class LLMOpenAIAdapter:
     """LLM OpenAI实现 - 真实API调用.
@@ -26,6 +39,9 @@ class LLMOpenAIAdapter:
         api_key: str,
         model: str = "gpt-4o-mini",
         base_url: str = "https://api.openai.com/v1",
+        response_cache: LLMResponseCache | None = None,
+        client_registry: ClientRegistry | None = None,
+        rate_limiter: LLMRateLimiter | None = None,
     ) -> None:
         """初始化OpenAI Adapter.
 
@@ -33,6 +49,9 @@ class LLMOpenAIAdapter:
             api_key: OpenAI API密钥
             model: 模型名称(默认gpt-4o-mini)
             base_url: API基础URL(支持自定义端点)
+            response_cache: LLM响应缓存(可选)
+            client_registry: 进程级客户端注册表(可选,注入时与LLM节点共享连接池)
+            rate_limiter: LLM客户端限流器(可选)
 
         注意:
             使用AsyncOpenAI而非OpenAI,确保异步一致性
@@ -45,8 +64,14 @@ class LLMOpenAIAdapter:
                 "OpenAI API key is required. Please set OPENAI_API_KEY in your .env file."
             )
 
-        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        if client_registry is not None:
+            self.client = client_registry.openai_client(api_key, base_url=base_url)
+        else:
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
         self.model = model
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter
+        self.single_flight = SingleFlight()
 
     async def generate(
         self,
@@ -62,7 +87,8 @@ class LLMOpenAIAdapter:
             prompt: 提示词
             temperature: 温度参数(0.0-1.0)
             max_tokens: 最大token数
-            **kwargs: 其他OpenAI参数(如top_p, frequency_penalty等)
+            **kwargs: 其他OpenAI参数(如top_p, frequency_penalty等);
+                cache=True/False 强制缓存/绕过缓存, cache_ttl_seconds 指定缓存TTL
 
         返回:
             LLM生成的文本内容
@@ -72,21 +98,13 @@ class LLMOpenAIAdapter:
             openai.RateLimitError: 超过速率限制
             openai.AuthenticationError: 认证失败
         """
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            **kwargs,
+        request, key, cache_key, ttl = self._prepare(prompt, temperature, max_tokens, kwargs)
+        if key is None:
+            return await self._generate(prompt, request, None, None)
+        return await self.single_flight.do(
+            key, lambda: self._generate(prompt, request, cache_key, ttl)
         )
 
-        # 提取生成内容
-        content = response.choices[0].message.content
-        if content is None:
-            raise RuntimeError(f"OpenAI returned empty content. Response: {response}")
-
-        return content
-
     async def generate_streaming(
         self,
         prompt: str,
@@ -104,22 +122,153 @@ class LLMOpenAIAdapter:
             **kwargs: 其他OpenAI参数
 
         生成:
-            文本片段(delta), 逐步返回生成内容
+            文本片段(delta), 逐步返回生成内容; 缓存命中时回放录制的分片
 
         异常:
             openai.APIError: API调用失败
             openai.RateLimitError: 超过速率限制
         """
-        stream = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True,
-            **kwargs,
-        )
+        request, key, cache_key, ttl = self._prepare(prompt, temperature, max_tokens, kwargs)
+        if key is None:
+            stream = self._stream(prompt, request, None, None)
+        else:
+            stream = self.single_flight.stream(
+                key, lambda: self._stream(prompt, request, cache_key, ttl)
+            )
+        async for delta in stream:
+            yield delta
+
+    async def _generate(
+        self,
+        prompt: str,
+        request: dict[str, Any],
+        cache_key: str | None,
+        ttl: float | None,
+    ) -> str:
+        """查缓存 → 调用API → 写缓存(并发的相同请求只执行一次)."""
+        if cache_key is not None:
+            cached = await self.response_cache.aget(cache_key)  # type: ignore[union-attr]
+            if cached is not None:
+                return cached.content
+
+        if self.rate_limiter is None:
+            response = await self.client.chat.completions.create(**request)
+        else:
+            response = await self.rate_limiter.run(
+                "openai",
+                request["model"],
+                lambda: self.client.chat.completions.create(**request),
+                messages=request["messages"],
+                max_tokens=request["max_tokens"],
+                usage=lambda r: getattr(getattr(r, "usage", None), "total_tokens", None),
+            )
+
+        # 提取生成内容
+        content = response.choices[0].message.content
+        if content is None:
+            raise RuntimeError(f"OpenAI returned empty content. Response: {response}")
+
+        if cache_key is not None:
+            usage = getattr(response, "usage", None)
+            await self.response_cache.aput(  # type: ignore[union-attr]
+                cache_key,
+                content,
+                prompt_tokens=getattr(usage, "prompt_tokens", None) or estimate_tokens(prompt),
+                completion_tokens=(
+                    getattr(usage, "completion_tokens", None) or estimate_tokens(content)
+                ),
+                ttl_seconds=ttl,
+            )
+        return content
+
+    async def _stream(
+        self,
+        prompt: str,
+        request: dict[str, Any],
+        cache_key: str | None,
+        ttl: float | None,
+    ) -> AsyncIterator[str]:
+        """上游流(缓存命中时回放),完整结束后写入缓存."""
+        if cache_key is not None:
+            cached = await self.response_cache.aget(cache_key)  # type: ignore[union-attr]
+            if cached is not None:
+                async for delta in replay_stream(cached):
+                    yield delta
+                return
+
+        permit = None
+        if self.rate_limiter is not None:
+            permit = await self.rate_limiter.acquire(
+                "openai",
+                request["model"],
+                messages=request["messages"],
+                max_tokens=request["max_tokens"],
+            )
 
         # 流式返回delta
-        async for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        chunks: list[str] = []
+        try:
+            stream = await self.client.chat.completions.create(stream=True, **request)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    chunks.append(delta)
+                    yield delta
+        except BaseException as e:
+            if permit is not None:
+                permit.limiter.release(
+                    permit,
+                    rate_limited=isinstance(e, Exception) and is_rate_limit_error(e),
+                    failed=True,
+                )
+            raise
+        if permit is not None:
+            permit.limiter.release(permit)
+
+        # 只缓存完整结束的流(所有调用方中途放弃时不会执行到这里)
+        if cache_key is not None and chunks:
+            content = "".join(chunks)
+            await self.response_cache.aput(  # type: ignore[union-attr]
+                cache_key,
+                content,
+                chunks=chunks,
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(content),
+                ttl_seconds=ttl,
+            )
+
+    def _prepare(
+        self, prompt: str, temperature: float, max_tokens: int, kwargs: dict[str, Any]
+    ) -> tuple[dict[str, Any], str | None, str | None, float | None]:
+        """构建请求参数并解析缓存策略.
+
+        返回:
+            (OpenAI请求参数, 在途合并键(None表示绕过), 缓存键(None表示不走缓存), 缓存TTL)
+        """
+        # 缓存控制参数不透传给 OpenAI
+        cache_flag = kwargs.pop("cache", None)
+        ttl = kwargs.pop("cache_ttl_seconds", None)
+        request: dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **kwargs,
+        }
+
+        if cache_flag is False:
+            if self.response_cache is not None:
+                self.response_cache.record_bypass()
+            return request, None, None, None
+        if cache_flag is not True and temperature > 0:
+            # 非确定性请求不缓存也不合并: 每个调用方应得到独立的采样结果
+            return request, None, None, None
+        key = llm_cache_key(
+            "openai",
+            request,
+            base_url=getattr(self.client, "base_url", None),
+            api_key=getattr(self.client, "api_key", None),
+        )
+        if self.response_cache is None:
+            return request, key, None, None
+        return request, key, key, ttl
@@ -0,0 +1,540 @@
+"""LLMRateLimiter - 按提供商/模型的客户端自适应限流与并发控制
+
+没有客户端限流时，负载一高就会触发提供商 429，ReAct 循环 / LLM 节点直接失败。
+这里在发请求前排队，把失败变成等待：
+
+- 令牌桶：requests/min 与 tokens/min 两个桶（token 数按 TokenCounter 预估 prompt + max_tokens，
+  调用完成后按实际用量修正）
+- AIMD 并发上限：成功时加性增长（每个窗口 +1），遇到 429 乘性减半，
+  配置了延迟目标时超时响应也会温和下调
+- 优先级通道：交互式对话 > API 触发的工作流 > 定时工作流，高优先级请求先获得配额
+- 重试：run() 遇到 429 时按指数退避（或 Retry-After）重新排队
+
+配置来源（LLMProvider.config["rate_limits"]）：
+    {
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200000,
+        "max_concurrency": 16,
+        "latency_target_seconds": 20,
+        "models": {"gpt-4o": {"requests_per_minute": 100}}
+    }
+模型级配置覆盖提供商级配置，提供商级覆盖全局默认值；0 表示不限。
+
+限流器是进程级共享的，调度器在各自线程的事件循环中也会调用：状态由 threading.Lock 保护，
+放行时通过等待方 future 所属循环的 call_soon_threadsafe 唤醒，补充定时器也挂在等待方的循环上。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from enum import IntEnum
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 429 后同一并发窗口内只减半一次
+_DECREASE_COOLDOWN_SECONDS = 1.0
+# 无 Retry-After 时的重试退避基数 / 上限（秒）
+_RETRY_BACKOFF_BASE = 0.5
+_RETRY_BACKOFF_MAX = 8.0
+
+
+class LLMPriority(IntEnum):
+    """优先级通道（数值越小越优先）"""
+
+    INTERACTIVE = 0
+    WORKFLOW = 1
+    SCHEDULED = 2
+
+
+_current_priority: ContextVar[LLMPriority] = ContextVar(
+    "llm_priority", default=LLMPriority.WORKFLOW
+)
+
+
+@contextmanager
+def llm_priority(priority: LLMPriority) -> Iterator[None]:
+    """在当前上下文（及其创建的任务）中设置 LLM 调用的优先级通道"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> LLMPriority:
+    """当前上下文的优先级通道（默认 WORKFLOW）"""
+    return _current_priority.get()
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """判断异常是否为提供商限流（429）"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(error: BaseException) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """单个 provider/model 的限流配置（0 表示不限）"""
+
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    max_concurrency: int = 16
+    min_concurrency: int = 1
+    latency_target_seconds: float = 0
+
+    def merged(self, overrides: Mapping[str, Any] | None) -> RateLimits:
+        """用配置字典覆盖已知字段（忽略未知键与 None）"""
+        if not overrides:
+            return self
+        known = {f.name for f in fields(self)}
+        values = {
+            key: int(value) if key.endswith("concurrency") else float(value)
+            for key, value in overrides.items()
+            if key in known and value is not None
+        }
+        return replace(self, **values)
+
+
+class TokenBucket:
+    """按分钟速率匀速补充的令牌桶（桶容量为一分钟的配额）"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """消耗 amount 需要等待的秒数（0 表示可立即消耗）"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self._rate
+
+    def consume(self, amount: float) -> None:
+        """消耗令牌（修正实际用量时允许透支）"""
+        self._refill()
+        self._level -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class AIMDConcurrency:
+    """加性增 / 乘性减的并发上限"""
+
+    def __init__(self, limits: RateLimits, clock: Callable[[], float]):
+        self._min = max(1, limits.min_concurrency)
+        self._max = max(self._min, limits.max_concurrency)
+        self._latency_target = limits.latency_target_seconds
+        self._clock = clock
+        self._limit = float(self._max)
+        self._last_decrease = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return max(self._min, int(self._limit))
+
+    def on_success(self, latency: float) -> None:
+        if self._latency_target and latency > self._latency_target:
+            self._decrease(0.9)
+        else:
+            self._limit = min(self._max, self._limit + 1.0 / self._limit)
+
+    def on_rate_limited(self) -> None:
+        self._decrease(0.5)
+
+    def _decrease(self, factor: float) -> None:
+        now = self._clock()
+        if now - self._last_decrease < _DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self._min), self._limit * factor)
+
+
+@dataclass(eq=False)
+class Permit:
+    """一次获得的调用配额（释放时按实际结果调整限流状态）"""
+
+    limiter: ModelRateLimiter
+    tokens: float
+    started_at: float
+    released: bool = False
+
+
+class ModelRateLimiter:
+    """单个 provider/model 的限流器：令牌桶 + AIMD 并发 + 优先级队列"""
+
+    def __init__(self, limits: RateLimits, clock: Callable[[], float] = time.monotonic):
+        self.limits = limits
+        self._clock = clock
+        self._requests = (
+            TokenBucket(limits.requests_per_minute, clock) if limits.requests_per_minute else None
+        )
+        self._tokens = (
+            TokenBucket(limits.tokens_per_minute, clock) if limits.tokens_per_minute else None
+        )
+        self._concurrency = AIMDConcurrency(limits, clock)
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[int, int, float, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._timer_at: float | None = None
+        self._in_flight = 0
+
+        # 监控指标
+        self._granted = 0
+        self._rate_limited = 0
+        self._wait_seconds = 0.0
+
+    @property
+    def needs_token_estimate(self) -> bool:
+        return self._tokens is not None
+
+    async def acquire(self, tokens: float = 0, priority: LLMPriority | None = None) -> Permit:
+        """排队获取一次配额"""
+        lane = current_llm_priority() if priority is None else priority
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queued_at = self._clock()
+        with self._lock:
+            heapq.heappush(self._waiters, (int(lane), next(self._seq), float(tokens), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已获得配额但调用方被取消：归还并发与令牌
+                self._finish(Permit(self, tokens, queued_at), refund=True)
+            self._dispatch()
+            raise
+        with self._lock:
+            self._wait_seconds += self._clock() - queued_at
+        return Permit(self, tokens, self._clock())
+
+    def release(
+        self,
+        permit: Permit,
+        *,
+        rate_limited: bool = False,
+        failed: bool = False,
+        actual_tokens: int | None = None,
+    ) -> None:
+        """释放配额并更新 AIMD 状态"""
+        with self._lock:
+            if permit.released:
+                return
+            if rate_limited:
+                self._rate_limited += 1
+                self._concurrency.on_rate_limited()
+            elif not failed:
+                self._concurrency.on_success(self._clock() - permit.started_at)
+            if self._tokens is not None and actual_tokens is not None:
+                delta = actual_tokens - permit.tokens
+                if delta > 0:
+                    self._tokens.consume(delta)
+                elif delta < 0:
+                    self._tokens.refund(-delta)
+        self._finish(permit, refund=False)
+        self._dispatch()
+
+    def get_stats(self) -> dict:
+        lanes = {lane.name.lower(): 0 for lane in LLMPriority}
+        with self._lock:
+            for lane, _, _, future in self._waiters:
+                if not future.done():
+                    lanes[LLMPriority(lane).name.lower()] += 1
+            return {
+                "in_flight": self._in_flight,
+                "concurrency_limit": self._concurrency.limit,
+                "queued": lanes,
+                "granted": self._granted,
+                "rate_limited": self._rate_limited,
+                "avg_wait_ms": (
+                    (self._wait_seconds / self._granted * 1000) if self._granted else 0.0
+                ),
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _finish(self, permit: Permit, *, refund: bool) -> None:
+        with self._lock:
+            if permit.released:
+                return
+            permit.released = True
+            self._in_flight -= 1
+            if refund:
+                if self._requests is not None:
+                    self._requests.refund(1)
+                if self._tokens is not None:
+                    self._tokens.refund(permit.tokens)
+
+    def _dispatch(self) -> None:
+        """按优先级依次放行队首请求，直到并发或令牌不足"""
+        granted: list[tuple[float, asyncio.Future[None]]] = []
+        timer: tuple[float, asyncio.Future[None]] | None = None
+        with self._lock:
+            while self._waiters:
+                lane, seq, tokens, future = self._waiters[0]
+                if future.done():
+                    heapq.heappop(self._waiters)
+                    continue
+                if self._in_flight >= self._concurrency.limit:
+                    break
+                wait = 0.0
+                if self._requests is not None:
+                    wait = self._requests.wait_time(1)
+                if self._tokens is not None:
+                    wait = max(wait, self._tokens.wait_time(tokens))
+                if wait > 0:
+                    deadline = self._clock() + wait
+                    # 已有更早（或同时）触发的定时器时无需再挂
+                    if self._timer_at is None or deadline < self._timer_at:
+                        self._timer_at = deadline
+                        timer = (wait, future)
+                    break
+                heapq.heappop(self._waiters)
+                if self._requests is not None:
+                    self._requests.consume(1)
+                if self._tokens is not None:
+                    self._tokens.consume(min(tokens, self._tokens.capacity))
+                self._in_flight += 1
+                self._granted += 1
+                granted.append((tokens, future))
+
+        # 唤醒在锁外进行：等待方可能属于其他线程的事件循环
+        for tokens, future in granted:
+            try:
+                future.get_loop().call_soon_threadsafe(self._deliver, future, tokens)
+            except RuntimeError:
+                # 等待方的事件循环已关闭
+                self._revoke(tokens)
+        if timer is not None:
+            self._schedule(*timer)
+
+    def _deliver(self, future: asyncio.Future[None], tokens: float) -> None:
+        """在等待方的事件循环中完成 future（等待方已取消时归还配额）"""
+        if future.done():
+            self._revoke(tokens)
+            return
+        future.set_result(None)
+
+    def _revoke(self, tokens: float) -> None:
+        self._finish(Permit(self, tokens, self._clock()), refund=True)
+        self._dispatch()
+
+    def _schedule(self, delay: float, future: asyncio.Future[None]) -> None:
+        """令牌不足时在补充后重新调度（定时器挂在队首等待方的事件循环上）"""
+        loop = future.get_loop()
+        try:
+            loop.call_soon_threadsafe(loop.call_later, delay, self._on_timer)
+        except RuntimeError:
+            with self._lock:
+                self._timer_at = None
+
+    def _on_timer(self) -> None:
+        # 被更早定时器取代的旧定时器触发时只会多调度一次，不会漏掉唤醒
+        with self._lock:
+            self._timer_at = None
+        self._dispatch()
+
+
+class LLMRateLimiter:
+    """按 (provider, model) 管理限流器的注册表
+
+    Example:
+        >>> limiter = LLMRateLimiter(RateLimits(max_concurrency=8))
+        >>> limiter.configure("openai", {"requests_per_minute": 500, "tokens_per_minute": 2e5})
+        >>> with llm_priority(LLMPriority.INTERACTIVE):
+        ...     content = await limiter.run("openai", "gpt-4o-mini", fetch, messages=messages)
+    """
+
+    def __init__(
+        self,
+        default_limits: RateLimits | None = None,
+        *,
+        max_retries: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初始化注册表
+
+        参数：
+            default_limits: 未单独配置的 provider/model 使用的默认限流
+            max_retries: run() 遇到 429 时的最大重试次数
+            clock: 单调时钟（测试可注入）
+        """
+        self.default_limits = default_limits or RateLimits()
+        self.max_retries = max_retries
+        self._clock = clock
+        self._provider_config: dict[str, Mapping[str, Any]] = {}
+        self._limiters: dict[tuple[str, str], ModelRateLimiter] = {}
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def configure(self, provider: str, config: Mapping[str, Any] | None) -> None:
+        """设置提供商的限流配置（已创建的限流器按新配置重建）"""
+        provider = provider.lower()
+        with self._lock:
+            self._provider_config[provider] = dict(config or {})
+            for key in [key for key in self._limiters if key[0] == provider]:
+                del self._limiters[key]
+
+    def configure_providers(self, providers: Iterable[Any]) -> int:
+        """从 LLMProvider 实体加载 config["rate_limits"]，返回加载的提供商数"""
+        count = 0
+        for provider in providers:
+            config = (getattr(provider, "config", None) or {}).get("rate_limits")
+            if config:
+                self.configure(provider.name, config)
+                count += 1
+        return count
+
+    def limits_for(self, provider: str, model: str) -> RateLimits:
+        config = self._provider_config.get(provider.lower(), {})
+        models = config.get("models") or {}
+        return self.default_limits.merged(config).merged(models.get(model))
+
+    def limiter(self, provider: str, model: str) -> ModelRateLimiter:
+        key = (provider.lower(), model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = ModelRateLimiter(self.limits_for(provider, model), self._clock)
+                self._limiters[key] = limiter
+            return limiter
+
+    async def acquire(
+        self,
+        provider: str,
+        model: str,
+        *,
+        messages: list[dict[str, Any]] | None = None,
+        max_tokens: int = 0,
+        priority: LLMPriority | None = None,
+    ) -> Permit:
+        """排队获取一次配额（用于流式等需要自行释放的场景，完成后调用 permit.limiter.release）"""
+        limiter = self.limiter(provider, model)
+        tokens = (
+            estimate_request_tokens(provider, model, messages or [], max_tokens)
+            if limiter.needs_token_estimate
+            else 0
+        )
+        return await limiter.acquire(tokens, priority)
+
+    async def run(
+        self,
+        provider: str,
+        model: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        messages: list[dict[str, Any]] | None = None,
+        max_tokens: int = 0,
+        priority: LLMPriority | None = None,
+        usage: Callable[[T], int | None] | None = None,
+    ) -> T:
+        """在限流下执行一次 LLM 调用（429 时退避后重新排队）
+
+        参数：
+            provider / model: 限流维度
+            fn: 实际发起请求的协程工厂（每次重试重新调用）
+            messages / max_tokens: 用于预估 token（仅在配置了 tokens/min 时计算）
+            priority: 优先级通道（默认取当前上下文）
+            usage: 从结果中提取实际 token 用量（用于修正令牌桶）
+        """
+        limiter = self.limiter(provider, model)
+        tokens = (
+            estimate_request_tokens(provider, model, messages or [], max_tokens)
+            if limiter.needs_token_estimate
+            else 0
+        )
+        attempt = 0
+        while True:
+            permit = await limiter.acquire(tokens, priority)
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                limiter.release(permit, failed=True)
+                raise
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    limiter.release(permit, failed=True)
+                    raise
+                limiter.release(permit, rate_limited=True)
+                if attempt >= self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e) or min(
+                    _RETRY_BACKOFF_MAX, _RETRY_BACKOFF_BASE * (2**attempt)
+                )
+                attempt += 1
+                self._retries += 1
+                logger.warning(
+                    f"LLM rate limited ({provider}/{model}), retry {attempt} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            limiter.release(permit, actual_tokens=usage(result) if usage else None)
+            return result
+
+    def get_stats(self) -> dict:
+        return {
+            "retries": self._retries,
+            "limiters": {
+                f"{provider}/{model}": limiter.get_stats()
+                for (provider, model), limiter in list(self._limiters.items())
+            },
+        }
+
+
+_estimate_failures: set[tuple[str, str]] = set()
+
+
+def estimate_request_tokens(
+    provider: str, model: str, messages: list[dict[str, Any]], max_tokens: int = 0
+) -> int:
+    """预估一次请求占用的 tokens/min 配额（prompt tokens + max_tokens）
+
+    TokenCounter 不可用（如 tiktoken 编码文件无法下载）时退化为字符估算，
+    且同一 provider/model 不再重复尝试。
+    """
+    from src.infrastructure.lc_adapters.token_counter import estimate_tokens, get_token_counter
+
+    key = (provider.lower(), model)
+    if key not in _estimate_failures:
+        try:
+            return get_token_counter(provider, model).count_messages(messages) + max_tokens
+        except Exception:  # noqa: BLE001 - 预估失败不影响调用
+            _estimate_failures.add(key)
+    text = "".join(str(message.get("content", "")) for message in messages)
+    return estimate_tokens(text) + max_tokens
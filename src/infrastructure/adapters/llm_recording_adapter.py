@@ -0,0 +1,199 @@
+"""LLM Recording Adapter - 录制真实LLM会话, 供LLMReplayAdapter回放.
+
+职责:
+- 包装任意LLMPort实现, 透传generate/generate_streaming
+- 记录prompt、响应、流式分块, 以及TTFT/token间隔/总耗时(毫秒)
+- 以JSONL格式(每行一条录制, LLMReplayAdapter可直接回放)追加写入录制文件
+
+每次调用完成后只追加一行, 且在线程中写入, 不阻塞事件循环, 也不随录制条数增长而变慢。
+录制文件是唯一存储: 内存中不保留录制, 查看(recordings)与导出(save)都从文件读回。
+
+用法:
+    recorder = LLMRecordingAdapter(real_llm, record_file="tests/fixtures/llm_recordings.jsonl")
+    await recorder.generate("...")  # 调用完成后追加一行
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any
+
+from src.domain.ports.llm_port import LLMPort
+from src.infrastructure.adapters.llm_replay_adapter import load_recordings
+
+
+class LLMRecordingAdapter:
+    """录制型LLM实现 - 透传调用并记录响应与时序."""
+
+    def __init__(
+        self,
+        inner: LLMPort,
+        *,
+        record_file: str | Path,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """初始化Recording Adapter.
+
+        参数:
+            inner: 被录制的真实LLM适配器
+            record_file: 录制文件路径(每次调用完成后追加一行; 已存在的录制会保留,
+                旧的JSON列表文件会先转换为JSONL)
+            clock: 计时函数(秒), 测试时可注入
+        """
+        self._inner = inner
+        self._record_file = Path(record_file)
+        self._clock = clock
+        self._write_lock = threading.Lock()
+
+        if self._is_json_list(self._record_file):
+            self._rewrite_as_jsonl(self._record_file)
+
+    def __getattr__(self, name: str) -> Any:
+        # 其余属性(model、close 等)透传给真实适配器
+        return getattr(self._inner, name)
+
+    @staticmethod
+    def _ms(seconds: float) -> float:
+        return round(seconds * 1000, 3)
+
+    @property
+    def recordings(self) -> list[dict[str, Any]]:
+        """从录制文件读回全部录制(按录制顺序; 仅用于查看, 不做缓存)."""
+        with self._write_lock:
+            if not self._record_file.exists():
+                return []
+            return load_recordings(self._record_file)
+
+    async def _append(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        await asyncio.to_thread(self._write_line, self._record_file, line)
+
+    def _write_line(self, path: Path, line: str) -> None:
+        with self._write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+    @staticmethod
+    def _is_json_list(path: Path) -> bool:
+        """只读取文件开头判断是否为旧的JSON列表格式(不加载整个文件)."""
+        if not path.exists():
+            return False
+        with path.open(encoding="utf-8") as f:
+            while chunk := f.read(4096):
+                stripped = chunk.lstrip()
+                if stripped:
+                    return stripped.startswith("[")
+        return False
+
+    @staticmethod
+    def _rewrite_as_jsonl(path: Path) -> None:
+        # 一次性迁移旧格式: JSON列表只能整体解析
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for record in load_recordings(path):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+
+    def save(self, path: str | Path) -> None:
+        """把录制文件导出为JSON列表(逐行流式转换, 先写临时文件再替换, 避免中途失败留下半个文件).
+
+        参数:
+            path: 目标文件路径
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        with self._write_lock, tmp.open("w", encoding="utf-8") as out:
+            out.write("[")
+            separator = "\n"
+            if self._record_file.exists():
+                with self._record_file.open(encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            out.write(separator + line.rstrip("\n"))
+                            separator = ",\n"
+            out.write("\n]\n")
+        os.replace(tmp, target)
+
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs: Any,
+    ) -> str:
+        """调用真实LLM并录制响应与总耗时.
+
+        参数:
+            prompt: 提示词
+            temperature: 透传
+            max_tokens: 透传
+            **kwargs: 透传
+
+        返回:
+            真实LLM的响应
+        """
+        started = self._clock()
+        response = await self._inner.generate(
+            prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        await self._append(
+            {
+                "prompt": prompt,
+                "response": response,
+                "latency_ms": self._ms(self._clock() - started),
+            }
+        )
+        return response
+
+    async def generate_streaming(
+        self,
+        prompt: str,
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        """调用真实LLM流式接口, 边透传边录制分块与时序.
+
+        流未完整结束(异常或调用方提前关闭)时不写入录制。
+
+        参数:
+            prompt: 提示词
+            temperature: 透传
+            max_tokens: 透传
+            **kwargs: 透传
+
+        生成:
+            真实LLM的响应分块
+        """
+        started = self._clock()
+        chunks: list[str] = []
+        arrivals: list[float] = []
+        async for chunk in self._inner.generate_streaming(
+            prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
+        ):
+            arrivals.append(self._clock())
+            chunks.append(chunk)
+            yield chunk
+
+        finished = self._clock()
+        await self._append(
+            {
+                "prompt": prompt,
+                "response": "".join(chunks),
+                "chunks": chunks,
+                "ttft_ms": self._ms(arrivals[0] - started) if arrivals else 0.0,
+                "inter_token_ms": [
+                    self._ms(later - earlier)
+                    for earlier, later in zip(arrivals, arrivals[1:], strict=False)
+                ],
+                "latency_ms": self._ms(finished - started),
+            }
+        )
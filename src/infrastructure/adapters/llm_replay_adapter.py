@@ -1,21 +1,100 @@
 """LLM Replay Adapter - 回放预录制的LLM响应.
 
 职责:
-- 从JSON文件加载预录制的prompt-response对
+- 从JSON/JSONL文件加载预录制的prompt-response对
+- 按prompt哈希索引查找录制(可选归一化prompt, 屏蔽UUID/时间戳等易变内容)
+- 按录制时的首token延迟(TTFT)与token间隔复现流式节奏
 - 实现确定性回放(无LLM调用,无成本)
-- 适用于需要真实但可控的LLM输出的场景
+
+录制格式(JSON列表, 或每行一条录制的JSONL; 除prompt/response外均可选):
+    [
+        {
+            "prompt": "...",
+            "response": "...",
+            "chunks": ["...", "..."],        # 流式分块, 缺省为[response]
+            "ttft_ms": 420.0,                # 首个chunk前的等待
+            "inter_token_ms": [35.0, 41.2],  # 相邻chunk间隔(也可为单个数值)
+            "latency_ms": 1800.0             # 非流式调用总耗时
+        }
+    ]
+
+同一prompt有多条录制时按录制顺序轮转返回(复现多轮会话中的重复prompt)。
 
 适用场景:
 - 集成回归测试(Hybrid模式)
 - 需要特定LLM输出的测试用例
+- 无网络环境下的流式接口压测(配合LLMRecordingAdapter录制)
 - 降低测试成本
 """
 
+import asyncio
+import hashlib
 import json
+import re
 from collections.abc import AsyncIterator
 from pathlib import Path
 from typing import Any
 
+_WHITESPACE = re.compile(r"\s+")
+_UUID = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+)
+_ISO_TIMESTAMP = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """归一化prompt: 折叠空白, 并把UUID/ISO时间戳替换为占位符.
+
+    参数:
+        prompt: 原始提示词
+
+    返回:
+        归一化后的提示词(录制与回放两侧使用同一规则)
+    """
+    text = _UUID.sub("<uuid>", prompt)
+    text = _ISO_TIMESTAMP.sub("<timestamp>", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def load_recordings(path: Path) -> list[dict[str, Any]]:
+    """读取录制文件(JSON列表或JSONL, 按首个非空白字符是否为 "[" 区分).
+
+    参数:
+        path: 录制文件路径
+
+    返回:
+        录制列表(保持录制顺序)
+
+    异常:
+        json.JSONDecodeError: 录制文件格式无效
+        ValueError: JSON内容不是列表
+    """
+    text = path.read_text(encoding="utf-8")
+    if not text.lstrip().startswith("["):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    recordings = json.loads(text)
+    if not isinstance(recordings, list):
+        raise ValueError(f"Invalid replay file format: expected list, got {type(recordings)}")
+    return recordings
+
+
+def prompt_key(prompt: str, *, normalize: bool = False) -> str:
+    """计算录制索引键(prompt的SHA-256).
+
+    参数:
+        prompt: 提示词
+        normalize: 是否先归一化
+
+    返回:
+        十六进制哈希
+    """
+    if normalize:
+        prompt = normalize_prompt(prompt)
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
 
 class LLMReplayAdapter:
     """LLM Replay实现 - 回放录制的响应.
@@ -23,16 +102,26 @@ class LLMReplayAdapter:
     模式B (Hybrid)的核心组件。
     """
 
-    def __init__(self, replay_file: str) -> None:
+    def __init__(
+        self,
+        replay_file: str,
+        *,
+        normalize_prompts: bool = False,
+        time_scale: float = 1.0,
+        default_response: str | None = None,
+    ) -> None:
         """初始化Replay Adapter.
 
         参数:
-            replay_file: 录制文件路径(JSON格式)
-                        格式: [{"prompt": "...", "response": "..."}, ...]
+            replay_file: 录制文件路径(JSON或JSONL格式, 见模块文档)
+            normalize_prompts: 是否按归一化prompt匹配
+            time_scale: 录制耗时的回放倍率(0 表示不等待, 1.0 表示按原速复现)
+            default_response: 未命中录制时返回的响应(None 表示抛出 ValueError)
 
         异常:
             FileNotFoundError: 录制文件不存在
             json.JSONDecodeError: 录制文件格式无效
+            ValueError: JSON内容不是列表
         """
         replay_path = Path(replay_file)
         if not replay_path.exists():
@@ -41,13 +130,61 @@ class LLMReplayAdapter:
                 f"Please create the file or check LLM_REPLAY_FILE configuration."
             )
 
-        with replay_path.open(encoding="utf-8") as f:
-            self.recordings: list[dict[str, str]] = json.load(f)
+        self.recordings: list[dict[str, Any]] = load_recordings(replay_path)
 
-        if not isinstance(self.recordings, list):
-            raise ValueError(
-                f"Invalid replay file format: expected list, got {type(self.recordings)}"
-            )
+        self.normalize_prompts = normalize_prompts
+        self.time_scale = time_scale
+        self.default_response = default_response
+
+        # prompt哈希 -> 录制列表(保持录制顺序)
+        self._index: dict[str, list[dict[str, Any]]] = {}
+        for record in self.recordings:
+            prompt = record.get("prompt")
+            if isinstance(prompt, str):
+                key = prompt_key(prompt, normalize=normalize_prompts)
+                self._index.setdefault(key, []).append(record)
+        self._cursors: dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, prompt: str) -> dict[str, Any] | None:
+        """按prompt哈希查找录制, 同一prompt的多条录制轮转返回."""
+        key = prompt_key(prompt, normalize=self.normalize_prompts)
+        records = self._index.get(key)
+        if not records:
+            self._misses += 1
+            return None
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        self._hits += 1
+        return records[cursor % len(records)]
+
+    def _resolve(self, prompt: str) -> dict[str, Any]:
+        record = self._lookup(prompt)
+        if record is not None:
+            return record
+        if self.default_response is not None:
+            return {"response": self.default_response}
+
+        # 未找到匹配
+        raise ValueError(
+            f"No recording found for prompt: {prompt[:100]}...\n"
+            f"Available recordings: {len(self.recordings)}\n"
+            f"Please re-record or check prompt consistency."
+        )
+
+    async def _wait(self, delay_ms: float) -> None:
+        if self.time_scale > 0 and delay_ms > 0:
+            await asyncio.sleep(delay_ms * self.time_scale / 1000)
+
+    @staticmethod
+    def _chunk_delays(record: dict[str, Any], chunk_count: int) -> list[float]:
+        """录制中相邻chunk的间隔(毫秒), 长度为 chunk_count - 1."""
+        intervals = record.get("inter_token_ms", 0.0)
+        if isinstance(intervals, int | float):
+            return [float(intervals)] * max(chunk_count - 1, 0)
+        delays = [float(value) for value in intervals][: max(chunk_count - 1, 0)]
+        return delays + [0.0] * (chunk_count - 1 - len(delays))
 
     async def generate(
         self,
@@ -60,7 +197,7 @@ class LLMReplayAdapter:
         """从录制中查找匹配的响应.
 
         参数:
-            prompt: 提示词(必须与录制时完全匹配)
+            prompt: 提示词(与录制时完全匹配, 或归一化后匹配)
             temperature: 忽略(回放不需要随机性)
             max_tokens: 忽略(返回录制内容)
             **kwargs: 忽略
@@ -71,17 +208,13 @@ class LLMReplayAdapter:
         异常:
             ValueError: 未找到匹配的录制(prompt不匹配)
         """
-        # 精确匹配prompt
-        for record in self.recordings:
-            if record.get("prompt") == prompt:
-                return record["response"]
-
-        # 未找到匹配
-        raise ValueError(
-            f"No recording found for prompt: {prompt[:100]}...\n"
-            f"Available recordings: {len(self.recordings)}\n"
-            f"Please re-record or check prompt consistency."
-        )
+        record = self._resolve(prompt)
+        latency_ms = record.get("latency_ms")
+        if latency_ms is None:
+            chunks = record.get("chunks") or [record["response"]]
+            latency_ms = record.get("ttft_ms", 0.0) + sum(self._chunk_delays(record, len(chunks)))
+        await self._wait(float(latency_ms))
+        return record["response"]
 
     async def generate_streaming(
         self,
@@ -93,7 +226,7 @@ class LLMReplayAdapter:
     ) -> AsyncIterator[str]:
         """流式回放录制响应.
 
-        注意: 回放模式下一次性返回完整录制内容。
+        按录制的分块与TTFT/token间隔逐块返回; 录制未包含分块时返回完整响应(单个chunk)。
 
         参数:
             prompt: 提示词
@@ -102,12 +235,26 @@ class LLMReplayAdapter:
             **kwargs: 忽略
 
         生成:
-            完整的录制响应(单个chunk)
+            录制的响应分块
 
         异常:
             ValueError: 未找到匹配的录制
         """
-        response = await self.generate(
-            prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
-        )
-        yield response
+        record = self._resolve(prompt)
+        chunks = record.get("chunks") or [record["response"]]
+        delays = self._chunk_delays(record, len(chunks))
+
+        await self._wait(float(record.get("ttft_ms", 0.0)))
+        for index, chunk in enumerate(chunks):
+            if index:
+                await self._wait(delays[index - 1])
+            yield chunk
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取回放命中统计."""
+        return {
+            "recordings": len(self.recordings),
+            "unique_prompts": len(self._index),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
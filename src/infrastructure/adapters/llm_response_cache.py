@@ -0,0 +1,345 @@
+"""LLMResponseCache - 精确匹配、参数感知的 LLM 响应缓存
+
+确定性的 LLM 请求（temperature=0、结构化输出）在定时工作流中会被原样重复很多次，
+每次都走网络只会增加延迟和费用。
+
+设计：
+- 缓存键：sha256(provider + 端点 base_url + API key 指纹 + 完整请求参数的规范化 JSON)，
+  请求参数包括 model / messages / temperature / max_tokens / response_format / tools 等，
+  任一参数不同都视为不同请求；不同端点（代理、兼容网关）或不同凭据的响应互不复用
+- 两级缓存：进程内 LRU（OrderedDict）在前，SQLite 表在后（跨进程、跨重启）
+- TTL：写入时按条目指定（工作流 / 节点级配置），过期条目读取时惰性删除
+- 流式回放：命中时按录制的分片（无分片则按固定长度切分）重新以流的形式输出
+- 指标：内存命中 / 磁盘命中 / 未命中 / 绕过 / 写入 / 节省的 token 数
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# 无录制分片时，回放流每片的字符数
+REPLAY_CHUNK_CHARS = 16
+
+
+def llm_cache_key(
+    provider: str,
+    request: Mapping[str, Any],
+    *,
+    base_url: object | None = None,
+    api_key: str | None = None,
+) -> str:
+    """计算请求的缓存键
+
+    参数：
+        provider: 提供商名称（openai / anthropic ...）
+        request: 发送给提供商 API 的完整请求参数
+        base_url: 请求发往的 API 端点（SDK 客户端的 base_url，忽略末尾斜杠）
+        api_key: 使用的 API key（只取 sha256 指纹参与计算，不以明文进入缓存键）
+
+    返回：
+        sha256 十六进制字符串
+    """
+    payload = json.dumps(
+        {
+            "provider": provider.lower(),
+            "base_url": str(base_url).rstrip("/") if base_url is not None else None,
+            "credential": (
+                hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16] if api_key else None
+            ),
+            "request": request,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class CachedLLMResponse:
+    """缓存的 LLM 响应
+
+    属性：
+        content: 完整响应文本
+        chunks: 流式响应的原始分片（非流式写入时为 None）
+        prompt_tokens: 原请求消耗的 prompt tokens（命中时计入节省量）
+        completion_tokens: 原请求消耗的 completion tokens
+        expires_at: 过期时间（epoch 秒，None 表示不过期）
+    """
+
+    content: str
+    chunks: list[str] | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    expires_at: float | None = None
+
+
+async def replay_stream(
+    response: CachedLLMResponse, chunk_chars: int = REPLAY_CHUNK_CHARS
+) -> AsyncIterator[str]:
+    """把缓存的响应以流的形式回放给流式调用方"""
+    chunks = response.chunks or [
+        response.content[i : i + chunk_chars] for i in range(0, len(response.content), chunk_chars)
+    ]
+    for chunk in chunks:
+        yield chunk
+        # 让出事件循环，保持与真实流一致的调度行为
+        await asyncio.sleep(0)
+
+
+class LLMResponseCache:
+    """两级（内存 LRU + SQLite）LLM 响应缓存
+
+    Example:
+        >>> cache = LLMResponseCache("data/llm_response_cache.db", default_ttl_seconds=3600)
+        >>> key = llm_cache_key("openai", {"model": "gpt-4o-mini", "messages": [...]})
+        >>> await cache.aget(key)
+        None
+        >>> await cache.aput(key, "hello", prompt_tokens=12, completion_tokens=1)
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        max_memory_entries: int = 2_000,
+        default_ttl_seconds: float | None = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        """初始化缓存
+
+        参数：
+            db_path: SQLite 文件路径；为 None 时只使用内存 LRU
+            max_memory_entries: 内存 LRU 最多保留的响应数
+            default_ttl_seconds: 默认 TTL（秒），None 表示不过期
+            clock: 墙上时钟（过期时间需跨进程比较，测试可注入）
+        """
+        self.db_path = db_path
+        self.default_ttl_seconds = default_ttl_seconds
+        self._max_memory_entries = max(0, max_memory_entries)
+        self._clock = clock
+        self._memory: OrderedDict[str, CachedLLMResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+        # 监控指标
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        self._writes = 0
+        self._saved_prompt_tokens = 0
+        self._saved_completion_tokens = 0
+
+    # ==================== 异步接口 ====================
+
+    async def aget(self, key: str) -> CachedLLMResponse | None:
+        """查询缓存（先查内存，未命中时在线程中查 SQLite）"""
+        response = self._get_from_memory(key)
+        if response is not None:
+            self._memory_hits += 1
+        elif self.db_path is not None:
+            response = await asyncio.to_thread(self._load_from_disk, key)
+            if response is not None:
+                self._disk_hits += 1
+        if response is None:
+            self._misses += 1
+            return None
+        self._saved_prompt_tokens += response.prompt_tokens
+        self._saved_completion_tokens += response.completion_tokens
+        return response
+
+    async def aput(
+        self,
+        key: str,
+        content: str,
+        *,
+        chunks: list[str] | None = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        """写入缓存（内存立即可见，SQLite 在线程中写入）
+
+        参数：
+            key: llm_cache_key() 计算的缓存键
+            content: 完整响应文本
+            chunks: 流式响应分片（可选，用于忠实回放）
+            prompt_tokens / completion_tokens: 原请求的 token 消耗
+            ttl_seconds: 条目 TTL（None 使用默认 TTL；<= 0 不写入）
+        """
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl is not None and ttl <= 0:
+            return
+        response = CachedLLMResponse(
+            content=content,
+            chunks=list(chunks) if chunks else None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            expires_at=self._clock() + ttl if ttl is not None else None,
+        )
+        self._remember(key, response)
+        self._writes += 1
+        if self.db_path is not None:
+            await asyncio.to_thread(self._store_to_disk, key, response)
+
+    def record_bypass(self) -> None:
+        """记录一次被显式绕过（bypass 标志）的请求"""
+        self._bypasses += 1
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除的 SQLite 行数"""
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, v in self._memory.items() if self._expired(v, now)]:
+                del self._memory[key]
+            if self.db_path is None:
+                return 0
+            conn = self._connection()
+            cursor = conn.execute(
+                "DELETE FROM llm_response_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        """关闭 SQLite 连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> dict:
+        """获取缓存统计指标
+
+        Returns:
+            - hits / memory_hits / disk_hits / misses / hit_rate
+            - bypasses: 绕过缓存的请求数
+            - writes: 写入的响应数
+            - saved_prompt_tokens / saved_completion_tokens / saved_tokens: 命中节省的 token
+            - memory_entries: 当前内存 LRU 中的响应数
+        """
+        hits = self._memory_hits + self._disk_hits
+        total = hits + self._misses
+        return {
+            "hits": hits,
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": hits / total if total > 0 else 0.0,
+            "bypasses": self._bypasses,
+            "writes": self._writes,
+            "saved_prompt_tokens": self._saved_prompt_tokens,
+            "saved_completion_tokens": self._saved_completion_tokens,
+            "saved_tokens": self._saved_prompt_tokens + self._saved_completion_tokens,
+            "memory_entries": len(self._memory),
+            "persistent": self.db_path is not None,
+        }
+
+    # ==================== 内部方法 ====================
+
+    @staticmethod
+    def _expired(response: CachedLLMResponse, now: float) -> bool:
+        return response.expires_at is not None and response.expires_at <= now
+
+    def _get_from_memory(self, key: str) -> CachedLLMResponse | None:
+        with self._lock:
+            response = self._memory.get(key)
+            if response is None:
+                return None
+            if self._expired(response, self._clock()):
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return response
+
+    def _remember(self, key: str, response: CachedLLMResponse) -> None:
+        if self._max_memory_entries == 0:
+            return
+        with self._lock:
+            self._memory[key] = response
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            assert self.db_path is not None
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    chunks TEXT,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load_from_disk(self, key: str) -> CachedLLMResponse | None:
+        now = self._clock()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                """
+                SELECT content, chunks, prompt_tokens, completion_tokens, expires_at
+                FROM llm_response_cache WHERE cache_key = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            content, chunks, prompt_tokens, completion_tokens, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                return None
+        response = CachedLLMResponse(
+            content=content,
+            chunks=json.loads(chunks) if chunks else None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            expires_at=expires_at,
+        )
+        self._remember(key, response)
+        return response
+
+    def _store_to_disk(self, key: str, response: CachedLLMResponse) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache
+                (cache_key, content, chunks, prompt_tokens, completion_tokens, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    response.content,
+                    json.dumps(response.chunks, ensure_ascii=False) if response.chunks else None,
+                    response.prompt_tokens,
+                    response.completion_tokens,
+                    self._clock(),
+                    response.expires_at,
+                ),
+            )
+            conn.commit()
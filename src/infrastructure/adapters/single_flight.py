@@ -0,0 +1,187 @@
+"""SingleFlight - 合并在途的相同请求
+
+突发流量（很多用户同时打开同一个工作流、定时任务同时触发）会让完全相同的 LLM /
+嵌入请求同时在途。响应缓存在第一个请求完成前帮不上忙，这里把并发的相同请求
+合并为一次上游调用，再把结果（或流）分发给所有等待者：
+
+- do(key, fn)：第一个调用方（leader）发起上游调用，其余调用方等待同一个结果；
+  上游异常会抛给所有等待者
+- stream(key, factory)：上游流只消费一次，分片缓存在内存中，每个订阅者从头读取，
+  晚加入的订阅者先追上已缓存的分片再跟随实时分片
+- 取消语义：单个等待者取消只影响它自己；最后一个等待者离开且上游尚未完成时，
+  取消上游调用并立即移除该键（之后的相同请求会重新发起调用）
+- 在途表按事件循环隔离：同一个实例可被多个线程各自的事件循环共享（如调度器的
+  每线程事件循环），只合并同一事件循环内的请求，future 不会跨循环等待
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+@dataclass(eq=False)
+class _StreamCall:
+    chunks: list[Any] = field(default_factory=list)
+    done: bool = False
+    error: BaseException | None = None
+    subscribers: int = 0
+    task: asyncio.Task[None] | None = None
+    signal: asyncio.Future[None] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+    def publish(self) -> None:
+        """唤醒所有等待新分片的订阅者"""
+        signal, self.signal = self.signal, asyncio.get_running_loop().create_future()
+        signal.set_result(None)
+
+
+@dataclass(eq=False)
+class _LoopCalls:
+    calls: dict[str, _Call[Any]] = field(default_factory=dict)
+    streams: dict[str, _StreamCall] = field(default_factory=dict)
+
+
+class SingleFlight:
+    """按键合并并发的相同异步调用（按事件循环隔离在途表，可跨线程共享实例）
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> results = await asyncio.gather(
+        ...     *(flight.do("key", lambda: fetch()) for _ in range(10))
+        ... )  # fetch() 只执行一次
+        >>> async for chunk in flight.stream("key", lambda: upstream_stream()):
+        ...     print(chunk)
+    """
+
+    def __init__(self) -> None:
+        self._loops: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopCalls] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行（或加入）key 对应的在途调用并返回结果"""
+        calls = self._current().calls
+        call = calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(calls, key, call))
+            self._count(leader=True)
+        else:
+            self._count(leader=False)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                self._forget(calls, key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """订阅（或发起）key 对应的在途流"""
+        streams = self._current().streams
+        call = streams.get(key)
+        if call is None:
+            call = _StreamCall()
+            streams[key] = call
+            call.task = asyncio.ensure_future(self._pump(streams, key, call, factory))
+            self._count(leader=True)
+        else:
+            self._count(leader=False)
+
+        call.subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(call.chunks):
+                    index += 1
+                    yield call.chunks[index - 1]
+                    continue
+                if call.done:
+                    if call.error is not None:
+                        raise call.error
+                    return
+                await asyncio.shield(call.signal)
+        finally:
+            call.subscribers -= 1
+            if call.subscribers == 0 and not call.done and call.task is not None:
+                self._forget(streams, key, call)
+                call.task.cancel()
+
+    def get_stats(self) -> dict:
+        """获取合并统计：leaders 为实际发起的上游调用数，coalesced 为被合并的调用数"""
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight": sum(
+                    len(loop_calls.calls) + len(loop_calls.streams)
+                    for loop_calls in list(self._loops.values())
+                ),
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _current(self) -> _LoopCalls:
+        """当前事件循环的在途表（事件循环被回收后随之释放）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_calls = self._loops.get(loop)
+            if loop_calls is None:
+                loop_calls = self._loops[loop] = _LoopCalls()
+            return loop_calls
+
+    def _count(self, *, leader: bool) -> None:
+        with self._lock:
+            if leader:
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+    async def _pump(
+        self,
+        streams: dict[str, _StreamCall],
+        key: str,
+        call: _StreamCall,
+        factory: Callable[[], AsyncIterator[Any]],
+    ) -> None:
+        """消费上游流并把分片广播给订阅者"""
+        try:
+            async for chunk in factory():
+                call.chunks.append(chunk)
+                call.publish()
+        except asyncio.CancelledError:
+            call.error = asyncio.CancelledError()
+            raise
+        except Exception as e:  # noqa: BLE001 - 转交给所有订阅者
+            call.error = e
+        finally:
+            call.done = True
+            self._forget(streams, key, call)
+            call.publish()
+
+    @staticmethod
+    def _forget(registry: dict[str, Any], key: str, call: Any) -> None:
+        if registry.get(key) is call:
+            del registry[key]
@@ -0,0 +1,107 @@
+"""chat_messages 全文索引（SQLite FTS5）
+
+为什么需要全文索引？
+- 历史搜索原先使用 `content LIKE '%query%'`，每次都要扫描整个工作流的对话历史
+- FTS5 倒排索引 + SQL 内 BM25 排序 + LIMIT，搜索耗时不随历史条数线性增长
+
+设计说明：
+- 外部内容表（content='chat_messages'）：索引不重复存储消息正文，rowid 与 chat_messages 对齐
+- 由触发器在 INSERT / UPDATE / DELETE 时同步，Repository 无需感知索引存在
+- trigram 分词器：按三字符滑窗建索引，不依赖空格切词，中日韩文本与英文标识符
+  都能做子串匹配（短语查询 "HTTP节点" 等价于 LIKE '%HTTP节点%'，但走索引）
+- 仅 SQLite 使用；其他数据库不创建，Repository 自动回退到 LIKE 查询
+
+注意：
+- trigram 只能检索长度不少于 3 个字符的查询，更短的查询由 Repository 回退到 LIKE
+- chat_messages 没有 INTEGER PRIMARY KEY，VACUUM 可能重排 rowid；VACUUM 之后应调用
+  rebuild_chat_message_fts() 重建索引
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Connection, text
+
+CHAT_MESSAGE_FTS_TABLE = "chat_messages_fts"
+
+# trigram 最短可检索长度
+FTS_MIN_QUERY_LENGTH = 3
+
+CHAT_MESSAGE_FTS_DDL: tuple[str, ...] = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {CHAT_MESSAGE_FTS_TABLE} USING fts5(
+        content,
+        content = 'chat_messages',
+        tokenize = 'trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO {CHAT_MESSAGE_FTS_TABLE} (rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO {CHAT_MESSAGE_FTS_TABLE} ({CHAT_MESSAGE_FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update
+    AFTER UPDATE OF content ON chat_messages BEGIN
+        INSERT INTO {CHAT_MESSAGE_FTS_TABLE} ({CHAT_MESSAGE_FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+        INSERT INTO {CHAT_MESSAGE_FTS_TABLE} (rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+)
+
+CHAT_MESSAGE_FTS_DROP: tuple[str, ...] = (
+    "DROP TRIGGER IF EXISTS chat_messages_fts_insert",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_update",
+    f"DROP TABLE IF EXISTS {CHAT_MESSAGE_FTS_TABLE}",
+)
+
+
+def has_chat_message_fts(conn: Connection) -> bool:
+    """检查当前数据库是否已建立 chat_messages 全文索引"""
+    if conn.dialect.name != "sqlite":
+        return False
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": CHAT_MESSAGE_FTS_TABLE},
+    ).first()
+    return row is not None
+
+
+def ensure_chat_message_fts(conn: Connection) -> bool:
+    """创建全文索引与同步触发器（幂等）
+
+    首次创建时从已有消息回填索引。
+
+    参数：
+        conn: SQLAlchemy 连接（需在事务内）
+
+    返回：
+        是否新建了索引（非 SQLite 数据库返回 False）
+    """
+    if conn.dialect.name != "sqlite":
+        return False
+    created = not has_chat_message_fts(conn)
+    for statement in CHAT_MESSAGE_FTS_DDL:
+        conn.execute(text(statement))
+    if created:
+        rebuild_chat_message_fts(conn)
+    return created
+
+
+def rebuild_chat_message_fts(conn: Connection) -> None:
+    """根据 chat_messages 全量重建索引（回填、VACUUM 之后使用）"""
+    conn.execute(
+        text(f"INSERT INTO {CHAT_MESSAGE_FTS_TABLE} ({CHAT_MESSAGE_FTS_TABLE}) VALUES ('rebuild')")
+    )
+
+
+def to_fts_phrase(query: str) -> str:
+    """将查询转为 FTS5 短语表达式（整体作为子串匹配）"""
+    return '"' + query.replace('"', '""') + '"'
@@ -21,10 +21,21 @@ ORM 模型 vs 领域实体：
 
 from datetime import datetime
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.infrastructure.database.base import Base
+from src.infrastructure.database.chat_message_fts import ensure_chat_message_fts
 
 
 class UserModel(Base):
@@ -835,6 +846,12 @@ class ChatMessageModel(Base):
         return f"<ChatMessageModel(id={self.id}, workflow_id={self.workflow_id}, role={role}, content='{preview}')>"
 
 
+@event.listens_for(ChatMessageModel.__table__, "after_create")
+def _create_chat_message_fts(target, connection, **kw) -> None:
+    """建表后同时建立全文索引与同步触发器（仅 SQLite）"""
+    ensure_chat_message_fts(connection)
+
+
 class RunModel(Base):
     """Run ORM 模型
 
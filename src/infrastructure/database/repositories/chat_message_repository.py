@@ -8,11 +8,17 @@
 
 from datetime import UTC
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 
 from src.domain.entities.chat_message import ChatMessage
 from src.domain.ports.chat_message_repository import ChatMessageRepository
+from src.infrastructure.database.chat_message_fts import (
+    CHAT_MESSAGE_FTS_TABLE,
+    FTS_MIN_QUERY_LENGTH,
+    has_chat_message_fts,
+    to_fts_phrase,
+)
 from src.infrastructure.database.models import ChatMessageModel
 
 
@@ -32,6 +38,7 @@ class SQLAlchemyChatMessageRepository(ChatMessageRepository):
             session: SQLAlchemy Session（事务边界）
         """
         self.session = session
+        self._has_fts: bool | None = None
 
     def save(self, message: ChatMessage) -> None:
         """保存 ChatMessage 实体
@@ -81,7 +88,7 @@ class SQLAlchemyChatMessageRepository(ChatMessageRepository):
         return [self._model_to_entity(model) for model in models]
 
     def search(
-        self, workflow_id: str, query: str, threshold: float = 0.5
+        self, workflow_id: str, query: str, threshold: float = 0.5, limit: int = 50
     ) -> list[tuple[ChatMessage, float]]:
         """在工作流的历史记录中搜索消息
 
@@ -90,16 +97,13 @@ class SQLAlchemyChatMessageRepository(ChatMessageRepository):
         - 返回包含关键词的消息列表（按相关性排序）
 
         实现：
-        - 简单实现：使用 LIKE 查询 + Jaccard 相似度
-        - 按相关性分数降序排列
+        - SQLite 且已建立全文索引：FTS5 trigram 短语匹配，在 SQL 内按 BM25 排序并 LIMIT
+        - 查询短于 3 个字符或无全文索引：回退到 LIKE 查询（取最新的 limit 条）
+        - 只对候选的前 limit 条计算 Jaccard + 包含查询词加分
+        - 按相关性分数降序排列（分数相同时保持 BM25 顺序）
         """
-        # 1. 使用 LIKE 查询匹配消息
-        stmt = select(ChatMessageModel).where(
-            ChatMessageModel.workflow_id == workflow_id,
-            ChatMessageModel.content.ilike(f"%{query}%"),  # 不区分大小写
-        )
-
-        models = self.session.execute(stmt).scalars().all()
+        # 1. 在数据库内取出候选消息（已按相关性/时间排序并截断）
+        models = self._find_candidates(workflow_id, query, limit)
 
         # 如果没有匹配结果，直接返回空列表
         if not models:
@@ -139,6 +143,52 @@ class SQLAlchemyChatMessageRepository(ChatMessageRepository):
 
         return results
 
+    def _find_candidates(self, workflow_id: str, query: str, limit: int) -> list[ChatMessageModel]:
+        """取出搜索候选消息
+
+        参数：
+            workflow_id: 工作流 ID
+            query: 搜索关键词
+            limit: 最多返回条数
+
+        返回：
+            ChatMessageModel 列表（全文索引按 BM25 排序；回退路径按时间倒序）
+        """
+        if limit <= 0:
+            return []
+
+        if len(query) >= FTS_MIN_QUERY_LENGTH and self._fts_available():
+            # bm25() 越小越相关；JOIN 走 rowid，过滤走主表的 workflow_id
+            stmt = select(ChatMessageModel).from_statement(
+                text(f"""
+                    SELECT c.* FROM {CHAT_MESSAGE_FTS_TABLE}
+                    JOIN chat_messages AS c ON c.rowid = {CHAT_MESSAGE_FTS_TABLE}.rowid
+                    WHERE {CHAT_MESSAGE_FTS_TABLE} MATCH :match AND c.workflow_id = :workflow_id
+                    ORDER BY bm25({CHAT_MESSAGE_FTS_TABLE})
+                    LIMIT :limit
+                    """).bindparams(
+                    match=to_fts_phrase(query), workflow_id=workflow_id, limit=limit
+                )
+            )
+            return list(self.session.execute(stmt).scalars().all())
+
+        stmt = (
+            select(ChatMessageModel)
+            .where(
+                ChatMessageModel.workflow_id == workflow_id,
+                ChatMessageModel.content.ilike(f"%{query}%"),  # 不区分大小写
+            )
+            .order_by(ChatMessageModel.timestamp.desc())
+            .limit(limit)
+        )
+        return list(self.session.execute(stmt).scalars().all())
+
+    def _fts_available(self) -> bool:
+        """当前会话绑定的数据库是否有全文索引（每个 Repository 实例只检查一次）"""
+        if self._has_fts is None:
+            self._has_fts = has_chat_message_fts(self.session.connection())
+        return self._has_fts
+
     def delete_by_workflow_id(self, workflow_id: str) -> None:
         """清空工作流的对话历史
 
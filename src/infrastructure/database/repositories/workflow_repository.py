@@ -21,8 +21,9 @@
 """
 
 from datetime import UTC
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 
 from src.domain.entities.edge import Edge
@@ -128,82 +129,193 @@ class SQLAlchemyWorkflowRepository:
             updated_at=model.updated_at.replace(tzinfo=UTC),
         )
 
-    def _to_model(self, entity: Workflow) -> WorkflowModel:
-        """将领域实体转换为 ORM 模型（聚合根）
-
-        为什么需要这个方法？
-        - 保存实体到数据库时需要 ORM 模型
-        - 领域实体不应该知道数据库细节
-
-        转换策略：
-        - 直接映射：字段名相同，直接赋值
-        - 级联保存：保存 Node 和 Edge（聚合根特性）
-        - 值对象转换：Position、NodeType、WorkflowStatus
-
-        参数：
-            entity: Workflow 领域实体
-
-        返回：
-            WorkflowModel ORM 模型（包含所有 Node 和 Edge）
-        """
-        # 转换 Workflow
-        model = WorkflowModel(
-            id=entity.id,
-            user_id=entity.user_id,
-            project_id=entity.project_id,
-            name=entity.name,
-            description=entity.description,
-            status=entity.status.value,
-            source=entity.source,  # V2新增
-            source_id=entity.source_id,  # V2新增
-            created_at=entity.created_at.replace(tzinfo=None),
-            updated_at=entity.updated_at.replace(tzinfo=None),
-        )
-
-        # 转换 Node（级联）
-        model.nodes = [
-            NodeModel(
-                id=node.id,
-                workflow_id=entity.id,
-                type=node.type.value,
-                name=node.name,
-                config=node.config,
-                position_x=node.position.x,
-                position_y=node.position.y,
-            )
-            for node in entity.nodes
-        ]
-
-        # 转换 Edge（级联）
-        model.edges = [
-            EdgeModel(
-                id=edge.id,
-                workflow_id=entity.id,
-                source_node_id=edge.source_node_id,
-                target_node_id=edge.target_node_id,
-                condition=edge.condition,
-            )
-            for edge in entity.edges
-        ]
-
-        return model
-
     # ==================== Repository 方法 ====================
     # 职责：持久化操作
 
     def save(self, workflow: Workflow) -> None:
         """保存 Workflow 实体（新增或更新）
 
-        实现策略：
-        - 使用 merge()：自动判断新增或更新
-        - 级联保存：自动保存 Node 和 Edge
+        实现策略（增量持久化）：
+        - 先读取数据库中已有的 Node/Edge 行（只查列，不构建 ORM 对象）
+        - 与实体逐行比较，只对真正变化的行发出 INSERT/UPDATE/DELETE
+        - 同类语句批量执行（executemany），一次往返处理所有变化行
         - 事务控制：由调用者控制（session.commit()）
 
+        为什么不用 merge()？
+        - merge() 会重建整个聚合（所有 NodeModel/EdgeModel）并逐个对账
+        - 画布上拖动一个节点就会重写整个工作流（写放大）
+        - 200 节点的工作流频繁保存时，延迟主要消耗在无变化的行上
+
         参数：
             workflow: Workflow 实体
         """
-        model = self._to_model(workflow)
-        self.session.merge(model)
+        workflow_row = self._workflow_row(workflow)
+        existing = self.session.execute(
+            select(
+                WorkflowModel.user_id,
+                WorkflowModel.project_id,
+                WorkflowModel.name,
+                WorkflowModel.description,
+                WorkflowModel.status,
+                WorkflowModel.source,
+                WorkflowModel.source_id,
+                WorkflowModel.created_at,
+                WorkflowModel.updated_at,
+            ).where(WorkflowModel.id == workflow.id)
+        ).first()
+
+        if existing is None:
+            self.session.execute(insert(WorkflowModel), [workflow_row])
+        else:
+            changed = {key: value for key, value in workflow_row.items() if key != "id"}
+            if any(getattr(existing, key) != value for key, value in changed.items()):
+                self.session.execute(
+                    update(WorkflowModel).where(WorkflowModel.id == workflow.id).values(**changed)
+                )
+
+        self._sync_children(
+            model_cls=NodeModel,
+            workflow_id=workflow.id,
+            rows=[self._node_row(workflow.id, node) for node in workflow.nodes],
+            columns=("workflow_id", "type", "name", "config", "position_x", "position_y"),
+            is_new=existing is None,
+        )
+        self._sync_children(
+            model_cls=EdgeModel,
+            workflow_id=workflow.id,
+            rows=[self._edge_row(workflow.id, edge) for edge in workflow.edges],
+            columns=("workflow_id", "source_node_id", "target_node_id", "condition"),
+            is_new=existing is None,
+        )
+
+        self._expire_cached(WorkflowModel, [workflow.id])
+
+    # ==================== 增量持久化辅助方法 ====================
+    # 职责：实体 → 行字典、行级 diff、身份映射同步
+
+    @staticmethod
+    def _workflow_row(entity: Workflow) -> dict[str, Any]:
+        """将 Workflow 顶层字段转换为行字典（不含 Node/Edge）"""
+        return {
+            "id": entity.id,
+            "user_id": entity.user_id,
+            "project_id": entity.project_id,
+            "name": entity.name,
+            "description": entity.description,
+            "status": entity.status.value,
+            "source": entity.source,
+            "source_id": entity.source_id,
+            "created_at": entity.created_at.replace(tzinfo=None),
+            "updated_at": entity.updated_at.replace(tzinfo=None),
+        }
+
+    @staticmethod
+    def _node_row(workflow_id: str, node: Node) -> dict[str, Any]:
+        """将 Node 实体转换为行字典"""
+        return {
+            "id": node.id,
+            "workflow_id": workflow_id,
+            "type": node.type.value,
+            "name": node.name,
+            "config": node.config,
+            "position_x": node.position.x,
+            "position_y": node.position.y,
+        }
+
+    @staticmethod
+    def _edge_row(workflow_id: str, edge: Edge) -> dict[str, Any]:
+        """将 Edge 实体转换为行字典"""
+        return {
+            "id": edge.id,
+            "workflow_id": workflow_id,
+            "source_node_id": edge.source_node_id,
+            "target_node_id": edge.target_node_id,
+            "condition": edge.condition,
+        }
+
+    def _sync_children(
+        self,
+        *,
+        model_cls: type[NodeModel] | type[EdgeModel],
+        workflow_id: str,
+        rows: list[dict[str, Any]],
+        columns: tuple[str, ...],
+        is_new: bool,
+    ) -> None:
+        """对比已存储的子行与实体子行，批量发出 INSERT/UPDATE/DELETE
+
+        参数：
+            model_cls: NodeModel 或 EdgeModel
+            workflow_id: 所属 Workflow ID
+            rows: 实体侧的目标行（_node_row / _edge_row 的结果）
+            columns: 参与比较的非主键列
+            is_new: Workflow 是否为新建（新建时无需查询已有子行）
+        """
+        table = model_cls.__table__
+        stored: dict[str, tuple[Any, ...]] = {}
+        if not is_new:
+            stmt = select(table.c.id, *(table.c[name] for name in columns)).where(
+                table.c.workflow_id == workflow_id
+            )
+            stored = {row[0]: tuple(row[1:]) for row in self.session.execute(stmt)}
+
+        target_ids = {row["id"] for row in rows}
+        to_insert: list[dict[str, Any]] = []
+        to_update: list[dict[str, Any]] = []
+        for row in rows:
+            current = stored.get(row["id"])
+            if current is None:
+                to_insert.append(row)
+            elif current != tuple(row[name] for name in columns):
+                to_update.append(row)
+        to_delete = [row_id for row_id in stored if row_id not in target_ids]
+
+        if to_insert:
+            # ID 已被其他 Workflow 占用时沿用 merge() 语义：转为 UPDATE（改挂到当前 Workflow）
+            claimed = set(
+                self.session.scalars(
+                    select(table.c.id).where(table.c.id.in_([row["id"] for row in to_insert]))
+                )
+            )
+            if claimed:
+                to_update.extend(row for row in to_insert if row["id"] in claimed)
+                to_insert = [row for row in to_insert if row["id"] not in claimed]
+
+        if to_delete:
+            self.session.execute(
+                delete(model_cls)
+                .where(model_cls.id.in_(to_delete))
+                .execution_options(synchronize_session=False)
+            )
+        if to_update:
+            self.session.execute(update(model_cls), to_update)
+        if to_insert:
+            self.session.execute(insert(model_cls), to_insert)
+
+        self._expire_cached(model_cls, [row["id"] for row in to_update], refresh=True)
+        self._expire_cached(model_cls, to_delete)
+
+    def _expire_cached(
+        self,
+        model_cls: type[WorkflowModel] | type[NodeModel] | type[EdgeModel],
+        ids: list[str],
+        *,
+        refresh: bool = False,
+    ) -> None:
+        """同步 Session 身份映射中的缓存对象
+
+        增量语句绕过了 ORM 的工作单元，身份映射里已加载的对象可能过期：
+        - refresh=True：过期属性，下次访问时重新加载
+        - refresh=False：Workflow 过期（含 nodes/edges 集合），已删除的子行直接移出 Session
+        """
+        for row_id in ids:
+            cached = self.session.identity_map.get(Session.identity_key(model_cls, row_id))
+            if cached is None:
+                continue
+            if refresh or model_cls is WorkflowModel:
+                self.session.expire(cached)
+            else:
+                self.session.expunge(cached)
 
     def get_by_id(self, workflow_id: str) -> Workflow:
         """根据 ID 获取 Workflow 实体（不存在抛异常）
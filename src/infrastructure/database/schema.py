@@ -10,6 +10,7 @@ from __future__ import annotations
 from sqlalchemy import text
 
 from src.infrastructure.database.base import Base
+from src.infrastructure.database.chat_message_fts import ensure_chat_message_fts
 from src.infrastructure.database.engine import sync_engine
 
 
@@ -42,3 +43,6 @@ def ensure_sqlite_schema() -> None:
             conn.execute(text("ALTER TABLE runs ADD COLUMN started_at DATETIME"))
         if "error" not in existing:
             conn.execute(text("ALTER TABLE runs ADD COLUMN error TEXT"))
+
+        # 已存在的库（create_all 不会触发 after_create）补建聊天记录全文索引并回填
+        ensure_chat_message_fts(conn)
@@ -12,6 +12,9 @@ from typing import Any
 
 from src.domain.agents.workflow_agent import register_default_container_executor_factory
 from src.domain.ports.node_executor import NodeExecutorRegistry
+from src.infrastructure.adapters.client_registry import ClientRegistry
+from src.infrastructure.adapters.llm_rate_limiter import LLMRateLimiter
+from src.infrastructure.adapters.llm_response_cache import LLMResponseCache
 from src.infrastructure.executors.base_executor import EndExecutor, StartExecutor
 from src.infrastructure.executors.database_executor import DatabaseExecutor
 from src.infrastructure.executors.default_container_executor import DefaultContainerExecutor
@@ -53,12 +56,18 @@ def create_executor_registry(
     openai_api_key: str | None = None,
     anthropic_api_key: str | None = None,
     session_factory: Callable[[], Any] | None = None,
+    llm_response_cache: LLMResponseCache | None = None,
+    client_registry: ClientRegistry | None = None,
+    llm_rate_limiter: LLMRateLimiter | None = None,
 ) -> NodeExecutorRegistry:
     """创建执行器注册表
 
     参数：
         openai_api_key: OpenAI API Key
         anthropic_api_key: Anthropic API Key
+        llm_response_cache: LLM 响应缓存（可选，LLM 节点共享）
+        client_registry: 共享客户端注册表（可选，LLM / HTTP 节点复用连接池）
+        llm_rate_limiter: LLM 客户端限流器（可选，LLM 节点共享）
 
     返回：
         配置好的执行器注册表
@@ -70,12 +79,19 @@ def create_executor_registry(
     registry.register("end", EndExecutor())
 
     # 注册 HTTP 执行器
-    registry.register("httpRequest", HttpExecutor())
-    registry.register("http", HttpExecutor())  # 兼容旧版本
+    http_executor = HttpExecutor(client_registry=client_registry)
+    registry.register("httpRequest", http_executor)
+    registry.register("http", http_executor)  # 兼容旧版本
 
     # 注册 LLM 执行器
-    registry.register("textModel", LlmExecutor(api_key=openai_api_key))
-    registry.register("llm", LlmExecutor(api_key=openai_api_key))  # 兼容旧版本
+    llm_executor = LlmExecutor(
+        api_key=openai_api_key,
+        response_cache=llm_response_cache,
+        client_registry=client_registry,
+        rate_limiter=llm_rate_limiter,
+    )
+    registry.register("textModel", llm_executor)
+    registry.register("llm", llm_executor)  # 兼容旧版本
 
     # 注册 JavaScript 执行器
     registry.register("javascript", JavaScriptExecutor())
@@ -11,13 +11,16 @@ import httpx
 from src.domain.entities.node import Node
 from src.domain.exceptions import DomainError
 from src.domain.ports.node_executor import NodeExecutor
+from src.infrastructure.adapters.client_registry import ClientRegistry
 
 
 class HttpExecutor(NodeExecutor):
     """HTTP 请求节点执行器"""
 
-    def __init__(self, timeout: float = 30.0):
+    def __init__(self, timeout: float = 30.0, client_registry: ClientRegistry | None = None):
         self.timeout = timeout
+        # 注入时复用进程级连接池（keep-alive），否则每次请求新建客户端
+        self.client_registry = client_registry
 
     async def execute(self, node: Node, inputs: dict[str, Any], context: dict[str, Any]) -> Any:
         """执行 HTTP 请求节点
@@ -59,20 +62,29 @@ class HttpExecutor(NodeExecutor):
 
         # 发送请求
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.request(
+            if self.client_registry is not None:
+                response = await self.client_registry.http_client().request(
                     method=method,
                     url=url,
                     headers=headers,
                     json=body,
+                    timeout=self.timeout,
                 )
-                response.raise_for_status()
-
-                # 尝试解析 JSON 响应
-                try:
-                    return response.json()
-                except json.JSONDecodeError:
-                    return response.text
+            else:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        json=body,
+                    )
+            response.raise_for_status()
+
+            # 尝试解析 JSON 响应
+            try:
+                return response.json()
+            except json.JSONDecodeError:
+                return response.text
 
         except httpx.InvalidURL as e:
             raise DomainError("HTTP 节点 URL 格式错误") from e
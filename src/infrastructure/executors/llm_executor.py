@@ -1,14 +1,49 @@
 """LLM Executor（LLM 执行器）
 
 Infrastructure 层：实现 LLM 文本生成节点执行器
+
+响应缓存：
+- 注入 LLMResponseCache 后，确定性请求（temperature <= 0）按完整请求参数精确匹配缓存
+- 节点配置 cache=True 强制缓存非零温度请求，cache=False 绕过缓存
+- TTL：节点配置 cacheTtlSeconds 优先，其次执行上下文 llm_cache_ttl_seconds（工作流级），
+  最后使用缓存默认 TTL；执行上下文 llm_cache_bypass=True 绕过整个工作流的缓存
+
+在途请求合并：
+- 并发的相同请求（相同提供商 + 完整请求参数）只调用一次上游 API，结果分发给所有等待者；
+  cache=False / llm_cache_bypass 的请求不参与合并
+
+客户端复用：
+- 注入 ClientRegistry 后，SDK 客户端按 (provider, api_key) 在进程内共享，复用 keep-alive 连接
+
+客户端限流：
+- 注入 LLMRateLimiter 后，上游调用按 provider/model 排队（令牌桶 + AIMD 并发 + 优先级通道），
+  429 时退避重试；缓存命中与被合并的请求不占用配额
 """
 
 import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Any
 
 from src.domain.entities.node import Node
 from src.domain.exceptions import DomainError
 from src.domain.ports.node_executor import NodeExecutor
+from src.infrastructure.adapters.client_registry import ClientRegistry
+from src.infrastructure.adapters.llm_rate_limiter import LLMRateLimiter
+from src.infrastructure.adapters.llm_response_cache import LLMResponseCache, llm_cache_key
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.lc_adapters.token_counter import estimate_tokens
+
+# fetch 返回 (content, prompt_tokens, completion_tokens)；token 未知时为 None
+_Completion = tuple[str | None, int | None, int | None]
+
+
+@dataclass(frozen=True)
+class _CachePolicy:
+    """单次调用的缓存策略（None TTL 表示使用缓存默认值；store=False 表示未注入缓存，只合并在途请求）"""
+
+    ttl_seconds: float | None = None
+    store: bool = True
 
 
 class LlmExecutor(NodeExecutor):
@@ -17,8 +52,18 @@ class LlmExecutor(NodeExecutor):
     支持 OpenAI、Anthropic、Google 等模型
     """
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        response_cache: LLMResponseCache | None = None,
+        client_registry: ClientRegistry | None = None,
+        rate_limiter: LLMRateLimiter | None = None,
+    ):
         self.api_key = api_key
+        self.response_cache = response_cache
+        self.client_registry = client_registry
+        self.rate_limiter = rate_limiter
+        self.single_flight = SingleFlight()
 
     async def execute(self, node: Node, inputs: dict[str, Any], context: dict[str, Any]) -> Any:
         """执行 LLM 节点
@@ -32,6 +77,8 @@ class LlmExecutor(NodeExecutor):
             promptSourceNodeId: 当存在多个输入时，指定使用哪个上游节点输出作为 prompt
             structuredOutput: 是否使用结构化输出
             schema: 结构化输出的 schema
+            cache: 响应缓存开关（True 强制缓存，False 绕过，默认仅缓存 temperature <= 0）
+            cacheTtlSeconds: 响应缓存 TTL（秒）
         """
         # 获取配置（支持多种命名约定）
         model = node.config.get("model", "openai/gpt-4")
@@ -81,6 +128,8 @@ class LlmExecutor(NodeExecutor):
             provider = "openai"
             model_name = model
 
+        cache = self._cache_policy(node.config, context, temperature)
+
         # 调用对应的 LLM API
         try:
             if provider == "openai":
@@ -92,10 +141,11 @@ class LlmExecutor(NodeExecutor):
                     structured_output,
                     schema_str,
                     system_prompt,
+                    cache=cache,
                 )
             elif provider == "anthropic":
                 return await self._call_anthropic(
-                    model_name, prompt, temperature, max_tokens, system_prompt
+                    model_name, prompt, temperature, max_tokens, system_prompt, cache=cache
                 )
             elif provider == "google":
                 return await self._call_google(model_name, prompt, temperature, max_tokens)
@@ -113,6 +163,8 @@ class LlmExecutor(NodeExecutor):
         structured_output: bool,
         schema_str: str,
         system_prompt: str = "",
+        *,
+        cache: _CachePolicy | None = None,
     ) -> Any:
         """调用 OpenAI API"""
         try:
@@ -120,7 +172,10 @@ class LlmExecutor(NodeExecutor):
         except ImportError as e:
             raise DomainError("未安装 openai 库，请运行: pip install openai") from e
 
-        client = AsyncOpenAI(api_key=self.api_key)
+        if self.client_registry is not None:
+            client = self.client_registry.openai_client(self.api_key)
+        else:
+            client = AsyncOpenAI(api_key=self.api_key)
 
         # 构建消息列表（支持 system_prompt）
         messages = []
@@ -144,8 +199,16 @@ class LlmExecutor(NodeExecutor):
             except json.JSONDecodeError as e:
                 raise DomainError(f"LLM 节点 schema 格式错误: {schema_str}") from e
 
-        response = await client.chat.completions.create(**kwargs)
-        content = response.choices[0].message.content
+        async def fetch() -> _Completion:
+            response = await client.chat.completions.create(**kwargs)
+            usage = getattr(response, "usage", None)
+            return (
+                response.choices[0].message.content,
+                getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None),
+            )
+
+        content = await self._complete("openai", client, kwargs, cache, fetch)
 
         # 如果是结构化输出，尝试解析 JSON
         if structured_output and content:
@@ -157,7 +220,14 @@ class LlmExecutor(NodeExecutor):
         return content
 
     async def _call_anthropic(
-        self, model: str, prompt: str, temperature: float, max_tokens: int, system_prompt: str = ""
+        self,
+        model: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: str = "",
+        *,
+        cache: _CachePolicy | None = None,
     ) -> str:
         """调用 Anthropic API"""
         try:
@@ -165,7 +235,10 @@ class LlmExecutor(NodeExecutor):
         except ImportError as e:
             raise DomainError("未安装 anthropic 库，请运行: pip install anthropic") from e
 
-        client = AsyncAnthropic(api_key=self.api_key)
+        if self.client_registry is not None:
+            client = self.client_registry.anthropic_client(self.api_key)
+        else:
+            client = AsyncAnthropic(api_key=self.api_key)
 
         # 构建请求参数（Anthropic 的 system 是单独参数）
         kwargs: dict[str, Any] = {
@@ -177,8 +250,16 @@ class LlmExecutor(NodeExecutor):
         if system_prompt:
             kwargs["system"] = system_prompt
 
-        response = await client.messages.create(**kwargs)
-        return response.content[0].text
+        async def fetch() -> _Completion:
+            response = await client.messages.create(**kwargs)
+            usage = getattr(response, "usage", None)
+            return (
+                response.content[0].text,
+                getattr(usage, "input_tokens", None),
+                getattr(usage, "output_tokens", None),
+            )
+
+        return await self._complete("anthropic", client, kwargs, cache, fetch)  # type: ignore[return-value]
 
     async def _call_google(
         self, model: str, prompt: str, temperature: float, max_tokens: int
@@ -186,3 +267,108 @@ class LlmExecutor(NodeExecutor):
         """调用 Google Gemini API"""
         # TODO: 实现 Google Gemini API 调用
         raise DomainError("Google Gemini API 暂未实现")
+
+    def _cache_policy(
+        self, config: dict[str, Any], context: dict[str, Any], temperature: float
+    ) -> _CachePolicy | None:
+        """解析本次调用的缓存策略（None 表示绕过缓存且不合并在途请求）"""
+        cache_flag = config.get("cache")
+        if cache_flag is False or context.get("llm_cache_bypass"):
+            if self.response_cache is not None:
+                self.response_cache.record_bypass()
+            return None
+        if cache_flag is not True and float(temperature) > 0:
+            # 非确定性请求默认不缓存，也不合并（每个调用方应得到独立的采样结果）
+            return None
+        if self.response_cache is None:
+            return _CachePolicy(store=False)
+
+        ttl = config.get("cacheTtlSeconds", context.get("llm_cache_ttl_seconds"))
+        return _CachePolicy(ttl_seconds=float(ttl) if ttl is not None else None)
+
+    async def _complete(
+        self,
+        provider: str,
+        client: Any,
+        request: dict[str, Any],
+        cache: _CachePolicy | None,
+        fetch: Callable[[], Awaitable[_Completion]],
+    ) -> str | None:
+        """按缓存策略获取响应文本：合并并发的相同请求，命中直接返回，未命中调用 API 后写入缓存
+
+        缓存键包含 client 的端点与 API key 指纹，不同端点/凭据的响应互不复用。
+        """
+        fetch = self._rate_limited(provider, request, fetch)
+        if cache is None:
+            content, _, _ = await fetch()
+            return content
+
+        key = llm_cache_key(
+            provider,
+            request,
+            base_url=getattr(client, "base_url", None),
+            api_key=getattr(client, "api_key", self.api_key),
+        )
+        return await self.single_flight.do(
+            key, lambda: self._fetch_cached(key, request, cache, fetch)
+        )
+
+    def _rate_limited(
+        self,
+        provider: str,
+        request: dict[str, Any],
+        fetch: Callable[[], Awaitable[_Completion]],
+    ) -> Callable[[], Awaitable[_Completion]]:
+        """在限流器下执行上游调用（未注入限流器时原样返回）"""
+        limiter = self.rate_limiter
+        if limiter is None:
+            return fetch
+
+        def usage(completion: _Completion) -> int | None:
+            _, prompt_tokens, completion_tokens = completion
+            if prompt_tokens is None or completion_tokens is None:
+                return None
+            return prompt_tokens + completion_tokens
+
+        async def limited() -> _Completion:
+            return await limiter.run(
+                provider,
+                request["model"],
+                fetch,
+                messages=request["messages"],
+                max_tokens=request.get("max_tokens") or 0,
+                usage=usage,
+            )
+
+        return limited
+
+    async def _fetch_cached(
+        self,
+        key: str,
+        request: dict[str, Any],
+        cache: _CachePolicy,
+        fetch: Callable[[], Awaitable[_Completion]],
+    ) -> str | None:
+        """查缓存 → 调用 API → 写缓存（每组并发的相同请求只执行一次）"""
+        if self.response_cache is None or not cache.store:
+            content, _, _ = await fetch()
+            return content
+
+        cached = await self.response_cache.aget(key)
+        if cached is not None:
+            return cached.content
+
+        content, prompt_tokens, completion_tokens = await fetch()
+        if content is not None:
+            if prompt_tokens is None:
+                prompt_tokens = estimate_tokens(json.dumps(request, ensure_ascii=False))
+            if completion_tokens is None:
+                completion_tokens = estimate_tokens(content)
+            await self.response_cache.aput(
+                key,
+                content,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                ttl_seconds=cache.ttl_seconds,
+            )
+        return content
@@ -5,8 +5,8 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import math
 import os
 from types import SimpleNamespace
 from typing import Any
@@ -14,7 +14,16 @@ from typing import Any
 from src.domain.exceptions import DomainError
 from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
 from src.domain.knowledge_base.ports.knowledge_repository import KnowledgeRepository
+from src.domain.knowledge_base.ports.reranker import Reranker
 from src.domain.knowledge_base.ports.retriever_service import RetrieverService
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.knowledge_base.embedding_cache import (
+    EmbeddingCache,
+    cache_model_key,
+    content_hash,
+)
+from src.infrastructure.knowledge_base.rerankers import CosineReranker
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
 
 # Optional deps (tests monkeypatch these symbols at module-level).
 try:  # pragma: no cover - exercised via unit-test monkeypatching
@@ -54,6 +63,19 @@ except Exception:  # noqa: BLE001 - optional dependency
 class ChromaRetrieverService(RetrieverService):
     """使用ChromaDB实现的检索服务"""
 
+    # 批量嵌入：每批文本数 / 同时在途的批次数
+    embedding_batch_size: int = 64
+    embedding_concurrency: int = 4
+    # 内容哈希嵌入缓存（None 表示不缓存）；维度参与缓存键，区分同名模型的不同输出维度
+    embedding_cache: EmbeddingCache | None = None
+    embedding_dimension: int = 0
+    # 检索结果缓存（None 表示不缓存）；写入/删除分块时按工作流递增语料版本
+    retrieval_cache: RetrievalCache | None = None
+    # 重排序阶段（可替换为 MMR / 交叉编码器）
+    reranker: Reranker = CosineReranker()
+    # 在途嵌入请求合并（None 表示不合并）：并发的相同查询 / 相同批次只调用一次提供方
+    embedding_single_flight: SingleFlight | None = None
+
     def __init__(
         self,
         knowledge_repository: KnowledgeRepository,
@@ -62,6 +84,12 @@ class ChromaRetrieverService(RetrieverService):
         chroma_path: str = "data/chroma_db",
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        embedding_batch_size: int = 64,
+        embedding_concurrency: int = 4,
+        embedding_cache: EmbeddingCache | None = None,
+        embedding_dimension: int = 0,
+        retrieval_cache: RetrievalCache | None = None,
+        reranker: Reranker | None = None,
     ):
         """初始化检索服务
 
@@ -72,11 +100,24 @@ class ChromaRetrieverService(RetrieverService):
             chroma_path: ChromaDB存储路径
             chunk_size: 分块大小
             chunk_overlap: 分块重叠
+            embedding_batch_size: embed_many 每批发送的文本数
+            embedding_concurrency: embed_many 同时在途的批次数
+            embedding_cache: 可选的嵌入缓存（按 模型/维度/内容哈希 复用向量）
+            embedding_dimension: 嵌入维度（作为缓存键的一部分）
+            retrieval_cache: 可选的检索结果缓存
+            reranker: 重排序器（默认向量化余弦相似度）
         """
         self.repository = knowledge_repository
         self.model_name = model_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_concurrency = max(1, embedding_concurrency)
+        self.embedding_cache = embedding_cache
+        self.embedding_dimension = embedding_dimension
+        self.retrieval_cache = retrieval_cache
+        self.reranker = reranker or CosineReranker()
+        self.embedding_single_flight = SingleFlight()
 
         if Settings is None or OpenAIEmbeddings is None or RecursiveCharacterTextSplitter is None:
             raise DomainError(
@@ -95,6 +136,9 @@ class ChromaRetrieverService(RetrieverService):
                 digest = hashlib.sha256(text.encode("utf-8")).digest()
                 return [b / 255.0 for b in digest[: self._dim]]
 
+            async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+                return [await self.aembed_query(text) for text in texts]
+
         class _NaiveTokenizer:
             def encode(self, text: str) -> list[str]:
                 return text.split()
@@ -148,42 +192,146 @@ class ChromaRetrieverService(RetrieverService):
         return len(self.tokenizer.encode(text))
 
     async def generate_embedding(self, text: str) -> list[float]:
-        """生成文本的向量嵌入"""
+        """生成文本的向量嵌入（命中嵌入缓存时不调用提供方，并发的相同文本只嵌入一次）"""
+        digest = content_hash(text)
+        flight = self.embedding_single_flight
+        if flight is None:
+            return await self._generate_embedding(text, digest)
+        # 每个等待者拿到独立副本，避免共享同一个 list
+        return list(
+            await flight.do(
+                self._flight_key(digest), lambda: self._generate_embedding(text, digest)
+            )
+        )
+
+    async def _generate_embedding(self, text: str, digest: str) -> list[float]:
+        """查嵌入缓存 → 调用提供方 → 写嵌入缓存"""
+        cache = self.embedding_cache
+        if cache is not None:
+            cached = await cache.aget_many(self._cache_model, self.embedding_dimension, [digest])
+            if cached[0] is not None:
+                return cached[0]
+
         try:
             embedding = await self.embeddings.aembed_query(text)
-            return embedding
         except DomainError:
             raise
         except Exception as e:
-            # 处理 OpenAI SDK 特定错误
-            try:
-                from openai import (
-                    APIConnectionError,
-                    APIError,
-                    APITimeoutError,
-                    AuthenticationError,
-                    BadRequestError,
-                    RateLimitError,
+            raise self._embedding_error(e) from e
+
+        if cache is not None and embedding:
+            await cache.aput_many(self._cache_model, self.embedding_dimension, {digest: embedding})
+        return embedding
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """批量生成向量嵌入
+
+        实现策略：
+        - 按内容哈希（sha256）去重，相同文本只嵌入一次
+        - 配置了嵌入缓存时先查缓存，只对未命中的文本调用提供方，结果回写缓存
+        - 按 embedding_batch_size 分批调用提供方的批量嵌入接口
+        - 批次之间并发执行，由信号量限制同时在途的批次数
+        """
+        if not texts:
+            return []
+
+        unique: dict[str, str] = {}
+        digests: list[str] = []
+        for text in texts:
+            digest = content_hash(text)
+            digests.append(digest)
+            unique.setdefault(digest, text)
+
+        vectors: dict[str, list[float]] = {}
+        cache = self.embedding_cache
+        if cache is not None:
+            cached = await cache.aget_many(
+                self._cache_model, self.embedding_dimension, list(unique)
+            )
+            for digest, embedding in zip(unique, cached, strict=True):
+                if embedding is not None:
+                    vectors[digest] = embedding
+
+        keys = [digest for digest in unique if digest not in vectors]
+        size = self.embedding_batch_size
+        batches = [keys[i : i + size] for i in range(0, len(keys), size)]
+        semaphore = asyncio.Semaphore(self.embedding_concurrency)
+
+        async def _run(batch: list[str]) -> list[list[float]]:
+            async with semaphore:
+                texts = [unique[key] for key in batch]
+                flight = self.embedding_single_flight
+                if flight is None:
+                    return await self._embed_batch(texts)
+                # 并发写入相同文档时批次完全一致，合并为一次提供方调用
+                return await flight.do(
+                    self._flight_key("batch:" + content_hash("\n".join(batch))),
+                    lambda: self._embed_batch(texts),
                 )
 
-                if isinstance(e, AuthenticationError):
-                    raise DomainError(
-                        "向量嵌入生成失败：OpenAI 认证失败（API Key 无效或缺失）"
-                    ) from e
-                if isinstance(e, RateLimitError):
-                    raise DomainError("向量嵌入生成失败：OpenAI 触发限流（Rate Limit）") from e
-                if isinstance(e, BadRequestError):
-                    raise DomainError("向量嵌入生成失败：OpenAI 请求参数错误") from e
-                if isinstance(e, APITimeoutError):
-                    raise DomainError("向量嵌入生成失败：OpenAI 请求超时") from e
-                if isinstance(e, APIConnectionError):
-                    raise DomainError("向量嵌入生成失败：OpenAI 连接失败") from e
-                if isinstance(e, APIError):
-                    raise DomainError("向量嵌入生成失败：OpenAI 服务端错误") from e
-            except ImportError:
-                pass
+        results = await asyncio.gather(*(_run(batch) for batch in batches))
 
-            raise DomainError("向量嵌入生成失败") from e
+        fresh: dict[str, list[float]] = {}
+        for batch, embeddings in zip(batches, results, strict=True):
+            if len(embeddings) != len(batch):
+                raise DomainError("向量嵌入生成失败：批量返回数量与输入不一致")
+            fresh.update(zip(batch, embeddings, strict=True))
+        if cache is not None and fresh:
+            await cache.aput_many(self._cache_model, self.embedding_dimension, fresh)
+        vectors.update(fresh)
+        return [list(vectors[digest]) for digest in digests]
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """调用一次批量嵌入接口（不支持批量时退化为并发单条调用）"""
+        try:
+            aembed_documents = getattr(self.embeddings, "aembed_documents", None)
+            if aembed_documents is not None:
+                return list(await aembed_documents(texts))
+            return list(await asyncio.gather(*(self.embeddings.aembed_query(t) for t in texts)))
+        except DomainError:
+            raise
+        except Exception as e:
+            raise self._embedding_error(e) from e
+
+    @property
+    def _cache_model(self) -> str:
+        """嵌入缓存键中的模型部分（含提供方，确定性嵌入不会污染真实提供方的缓存）"""
+        return cache_model_key(self.embeddings, self.model_name)
+
+    def _flight_key(self, digest: str) -> str:
+        """在途合并键：模型 / 维度 / 内容哈希"""
+        return f"{self.model_name}:{self.embedding_dimension}:{digest}"
+
+    @staticmethod
+    def _embedding_error(e: Exception) -> DomainError:
+        """将嵌入提供方异常转换为领域异常"""
+        # 处理 OpenAI SDK 特定错误
+        try:
+            from openai import (
+                APIConnectionError,
+                APIError,
+                APITimeoutError,
+                AuthenticationError,
+                BadRequestError,
+                RateLimitError,
+            )
+
+            if isinstance(e, AuthenticationError):
+                return DomainError("向量嵌入生成失败：OpenAI 认证失败（API Key 无效或缺失）")
+            if isinstance(e, RateLimitError):
+                return DomainError("向量嵌入生成失败：OpenAI 触发限流（Rate Limit）")
+            if isinstance(e, BadRequestError):
+                return DomainError("向量嵌入生成失败：OpenAI 请求参数错误")
+            if isinstance(e, APITimeoutError):
+                return DomainError("向量嵌入生成失败：OpenAI 请求超时")
+            if isinstance(e, APIConnectionError):
+                return DomainError("向量嵌入生成失败：OpenAI 连接失败")
+            if isinstance(e, APIError):
+                return DomainError("向量嵌入生成失败：OpenAI 服务端错误")
+        except ImportError:
+            pass
+
+        return DomainError("向量嵌入生成失败")
 
     async def chunk_document(
         self,
@@ -224,7 +372,15 @@ class ChromaRetrieverService(RetrieverService):
         top_k: int = 5,
         filters: dict[str, str] | None = None,
     ) -> list[tuple[DocumentChunk, float]]:
-        """检索相关的文档块"""
+        """检索相关的文档块（命中检索缓存时跳过嵌入与向量查询）"""
+        cache = self.retrieval_cache
+        cache_key: tuple = ()
+        if cache is not None:
+            cache_key = cache.make_key("chunks", workflow_id, query, top_k, filters)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
         try:
             # 生成查询向量
             query_embedding = await self.generate_embedding(query)
@@ -297,6 +453,8 @@ class ChromaRetrieverService(RetrieverService):
 
             # 按相似度排序
             chunks_with_scores.sort(key=lambda x: x[1], reverse=True)
+            if cache is not None:
+                cache.put(cache_key, list(chunks_with_scores))
             return chunks_with_scores
         except DomainError:
             raise
@@ -324,35 +482,15 @@ class ChromaRetrieverService(RetrieverService):
     ) -> list[tuple[DocumentChunk, float]]:
         """对文档块进行重排序
 
-        这里使用简单的余弦相似度重排序
-        实际项目中可以使用更复杂的重排序模型
+        取前 top_k * 2 个有向量的候选，交给可插拔的重排序器（默认向量化余弦相似度）。
         """
         # 生成查询向量
         query_embedding = await self.generate_embedding(query)
         if not query_embedding:
             return []
 
-        def _cosine(a: list[float], b: list[float]) -> float:
-            if not a or not b:
-                return 0.0
-            if len(a) != len(b):
-                raise ValueError("Embedding dimension mismatch")
-            dot = sum(x * y for x, y in zip(a, b, strict=False))
-            norm_a = math.sqrt(sum(x * x for x in a))
-            norm_b = math.sqrt(sum(y * y for y in b))
-            if norm_a == 0.0 or norm_b == 0.0:
-                return 0.0
-            return dot / (norm_a * norm_b)
-
-        chunks_with_scores = []
-        for chunk in chunks[: top_k * 2]:  # 获取更多候选
-            if chunk.embedding:
-                similarity = _cosine(query_embedding, chunk.embedding)
-                chunks_with_scores.append((chunk, similarity))
-
-        # 按相似度排序并返回top_k
-        chunks_with_scores.sort(key=lambda x: x[1], reverse=True)
-        return chunks_with_scores[:top_k]
+        candidates = [chunk for chunk in chunks[: top_k * 2] if chunk.embedding]  # 获取更多候选
+        return await self.reranker.rerank(query, query_embedding, candidates, top_k)
 
     async def get_context_for_query(
         self,
@@ -361,6 +499,14 @@ class ChromaRetrieverService(RetrieverService):
         max_tokens: int = 4000,
     ) -> str:
         """为查询获取上下文"""
+        cache = self.retrieval_cache
+        cache_key: tuple = ()
+        if cache is not None:
+            cache_key = cache.make_key("context", workflow_id, query, 10, None, max_tokens)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         # 检索相关文档块
         chunks_with_scores = await self.retrieve_relevant_chunks(
             query=query,
@@ -368,7 +514,15 @@ class ChromaRetrieverService(RetrieverService):
             top_k=10,  # 获取更多候选以便筛选
         )
 
-        # 构建上下文
+        context = self.format_context(chunks_with_scores, max_tokens)
+        if cache is not None:
+            cache.put(cache_key, context)
+        return context
+
+    def format_context(
+        self, chunks_with_scores: list[tuple[DocumentChunk, float]], max_tokens: int
+    ) -> str:
+        """将检索结果拼接为上下文（按 token 预算跳过放不下的分块）"""
         context_parts: list[str] = []
         current_tokens = 0
 
@@ -418,6 +572,7 @@ class ChromaRetrieverService(RetrieverService):
             self.collection.add(
                 ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
             )
+            self._invalidate_retrievals(metadatas)
         except DomainError:
             raise
         except (TypeError, ValueError) as e:
@@ -442,6 +597,15 @@ class ChromaRetrieverService(RetrieverService):
         if results["ids"]:
             # 删除这些块
             self.collection.delete(ids=results["ids"])
+            self._invalidate_retrievals(results.get("metadatas") or [])
+
+    def _invalidate_retrievals(self, metadatas: list[dict[str, Any] | None]) -> None:
+        """递增受影响工作流的语料版本（无 workflow_id 的分块属于全局分区）"""
+        if self.retrieval_cache is None:
+            return
+        workflow_ids = {(metadata or {}).get("workflow_id") or None for metadata in metadatas}
+        for workflow_id in workflow_ids:
+            self.retrieval_cache.bump(workflow_id)
 
     async def update_document_chunk(self, chunk: DocumentChunk) -> None:
         """更新文档块"""
@@ -0,0 +1,262 @@
+"""EmbeddingCache - 基于内容哈希的持久化向量嵌入缓存
+
+同一段文本在同一模型/维度下的嵌入是确定的，重复调用嵌入接口只会增加延迟和费用
+（重新导入文档、重复的用户查询、每轮对话的 RAG 检索）。
+
+设计：
+- 缓存键：(model, dimension, sha256(text))；model 由调用方经 cache_model_key 加上提供方标识，
+  避免本地确定性嵌入与真实提供方的向量在同一模型名下互相复用
+- 两级缓存：进程内 LRU（OrderedDict）在前，SQLite 表（float32 BLOB）在后
+- SQLite 访问在线程中执行（asyncio.to_thread），不阻塞事件循环；磁盘线程只读写 SQLite，
+  查到的向量由调用方写回内存 LRU；LRU 与指标由独立的锁保护（进程级缓存会被多个事件循环线程共享）
+- 指标：内存命中 / 磁盘命中 / 未命中 / 写入次数
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.infrastructure.knowledge_base.local_vector_index import (
+    decode_embedding,
+    encode_embedding,
+)
+
+
+def content_hash(text: str) -> str:
+    """计算文本的内容哈希（sha256 十六进制）"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_model_key(embeddings: object, model_name: str) -> str:
+    """缓存键中的模型部分：嵌入提供方类型 + 模型名（不同提供方的向量互不复用）"""
+    return f"{type(embeddings).__name__}/{model_name}"
+
+
+class EmbeddingCache:
+    """两级（内存 LRU + SQLite）向量嵌入缓存
+
+    Example:
+        >>> cache = EmbeddingCache("data/embedding_cache.db")
+        >>> key = content_hash("hello")
+        >>> await cache.aget_many("text-embedding-3-small", 1536, [key])
+        [None]
+        >>> await cache.aput_many("text-embedding-3-small", 1536, {key: [0.1, 0.2]})
+    """
+
+    def __init__(self, db_path: str | None = None, max_memory_entries: int = 10_000):
+        """初始化缓存
+
+        参数：
+            db_path: SQLite 文件路径；为 None 时只使用内存 LRU
+            max_memory_entries: 内存 LRU 最多保留的向量数
+        """
+        self.db_path = db_path
+        self._max_memory_entries = max(0, max_memory_entries)
+        self._memory: OrderedDict[tuple[str, int, str], list[float]] = OrderedDict()
+        self._lock = threading.Lock()  # 保护 SQLite 连接
+        self._memory_lock = threading.Lock()  # 保护内存 LRU 与指标
+        self._conn: sqlite3.Connection | None = None
+
+        # 监控指标
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._writes = 0
+
+    # ==================== 异步接口 ====================
+
+    async def aget_many(
+        self, model: str, dimension: int, hashes: list[str]
+    ) -> list[list[float] | None]:
+        """批量查询（先查内存，未命中的部分在线程中查 SQLite）"""
+        results, missing = self._get_from_memory(model, dimension, hashes)
+        if missing and self.db_path is not None:
+            found = await asyncio.to_thread(self._load_from_disk, model, dimension, missing)
+            self._merge_found(model, dimension, hashes, results, found)
+        self._record(results, memory_hits=len(hashes) - len(missing))
+        return results
+
+    async def aput_many(self, model: str, dimension: int, items: dict[str, list[float]]) -> None:
+        """批量写入（内存立即可见，SQLite 在线程中写入）"""
+        if not items:
+            return
+        with self._memory_lock:
+            for text_hash, embedding in items.items():
+                self._remember((model, dimension, text_hash), list(embedding))
+            self._writes += len(items)
+        if self.db_path is not None:
+            await asyncio.to_thread(self._store_to_disk, model, dimension, items)
+
+    # ==================== 同步接口 ====================
+
+    def get_many(self, model: str, dimension: int, hashes: list[str]) -> list[list[float] | None]:
+        """批量查询（同步版本，供离线脚本使用）"""
+        results, missing = self._get_from_memory(model, dimension, hashes)
+        if missing and self.db_path is not None:
+            found = self._load_from_disk(model, dimension, missing)
+            self._merge_found(model, dimension, hashes, results, found)
+        self._record(results, memory_hits=len(hashes) - len(missing))
+        return results
+
+    def put_many(self, model: str, dimension: int, items: dict[str, list[float]]) -> None:
+        """批量写入（同步版本，供离线脚本使用）"""
+        if not items:
+            return
+        with self._memory_lock:
+            for text_hash, embedding in items.items():
+                self._remember((model, dimension, text_hash), list(embedding))
+            self._writes += len(items)
+        if self.db_path is not None:
+            self._store_to_disk(model, dimension, items)
+
+    def close(self) -> None:
+        """关闭 SQLite 连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> dict:
+        """获取缓存统计指标
+
+        Returns:
+            - hits / memory_hits / disk_hits / misses / hit_rate
+            - writes: 写入的向量数
+            - memory_entries: 当前内存 LRU 中的向量数
+        """
+        with self._memory_lock:
+            hits = self._memory_hits + self._disk_hits
+            total = hits + self._misses
+            return {
+                "hits": hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": hits / total if total > 0 else 0.0,
+                "writes": self._writes,
+                "memory_entries": len(self._memory),
+                "persistent": self.db_path is not None,
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _get_from_memory(
+        self, model: str, dimension: int, hashes: list[str]
+    ) -> tuple[list[list[float] | None], list[str]]:
+        results: list[list[float] | None] = []
+        missing: list[str] = []
+        with self._memory_lock:
+            for text_hash in hashes:
+                key = (model, dimension, text_hash)
+                embedding = self._memory.get(key)
+                if embedding is None:
+                    missing.append(text_hash)
+                    results.append(None)
+                else:
+                    self._memory.move_to_end(key)
+                    results.append(list(embedding))
+        return results, missing
+
+    def _merge_found(
+        self,
+        model: str,
+        dimension: int,
+        hashes: list[str],
+        results: list[list[float] | None],
+        found: dict[str, list[float]],
+    ) -> None:
+        """把磁盘命中填入结果并写回内存 LRU（在调用方线程执行）"""
+        for i, text_hash in enumerate(hashes):
+            if results[i] is None and text_hash in found:
+                results[i] = found[text_hash]
+        with self._memory_lock:
+            for text_hash, embedding in found.items():
+                self._remember((model, dimension, text_hash), embedding)
+
+    def _record(self, results: list[list[float] | None], memory_hits: int) -> None:
+        found = sum(1 for embedding in results if embedding is not None)
+        with self._memory_lock:
+            self._memory_hits += memory_hits
+            self._disk_hits += found - memory_hits
+            self._misses += len(results) - found
+
+    def _remember(self, key: tuple[str, int, str], embedding: list[float]) -> None:
+        """写入内存 LRU（调用方持有 _memory_lock）"""
+        if self._max_memory_entries == 0:
+            return
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            assert self.db_path is not None
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, dimension, text_hash)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load_from_disk(
+        self, model: str, dimension: int, hashes: list[str]
+    ) -> dict[str, list[float]]:
+        """从 SQLite 读取向量（可在工作线程中执行，不触碰内存 LRU）"""
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            conn = self._connection()
+            # SQLite 默认最多 999 个绑定参数，按批查询
+            for start in range(0, len(hashes), 900):
+                batch = hashes[start : start + 900]
+                placeholders = ",".join("?" for _ in batch)
+                rows = conn.execute(
+                    f"""
+                    SELECT text_hash, embedding FROM embedding_cache
+                    WHERE model = ? AND dimension = ? AND text_hash IN ({placeholders})
+                    """,
+                    (model, dimension, *batch),
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = decode_embedding(blob)
+        return found
+
+    def _store_to_disk(self, model: str, dimension: int, items: dict[str, list[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO embedding_cache
+                (model, dimension, text_hash, embedding, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        model,
+                        dimension,
+                        text_hash,
+                        encode_embedding(embedding),
+                        now,
+                    )
+                    for text_hash, embedding in items.items()
+                ],
+            )
+            conn.commit()
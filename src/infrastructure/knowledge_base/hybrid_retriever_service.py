@@ -0,0 +1,195 @@
+"""HybridRetrieverService - 词法（BM25）+ 向量混合检索
+
+纯向量检索对精确标识符（节点名、错误码）召回较差。混合检索同时查询：
+- 词法通道：KnowledgeRepository.search_chunks_lexical（FTS5 倒排索引 + BM25）
+- 向量通道：底层检索服务（如 ChromaRetrieverService）的 retrieve_relevant_chunks
+
+两路结果按倒数排名融合（Reciprocal Rank Fusion）：
+    score(d) = Σ weight_i / (rrf_k + rank_i(d))
+融合后的候选再交给 rerank_chunks 等后续阶段（分块需携带 document_id/chunk_index，
+两路结果按该组合键对齐）。
+
+大语料下的词法预筛选：当分区分块数超过 prefilter_min_chunks 且词法通道召回足够时，
+向量通道只对词法候选打分（KnowledgeRepository.search_similar_chunks 的 candidate_ids），
+避免对整个分区做向量扫描。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.domain.knowledge_base.ports.knowledge_repository import KnowledgeRepository
+from src.domain.knowledge_base.ports.retriever_service import RetrieverService
+
+
+def chunk_identity(chunk: DocumentChunk) -> tuple[str, int]:
+    """分块的跨存储标识（向量存储返回的分块ID可能与仓储不同）"""
+    return (chunk.document_id, chunk.chunk_index)
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[tuple[DocumentChunk, float]]],
+    weights: list[float] | None = None,
+    rrf_k: int = 60,
+) -> list[tuple[DocumentChunk, float]]:
+    """倒数排名融合
+
+    参数：
+        rankings: 多路按相关性降序排列的结果
+        weights: 每路的权重（默认均为 1.0）
+        rrf_k: 平滑常数，越大越弱化头部排名的优势
+
+    返回：
+        (DocumentChunk, 融合分数) 列表，按分数降序；同一分块保留首次出现的对象
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: dict[tuple[str, int], float] = {}
+    chunks: dict[tuple[str, int], DocumentChunk] = {}
+    for ranking, weight in zip(rankings, weights, strict=True):
+        seen: set[tuple[str, int]] = set()
+        for rank, (chunk, _score) in enumerate(ranking, start=1):
+            identity = chunk_identity(chunk)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            chunks.setdefault(identity, chunk)
+            scores[identity] = scores.get(identity, 0.0) + weight / (rrf_k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(chunks[identity], score) for identity, score in fused]
+
+
+class HybridRetrieverService(RetrieverService):
+    """混合检索服务（装饰底层向量检索服务）
+
+    嵌入、切分、重排序、写入等操作全部委托给底层检索服务，
+    只替换 retrieve_relevant_chunks / get_context_for_query 的召回逻辑。
+    """
+
+    def __init__(
+        self,
+        base: RetrieverService,
+        knowledge_repository: KnowledgeRepository,
+        rrf_k: int = 60,
+        candidate_pool: int = 50,
+        lexical_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        prefilter_min_chunks: int = 20_000,
+    ):
+        """初始化混合检索服务
+
+        参数：
+            base: 底层向量检索服务
+            knowledge_repository: 知识库仓储（提供词法检索与候选向量打分）
+            rrf_k: RRF 平滑常数
+            candidate_pool: 每路召回的候选数量（不少于 top_k）
+            lexical_weight: 词法通道权重
+            vector_weight: 向量通道权重
+            prefilter_min_chunks: 分区分块数达到该值时启用词法预筛选
+        """
+        self.base = base
+        self.repository = knowledge_repository
+        self.rrf_k = rrf_k
+        self.candidate_pool = max(1, candidate_pool)
+        self.lexical_weight = lexical_weight
+        self.vector_weight = vector_weight
+        self.prefilter_min_chunks = prefilter_min_chunks
+
+    # ==================== 委托 ====================
+
+    async def generate_embedding(self, text: str) -> list[float]:
+        return await self.base.generate_embedding(text)
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return await self.base.embed_many(texts)
+
+    async def chunk_document(
+        self,
+        content: str,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+    ) -> list[str]:
+        return await self.base.chunk_document(content, chunk_size, chunk_overlap)
+
+    async def rerank_chunks(
+        self,
+        query: str,
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        return await self.base.rerank_chunks(query, chunks, top_k)
+
+    async def add_document_chunks(self, chunks: list[DocumentChunk]) -> None:
+        await self.base.add_document_chunks(chunks)
+
+    async def delete_document_chunks(self, document_id: str) -> None:
+        await self.base.delete_document_chunks(document_id)
+
+    # ==================== 混合召回 ====================
+
+    async def retrieve_relevant_chunks(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        top_k: int = 5,
+        filters: dict[str, Any] | None = None,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """混合检索：词法 + 向量两路召回，RRF 融合后返回 top_k
+
+        返回的分数为 RRF 分数按理论上限（两路均排第一）归一化到 [0, 1]。
+        """
+        pool = max(top_k, self.candidate_pool)
+
+        lexical = await self.repository.search_chunks_lexical(query, workflow_id, limit=pool)
+        lexical = [hit for hit in lexical if self._matches(hit[0], filters)]
+
+        if len(lexical) >= top_k and await self._should_prefilter(workflow_id):
+            query_embedding = await self.base.generate_embedding(query)
+            vector = await self.repository.search_similar_chunks(
+                query_embedding,
+                workflow_id=workflow_id,
+                limit=pool,
+                threshold=-1.0,
+                candidate_ids=[chunk.id for chunk, _score in lexical],
+            )
+        else:
+            vector = await self.base.retrieve_relevant_chunks(
+                query=query, workflow_id=workflow_id, top_k=pool, filters=filters
+            )
+
+        fused = reciprocal_rank_fusion(
+            [vector, lexical],
+            weights=[self.vector_weight, self.lexical_weight],
+            rrf_k=self.rrf_k,
+        )
+        ceiling = (self.vector_weight + self.lexical_weight) / (self.rrf_k + 1)
+        return [(chunk, score / ceiling) for chunk, score in fused[:top_k]]
+
+    async def get_context_for_query(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        max_tokens: int = 4000,
+    ) -> str:
+        """基于混合检索结果构建上下文"""
+        chunks_with_scores = await self.retrieve_relevant_chunks(
+            query=query, workflow_id=workflow_id, top_k=10
+        )
+        format_context = getattr(self.base, "format_context", None)
+        if format_context is not None:
+            return format_context(chunks_with_scores, max_tokens)
+        return "\n\n---\n\n".join(f"[文档片段] {chunk.content}" for chunk, _ in chunks_with_scores)
+
+    # ==================== 内部方法 ====================
+
+    async def _should_prefilter(self, workflow_id: str | None) -> bool:
+        if self.prefilter_min_chunks <= 0:
+            return True
+        return await self.repository.count_chunks(workflow_id) >= self.prefilter_min_chunks
+
+    @staticmethod
+    def _matches(chunk: DocumentChunk, filters: dict[str, Any] | None) -> bool:
+        if not filters:
+            return True
+        metadata = chunk.metadata or {}
+        return all(metadata.get(key) == value for key, value in filters.items())
@@ -0,0 +1,385 @@
+"""ivfpq_index - IVF + PQ 近似最近邻索引（纯 NumPy）
+
+精确扫描的代价与向量数成正比，并且每个向量要占 4·dim 字节。IVF-PQ：
+- 粗量化器：k-means 把向量划分到 nlist 个倒排列表，检索时只扫描与查询最近的 nprobe 个列表
+- 乘积量化（PQ）：残差（向量 - 所属质心）切成 m 段，每段用至多 256 个码字量化，
+  每个向量只存 m 字节编码 + 4 字节列表归属
+- 内积可分解：q·x ≈ q·c + Σ_j q_j·codebook_j[code_j]，查询时每段算一次查找表（m × ksub），
+  候选打分只需查表求和（非对称距离计算，ADC）
+- 精排：对 ADC 分数最高的 limit × refine_factor 个候选，用原始向量（内存映射矩阵）重新打分
+- 持久化：质心、码本、编码与列表归属均为 .npy 文件，加载时以 mmap_mode="r" 映射
+
+向量应事先归一化（余弦相似度即内积）。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+_BLOCK_ROWS = 1024
+
+
+def default_nlist(n: int) -> int:
+    """倒排列表数量的经验值：约 √n（至少 1，不超过 n）"""
+    return max(1, min(n, int(round(math.sqrt(n)))))
+
+
+def default_subquantizers(dim: int) -> int:
+    """子量化器数量：每段约 8 维（dim 的约数中不超过 dim/8 的最大值）"""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def assign_nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """按 L2 距离为每行分配最近的质心（分块计算，控制中间矩阵大小）"""
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    scaled = (-2.0 * centroids.T).astype(np.float32)
+    assign = np.empty(data.shape[0], dtype=np.int32)
+    for start in range(0, data.shape[0], _BLOCK_ROWS):
+        block = np.asarray(data[start : start + _BLOCK_ROWS], dtype=np.float32)
+        # ||x - c||² = ||x||² - 2x·c + ||c||²，||x||² 对 argmin 无影响
+        distances = block @ scaled
+        distances += centroid_sq
+        assign[start : start + block.shape[0]] = np.argmin(distances, axis=1)
+    return assign
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """Lloyd k-means（随机抽样初始化；空簇用随机样本重新填充）
+
+    返回：
+        (min(k, n), dim) 的 float32 质心矩阵
+    """
+    data = np.asarray(data, dtype=np.float32)
+    n = data.shape[0]
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(n, k, replace=False)].copy()
+    if k == n:
+        return centroids
+
+    for _ in range(iterations):
+        assign = assign_nearest(data, centroids)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind="stable")
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts[present])[:-1]])
+        sums = np.add.reduceat(data[order], starts, axis=0)
+        updated = centroids.copy()
+        updated[present] = sums / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            updated[empty] = data[rng.choice(n, empty.size, replace=False)]
+        if np.allclose(updated, centroids, atol=1e-6):
+            centroids = updated
+            break
+        centroids = updated
+    return centroids
+
+
+def assign_subspaces(data: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    """按子空间为每行分配最近的码字（所有子空间一次批量矩阵乘法）
+
+    参数：
+        data: (n, m·dsub) 残差矩阵
+        codebooks: (m, ksub, dsub) 码本
+
+    返回：
+        (n, m) 码字下标
+    """
+    m, _ksub, dsub = codebooks.shape
+    # 增广一维：[x, 1] · [-2c, ||c||²] = ||c||² - 2x·c，一次矩阵乘法得到距离（省去 ||x||²）
+    augmented = np.concatenate(
+        [-2.0 * codebooks, np.einsum("jcd,jcd->jc", codebooks, codebooks)[:, :, None]], axis=2
+    )
+    augmented = augmented.transpose(0, 2, 1).astype(np.float32)  # (m, dsub+1, ksub)
+    ones = np.ones((m, _BLOCK_ROWS, 1), dtype=np.float32)
+    codes = np.empty((data.shape[0], m), dtype=np.int32)
+    for start in range(0, data.shape[0], _BLOCK_ROWS):
+        block = np.asarray(data[start : start + _BLOCK_ROWS], dtype=np.float32)
+        rows = block.shape[0]
+        sub = block.reshape(rows, m, dsub).transpose(1, 0, 2)  # (m, b, dsub)
+        sub = np.concatenate([sub, ones[:, :rows]], axis=2)
+        codes[start : start + rows] = np.argmin(sub @ augmented, axis=2).T
+    return codes
+
+
+def train_codebooks(
+    residual: np.ndarray, m: int, ksub: int = 256, iterations: int = 15, seed: int = 0
+) -> np.ndarray:
+    """在残差上训练 PQ 码本（m 个子空间的 k-means 同步迭代）
+
+    返回：
+        (m, min(ksub, n), dsub) 的 float32 码本
+    """
+    n, dim = residual.shape
+    dsub = dim // m
+    k = min(ksub, n)
+    sub = residual.reshape(n, m, dsub)
+    rng = np.random.default_rng(seed)
+    codebooks = sub[rng.choice(n, k, replace=False)].transpose(1, 0, 2).copy()
+    if k == n:
+        return codebooks
+
+    for _ in range(iterations):
+        codes = assign_subspaces(residual, codebooks)
+        updated = codebooks.copy()
+        for j in range(m):
+            counts = np.bincount(codes[:, j], minlength=k)
+            sums = np.stack(
+                [np.bincount(codes[:, j], weights=sub[:, j, d], minlength=k) for d in range(dsub)],
+                axis=1,
+            )
+            present = counts > 0
+            updated[j, present] = sums[present] / counts[present, None]
+            empty = np.flatnonzero(~present)
+            if empty.size:
+                updated[j, empty] = sub[rng.choice(n, empty.size, replace=False), j]
+        if np.allclose(updated, codebooks, atol=1e-6):
+            return updated
+        codebooks = updated
+    return codebooks
+
+
+class IVFPQIndex:
+    """IVF + PQ 索引（行号即向量在外部矩阵中的位置）
+
+    使用示例：
+        index = IVFPQIndex.train(vectors)            # 训练并编码全部向量
+        index.add(new_vectors)                       # 增量追加（沿用已训练的量化器）
+        rows, scores = index.search(query, 10, nprobe=16, refine=vectors)
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        codebooks: np.ndarray,
+        assign: np.ndarray | None = None,
+        codes: np.ndarray | None = None,
+        trained_size: int = 0,
+    ):
+        """初始化索引
+
+        参数：
+            centroids: 粗量化质心 (nlist, dim)
+            codebooks: PQ 码本 (m, ksub, dsub)
+            assign: 每个向量所属的倒排列表 (n,)
+            codes: 每个向量的 PQ 编码 (n, m)
+            trained_size: 训练时的向量数量（用于判断是否需要重新训练）
+        """
+        self.centroids = centroids
+        self.codebooks = codebooks
+        self.m, self.ksub, self.dsub = codebooks.shape
+        self.dim = centroids.shape[1]
+        self.assign = assign if assign is not None else np.zeros(0, dtype=np.int32)
+        self.codes = codes if codes is not None else np.zeros((0, self.m), dtype=np.uint8)
+        self.trained_size = trained_size
+        self._order: np.ndarray | None = None
+        self._offsets: np.ndarray | None = None
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def size(self) -> int:
+        return self.assign.shape[0]
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """每个向量常驻的字节数（PQ 编码 + 列表归属）"""
+        return self.m * self.codes.itemsize + self.assign.itemsize
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: int | None = None,
+        m: int | None = None,
+        ksub: int = 256,
+        sample_size: int = 65536,
+        pq_sample_size: int = 16384,
+        iterations: int = 15,
+        seed: int = 0,
+    ) -> IVFPQIndex:
+        """在向量（或其抽样）上训练粗量化器与 PQ 码本，并编码全部向量
+
+        参数：
+            vectors: (n, dim) 向量矩阵（可以是 np.memmap）
+            nlist: 倒排列表数量（默认约 √n）
+            m: 子量化器数量（须整除 dim，默认每段约 8 维）
+            ksub: 每段码字数量（≤ 256）
+            sample_size: 粗量化器训练抽样数量上限
+            pq_sample_size: PQ 码本训练抽样数量上限
+            iterations: k-means 迭代次数
+            seed: 随机种子
+        """
+        n, dim = vectors.shape
+        if n == 0:
+            raise ValueError("Cannot train an IVF-PQ index on an empty matrix")
+        m = m or default_subquantizers(dim)
+        if dim % m != 0:
+            raise ValueError(f"Dimension {dim} is not divisible by m={m}")
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(n, min(n, sample_size), replace=False))
+        sample = np.asarray(vectors[rows], dtype=np.float32)
+
+        centroids = kmeans(sample, nlist or default_nlist(n), iterations, seed)
+        residual = sample - centroids[assign_nearest(sample, centroids)]
+        codebooks = train_codebooks(
+            residual[:pq_sample_size], m, min(ksub, 256), iterations, seed
+        ).astype(np.float32)
+        index = cls(centroids, codebooks, trained_size=n)
+        index.add(vectors)
+        return index
+
+    def encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """计算向量的列表归属与残差 PQ 编码"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        assign = assign_nearest(vectors, self.centroids)
+        codes = np.empty((vectors.shape[0], self.m), dtype=np.uint8)
+        for start in range(0, vectors.shape[0], _BLOCK_ROWS):
+            stop = start + _BLOCK_ROWS
+            residual = vectors[start:stop] - self.centroids[assign[start:stop]]
+            codes[start:stop] = assign_subspaces(residual, self.codebooks)
+        return assign, codes
+
+    def add(self, vectors: np.ndarray) -> None:
+        """追加向量（行号从当前 size 开始顺延）"""
+        if vectors.shape[0] == 0:
+            return
+        assign, codes = self.encode(vectors)
+        self.assign = np.concatenate([self.assign, assign])
+        self.codes = np.concatenate([self.codes, codes])
+        self._order = None
+
+    def subset(self, keep: np.ndarray) -> IVFPQIndex:
+        """只保留 keep 为 True 的行（压缩外部矩阵时复用已有编码，无需重新训练）"""
+        return IVFPQIndex(
+            self.centroids,
+            self.codebooks,
+            np.asarray(self.assign[keep]),
+            np.asarray(self.codes[keep]),
+            self.trained_size,
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        limit: int,
+        nprobe: int = 16,
+        dead: np.ndarray | None = None,
+        refine: np.ndarray | None = None,
+        refine_factor: int = 10,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """近似 top-k 内积检索
+
+        参数：
+            query: 查询向量（应已归一化）
+            limit: 返回数量
+            nprobe: 扫描的倒排列表数量（越大召回越高、越慢）
+            dead: 可选的墓碑掩码（True 的行不参与检索）
+            refine: 可选的原始向量矩阵，用于对候选精排
+            refine_factor: 精排候选数量 = limit × refine_factor
+
+        返回：
+            (行号数组, 分数数组)，按分数降序
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if limit <= 0 or self.size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        coarse = self.centroids @ query
+        nprobe = max(1, min(nprobe, self.nlist))
+        probed = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        rows = self._rows_in_lists(probed)
+        if dead is not None and rows.size:
+            rows = rows[~dead[rows]]
+        if rows.size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # 查找表：table[j, c] = q_j · codebook_j[c]
+        table = np.einsum("jcd,jd->jc", self.codebooks, query.reshape(self.m, self.dsub))
+        codes = np.asarray(self.codes[rows])
+        scores = coarse[self.assign[rows]] + table[np.arange(self.m), codes].sum(axis=1)
+
+        keep = min(rows.size, limit * max(1, refine_factor) if refine is not None else limit)
+        top = np.argpartition(-scores, keep - 1)[:keep]
+        rows, scores = rows[top], scores[top]
+        if refine is not None:
+            order = np.argsort(rows)
+            rows = rows[order]
+            scores = np.asarray(refine[rows], dtype=np.float32) @ query
+
+        k = min(limit, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top].astype(np.int64), scores[top].astype(np.float32)
+
+    # ==================== 持久化 ====================
+
+    def save(self, stem: Path) -> None:
+        """保存到 `<stem>.{centroids,codebooks,assign,codes}.npy`（先写临时文件再替换）"""
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        for name, array in self._arrays().items():
+            path = stem.with_name(f"{stem.name}.{name}.npy")
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, stem: Path, trained_size: int = 0) -> IVFPQIndex | None:
+        """以内存映射方式加载；文件缺失或形状不一致时返回 None"""
+        arrays: dict[str, np.ndarray] = {}
+        for name in ("centroids", "codebooks", "assign", "codes"):
+            path = stem.with_name(f"{stem.name}.{name}.npy")
+            if not path.exists():
+                return None
+            try:
+                arrays[name] = np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                return None
+        centroids, codebooks = arrays["centroids"], arrays["codebooks"]
+        assign, codes = arrays["assign"], arrays["codes"]
+        if (
+            codebooks.ndim != 3
+            or centroids.shape[1] != codebooks.shape[0] * codebooks.shape[2]
+            or codes.shape != (assign.shape[0], codebooks.shape[0])
+        ):
+            return None
+        return cls(
+            np.asarray(centroids), np.asarray(codebooks), assign, codes, trained_size=trained_size
+        )
+
+    @staticmethod
+    def remove_files(stem: Path) -> None:
+        for name in ("centroids", "codebooks", "assign", "codes"):
+            stem.with_name(f"{stem.name}.{name}.npy").unlink(missing_ok=True)
+
+    # ==================== 内部方法 ====================
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {
+            "centroids": self.centroids,
+            "codebooks": self.codebooks,
+            "assign": self.assign,
+            "codes": self.codes,
+        }
+
+    def _rows_in_lists(self, lists: np.ndarray) -> np.ndarray:
+        """倒排列表的行号（按列表排序的 CSR 结构，追加后惰性重建）"""
+        if self._order is None or self._offsets is None:
+            assign = np.asarray(self.assign)
+            self._order = np.argsort(assign, kind="stable")
+            self._offsets = np.concatenate(
+                [[0], np.cumsum(np.bincount(assign, minlength=self.nlist))]
+            )
+        chunks = [self._order[self._offsets[i] : self._offsets[i + 1]] for i in lists]
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
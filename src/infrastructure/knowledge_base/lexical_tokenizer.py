@@ -0,0 +1,59 @@
+"""lexical_tokenizer - 中英文混合语料的词法切分
+
+为 SQLite FTS5 倒排索引提供统一的切分规则（写入与查询使用同一套规则）：
+- 中日韩文字：连续片段按二元组（bigram）切分，单字片段保留单字
+- 拉丁字母/数字：按单词切分，保留标识符整体（如 node_name、E-1001、v1.2），
+  同时输出其组成部分，使 "node" 也能命中 "node_name"
+- 统一 casefold
+
+切分结果以空格拼接后写入 FTS5（tokenchars 保留 `_ - .`），因此 FTS5 自身的
+unicode61 分词器只负责按空格拆分，不会再改变这里产出的词项。
+"""
+
+from __future__ import annotations
+
+import re
+
+# FTS5 建表时使用的分词器配置（与 to_fts_document 的输出配合）
+FTS_TOKENIZE = "unicode61 remove_diacritics 0 tokenchars '_-.'"
+
+# 假名、CJK 统一表意文字（含扩展 A）、韩文音节、兼容表意文字
+_TOKEN_PATTERN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+    r"|[0-9a-z_]+(?:[.\-][0-9a-z_]+)*"
+)
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_PART_SEPARATORS = re.compile(r"[_.\-]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """将文本切分为词项列表（保留重复，用于词频统计）"""
+    tokens: list[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.casefold()):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            continue
+
+        tokens.append(run)
+        parts = [part for part in _PART_SEPARATORS.split(run) if part]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def to_fts_document(text: str) -> str:
+    """生成写入 FTS5 的词项串"""
+    return " ".join(tokenize(text))
+
+
+def to_fts_query(text: str) -> str:
+    """生成 FTS5 MATCH 表达式（词项之间为 OR，由 BM25 负责排序）
+
+    返回空字符串表示查询中没有可检索的词项。
+    """
+    unique = dict.fromkeys(tokenize(text))
+    return " OR ".join(f'"{token}"' for token in unique)
@@ -0,0 +1,568 @@
+"""LocalVectorIndex - 嵌入式本地向量索引
+
+为 SQLiteKnowledgeRepository 提供不依赖外部向量引擎的精确 top-k 余弦检索。
+
+设计：
+- SQLite 是唯一事实来源：分块向量以 float32 BLOB 存在 document_chunks 表
+- 每个工作流一个连续的 float32 矩阵文件（行已归一化），通过 np.memmap 映射，
+  检索时一次矩阵-向量乘法完成打分，数据驻留在 OS page cache 而不是 Python 堆
+- 增量维护：新增分块直接追加到矩阵文件末尾，分块ID追加到 `.ids` 文件（每行一个 JSON 字符串），
+  sidecar 元数据只记录版本、行数与墓碑，单次追加的落盘开销与分区规模无关；删除只打墓碑（tombstone）；
+  追加前后校验矩阵文件的 inode 与长度，若被其他进程重建/追加过则丢弃分区，下次检索时重建
+- 墓碑比例超过阈值时自动压缩（重写矩阵文件，剔除已删除行）
+- 版本号校验：SQLite 中维护每个工作流的 version，若与内存索引不一致
+  （例如其他进程写入了分块），则从 SQLite 重建该工作流的矩阵
+- 可选的近似检索：分区向量数达到 ann_min_vectors 时训练 IVF-PQ 索引（见 ivfpq_index），
+  检索只扫描 nprobe 个倒排列表并用矩阵行精排；新增向量沿用已训练的量化器增量编码，
+  规模增长到训练时的 ann_retrain_growth 倍后重新训练；近似索引只在训练/压缩后落盘，
+  加载时为落盘之后追加的行补编码
+- 后台训练（background_training=True）：索引本身不在写入/加载路径上训练，
+  由调用方通过 pending_ann_training 取快照、在工作线程中训练、再用 install_ann 换入；
+  训练期间沿用旧近似索引（行已对齐时）或精确检索。重建/加载同样拆为
+  write_partition / read_partition（可在线程中执行）与 install（在调用方线程换入）
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.infrastructure.knowledge_base.ivfpq_index import IVFPQIndex
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_WORKFLOW_KEY = "__global__"
+
+
+def workflow_key(workflow_id: str | None) -> str:
+    """将工作流ID映射为索引分区键（无工作流的文档归入全局分区）"""
+    return workflow_id or GLOBAL_WORKFLOW_KEY
+
+
+def encode_embedding(embedding: list[float]) -> bytes:
+    """将向量编码为 float32 BLOB"""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def decode_embedding(blob: bytes | None) -> list[float]:
+    """将 float32 BLOB 解码为向量"""
+    if not blob:
+        return []
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+@dataclass
+class _WorkflowMatrix:
+    """单个工作流的向量矩阵（内存映射 + 墓碑）"""
+
+    key: str
+    path: Path
+    dim: int = 0
+    version: int = 0
+    ids: list[str] = field(default_factory=list)
+    positions: dict[str, int] = field(default_factory=dict)
+    dead: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    matrix: np.ndarray | None = None
+    ann: IVFPQIndex | None = None
+    ann_saved: dict[str, int] | None = None
+    inode: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def live_count(self) -> int:
+        return self.size - int(self.dead.sum())
+
+    def remap(self) -> None:
+        """按当前行数重新映射矩阵文件（记录文件 inode，用于发现其他进程替换了文件）"""
+        self.inode = os.stat(self.path).st_ino if self.path.exists() else 0
+        if self.size == 0 or self.dim == 0:
+            self.matrix = None
+            return
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.size, self.dim))
+
+    def file_matches(self) -> bool:
+        """矩阵文件仍是本分区映射的文件且长度与行数一致"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_ino == self.inode and stat.st_size == self.size * self.dim * 4
+
+
+class LocalVectorIndex:
+    """按工作流分区的本地精确向量索引
+
+    使用示例：
+        index = LocalVectorIndex("data/kb.db.vectors")
+        index.rebuild("wf_1", version=3, ids=[...], vectors=matrix)
+        index.append("wf_1", version=4, ids=["c1"], vectors=np.array([[...]]))
+        hits = index.search("wf_1", query, limit=5)  # [(chunk_id, score), ...]
+    """
+
+    def __init__(
+        self,
+        index_dir: str | Path,
+        compaction_threshold: float = 0.3,
+        ann_min_vectors: int = 0,
+        ann_nprobe: int = 16,
+        ann_refine_factor: int = 10,
+        ann_retrain_growth: float = 2.0,
+        background_training: bool = False,
+    ):
+        """初始化索引
+
+        参数：
+            index_dir: 矩阵文件所在目录
+            compaction_threshold: 墓碑占比超过该值时自动压缩
+            ann_min_vectors: 分区向量数达到该值时启用 IVF-PQ 近似检索（0 表示始终精确检索）
+            ann_nprobe: 近似检索扫描的倒排列表数量
+            ann_refine_factor: 近似检索精排候选倍数
+            ann_retrain_growth: 向量数增长到训练时的多少倍后重新训练
+            background_training: 为 True 时不在写入/加载路径上同步训练近似索引
+        """
+        self.index_dir = Path(index_dir)
+        self.compaction_threshold = compaction_threshold
+        self.ann_min_vectors = ann_min_vectors
+        self.ann_nprobe = ann_nprobe
+        self.ann_refine_factor = ann_refine_factor
+        self.ann_retrain_growth = ann_retrain_growth
+        self.background_training = background_training
+        self._matrices: dict[str, _WorkflowMatrix] = {}
+
+    # ==================== 状态查询 ====================
+
+    def version(self, key: str) -> int | None:
+        """返回分区在内存中的版本号（未加载返回 None）"""
+        matrix = self._matrices.get(key)
+        return matrix.version if matrix is not None else None
+
+    def live_count(self, key: str) -> int:
+        """返回分区中未删除的向量数量"""
+        matrix = self._matrices.get(key)
+        return matrix.live_count if matrix is not None else 0
+
+    def ann_stats(self, key: str) -> dict[str, Any] | None:
+        """返回分区近似索引的统计（未启用返回 None）"""
+        matrix = self._matrices.get(key)
+        if matrix is None or matrix.ann is None:
+            return None
+        return {
+            "vectors": matrix.ann.size,
+            "nlist": matrix.ann.nlist,
+            "subquantizers": matrix.ann.m,
+            "bytes_per_vector": matrix.ann.bytes_per_vector,
+            "compression_ratio": matrix.dim * 4 / matrix.ann.bytes_per_vector,
+        }
+
+    def load(self, key: str, version: int) -> bool:
+        """尝试从磁盘恢复分区（sidecar 版本与 SQLite 一致时才复用）
+
+        返回：
+            True 表示恢复成功，False 表示需要调用 rebuild
+        """
+        matrix = self.read_partition(key, version)
+        if matrix is None:
+            return False
+        self.install(matrix)
+        return True
+
+    def read_partition(self, key: str, version: int) -> _WorkflowMatrix | None:
+        """从磁盘读取分区但不换入（不修改索引状态，可在工作线程中执行）"""
+        path = self._matrix_path(key)
+        meta_path = path.with_suffix(".json")
+        if not path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != version:
+            return None
+
+        ids = self._read_ids(key)
+        dim = int(meta.get("dim", 0))
+        if ids is None or len(ids) != meta.get("size") or path.stat().st_size != len(ids) * dim * 4:
+            return None
+
+        dead = np.zeros(len(ids), dtype=bool)
+        dead[list(meta.get("dead", []))] = True
+        matrix = _WorkflowMatrix(
+            key=key,
+            path=path,
+            dim=dim,
+            version=version,
+            ids=ids,
+            positions={chunk_id: i for i, chunk_id in enumerate(ids)},
+            dead=dead,
+        )
+        matrix.remap()
+        ann_meta = meta.get("ann")
+        if ann_meta and matrix.matrix is not None and ann_meta.get("size", 0) <= matrix.size:
+            ann = IVFPQIndex.load(
+                self._ann_stem(key), trained_size=int(ann_meta.get("trained_size", 0))
+            )
+            if ann is not None and ann.size == ann_meta["size"] and ann.dim == dim:
+                # 落盘之后追加的行沿用已训练的量化器补编码
+                ann.add(np.asarray(matrix.matrix[ann.size :]))
+                matrix.ann = ann
+                matrix.ann_saved = dict(ann_meta)
+        return matrix
+
+    def install(self, matrix: _WorkflowMatrix) -> None:
+        """换入 read_partition / write_partition 得到的分区（替换同键的旧分区）"""
+        if self._matrices.get(matrix.key) is not matrix:
+            self._release(matrix.key)
+        self._matrices[matrix.key] = matrix
+        self._refresh_ann(matrix)
+
+    # ==================== 写入 ====================
+
+    def rebuild(
+        self,
+        key: str,
+        version: int,
+        ids: list[str],
+        vectors: np.ndarray,
+        ann: IVFPQIndex | None = None,
+    ) -> None:
+        """用完整数据重建分区矩阵（覆盖旧文件）
+
+        参数：
+            ann: 可复用的近似索引（行与 vectors 对齐）；为 None 时按需重新训练
+        """
+        self._release(key)
+        matrix = self.write_partition(key, version, ids, vectors, ann=ann)
+        self.install(matrix)
+
+    def write_partition(
+        self,
+        key: str,
+        version: int,
+        ids: list[str],
+        vectors: np.ndarray,
+        ann: IVFPQIndex | None = None,
+    ) -> _WorkflowMatrix:
+        """写出分区矩阵文件与元数据但不换入（可在工作线程中执行，随后调用 install）"""
+        vectors = self._normalize(vectors)
+        dim = int(vectors.shape[1]) if vectors.size else 0
+        path = self._matrix_path(key)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        vectors.tofile(tmp_path)
+        os.replace(tmp_path, path)
+        ids_path = path.with_suffix(".ids")
+        tmp_path = ids_path.with_suffix(".ids.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{json.dumps(chunk_id)}\n" for chunk_id in ids)
+        os.replace(tmp_path, ids_path)
+
+        matrix = _WorkflowMatrix(
+            key=key,
+            path=path,
+            dim=dim,
+            version=version,
+            ids=list(ids),
+            positions={chunk_id: i for i, chunk_id in enumerate(ids)},
+            dead=np.zeros(len(ids), dtype=bool),
+            ann=ann,
+        )
+        matrix.remap()
+        self._write_meta(matrix, save_ann=True)
+        return matrix
+
+    def append(self, key: str, version: int, ids: list[str], vectors: np.ndarray) -> None:
+        """向已加载的分区追加向量（同ID先打墓碑再追加）
+
+        维度不一致，或矩阵文件已被其他进程重建/追加时，丢弃分区，下次检索时从 SQLite 重建。
+        """
+        matrix = self._take_for_update(key, version)
+        if matrix is None or not ids:
+            return
+        vectors = self._normalize(vectors)
+        if matrix.dim == 0:
+            matrix.dim = int(vectors.shape[1])
+        if vectors.shape[1] != matrix.dim:
+            logger.warning(
+                "Vector dimension mismatch on append, partition will be rebuilt",
+                extra={"workflow_key": key, "expected": matrix.dim, "got": vectors.shape[1]},
+            )
+            self._release(key)
+            return
+        if not matrix.file_matches():
+            self._release(key)
+            return
+
+        self._tombstone(matrix, ids)
+        with open(matrix.path, "ab") as f:
+            vectors.tofile(f)
+        with open(matrix.path.with_suffix(".ids"), "a", encoding="utf-8") as f:
+            f.writelines(f"{json.dumps(chunk_id)}\n" for chunk_id in ids)
+        start = matrix.size
+        matrix.ids.extend(ids)
+        for offset, chunk_id in enumerate(ids):
+            matrix.positions[chunk_id] = start + offset
+        matrix.dead = np.concatenate([matrix.dead, np.zeros(len(ids), dtype=bool)])
+        matrix.version = version
+        if not matrix.file_matches():
+            # 追加期间有其他写入方：文件内容不可信
+            self._release(key)
+            return
+        matrix.remap()
+        if matrix.ann is not None:
+            matrix.ann.add(vectors)
+        self._refresh_ann(matrix)
+        self._write_meta(matrix)
+
+    def delete(self, key: str, version: int, ids: list[str]) -> None:
+        """删除向量（打墓碑，必要时压缩）"""
+        matrix = self._take_for_update(key, version)
+        if matrix is None:
+            return
+        self._tombstone(matrix, ids)
+        matrix.version = version
+        if matrix.size and matrix.dead.sum() / matrix.size > self.compaction_threshold:
+            self.compact(key)
+
+    def compact(self, key: str) -> None:
+        """压缩分区：重写矩阵文件，剔除墓碑行"""
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            return
+        alive = ~matrix.dead
+        ids = [chunk_id for chunk_id, keep in zip(matrix.ids, alive, strict=True) if keep]
+        vectors = (
+            np.asarray(matrix.matrix)[alive]
+            if matrix.matrix is not None
+            else np.zeros((0, matrix.dim), dtype=np.float32)
+        )
+        ann = matrix.ann.subset(alive) if matrix.ann is not None else None
+        self.rebuild(key, matrix.version, ids, vectors, ann=ann)
+
+    def drop(self, key: str) -> None:
+        """丢弃内存中的分区（下次访问时重新加载）"""
+        self._release(key)
+
+    def flush(self) -> None:
+        """将所有分区的元数据（行数、墓碑、版本）落盘"""
+        for matrix in self._matrices.values():
+            self._write_meta(matrix)
+
+    # ==================== 近似索引后台训练 ====================
+
+    def pending_ann_training(self, key: str) -> tuple[_WorkflowMatrix, np.ndarray] | None:
+        """需要（重新）训练近似索引时返回 (分区, 训练数据快照)，否则返回 None"""
+        matrix = self._matrices.get(key)
+        if matrix is None or matrix.matrix is None or not self._ann_wanted(matrix):
+            return None
+        if not self._ann_due(matrix):
+            return None
+        return matrix, matrix.matrix
+
+    def install_ann(self, matrix: _WorkflowMatrix, ann: IVFPQIndex) -> bool:
+        """换入后台训练好的近似索引（补编码训练期间追加的行）并落盘
+
+        分区已被重建/压缩/丢弃时放弃本次结果，返回 False。
+        """
+        if self._matrices.get(matrix.key) is not matrix or matrix.matrix is None:
+            return False
+        if ann.dim != matrix.dim or ann.size > matrix.size:
+            return False
+        if ann.size < matrix.size:
+            ann.add(np.asarray(matrix.matrix[ann.size :]))
+        matrix.ann = ann
+        self._write_meta(matrix, save_ann=True)
+        logger.info(
+            "Trained IVF-PQ index",
+            extra={"workflow_key": matrix.key, "vectors": matrix.size, "nlist": ann.nlist},
+        )
+        return True
+
+    # ==================== 检索 ====================
+
+    def search(
+        self,
+        key: str,
+        query: np.ndarray,
+        limit: int,
+        threshold: float | None = None,
+        candidates: list[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """top-k 余弦检索（启用近似索引的分区走 IVF-PQ，其余精确扫描）
+
+        参数：
+            key: 分区键
+            query: 查询向量（未归一化即可）
+            limit: 返回数量
+            threshold: 可选的最低相似度
+            candidates: 可选的候选分块ID（例如词法预筛选结果），只对这些行精确打分
+
+        返回：
+            (chunk_id, 相似度) 列表，按相似度降序
+        """
+        matrix = self._matrices.get(key)
+        if matrix is None or matrix.matrix is None or limit <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != matrix.dim:
+            return []
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+
+        if candidates is not None:
+            rows = np.fromiter(
+                (matrix.positions[c] for c in dict.fromkeys(candidates) if c in matrix.positions),
+                dtype=np.int64,
+            )
+            if rows.size == 0:
+                return []
+            scores = matrix.matrix[rows] @ (query / norm)
+        elif matrix.ann is not None:
+            rows, scores = matrix.ann.search(
+                query / norm,
+                limit,
+                nprobe=self.ann_nprobe,
+                dead=matrix.dead,
+                refine=matrix.matrix,
+                refine_factor=self.ann_refine_factor,
+            )
+            return [
+                (matrix.ids[int(row)], float(score))
+                for row, score in zip(rows, scores, strict=True)
+                if threshold is None or score >= threshold
+            ]
+        else:
+            rows = np.arange(matrix.size)
+            scores = np.where(matrix.dead, -np.inf, matrix.matrix @ (query / norm))
+            if matrix.live_count <= 0:
+                return []
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results: list[tuple[str, float]] = []
+        for position in top:
+            score = float(scores[position])
+            if score == -np.inf or (threshold is not None and score < threshold):
+                break
+            results.append((matrix.ids[int(rows[position])], score))
+        return results
+
+    # ==================== 内部方法 ====================
+
+    def _matrix_path(self, key: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        return self.index_dir / f"{safe}.f32"
+
+    def _ann_stem(self, key: str) -> Path:
+        return self._matrix_path(key).with_suffix(".ivfpq")
+
+    def _refresh_ann(self, matrix: _WorkflowMatrix) -> None:
+        """按规模启用、训练或重新训练分区的近似索引（后台训练模式下只停用失效的索引）"""
+        if matrix.matrix is None or not self._ann_wanted(matrix):
+            matrix.ann = None
+            return
+        if not self._ann_due(matrix):
+            return
+        if self.background_training:
+            ann = matrix.ann
+            if ann is not None and (ann.size != matrix.size or ann.dim != matrix.dim):
+                # 行未对齐的旧索引不可用：训练完成前走精确检索
+                matrix.ann = None
+            return
+        self.install_ann(matrix, IVFPQIndex.train(matrix.matrix))
+
+    def _ann_wanted(self, matrix: _WorkflowMatrix) -> bool:
+        return self.ann_min_vectors > 0 and matrix.live_count >= self.ann_min_vectors
+
+    def _ann_due(self, matrix: _WorkflowMatrix) -> bool:
+        ann = matrix.ann
+        return not (
+            ann is not None
+            and ann.size == matrix.size
+            and ann.dim == matrix.dim
+            and ann.size <= max(ann.trained_size, 1) * self.ann_retrain_growth
+        )
+
+    def _take_for_update(self, key: str, version: int) -> _WorkflowMatrix | None:
+        """取出可增量更新的分区
+
+        只有内存版本恰好落后一个版本时才能增量应用；否则说明中间有其他写入方，
+        直接丢弃分区，等下次检索时按 SQLite 重建。
+        """
+        matrix = self._matrices.get(key)
+        if matrix is not None and matrix.version != version - 1:
+            self._release(key)
+            return None
+        return matrix
+
+    def _release(self, key: str) -> None:
+        matrix = self._matrices.pop(key, None)
+        if matrix is not None:
+            matrix.matrix = None
+            matrix.ann = None
+
+    @staticmethod
+    def _tombstone(matrix: _WorkflowMatrix, ids: list[str]) -> None:
+        for chunk_id in ids:
+            position = matrix.positions.pop(chunk_id, None)
+            if position is not None:
+                matrix.dead[position] = True
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if vectors.size == 0:
+            return vectors
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return vectors / norms
+
+    def _read_ids(self, key: str) -> list[str] | None:
+        try:
+            with open(self._matrix_path(key).with_suffix(".ids"), encoding="utf-8") as f:
+                return [json.loads(line) for line in f]
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, matrix: _WorkflowMatrix, save_ann: bool = False) -> None:
+        """写 sidecar 元数据（ID 已追加到 `.ids` 文件）
+
+        参数：
+            save_ann: 为 True 时同时保存近似索引（训练/压缩后），否则沿用上次落盘的近似索引，
+                加载时为其后追加的行补编码
+        """
+        if save_ann:
+            if matrix.ann is not None:
+                matrix.ann.save(self._ann_stem(matrix.key))
+                matrix.ann_saved = {
+                    "size": matrix.ann.size,
+                    "trained_size": matrix.ann.trained_size,
+                }
+            else:
+                IVFPQIndex.remove_files(self._ann_stem(matrix.key))
+                matrix.ann_saved = None
+        meta: dict[str, Any] = {
+            "version": matrix.version,
+            "dim": matrix.dim,
+            "size": matrix.size,
+            "dead": np.flatnonzero(matrix.dead).tolist(),
+            "ann": matrix.ann_saved,
+        }
+        meta_path = matrix.path.with_suffix(".json")
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
@@ -176,7 +176,10 @@ class RAGConfigManager:
                         description="Health check knowledge base",
                         type=KnowledgeBaseType.SYSTEM,
                     )
-                    await repo.save_knowledge_base(test_kb)
+                    try:
+                        await repo.save_knowledge_base(test_kb)
+                    finally:
+                        await repo.close()
 
                     health["components"]["vector_store"]["status"] = "healthy"
                     health["components"]["vector_store"]["details"] = f"SQLite: {db_path}"
@@ -0,0 +1,205 @@
+"""rerankers - 重排序器实现
+
+- CosineReranker：候选向量堆叠为矩阵，归一化一次，一次矩阵-向量乘法完成打分
+- MMRReranker：最大边际相关性（Maximal Marginal Relevance），在相关性与多样性之间折中，
+  避免上下文被几乎重复的分块占满
+- CrossEncoderReranker：按 (查询, 文本) 对打分的交叉编码器阶段；打分函数可插拔，
+  安装了 sentence-transformers 时可直接加载本地 CrossEncoder 模型，
+  否则使用基于词项重叠的轻量打分作为替身
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import Counter
+from collections.abc import Callable, Sequence
+
+import numpy as np
+
+from src.domain.exceptions import DomainError
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.domain.knowledge_base.ports.reranker import Reranker
+from src.infrastructure.knowledge_base.lexical_tokenizer import tokenize
+
+# Optional deps (tests monkeypatch these symbols at module-level).
+try:  # pragma: no cover - optional dependency
+    from sentence_transformers import CrossEncoder  # type: ignore[import-not-found]
+except Exception:  # noqa: BLE001 - optional dependency
+    CrossEncoder = None  # type: ignore[assignment]
+
+PairScorer = Callable[[list[tuple[str, str]]], Sequence[float]]
+
+
+def cosine_scores(query_embedding: list[float], chunks: list[DocumentChunk]) -> np.ndarray:
+    """计算查询与每个分块的余弦相似度（零向量得 0）
+
+    抛出：
+        ValueError: 分块向量维度与查询向量不一致
+    """
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    if any(len(chunk.embedding) != query.shape[0] for chunk in chunks):
+        raise ValueError("Embedding dimension mismatch")
+
+    matrix = np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    query_norm = float(np.linalg.norm(query))
+    if query_norm == 0.0:
+        return np.zeros(len(chunks), dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (matrix @ query) / (norms * query_norm)
+    return np.where(norms == 0.0, 0.0, scores)
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """返回分数最高的 top_k 个下标（降序，同分保持原顺序）"""
+    k = min(top_k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(-scores, kind="stable")
+    return order[:k]
+
+
+class CosineReranker(Reranker):
+    """向量化余弦相似度重排序"""
+
+    async def rerank(
+        self,
+        query: str,
+        query_embedding: list[float],
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        scores = cosine_scores(query_embedding, chunks)
+        return [(chunks[i], float(scores[i])) for i in _top_k(scores, top_k)]
+
+
+class MMRReranker(Reranker):
+    """最大边际相关性重排序
+
+    每一步选择 λ·sim(q, d) - (1-λ)·max sim(d, 已选) 最大的分块。
+    λ=1 退化为纯相关性排序；λ 越小越强调多样性。
+    返回的分数为分块与查询的余弦相似度。
+    """
+
+    def __init__(self, lambda_mult: float = 0.5):
+        """初始化
+
+        参数：
+            lambda_mult: 相关性权重 λ（0~1）
+        """
+        self.lambda_mult = lambda_mult
+
+    async def rerank(
+        self,
+        query: str,
+        query_embedding: list[float],
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        relevance = cosine_scores(query_embedding, chunks)
+        k = min(top_k, len(chunks))
+        if k <= 0:
+            return []
+
+        matrix = np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        matrix = matrix / norms
+
+        selected: list[int] = []
+        # 每个候选与已选集合的最大相似度（增量维护，每步一次矩阵-向量乘法）
+        redundancy = np.full(len(chunks), -np.inf, dtype=np.float32)
+        available = np.ones(len(chunks), dtype=bool)
+        for _ in range(k):
+            penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+            mmr = self.lambda_mult * relevance - (1.0 - self.lambda_mult) * penalty
+            mmr = np.where(available, mmr, -np.inf)
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, matrix @ matrix[best])
+
+        return [(chunks[i], float(relevance[i])) for i in selected]
+
+
+def lexical_overlap_scorer(pairs: list[tuple[str, str]]) -> list[float]:
+    """交叉编码器替身：按查询词项在文本中的覆盖度打分（0~1，带词频饱和）"""
+    scores: list[float] = []
+    for query, text in pairs:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            scores.append(0.0)
+            continue
+        counts = Counter(tokenize(text))
+        matched = sum(1.0 - math.exp(-counts[term]) for term in query_terms if term in counts)
+        scores.append(matched / (len(query_terms) * (1.0 - math.exp(-1.0))) if matched else 0.0)
+    return [min(score, 1.0) for score in scores]
+
+
+class CrossEncoderReranker(Reranker):
+    """交叉编码器重排序（打分函数可插拔）
+
+    使用示例：
+        reranker = CrossEncoderReranker()  # 词项重叠替身
+        reranker = CrossEncoderReranker.from_pretrained("BAAI/bge-reranker-base")
+    """
+
+    def __init__(self, scorer: PairScorer | None = None, run_in_thread: bool = False):
+        """初始化
+
+        参数：
+            scorer: (查询, 文本) 对的批量打分函数；默认使用词项重叠替身
+            run_in_thread: 打分较重（真实模型推理）时放到线程中执行，避免阻塞事件循环
+        """
+        self.scorer: PairScorer = scorer or lexical_overlap_scorer
+        self.run_in_thread = run_in_thread
+
+    @classmethod
+    def from_pretrained(cls, model_name: str) -> CrossEncoderReranker:
+        """加载本地 sentence-transformers CrossEncoder 模型"""
+        if CrossEncoder is None:
+            raise DomainError(
+                "CrossEncoderReranker requires sentence-transformers; "
+                "install it or use the default lexical scorer."
+            )
+        model = CrossEncoder(model_name)  # type: ignore[misc]
+        return cls(
+            scorer=lambda pairs: [float(s) for s in model.predict(pairs)], run_in_thread=True
+        )
+
+    async def rerank(
+        self,
+        query: str,
+        query_embedding: list[float],
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        if not chunks or top_k <= 0:
+            return []
+        pairs = [(query, chunk.content) for chunk in chunks]
+        if self.run_in_thread:
+            raw = await asyncio.to_thread(self.scorer, pairs)
+        else:
+            raw = self.scorer(pairs)
+        scores = np.asarray(list(raw), dtype=np.float32)
+        return [(chunks[i], float(scores[i])) for i in _top_k(scores, top_k)]
+
+
+def create_reranker(strategy: str, mmr_lambda: float = 0.5, model_name: str = "") -> Reranker:
+    """按配置创建重排序器
+
+    参数：
+        strategy: cosine / mmr / cross_encoder
+        mmr_lambda: MMR 的相关性权重
+        model_name: cross_encoder 策略使用的本地模型（为空时使用词项重叠替身）
+    """
+    if strategy == "mmr":
+        return MMRReranker(lambda_mult=mmr_lambda)
+    if strategy == "cross_encoder":
+        if model_name:
+            return CrossEncoderReranker.from_pretrained(model_name)
+        return CrossEncoderReranker()
+    return CosineReranker()
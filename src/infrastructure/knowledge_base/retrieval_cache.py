@@ -0,0 +1,176 @@
+"""RetrievalCache - 带语料版本失效的检索结果缓存
+
+对话流程（WorkflowChatServiceWithRAG）在多轮之间会重复几乎相同的查询，
+每次都要经历 嵌入 → 向量查询 → 结果转换。该缓存直接复用上一次的检索结果。
+
+设计：
+- 缓存键：(namespace, workflow_id, 规范化查询, top_k, filters)
+  规范化 = 去首尾空白 + 合并连续空白 + casefold
+- 失效：每个工作流维护一个语料版本号，add/delete 分块时递增；
+  条目记录写入时的版本，版本不一致即视为过期（无需遍历删除）
+  - 工作流查询同时依赖全局知识库分区（GLOBAL_WORKFLOW_KEY）的版本
+  - 不带 workflow_id 的查询覆盖所有语料，依赖全局纪元（任何写入都会递增）
+- TTL（单调时钟）+ LRU 容量上限
+- 指标：命中 / 未命中 / 版本失效 / 过期 / 淘汰
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from src.infrastructure.knowledge_base.local_vector_index import GLOBAL_WORKFLOW_KEY, workflow_key
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询文本（空白与大小写差异不影响命中）"""
+    return _WHITESPACE.sub(" ", query).strip().casefold()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    versions: tuple[int, int]
+    expires_at: float
+
+
+class RetrievalCache:
+    """检索结果缓存（进程内，TTL + LRU + 语料版本失效）
+
+    Example:
+        >>> cache = RetrievalCache(ttl_seconds=300)
+        >>> key = cache.make_key("chunks", "wf_1", "什么是 RAG？", top_k=5)
+        >>> cache.get(key)  # None → 执行检索
+        >>> cache.put(key, results)
+        >>> cache.bump("wf_1")  # 新增/删除分块后，wf_1 的旧结果全部失效
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1024):
+        """初始化缓存
+
+        参数：
+            ttl_seconds: 条目存活时间（秒）
+            max_entries: 最多缓存的检索结果数
+        """
+        self._ttl = max(0.0, float(ttl_seconds))
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._epoch = 0
+
+        # 监控指标
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._expired = 0
+        self._evictions = 0
+
+    # ==================== 键与版本 ====================
+
+    @staticmethod
+    def make_key(
+        namespace: str,
+        workflow_id: str | None,
+        query: str,
+        top_k: int,
+        filters: dict[str, Any] | None = None,
+        *extra: Any,
+    ) -> tuple:
+        """构造缓存键
+
+        参数：
+            namespace: 调用方命名空间（区分不同形态的缓存值）
+            workflow_id: 工作流ID（None 表示全库检索）
+            query: 原始查询文本
+            top_k: 返回数量
+            filters: 元数据过滤条件
+            extra: 其他影响结果的参数（如 max_tokens）
+        """
+        frozen_filters = tuple(sorted((str(k), repr(v)) for k, v in (filters or {}).items()))
+        return (namespace, workflow_id, normalize_query(query), top_k, frozen_filters, *extra)
+
+    def version(self, workflow_id: str | None) -> int:
+        """返回工作流分区的语料版本"""
+        return self._versions.get(workflow_key(workflow_id), 0)
+
+    def bump(self, workflow_id: str | None) -> None:
+        """语料变更：递增工作流分区版本与全局纪元
+
+        workflow_id 为 None 表示全局知识库分区（会影响所有工作流的查询）。
+        """
+        key = workflow_key(workflow_id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._epoch += 1
+
+    def bump_all(self) -> None:
+        """无法确定变更分区时使用：使所有缓存结果失效"""
+        for key in list(self._versions):
+            self._versions[key] += 1
+        self._versions[GLOBAL_WORKFLOW_KEY] = self._versions.get(GLOBAL_WORKFLOW_KEY, 0) + 1
+        self._epoch += 1
+        self._entries.clear()
+
+    # ==================== 读写 ====================
+
+    def get(self, key: tuple) -> Any | None:
+        """读取缓存；过期或版本不一致返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self._expired += 1
+            self._misses += 1
+            return None
+        if entry.versions != self._current_versions(key[1]):
+            del self._entries[key]
+            self._stale += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.value
+
+    def put(self, key: tuple, value: Any) -> None:
+        """写入缓存（记录当前语料版本）"""
+        self._entries[key] = _Entry(
+            value=value,
+            versions=self._current_versions(key[1]),
+            expires_at=time.monotonic() + self._ttl,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存（保留版本号）"""
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计指标"""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total > 0 else 0.0,
+            "stale": self._stale,
+            "expired": self._expired,
+            "evictions": self._evictions,
+            "entries": len(self._entries),
+            "ttl_seconds": self._ttl,
+        }
+
+    # ==================== 内部方法 ====================
+
+    def _current_versions(self, workflow_id: str | None) -> tuple[int, int]:
+        if workflow_id is None:
+            return (self._epoch, 0)
+        return (self.version(workflow_id), self._versions.get(GLOBAL_WORKFLOW_KEY, 0))
@@ -0,0 +1,151 @@
+"""sqlite_connection_pool - 长连接 aiosqlite 连接池
+
+每个 aiosqlite 连接背后是一个专用工作线程。按调用新建连接意味着每次都要启动线程、
+打开数据库文件并执行 PRAGMA；连接池让连接在进程内复用：
+- 连接按需创建，最多 size 个；空闲连接后进先出复用
+- 新连接统一执行 PRAGMA（外键、WAL、busy_timeout）以及可选的初始化回调（如建表）
+- sqlite3 按 SQL 文本缓存预编译语句（cached_statements），复用连接即复用预编译语句
+- 使用期间抛出异常时回滚未提交的事务；回滚失败的连接直接丢弃
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import aiosqlite
+
+ConnectionSetup = Callable[[aiosqlite.Connection], Awaitable[None]]
+
+_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+)
+
+
+class SQLiteConnectionPool:
+    """aiosqlite 连接池
+
+    使用示例：
+        pool = SQLiteConnectionPool("data/kb.db", size=4)
+        async with pool.connection() as conn:
+            await conn.execute("SELECT 1")
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        setup: ConnectionSetup | None = None,
+        busy_timeout_ms: int = 5000,
+        cached_statements: int = 256,
+    ):
+        """初始化连接池
+
+        参数：
+            db_path: SQLite数据库路径（":memory:" 时池大小固定为 1，保证所有调用看到同一个库）
+            size: 最大连接数
+            setup: 新连接打开后执行的初始化回调
+            busy_timeout_ms: 写锁等待超时（毫秒）
+            cached_statements: 每个连接缓存的预编译语句数量
+        """
+        self.db_path = db_path
+        self.size = 1 if db_path == ":memory:" else max(1, size)
+        self._setup = setup
+        self._busy_timeout_ms = int(busy_timeout_ms)
+        self._cached_statements = cached_statements
+
+        self._idle: list[aiosqlite.Connection] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._open_lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # close() 或切换事件循环时递增；归还时代次不一致的连接直接关闭
+        self._generation = 0
+        self._opened = 0
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """借出一个连接，退出上下文时归还"""
+        self._bind_loop()
+        assert self._slots is not None
+        async with self._slots:
+            generation = self._generation
+            conn = self._idle.pop() if self._idle else await self._open()
+            healthy = True
+            try:
+                yield conn
+            except BaseException:
+                healthy = await self._rollback(conn)
+                raise
+            finally:
+                if healthy and generation == self._generation:
+                    self._idle.append(conn)
+                else:
+                    await self._close_quietly(conn)
+
+    async def close(self) -> None:
+        """关闭所有空闲连接；借出中的连接归还时关闭。关闭后再次使用会重新建立连接"""
+        self._generation += 1
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._close_quietly(conn)
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取连接池统计"""
+        return {"size": self.size, "idle": len(self._idle), "opened": self._opened}
+
+    # ==================== 内部方法 ====================
+
+    def _bind_loop(self) -> None:
+        """asyncio 原语与事件循环绑定；切换事件循环（如多次 asyncio.run）时弃用旧连接"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        for conn in self._idle:
+            conn.stop()
+        self._idle = []
+        self._generation += 1
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.size)
+        self._open_lock = asyncio.Lock()
+
+    async def _open(self) -> aiosqlite.Connection:
+        assert self._open_lock is not None
+        # 串行打开连接，保证 setup 回调（建表、回填）不会并发执行
+        async with self._open_lock:
+            conn = aiosqlite.connect(self.db_path, cached_statements=self._cached_statements)
+            # 池化连接与进程同寿命；设为守护线程，遗漏 close() 时也不会阻塞解释器退出
+            thread = getattr(conn, "_thread", None)
+            if thread is not None:
+                thread.daemon = True
+            await conn
+            try:
+                await conn.execute(f"PRAGMA busy_timeout = {self._busy_timeout_ms}")
+                for pragma in _PRAGMAS:
+                    await conn.execute(pragma)
+                if self._setup is not None:
+                    await self._setup(conn)
+            except BaseException:
+                await self._close_quietly(conn)
+                raise
+            self._opened += 1
+            return conn
+
+    @staticmethod
+    async def _rollback(conn: aiosqlite.Connection) -> bool:
+        try:
+            await conn.rollback()
+            return True
+        except Exception:  # noqa: BLE001 - 连接已损坏，交由调用方丢弃
+            return False
+
+    @staticmethod
+    async def _close_quietly(conn: aiosqlite.Connection) -> None:
+        try:
+            await conn.close()
+        except Exception:  # noqa: BLE001 - 关闭失败不影响调用方
+            pass
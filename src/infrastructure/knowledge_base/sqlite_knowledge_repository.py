@@ -1,14 +1,24 @@
-"""SQLiteKnowledgeRepository - 使用SQLite存储知识库元数据
+"""SQLiteKnowledgeRepository - 使用SQLite存储知识库元数据与分块向量
 
 DDD规则：
 - 实现Domain层定义的KnowledgeRepository接口
-- 只负责存储元数据（文档、分块等），向量存储由外部向量引擎（如ChromaDB）管理
+- 存储元数据（知识库、文档、分块）以及分块向量（float32 BLOB）
+- 相似度检索由内嵌的 LocalVectorIndex 完成（无需 ChromaDB 等外部向量引擎）
+- 词法检索使用 FTS5 倒排索引（chunk_lexicon，rowid 与 document_chunks 对齐，BM25 排序）
+- 连接来自进程内长连接池（SQLiteConnectionPool），建表只在首个连接打开时执行一次
+- 向量分区的读取/重建、追加/删除与 IVF-PQ 训练在工作线程中执行，不阻塞事件循环；
+  同一分区的写入与检索按分区锁串行，训练期间检索沿用旧近似索引或精确扫描
 """
 
+import asyncio
 import json
+import logging
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime
+from typing import Any
 
 import aiosqlite
+import numpy as np
 
 from src.domain.knowledge_base.entities.document import Document
 from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
@@ -17,25 +27,77 @@ from src.domain.knowledge_base.ports.knowledge_repository import KnowledgeReposi
 from src.domain.value_objects.document_source import DocumentSource
 from src.domain.value_objects.document_status import DocumentStatus
 from src.domain.value_objects.knowledge_base_type import KnowledgeBaseType
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.knowledge_base.ivfpq_index import IVFPQIndex
+from src.infrastructure.knowledge_base.lexical_tokenizer import (
+    FTS_TOKENIZE,
+    to_fts_document,
+    to_fts_query,
+)
+from src.infrastructure.knowledge_base.local_vector_index import (
+    LocalVectorIndex,
+    decode_embedding,
+    encode_embedding,
+    workflow_key,
+)
+from src.infrastructure.knowledge_base.sqlite_connection_pool import SQLiteConnectionPool
+
+logger = logging.getLogger(__name__)
 
 
 class SQLiteKnowledgeRepository(KnowledgeRepository):
-    """使用SQLite的知识库仓储（仅存储元数据）"""
+    """使用SQLite的知识库仓储（元数据 + 本地向量索引）"""
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        vector_index_dir: str | None = None,
+        pool_size: int = 4,
+        ann_min_vectors: int = 0,
+        ann_nprobe: int = 16,
+    ):
         """初始化仓储
 
         参数：
             db_path: SQLite数据库路径
+            vector_index_dir: 向量矩阵文件目录（默认 `<db_path>.vectors`）
+            pool_size: 连接池最大连接数
+            ann_min_vectors: 分区向量数达到该值时启用 IVF-PQ 近似检索（0 表示始终精确检索）
+            ann_nprobe: 近似检索扫描的倒排列表数量
         """
         self.db_path = db_path
-
-    async def _get_connection(self) -> aiosqlite.Connection:
-        """获取数据库连接"""
-        conn = await aiosqlite.connect(self.db_path)
-        # 启用外键约束
-        await conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        self.vector_index = LocalVectorIndex(
+            vector_index_dir or f"{db_path}.vectors",
+            ann_min_vectors=ann_min_vectors,
+            ann_nprobe=ann_nprobe,
+            background_training=True,
+        )
+        self._index_loads = SingleFlight()
+        self._index_locks: dict[str, asyncio.Lock] = {}
+        self._ann_training: dict[str, asyncio.Task[None]] = {}
+        self._schema_ready = False
+        self._pool = SQLiteConnectionPool(db_path, size=pool_size, setup=self._ensure_schema)
+
+    def _connection(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        """从连接池借出连接（async with 退出时归还）"""
+        return self._pool.connection()
+
+    async def close(self) -> None:
+        """关闭连接池中的连接（取消进行中的近似索引训练）"""
+        for task in list(self._ann_training.values()):
+            task.cancel()
+        await self._pool.close()
+
+    def get_pool_stats(self) -> dict[str, Any]:
+        """获取连接池统计"""
+        return self._pool.get_stats()
+
+    async def _ensure_schema(self, conn: aiosqlite.Connection) -> None:
+        """连接池初始化回调：每个仓储实例只建表一次"""
+        if self._schema_ready:
+            return
+        await self._ensure_tables(conn)
+        self._schema_ready = True
 
     async def _ensure_tables(self, conn: aiosqlite.Connection) -> None:
         """确保所有表存在"""
@@ -68,171 +130,259 @@ class SQLiteKnowledgeRepository(KnowledgeRepository):
             )
         """)
 
-    # Knowledge Base operations
-    async def save_knowledge_base(self, knowledge_base: KnowledgeBase) -> None:
-        """保存知识库"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
+        # 文档分块表（向量以 float32 BLOB 存储；workflow_key 冗余存储用于按工作流分区索引）
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS document_chunks (
+                id TEXT PRIMARY KEY,
+                document_id TEXT NOT NULL,
+                workflow_key TEXT NOT NULL,
+                content TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                metadata TEXT,
+                embedding BLOB NOT NULL
+            )
+        """)
+
+        # 向量索引版本表（每次分块写入/删除时递增，用于校验本地矩阵是否过期）
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS vector_index_versions (
+                workflow_key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
 
         await conn.execute(
-            """
-            INSERT OR REPLACE INTO knowledge_bases
-            (id, name, description, type, owner_id, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                knowledge_base.id,
-                knowledge_base.name,
-                knowledge_base.description,
-                knowledge_base.type.value,
-                knowledge_base.owner_id,
-                knowledge_base.created_at,
-                knowledge_base.updated_at,
-            ),
+            "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id)"
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunks_workflow_key ON document_chunks(workflow_key)"
+        )
+
+        await self._ensure_lexicon(conn)
+
+    async def _ensure_lexicon(self, conn: aiosqlite.Connection) -> None:
+        """确保分块词法索引存在（首次创建时从已有分块回填）"""
+        cursor = await conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_lexicon'"
+        )
+        if await cursor.fetchone():
+            return
+
+        # 词项由 lexical_tokenizer 预先切分（CJK bigram + 单词），FTS5 只按空格拆分
+        await conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_lexicon USING fts5(
+                tokens,
+                workflow_key UNINDEXED,
+                tokenize = "{FTS_TOKENIZE}"
+            )
+        """)
+        cursor = await conn.execute("SELECT rowid, workflow_key, content FROM document_chunks")
+        rows = await cursor.fetchall()
+        await conn.executemany(
+            "INSERT INTO chunk_lexicon (rowid, tokens, workflow_key) VALUES (?, ?, ?)",
+            [(rowid, to_fts_document(content), key) for rowid, key, content in rows],
         )
         await conn.commit()
-        await conn.close()
+
+    # Knowledge Base operations
+    async def save_knowledge_base(self, knowledge_base: KnowledgeBase) -> None:
+        """保存知识库"""
+        async with self._connection() as conn:
+            await conn.execute(
+                """
+                INSERT OR REPLACE INTO knowledge_bases
+                (id, name, description, type, owner_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    knowledge_base.id,
+                    knowledge_base.name,
+                    knowledge_base.description,
+                    knowledge_base.type.value,
+                    knowledge_base.owner_id,
+                    knowledge_base.created_at,
+                    knowledge_base.updated_at,
+                ),
+            )
+            await conn.commit()
 
     async def find_knowledge_base_by_id(self, id: str) -> KnowledgeBase | None:
         """根据ID查找知识库"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        cursor = await conn.execute("SELECT * FROM knowledge_bases WHERE id = ?", (id,))
-        row = await cursor.fetchone()
-        await conn.close()
+        async with self._connection() as conn:
+            cursor = await conn.execute("SELECT * FROM knowledge_bases WHERE id = ?", (id,))
+            row = await cursor.fetchone()
 
         if row:
-            return KnowledgeBase(
-                id=row[0],
-                name=row[1],
-                description=row[2],
-                type=KnowledgeBaseType(row[3]),
-                owner_id=row[4],
-                created_at=datetime.fromisoformat(row[5]),
-                updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
-            )
+            return self._row_to_knowledge_base(row)
         return None
 
     async def find_knowledge_bases_by_owner(self, owner_id: str) -> list[KnowledgeBase]:
         """根据所有者ID查找知识库"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        cursor = await conn.execute("SELECT * FROM knowledge_bases WHERE owner_id = ?", (owner_id,))
-        rows = await cursor.fetchall()
-        await conn.close()
-
-        return [
-            KnowledgeBase(
-                id=row[0],
-                name=row[1],
-                description=row[2],
-                type=KnowledgeBaseType(row[3]),
-                owner_id=row[4],
-                created_at=datetime.fromisoformat(row[5]),
-                updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
+        async with self._connection() as conn:
+            cursor = await conn.execute(
+                "SELECT * FROM knowledge_bases WHERE owner_id = ?", (owner_id,)
             )
-            for row in rows
-        ]
+            rows = await cursor.fetchall()
+
+        return [self._row_to_knowledge_base(row) for row in rows]
 
     # Document operations
     async def save_document(self, document: Document) -> None:
         """保存文档"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        await conn.execute(
-            """
-            INSERT OR REPLACE INTO documents
-            (id, title, content, source, status, created_at, updated_at, metadata, file_path, workflow_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                document.id,
-                document.title,
-                document.content,
-                document.source.value,
-                document.status.value,
-                document.created_at,
-                document.updated_at,
-                json.dumps(document.metadata) if document.metadata else None,
-                document.file_path,
-                document.workflow_id,
-            ),
-        )
-        await conn.commit()
-        await conn.close()
+        await self.save_documents([document])
+
+    async def save_documents(self, documents: list[Document]) -> None:
+        """批量保存文档（单事务 executemany 写入）"""
+        if not documents:
+            return
+        async with self._connection() as conn:
+            await conn.executemany(
+                """
+                INSERT OR REPLACE INTO documents
+                (id, title, content, source, status, created_at, updated_at, metadata, file_path, workflow_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        document.id,
+                        document.title,
+                        document.content,
+                        document.source.value,
+                        document.status.value,
+                        document.created_at,
+                        document.updated_at,
+                        json.dumps(document.metadata) if document.metadata else None,
+                        document.file_path,
+                        document.workflow_id,
+                    )
+                    for document in documents
+                ],
+            )
+            await conn.commit()
 
     async def find_document_by_id(self, id: str) -> Document | None:
         """根据ID查找文档"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        cursor = await conn.execute("SELECT * FROM documents WHERE id = ?", (id,))
-        row = await cursor.fetchone()
-        await conn.close()
+        async with self._connection() as conn:
+            cursor = await conn.execute("SELECT * FROM documents WHERE id = ?", (id,))
+            row = await cursor.fetchone()
 
         if row:
-            return Document(
-                id=row[0],
-                title=row[1],
-                content=row[2],
-                source=DocumentSource(row[3]),
-                status=DocumentStatus(row[4]),
-                created_at=datetime.fromisoformat(row[5]),
-                updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
-                metadata=json.loads(row[7]) if row[7] else None,
-                file_path=row[8],
-                workflow_id=row[9],
-            )
+            return self._row_to_document(row)
         return None
 
     async def find_documents_by_workflow_id(self, workflow_id: str) -> list[Document]:
         """查找指定工作流的所有文档"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        cursor = await conn.execute("SELECT * FROM documents WHERE workflow_id = ?", (workflow_id,))
-        rows = await cursor.fetchall()
-        await conn.close()
-
-        return [
-            Document(
-                id=row[0],
-                title=row[1],
-                content=row[2],
-                source=DocumentSource(row[3]),
-                status=DocumentStatus(row[4]),
-                created_at=datetime.fromisoformat(row[5]),
-                updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
-                metadata=json.loads(row[7]) if row[7] else None,
-                file_path=row[8],
-                workflow_id=row[9],
+        async with self._connection() as conn:
+            cursor = await conn.execute(
+                "SELECT * FROM documents WHERE workflow_id = ?", (workflow_id,)
             )
-            for row in rows
-        ]
+            rows = await cursor.fetchall()
+
+        return [self._row_to_document(row) for row in rows]
 
     async def update_document(self, document: Document) -> None:
         """更新文档"""
-        await self.save_document(document)
+        await self.save_documents([document])
+
+    async def update_documents(self, documents: list[Document]) -> None:
+        """批量更新文档（与批量保存共用单事务写入）"""
+        await self.save_documents(documents)
 
     async def delete_document(self, id: str) -> None:
-        """删除文档"""
-        conn = await self._get_connection()
-        await conn.execute("DELETE FROM documents WHERE id = ?", (id,))
-        await conn.commit()
-        await conn.close()
+        """删除文档（同时删除其分块与向量）"""
+        await self.delete_chunks_by_document_id(id)
+        async with self._connection() as conn:
+            await conn.execute("DELETE FROM documents WHERE id = ?", (id,))
+            await conn.commit()
 
-    # Document Chunk operations (for metadata only)
+    # Document Chunk operations
     async def save_document_chunk(self, chunk: DocumentChunk) -> None:
-        """保存文档块（仅元数据）"""
-        # 不存储向量，只存储基本元数据
-        pass  # ChromaDB管理向量存储
+        """保存文档分块（含向量）"""
+        await self.save_document_chunks([chunk])
+
+    async def save_document_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """批量保存文档分块（单事务写入，并增量追加到向量索引）"""
+        if not chunks:
+            return
+        async with self._connection() as conn:
+            document_ids = sorted({chunk.document_id for chunk in chunks})
+            placeholders = ",".join("?" for _ in document_ids)
+            cursor = await conn.execute(
+                f"SELECT id, workflow_id FROM documents WHERE id IN ({placeholders})",
+                document_ids,
+            )
+            workflow_by_document = {row[0]: row[1] for row in await cursor.fetchall()}
+
+            grouped: dict[str, list[DocumentChunk]] = {}
+            for chunk in chunks:
+                key = workflow_key(workflow_by_document.get(chunk.document_id))
+                grouped.setdefault(key, []).append(chunk)
+
+            # INSERT OR REPLACE 会分配新的 rowid，先移除旧行对应的词法索引
+            chunk_ids = [chunk.id for chunk in chunks]
+            await self._delete_lexicon_rows(conn, "id", chunk_ids)
+
+            await conn.executemany(
+                """
+                INSERT OR REPLACE INTO document_chunks
+                (id, document_id, workflow_key, content, chunk_index, created_at, metadata, embedding)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        chunk.id,
+                        chunk.document_id,
+                        key,
+                        chunk.content,
+                        chunk.chunk_index,
+                        chunk.created_at,
+                        json.dumps(chunk.metadata) if chunk.metadata else None,
+                        encode_embedding(chunk.embedding),
+                    )
+                    for key, group in grouped.items()
+                    for chunk in group
+                ],
+            )
+            placeholders = ",".join("?" for _ in chunk_ids)
+            cursor = await conn.execute(
+                f"SELECT id, rowid, workflow_key FROM document_chunks WHERE id IN ({placeholders})",
+                chunk_ids,
+            )
+            rowids = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+            await conn.executemany(
+                "INSERT INTO chunk_lexicon (rowid, tokens, workflow_key) VALUES (?, ?, ?)",
+                [
+                    (rowids[chunk.id][0], to_fts_document(chunk.content), rowids[chunk.id][1])
+                    for chunk in {chunk.id: chunk for chunk in chunks}.values()
+                ],
+            )
+            versions = {key: await self._bump_index_version(conn, key) for key in grouped}
+            await conn.commit()
+
+        for key, group in grouped.items():
+            async with self._index_lock(key):
+                await asyncio.to_thread(
+                    self.vector_index.append,
+                    key,
+                    versions[key],
+                    [chunk.id for chunk in group],
+                    np.asarray([chunk.embedding for chunk in group], dtype=np.float32),
+                )
+            self._schedule_ann_training(key)
 
     async def find_chunks_by_document_id(self, document_id: str) -> list[DocumentChunk]:
-        """查找指定文档的所有块"""
-        return []  # ChromaDB管理向量检索
+        """查找指定文档的所有块（按 chunk_index 排序）"""
+        async with self._connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT id, document_id, content, chunk_index, created_at, metadata, embedding
+                FROM document_chunks WHERE document_id = ? ORDER BY chunk_index
+                """,
+                (document_id,),
+            )
+            rows = await cursor.fetchall()
+        return [self._row_to_chunk(row) for row in rows]
 
     async def search_similar_chunks(
         self,
@@ -240,23 +390,277 @@ class SQLiteKnowledgeRepository(KnowledgeRepository):
         workflow_id: str | None = None,
         limit: int = 5,
         threshold: float = 0.7,
+        candidate_ids: list[str] | None = None,
     ) -> list[tuple[DocumentChunk, float]]:
-        """搜索相似文档块"""
-        return []  # ChromaDB管理相似度搜索
+        """搜索相似文档块（本地向量索引上的 top-k 余弦检索，大分区可启用 IVF-PQ 近似检索）
+
+        workflow_id 为 None 时在所有分区上检索并合并结果；
+        提供 candidate_ids 时只对候选分块打分（用于词法预筛选）。
+        """
+        if not query_embedding or limit <= 0:
+            return []
+
+        async with self._connection() as conn:
+            if workflow_id is not None:
+                cursor = await conn.execute(
+                    "SELECT workflow_key, version FROM vector_index_versions WHERE workflow_key = ?",
+                    (workflow_key(workflow_id),),
+                )
+                versions = {workflow_key(workflow_id): 0}
+            else:
+                cursor = await conn.execute(
+                    "SELECT workflow_key, version FROM vector_index_versions"
+                )
+                versions = {}
+            versions.update({row[0]: int(row[1]) for row in await cursor.fetchall()})
+
+        # 加载分区期间不占用连接：并发检索会等待同一次加载，加载方自行借连接
+        query = np.asarray(query_embedding, dtype=np.float32)
+        hits: list[tuple[str, float]] = []
+        for key, version in versions.items():
+            async with self._index_lock(key):
+                await self._ensure_index_loaded(key, version)
+                hits.extend(self.vector_index.search(key, query, limit, threshold, candidate_ids))
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        hits = hits[:limit]
+
+        async with self._connection() as conn:
+            chunks = await self._fetch_chunks(conn, [chunk_id for chunk_id, _score in hits])
+        return [(chunks[chunk_id], score) for chunk_id, score in hits if chunk_id in chunks]
+
+    async def search_chunks_lexical(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        limit: int = 50,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """词法检索（FTS5 倒排索引 + BM25）
+
+        workflow_id 为 None 时在所有分区上检索。
+
+        返回：
+            (DocumentChunk, BM25 分数) 列表，分数越大越相关
+        """
+        match = to_fts_query(query)
+        if not match or limit <= 0:
+            return []
+
+        sql = """
+            SELECT c.id, bm25(chunk_lexicon) AS rank
+            FROM chunk_lexicon JOIN document_chunks c ON c.rowid = chunk_lexicon.rowid
+            WHERE chunk_lexicon MATCH ?
+        """
+        params: list[object] = [match]
+        if workflow_id is not None:
+            sql += " AND chunk_lexicon.workflow_key = ?"
+            params.append(workflow_key(workflow_id))
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        async with self._connection() as conn:
+            cursor = await conn.execute(sql, params)
+            # FTS5 的 bm25() 越小越相关，取负数使其与相似度方向一致
+            hits = [(row[0], -float(row[1])) for row in await cursor.fetchall()]
+            chunks = await self._fetch_chunks(conn, [chunk_id for chunk_id, _score in hits])
+        return [(chunks[chunk_id], score) for chunk_id, score in hits if chunk_id in chunks]
+
+    async def count_chunks(self, workflow_id: str | None = None) -> int:
+        """统计分块数量（workflow_id 为 None 时统计全部）"""
+        async with self._connection() as conn:
+            if workflow_id is None:
+                cursor = await conn.execute("SELECT COUNT(*) FROM document_chunks")
+            else:
+                cursor = await conn.execute(
+                    "SELECT COUNT(*) FROM document_chunks WHERE workflow_key = ?",
+                    (workflow_key(workflow_id),),
+                )
+            result = await cursor.fetchone()
+        return result[0] if result else 0
 
     async def delete_chunks_by_document_id(self, document_id: str) -> None:
-        """删除指定文档的所有块"""
-        pass  # ChromaDB管理块删除
+        """删除指定文档的所有块（向量索引中打墓碑）"""
+        async with self._connection() as conn:
+            cursor = await conn.execute(
+                "SELECT id, workflow_key FROM document_chunks WHERE document_id = ?",
+                (document_id,),
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                return
+
+            await self._delete_lexicon_rows(conn, "document_id", [document_id])
+            await conn.execute("DELETE FROM document_chunks WHERE document_id = ?", (document_id,))
+            grouped: dict[str, list[str]] = {}
+            for chunk_id, key in rows:
+                grouped.setdefault(key, []).append(chunk_id)
+            versions = {key: await self._bump_index_version(conn, key) for key in grouped}
+            await conn.commit()
+
+        for key, chunk_ids in grouped.items():
+            async with self._index_lock(key):
+                await asyncio.to_thread(self.vector_index.delete, key, versions[key], chunk_ids)
+
+    # Chunk lookup helpers
+    async def _fetch_chunks(
+        self, conn: aiosqlite.Connection, chunk_ids: list[str]
+    ) -> dict[str, DocumentChunk]:
+        """按ID批量读取分块"""
+        if not chunk_ids:
+            return {}
+        placeholders = ",".join("?" for _ in chunk_ids)
+        cursor = await conn.execute(
+            f"""
+            SELECT id, document_id, content, chunk_index, created_at, metadata, embedding
+            FROM document_chunks WHERE id IN ({placeholders})
+            """,
+            chunk_ids,
+        )
+        return {row[0]: self._row_to_chunk(row) for row in await cursor.fetchall()}
+
+    @staticmethod
+    async def _delete_lexicon_rows(
+        conn: aiosqlite.Connection, column: str, values: list[str]
+    ) -> None:
+        """删除 document_chunks 中 column IN values 的行对应的词法索引"""
+        placeholders = ",".join("?" for _ in values)
+        await conn.execute(
+            f"""
+            DELETE FROM chunk_lexicon WHERE rowid IN (
+                SELECT rowid FROM document_chunks WHERE {column} IN ({placeholders})
+            )
+            """,
+            values,
+        )
+
+    # Vector index helpers
+    @staticmethod
+    async def _bump_index_version(conn: aiosqlite.Connection, key: str) -> int:
+        """递增分区版本号并返回新版本"""
+        await conn.execute(
+            """
+            INSERT INTO vector_index_versions (workflow_key, version) VALUES (?, 1)
+            ON CONFLICT(workflow_key) DO UPDATE SET version = version + 1
+            """,
+            (key,),
+        )
+        cursor = await conn.execute(
+            "SELECT version FROM vector_index_versions WHERE workflow_key = ?", (key,)
+        )
+        row = await cursor.fetchone()
+        return int(row[0]) if row else 0
+
+    async def _ensure_index_loaded(self, key: str, version: int) -> None:
+        """确保分区索引与 SQLite 版本一致（不一致时从磁盘恢复或从 SQLite 重建）
+
+        并发检索同一分区时只加载一次；文件读写与矩阵构建在工作线程中执行。
+        """
+        if self.vector_index.version(key) != version:
+            await self._index_loads.do(f"{key}:{version}", lambda: self._load_index(key, version))
+        self._schedule_ann_training(key)
+
+    async def _load_index(self, key: str, version: int) -> None:
+        partition = await asyncio.to_thread(self.vector_index.read_partition, key, version)
+        if partition is None:
+            async with self._connection() as conn:
+                cursor = await conn.execute(
+                    "SELECT id, embedding FROM document_chunks WHERE workflow_key = ? ORDER BY rowid",
+                    (key,),
+                )
+                rows = await cursor.fetchall()
+            partition = await asyncio.to_thread(self._build_partition, key, version, rows)
+        self.vector_index.install(partition)
+
+    def _build_partition(self, key: str, version: int, rows: list[tuple[str, bytes]]) -> Any:
+        """解码分块向量并写出分区矩阵（在工作线程中执行）"""
+        ids: list[str] = []
+        vectors: list[np.ndarray] = []
+        dim = 0
+        for chunk_id, blob in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            dim = dim or vector.shape[0]
+            if vector.shape[0] != dim:
+                continue
+            ids.append(chunk_id)
+            vectors.append(vector)
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return self.vector_index.write_partition(key, version, ids, matrix)
+
+    def _schedule_ann_training(self, key: str) -> None:
+        """分区需要（重新）训练近似索引时在后台训练（同一分区同时只有一个训练任务）"""
+        if key in self._ann_training or self.vector_index.pending_ann_training(key) is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._train_ann(key))
+        self._ann_training[key] = task
+        task.add_done_callback(lambda _: self._ann_training.pop(key, None))
+
+    async def _train_ann(self, key: str) -> None:
+        pending = self.vector_index.pending_ann_training(key)
+        if pending is None:
+            return
+        partition, vectors = pending
+        try:
+            ann = await asyncio.to_thread(IVFPQIndex.train, vectors)
+        except Exception as e:  # noqa: BLE001 - 训练失败时继续精确检索
+            logger.warning(f"IVF-PQ training failed for {key}: {e}")
+            return
+        async with self._index_lock(key):
+            await asyncio.to_thread(self.vector_index.install_ann, partition, ann)
+
+    def _index_lock(self, key: str) -> asyncio.Lock:
+        """分区锁：工作线程中的追加/删除/换入与检索互斥（检索不会看到写了一半的分区）"""
+        lock = self._index_locks.get(key)
+        if lock is None:
+            lock = self._index_locks[key] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _row_to_chunk(row: tuple) -> DocumentChunk:
+        """将 document_chunks 行转换为 DocumentChunk"""
+        return DocumentChunk(
+            id=row[0],
+            document_id=row[1],
+            content=row[2],
+            embedding=decode_embedding(row[6]),
+            chunk_index=row[3],
+            created_at=datetime.fromisoformat(row[4]),
+            metadata=json.loads(row[5]) if row[5] else None,
+        )
+
+    @staticmethod
+    def _row_to_knowledge_base(row: tuple) -> KnowledgeBase:
+        """将 knowledge_bases 行转换为 KnowledgeBase"""
+        return KnowledgeBase(
+            id=row[0],
+            name=row[1],
+            description=row[2],
+            type=KnowledgeBaseType(row[3]),
+            owner_id=row[4],
+            created_at=datetime.fromisoformat(row[5]),
+            updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
+        )
+
+    @staticmethod
+    def _row_to_document(row: tuple) -> Document:
+        """将 documents 行转换为 Document"""
+        return Document(
+            id=row[0],
+            title=row[1],
+            content=row[2],
+            source=DocumentSource(row[3]),
+            status=DocumentStatus(row[4]),
+            created_at=datetime.fromisoformat(row[5]),
+            updated_at=datetime.fromisoformat(row[6]) if row[6] else None,
+            metadata=json.loads(row[7]) if row[7] else None,
+            file_path=row[8],
+            workflow_id=row[9],
+        )
 
     # Statistics
     async def count_documents_by_workflow(self, workflow_id: str) -> int:
         """统计指定工作流的文档数量"""
-        conn = await self._get_connection()
-        await self._ensure_tables(conn)
-
-        cursor = await conn.execute(
-            "SELECT COUNT(*) FROM documents WHERE workflow_id = ?", (workflow_id,)
-        )
-        result = await cursor.fetchone()
-        await conn.close()
+        async with self._connection() as conn:
+            cursor = await conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE workflow_id = ?", (workflow_id,)
+            )
+            result = await cursor.fetchone()
         return result[0] if result else 0
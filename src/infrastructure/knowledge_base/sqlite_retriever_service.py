@@ -0,0 +1,289 @@
+"""SQLiteRetrieverService - 基于 SQLite 知识库仓储的检索服务
+
+向量存放在 SQLiteKnowledgeRepository（document_chunks 表 + 本地向量索引）中，
+检索直接调用仓储的 search_similar_chunks，不需要额外的向量引擎；
+嵌入复用 langchain 嵌入模型（无 API Key 时退化为确定性哈希嵌入，便于本地/测试环境）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Protocol
+
+from src.domain.exceptions import DomainError
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.domain.knowledge_base.ports.knowledge_repository import KnowledgeRepository
+from src.domain.knowledge_base.ports.reranker import Reranker
+from src.domain.knowledge_base.ports.retriever_service import RetrieverService
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.knowledge_base.embedding_cache import (
+    EmbeddingCache,
+    cache_model_key,
+    content_hash,
+)
+from src.infrastructure.knowledge_base.rerankers import CosineReranker
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
+from src.infrastructure.lc_adapters.token_counter import estimate_tokens
+
+# Optional deps (tests monkeypatch these symbols at module-level).
+try:  # pragma: no cover - optional dependency
+    from langchain_openai import OpenAIEmbeddings  # type: ignore[import-not-found]
+except Exception:  # noqa: BLE001 - optional dependency
+    OpenAIEmbeddings = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency
+    from langchain_text_splitters import (  # type: ignore[import-not-found]
+        RecursiveCharacterTextSplitter,
+    )
+except Exception:  # noqa: BLE001 - optional dependency
+    RecursiveCharacterTextSplitter = None  # type: ignore[assignment]
+
+
+class Embeddings(Protocol):
+    """嵌入模型（langchain Embeddings 的异步子集）"""
+
+    async def aembed_query(self, text: str) -> list[float]: ...
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class DeterministicEmbeddings:
+    """按内容哈希生成的确定性嵌入（无 API Key 的本地/测试环境使用）"""
+
+    def __init__(self, dim: int = 16):
+        self._dim = dim
+
+    async def aembed_query(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 for b in digest[: self._dim]]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [await self.aembed_query(text) for text in texts]
+
+
+def create_embeddings(
+    model_name: str, api_key: str | None = None, base_url: str | None = None
+) -> Embeddings:
+    """创建嵌入模型（有 API Key 且安装了 langchain-openai 时使用 OpenAIEmbeddings）"""
+    if api_key and OpenAIEmbeddings is not None:
+        kwargs: dict[str, Any] = {"model": model_name, "api_key": api_key}
+        if base_url:
+            kwargs["base_url"] = base_url
+        return OpenAIEmbeddings(**kwargs)  # type: ignore[no-any-return]
+    return DeterministicEmbeddings()
+
+
+class SQLiteRetrieverService(RetrieverService):
+    """在 SQLiteKnowledgeRepository 的本地向量索引上检索"""
+
+    def __init__(
+        self,
+        knowledge_repository: KnowledgeRepository,
+        embeddings: Embeddings,
+        model_name: str = "text-embedding-3-small",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        embedding_batch_size: int = 64,
+        embedding_cache: EmbeddingCache | None = None,
+        embedding_dimension: int = 0,
+        retrieval_cache: RetrievalCache | None = None,
+        reranker: Reranker | None = None,
+    ):
+        """初始化检索服务
+
+        参数：
+            knowledge_repository: 知识库仓储（需支持 search_similar_chunks）
+            embeddings: 嵌入模型
+            model_name: 嵌入模型名称（作为嵌入缓存键的一部分）
+            chunk_size: 分块大小
+            chunk_overlap: 分块重叠
+            embedding_batch_size: embed_many 每批发送的文本数
+            embedding_cache: 可选的嵌入缓存（按 模型/维度/内容哈希 复用向量）
+            embedding_dimension: 嵌入维度（作为缓存键的一部分）
+            retrieval_cache: 可选的检索结果缓存
+            reranker: 重排序器（默认向量化余弦相似度）
+        """
+        self.repository = knowledge_repository
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_cache = embedding_cache
+        self.embedding_dimension = embedding_dimension
+        self.retrieval_cache = retrieval_cache
+        self.reranker = reranker or CosineReranker()
+        self.embedding_single_flight = SingleFlight()
+
+    # ==================== 嵌入与切分 ====================
+
+    @property
+    def _cache_model(self) -> str:
+        """嵌入缓存键中的模型部分（含提供方，确定性嵌入不会污染真实提供方的缓存）"""
+        return cache_model_key(self.embeddings, self.model_name)
+
+    async def generate_embedding(self, text: str) -> list[float]:
+        """生成文本的向量嵌入（命中嵌入缓存时不调用提供方，并发的相同文本只嵌入一次）"""
+        digest = content_hash(text)
+        return list(
+            await self.embedding_single_flight.do(
+                f"{self.model_name}:{self.embedding_dimension}:{digest}",
+                lambda: self._generate_embedding(text, digest),
+            )
+        )
+
+    async def _generate_embedding(self, text: str, digest: str) -> list[float]:
+        cache = self.embedding_cache
+        if cache is not None:
+            cached = await cache.aget_many(self._cache_model, self.embedding_dimension, [digest])
+            if cached[0] is not None:
+                return cached[0]
+        try:
+            embedding = await self.embeddings.aembed_query(text)
+        except Exception as e:
+            raise DomainError("向量嵌入生成失败") from e
+        if cache is not None and embedding:
+            await cache.aput_many(self._cache_model, self.embedding_dimension, {digest: embedding})
+        return embedding
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """批量生成向量嵌入（按内容哈希去重，先查嵌入缓存，未命中的分批调用提供方）"""
+        if not texts:
+            return []
+
+        unique: dict[str, str] = {}
+        digests: list[str] = []
+        for text in texts:
+            digest = content_hash(text)
+            digests.append(digest)
+            unique.setdefault(digest, text)
+
+        vectors: dict[str, list[float]] = {}
+        cache = self.embedding_cache
+        if cache is not None:
+            cached = await cache.aget_many(
+                self._cache_model, self.embedding_dimension, list(unique)
+            )
+            for digest, embedding in zip(unique, cached, strict=True):
+                if embedding is not None:
+                    vectors[digest] = embedding
+
+        keys = [digest for digest in unique if digest not in vectors]
+        fresh: dict[str, list[float]] = {}
+        for start in range(0, len(keys), self.embedding_batch_size):
+            batch = keys[start : start + self.embedding_batch_size]
+            try:
+                embeddings = await self.embeddings.aembed_documents([unique[k] for k in batch])
+            except Exception as e:
+                raise DomainError("向量嵌入生成失败") from e
+            if len(embeddings) != len(batch):
+                raise DomainError("向量嵌入生成失败：批量返回数量与输入不一致")
+            fresh.update(zip(batch, embeddings, strict=True))
+        if cache is not None and fresh:
+            await cache.aput_many(self._cache_model, self.embedding_dimension, fresh)
+        vectors.update(fresh)
+        return [list(vectors[digest]) for digest in digests]
+
+    async def chunk_document(
+        self,
+        content: str,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ) -> list[str]:
+        """将文档切分为多个块（未安装 langchain-text-splitters 时按字符滑窗切分）"""
+        chunk_size = chunk_size or self.chunk_size
+        chunk_overlap = min(chunk_overlap or self.chunk_overlap, chunk_size - 1)
+        if RecursiveCharacterTextSplitter is not None:
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=estimate_tokens,
+            )
+            return splitter.split_text(content)
+        step = max(1, chunk_size - chunk_overlap)
+        return [
+            content[start : start + chunk_size]
+            for start in range(0, len(content), step)
+            if content[start : start + chunk_size].strip()
+        ]
+
+    # ==================== 检索 ====================
+
+    async def retrieve_relevant_chunks(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        top_k: int = 5,
+        filters: dict[str, Any] | None = None,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """检索相关的文档块（命中检索缓存时跳过嵌入与向量查询）
+
+        提供 filters 时按分块 metadata 过滤；为保证过滤后仍有 top_k 条，多取候选。
+        """
+        cache = self.retrieval_cache
+        cache_key: tuple = ()
+        if cache is not None:
+            cache_key = cache.make_key("chunks", workflow_id, query, top_k, filters)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+        query_embedding = await self.generate_embedding(query)
+        if not query_embedding:
+            return []
+        hits = await self.repository.search_similar_chunks(
+            query_embedding,
+            workflow_id=workflow_id,
+            limit=top_k * 4 if filters else top_k,
+            threshold=-1.0,
+        )
+        if filters:
+            hits = [
+                hit
+                for hit in hits
+                if all((hit[0].metadata or {}).get(k) == v for k, v in filters.items())
+            ]
+        results = hits[:top_k]
+        if cache is not None:
+            cache.put(cache_key, list(results))
+        return results
+
+    async def rerank_chunks(
+        self,
+        query: str,
+        chunks: list[DocumentChunk],
+        top_k: int = 5,
+    ) -> list[tuple[DocumentChunk, float]]:
+        """对文档块进行重排序（取前 top_k * 2 个有向量的候选交给重排序器）"""
+        query_embedding = await self.generate_embedding(query)
+        if not query_embedding:
+            return []
+        candidates = [chunk for chunk in chunks[: top_k * 2] if chunk.embedding]
+        return await self.reranker.rerank(query, query_embedding, candidates, top_k)
+
+    async def get_context_for_query(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        max_tokens: int = 4000,
+    ) -> str:
+        """为查询获取上下文"""
+        chunks_with_scores = await self.retrieve_relevant_chunks(
+            query=query, workflow_id=workflow_id, top_k=10
+        )
+        return self.format_context(chunks_with_scores, max_tokens)
+
+    @staticmethod
+    def format_context(
+        chunks_with_scores: list[tuple[DocumentChunk, float]], max_tokens: int
+    ) -> str:
+        """将检索结果拼接为上下文（按 token 预算跳过放不下的分块）"""
+        context_parts: list[str] = []
+        current_tokens = 0
+        for chunk, _score in chunks_with_scores:
+            chunk_tokens = estimate_tokens(chunk.content)
+            if current_tokens + chunk_tokens > max_tokens:
+                continue
+            context_parts.append(f"[文档片段] {chunk.content}")
+            current_tokens += chunk_tokens
+        return "\n\n---\n\n".join(context_parts)
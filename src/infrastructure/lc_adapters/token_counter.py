@@ -11,16 +11,91 @@
 - 对于非 OpenAI 模型，使用估算方法
 - 提供快捷函数简化使用
 - 集成模型元数据获取上下文限制
+- 编码器与 TokenCounter 按 (provider, model) 全局共享，不在每次调用时重建
+- 单段文本的计数结果按内容哈希记忆（LRU），重复计数同一条消息不再重新编码
 
 依赖：
 - tiktoken: OpenAI 官方 token 计数库
 - model_metadata: 获取模型上下文限制
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any
 
 from src.infrastructure.lc_adapters.model_metadata import get_model_metadata
 
+# 记忆的文本计数条目上限（每条约 100 字节）
+TOKEN_MEMO_MAX_ENTRIES = 16384
+
+
+@lru_cache(maxsize=64)
+def get_encoding(provider: str, model: str) -> Any | None:
+    """获取共享的 tiktoken 编码器（按 provider/model 缓存）
+
+    参数：
+        provider: 提供商名称
+        model: 模型名称
+
+    返回：
+        tiktoken 编码器；非 OpenAI 模型或 tiktoken 未安装时返回 None
+    """
+    if provider.lower() != "openai":
+        return None
+    try:
+        import tiktoken
+    except ImportError:
+        # tiktoken 未安装，使用估算方法
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # 如果模型不支持，使用默认编码器
+        return tiktoken.get_encoding("cl100k_base")
+
+
+class _TokenCountMemo:
+    """文本 token 数记忆表（LRU，线程安全）
+
+    键为 (编码器名称, 内容哈希)：哈希远快于 BPE 编码，且不持有原文。
+    """
+
+    def __init__(self, max_entries: int = TOKEN_MEMO_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_count(self, namespace: str, text: str, count: Any) -> int:
+        key = (namespace, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        tokens = count(text)
+        with self._lock:
+            self._entries[key] = tokens
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return tokens
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_token_memo = _TokenCountMemo()
+
 
 class TokenCounter:
     """Token 计数器
@@ -45,21 +120,9 @@ class TokenCounter:
         metadata = get_model_metadata(provider, model)
         self.context_limit = metadata.context_window
 
-        # 初始化 tiktoken 编码器（仅 OpenAI 模型）
-        self._encoding = None
-        if provider.lower() == "openai":
-            try:
-                import tiktoken
-
-                # 尝试获取模型的编码器
-                try:
-                    self._encoding = tiktoken.encoding_for_model(model)
-                except KeyError:
-                    # 如果模型不支持，使用默认编码器
-                    self._encoding = tiktoken.get_encoding("cl100k_base")
-            except ImportError:
-                # tiktoken 未安装，使用估算方法
-                pass
+        # 共享的 tiktoken 编码器（仅 OpenAI 模型）
+        self._encoding = get_encoding(provider, model)
+        self._memo_namespace = self._encoding.name if self._encoding else "estimate"
 
     def count_messages(self, messages: list[dict[str, Any]]) -> int:
         """计算消息列表的 token 数
@@ -101,7 +164,7 @@ class TokenCounter:
             num_tokens += tokens_per_message
             for key, value in message.items():
                 if isinstance(value, str):
-                    num_tokens += len(self._encoding.encode(value))  # type: ignore
+                    num_tokens += self._count_encoded(value)
                 if key == "name":
                     num_tokens += tokens_per_name
 
@@ -133,7 +196,7 @@ class TokenCounter:
             # 计算内容 token
             content = message.get("content", "")
             if isinstance(content, str):
-                total_tokens += estimate_tokens(content)
+                total_tokens += self.count_text(content)
 
         # 对话固定开销
         total_tokens += 3
@@ -154,10 +217,31 @@ class TokenCounter:
 
         if self._encoding:
             # 使用 tiktoken 精确计数
-            return len(self._encoding.encode(text))
+            return self._count_encoded(text)
         else:
             # 使用估算方法
-            return estimate_tokens(text)
+            return _token_memo.get_or_count(self._memo_namespace, text, estimate_tokens)
+
+    def count_message(self, message: dict[str, Any]) -> int:
+        """计算单条消息的 token 数（不含整段对话的固定开销）
+
+        用于增量累计：count_messages(messages) == sum(count_message(m)) + 3
+
+        参数：
+            message: 消息字典（包含 role 和 content）
+
+        返回：
+            token 数
+        """
+        return self.count_messages([message]) - 3
+
+    def _count_encoded(self, text: str) -> int:
+        """使用 tiktoken 计数（按内容哈希记忆）"""
+        return _token_memo.get_or_count(
+            self._memo_namespace,
+            text,
+            lambda value: len(self._encoding.encode(value)),  # type: ignore[union-attr]
+        )
 
     def calculate_usage_ratio(self, used_tokens: int) -> float:
         """计算上下文使用率
@@ -199,6 +283,20 @@ class TokenCounter:
         return max(0, remaining)
 
 
+@lru_cache(maxsize=64)
+def get_token_counter(provider: str = "openai", model: str = "gpt-4") -> TokenCounter:
+    """获取共享的 TokenCounter（避免每次调用重新查询模型元数据与编码器）
+
+    参数：
+        provider: 提供商名称（默认 openai）
+        model: 模型名称（默认 gpt-4）
+
+    返回：
+        TokenCounter 实例（按 provider/model 全局共享）
+    """
+    return TokenCounter(provider=provider, model=model)
+
+
 def count_message_tokens(
     messages: list[dict[str, Any]],
     provider: str = "openai",
@@ -214,8 +312,7 @@ def count_message_tokens(
     返回：
         token 数
     """
-    counter = TokenCounter(provider=provider, model=model)
-    return counter.count_messages(messages)
+    return get_token_counter(provider, model).count_messages(messages)
 
 
 def count_text_tokens(
@@ -233,8 +330,7 @@ def count_text_tokens(
     返回：
         token 数
     """
-    counter = TokenCounter(provider=provider, model=model)
-    return counter.count_text(text)
+    return get_token_counter(provider, model).count_text(text)
 
 
 def estimate_tokens(text: str) -> int:
@@ -10,6 +10,7 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import SecretStr
 
 from src.domain.ports.workflow_chat_llm import WorkflowChatLLM
+from src.infrastructure.adapters.llm_rate_limiter import LLMPriority, LLMRateLimiter
 
 
 class LangChainWorkflowChatLLM(WorkflowChatLLM):
@@ -22,6 +23,7 @@ class LangChainWorkflowChatLLM(WorkflowChatLLM):
         model: str,
         base_url: str | None = None,
         temperature: float = 0.0,
+        rate_limiter: LLMRateLimiter | None = None,
     ) -> None:
         if not api_key:
             raise ValueError("OpenAI API Key is required for chat workflow features.")
@@ -35,6 +37,9 @@ class LangChainWorkflowChatLLM(WorkflowChatLLM):
             base_url=base_url,
         )
         self._parser = JsonOutputParser()
+        self._model = model
+        # Workflow chat is user-facing, so it queues in the interactive lane.
+        self._rate_limiter = rate_limiter
 
     @staticmethod
     def _build_messages(system_prompt: str, user_prompt: str) -> list[SystemMessage | HumanMessage]:
@@ -55,6 +60,19 @@ class LangChainWorkflowChatLLM(WorkflowChatLLM):
     ) -> dict[str, Any]:
         """Async variant for callers that prefer awaitable workflows."""
 
-        response = await self._llm.ainvoke(self._build_messages(system_prompt, user_prompt))
+        messages = self._build_messages(system_prompt, user_prompt)
+        if self._rate_limiter is None:
+            response = await self._llm.ainvoke(messages)
+        else:
+            response = await self._rate_limiter.run(
+                "openai",
+                self._model,
+                lambda: self._llm.ainvoke(messages),
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                priority=LLMPriority.INTERACTIVE,
+            )
         content = getattr(response, "content", str(response))
         return self._parser.parse(content)
@@ -4,6 +4,7 @@ Memory Infrastructure Package
 提供内存管理的基础设施实现：
 - DatabaseMemoryStore: 数据库持久化存储
 - InMemoryCache: TTL + LRU 缓存
+- SQLiteSharedMemoryCache: 同主机多 worker 共享的 SQLite(WAL) 缓存
 - TFIDFCompressor: 消息压缩算法
 """
 
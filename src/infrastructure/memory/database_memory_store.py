@@ -68,6 +68,25 @@ class DatabaseMemoryStore:
             logger.error(error_msg)
             raise DatabaseWriteError(error_msg) from e
 
+    def append_many(self, messages: list[ChatMessage]) -> None:
+        """
+        批量追加消息（写后模式的批量刷库，事务提交由调用方负责）
+
+        Args:
+            messages: 要保存的消息实体列表
+
+        Raises:
+            DatabaseWriteError: 数据库写入失败时
+        """
+        try:
+            for message in messages:
+                self._repository.save(message)
+            logger.debug(f"{len(messages)} messages saved to database")
+        except Exception as e:
+            error_msg = f"Failed to save batch of {len(messages)} messages: {e}"
+            logger.error(error_msg)
+            raise DatabaseWriteError(error_msg) from e
+
     def load_recent(self, workflow_id: str, last_n: int = 10) -> list[ChatMessage]:
         """
         从数据库加载最近的消息
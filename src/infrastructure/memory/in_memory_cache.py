@@ -2,20 +2,41 @@
 In-Memory Cache with TTL and LRU
 
 基于内存的缓存实现，提供：
-- TTL（Time-To-Live）过期机制
+- TTL（Time-To-Live）过期机制（单调时钟，不受系统时间调整影响）
 - LRU（Least Recently Used）淘汰策略
-- 性能监控指标
+- 全局字节预算：按条目估算内存占用，超出预算时淘汰最久未使用的 workflow
+- O(1) 追加：条目以定长 deque 存储，追加消息无需复制/截断整个列表
+- 性能监控指标（命中、未命中、淘汰、过期、字节占用）
 
 Author: Claude Code
 Date: 2025-11-30
 """
 
-from collections import OrderedDict
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 
 from src.domain.entities.chat_message import ChatMessage
 
+# 单条消息除正文外的固定开销估算（实体对象、id、workflow_id、timestamp、deque 槽位）
+_MESSAGE_OVERHEAD_BYTES = 512
+
+
+def estimate_message_bytes(message: ChatMessage) -> int:
+    """
+    估算单条消息的内存占用（O(1)，不复制正文）
+
+    Args:
+        message: 聊天消息
+
+    Returns:
+        估算字节数
+    """
+    return _MESSAGE_OVERHEAD_BYTES + sys.getsizeof(message.content)
+
 
 @dataclass
 class CacheEntry:
@@ -23,14 +44,14 @@ class CacheEntry:
     缓存条目
 
     Attributes:
-        messages: 缓存的消息列表
-        last_access: 最后访问时间（UTC）
-        is_valid: 有效性标记（False 表示被主动失效）
+        messages: 缓存的消息（定长 deque，超出上限时自动丢弃最旧的消息）
+        last_access: 最后访问时间（单调时钟秒数）
+        size_bytes: 条目估算内存占用
     """
 
-    messages: list[ChatMessage]
-    last_access: datetime
-    is_valid: bool = True
+    messages: deque[ChatMessage]
+    last_access: float
+    size_bytes: int = 0
 
 
 class InMemoryCache:
@@ -41,7 +62,8 @@ class InMemoryCache:
         - TTL 自动过期（默认 15 分钟）
         - LRU 淘汰策略（默认最多 1000 个 workflow）
         - 消息数量限制（默认每个 workflow 最多 50 条）
-        - 命中率统计
+        - 全局字节预算（默认 64 MiB）
+        - 命中率、淘汰、内存占用统计
 
     Implements:
         MemoryCache Protocol
@@ -50,6 +72,8 @@ class InMemoryCache:
         >>> cache = InMemoryCache(ttl_seconds=900, max_workflows=1000)
         >>> messages = [ChatMessage.create("wf_123", "Hello", is_user=True)]
         >>> cache.put("wf_123", messages)
+        >>> cache.append("wf_123", ChatMessage.create("wf_123", "Hi", is_user=False))
+        True
         >>> cached = cache.get("wf_123")
         >>> if cached is None:
         ...     # Cache miss, need to fallback to database
@@ -61,6 +85,8 @@ class InMemoryCache:
         ttl_seconds: int = 900,  # 15 分钟
         max_workflows: int = 1000,
         max_messages_per_workflow: int = 50,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
     ):
         """
         初始化缓存
@@ -69,15 +95,23 @@ class InMemoryCache:
             ttl_seconds: TTL 时长（秒），默认 900（15分钟）
             max_workflows: 最大缓存 workflow 数量，默认 1000
             max_messages_per_workflow: 每个 workflow 最多缓存消息数，默认 50
+            max_bytes: 所有条目估算内存占用上限（字节），默认 64 MiB
+            clock: 单调时钟（测试可注入）
         """
-        self._ttl = timedelta(seconds=ttl_seconds)
+        self._ttl = float(ttl_seconds)
         self._max_workflows = max_workflows
         self._max_messages = max_messages_per_workflow
+        self._max_bytes = max_bytes
+        self._clock = clock
         self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
 
         # 监控指标
         self._hits = 0
         self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
 
     def get(self, workflow_id: str) -> list[ChatMessage] | None:
         """
@@ -86,9 +120,8 @@ class InMemoryCache:
         执行逻辑：
         1. 检查缓存是否存在
         2. 检查 TTL 是否过期
-        3. 检查有效性标记
-        4. 更新访问时间 + LRU 排序
-        5. 返回消息副本
+        3. 更新访问时间 + LRU 排序
+        4. 返回消息副本
 
         Args:
             workflow_id: 工作流 ID
@@ -97,70 +130,93 @@ class InMemoryCache:
             - list[ChatMessage]: 缓存命中
             - None: 缓存未命中/过期/失效
         """
-        if workflow_id not in self._cache:
-            self._misses += 1
-            return None
+        with self._lock:
+            entry = self._live_entry(workflow_id)
+            if entry is None:
+                self._misses += 1
+                return None
 
-        entry = self._cache[workflow_id]
+            # 命中：更新访问时间 + LRU 移动到末尾
+            entry.last_access = self._clock()
+            self._cache.move_to_end(workflow_id)
+            self._hits += 1
 
-        # 检查 TTL
-        if datetime.utcnow() - entry.last_access > self._ttl:
-            self._misses += 1
-            del self._cache[workflow_id]
-            return None
-
-        # 检查有效性标记
-        if not entry.is_valid:
-            self._misses += 1
-            return None
-
-        # 命中：更新访问时间 + LRU 移动到末尾
-        entry.last_access = datetime.utcnow()
-        self._cache.move_to_end(workflow_id)
-        self._hits += 1
+            # 返回副本（避免外部修改）
+            return list(entry.messages)
 
-        # 返回副本（避免外部修改）
-        return entry.messages.copy()
-
-    def put(self, workflow_id: str, messages: list[ChatMessage]) -> None:
+    def put(self, workflow_id: str, messages: Iterable[ChatMessage]) -> None:
         """
         更新缓存
 
         执行逻辑：
         1. 限制消息数量（取最后 N 条）
-        2. 创建/更新缓存条目
+        2. 创建/替换缓存条目并计算字节占用
         3. 移动到 LRU 末尾
-        4. 检查容量限制，必要时淘汰最旧的
+        4. 检查数量与字节预算，必要时淘汰最旧的
 
         Args:
             workflow_id: 工作流 ID
             messages: 要缓存的消息列表
         """
-        # 限制消息数量
-        trimmed_messages = messages[-self._max_messages :]
-
-        # 更新或插入
-        self._cache[workflow_id] = CacheEntry(
-            messages=trimmed_messages, last_access=datetime.utcnow()
+        # 限制消息数量（deque 定长，只保留最后 N 条）
+        trimmed = deque(messages, maxlen=self._max_messages)
+        entry = CacheEntry(
+            messages=trimmed,
+            last_access=self._clock(),
+            size_bytes=sum(estimate_message_bytes(msg) for msg in trimmed),
         )
-        self._cache.move_to_end(workflow_id)
 
-        # LRU 淘汰
-        while len(self._cache) > self._max_workflows:
-            self._cache.popitem(last=False)  # 移除最旧的
+        with self._lock:
+            self._remove(workflow_id)
+            self._cache[workflow_id] = entry
+            self._bytes += entry.size_bytes
+            self._enforce_limits(workflow_id)
+
+    def append(self, workflow_id: str, message: ChatMessage) -> bool:
+        """
+        向已缓存的 workflow 追加一条消息（O(1)）
+
+        只在条目存在且未过期时追加；否则不创建条目（下次读取回溯数据库，
+        避免缓存只含最新一条消息的不完整历史）。
+
+        Args:
+            workflow_id: 工作流 ID
+            message: 要追加的消息
+
+        Returns:
+            是否已追加
+        """
+        with self._lock:
+            entry = self._live_entry(workflow_id)
+            if entry is None:
+                return False
+
+            messages = entry.messages
+            if messages.maxlen is not None and len(messages) == messages.maxlen:
+                dropped = estimate_message_bytes(messages[0])
+                entry.size_bytes -= dropped
+                self._bytes -= dropped
+            messages.append(message)
+
+            added = estimate_message_bytes(message)
+            entry.size_bytes += added
+            self._bytes += added
+            self._cache.move_to_end(workflow_id)
+            self._enforce_limits(workflow_id)
+            return workflow_id in self._cache
 
     def invalidate(self, workflow_id: str) -> None:
         """
         主动失效指定 workflow 的缓存
 
-        标记为失效而不是删除，触发下次读取时回溯到数据库。
+        直接移除条目并释放其字节占用，下次读取时回溯到数据库。
         操作幂等（重复调用不报错）。
 
         Args:
             workflow_id: 工作流 ID
         """
-        if workflow_id in self._cache:
-            self._cache[workflow_id].is_valid = False
+        with self._lock:
+            self._remove(workflow_id)
 
     def is_valid(self, workflow_id: str) -> bool:
         """
@@ -170,20 +226,12 @@ class InMemoryCache:
             workflow_id: 工作流 ID
 
         Returns:
-            - True: 缓存存在且未过期且有效
+            - True: 缓存存在且未过期
             - False: 缓存不存在/已过期/已失效
         """
-        if workflow_id not in self._cache:
-            return False
-
-        entry = self._cache[workflow_id]
-
-        # 检查 TTL
-        if datetime.utcnow() - entry.last_access > self._ttl:
-            return False
-
-        # 检查有效性标记
-        return entry.is_valid
+        with self._lock:
+            entry = self._cache.get(workflow_id)
+            return entry is not None and not self._expired(entry)
 
     def get_stats(self) -> dict:
         """
@@ -194,16 +242,72 @@ class InMemoryCache:
             - hits: 命中次数
             - misses: 未命中次数
             - hit_rate: 命中率（0-1）
+            - evictions: 因数量/字节预算被淘汰的条目数
+            - expirations: 因 TTL 过期被移除的条目数
             - cached_workflows: 当前缓存的 workflow 数量
+            - bytes: 当前估算内存占用（字节）
+            - max_bytes: 字节预算
             - ttl_seconds: TTL 时长（秒）
         """
-        total = self._hits + self._misses
-        hit_rate = self._hits / total if total > 0 else 0.0
+        with self._lock:
+            total = self._hits + self._misses
+            hit_rate = self._hits / total if total > 0 else 0.0
+
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": hit_rate,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "cached_workflows": len(self._cache),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "ttl_seconds": self._ttl,
+            }
+
+    # ==================== 内部方法（调用方持有锁） ====================
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return self._clock() - entry.last_access > self._ttl
+
+    def _live_entry(self, workflow_id: str) -> CacheEntry | None:
+        """返回未过期的条目；过期条目顺带移除"""
+        entry = self._cache.get(workflow_id)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            self._remove(workflow_id)
+            self._expirations += 1
+            return None
+        return entry
+
+    def _remove(self, workflow_id: str) -> None:
+        entry = self._cache.pop(workflow_id, None)
+        if entry is not None:
+            self._bytes -= entry.size_bytes
+
+    def _enforce_limits(self, workflow_id: str) -> None:
+        """
+        按 LRU 顺序淘汰其他条目直到满足数量与字节预算
 
-        return {
-            "hits": self._hits,
-            "misses": self._misses,
-            "hit_rate": hit_rate,
-            "cached_workflows": len(self._cache),
-            "ttl_seconds": self._ttl.total_seconds(),
-        }
+        当前条目单独超出字节预算时，先丢弃其最旧的消息；仍超出则不缓存。
+        """
+        while len(self._cache) > self._max_workflows or (
+            self._bytes > self._max_bytes and len(self._cache) > 1
+        ):
+            oldest = next(iter(self._cache))
+            if oldest == workflow_id:
+                break
+            self._remove(oldest)
+            self._evictions += 1
+
+        entry = self._cache.get(workflow_id)
+        if entry is None or self._bytes <= self._max_bytes:
+            return
+        while entry.messages and self._bytes > self._max_bytes:
+            dropped = estimate_message_bytes(entry.messages.popleft())
+            entry.size_bytes -= dropped
+            self._bytes -= dropped
+        if not entry.messages:
+            self._remove(workflow_id)
+            self._evictions += 1
@@ -0,0 +1,405 @@
+"""
+SQLite Shared Memory Cache
+
+同一主机上多个 worker 进程共享的对话记忆缓存（实现 MemoryCache Protocol）。
+
+为什么需要共享缓存？
+- 多 worker 部署时每个进程各有一份 InMemoryCache，同一 workflow 的请求落到不同 worker
+  时都会回溯数据库 + TF-IDF 压缩
+- 共享缓存保存压缩后的最近消息窗口，任一 worker 回溯一次后，其他 worker 直接命中
+
+设计说明：
+- SQLite WAL：多进程并发读、单写；PRAGMA mmap_size 让读取走内存映射
+- 每条消息单独一行（workflow_id, seq），追加只插入一行并删除超出窗口的旧行
+- 代次计数（generation）：invalidate 以及未命中的 append 递增代次；进程在未命中时记录
+  当时的代次，回溯完成后的 put 只在代次未变时写入，避免把失效前（或缺少期间追加的消息）
+  加载的旧窗口写回缓存
+- TTL 使用墙上时钟（time.time()），以便跨进程、跨重启比较
+- 全局字节预算：超出时按最后访问时间淘汰最久未使用的 workflow
+- 命中/未命中计数为进程内统计；条目数与字节数为共享统计
+
+Author: Claude Code
+Date: 2025-11-30
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from src.domain.entities.chat_message import ChatMessage
+from src.infrastructure.memory.in_memory_cache import estimate_message_bytes
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS memory_cache_entries (
+        workflow_id TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0,
+        live INTEGER NOT NULL DEFAULT 0,
+        next_seq INTEGER NOT NULL DEFAULT 0,
+        size_bytes INTEGER NOT NULL DEFAULT 0,
+        last_access REAL NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_memory_cache_live_access "
+    "ON memory_cache_entries(live, last_access)",
+    """
+    CREATE TABLE IF NOT EXISTS memory_cache_messages (
+        workflow_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (workflow_id, seq)
+    ) WITHOUT ROWID
+    """,
+)
+
+
+class SQLiteSharedMemoryCache:
+    """
+    基于 SQLite(WAL) 的跨进程共享缓存
+
+    Implements:
+        MemoryCache Protocol
+
+    Example:
+        >>> cache = SQLiteSharedMemoryCache("data/memory_cache.db", ttl_seconds=900)
+        >>> if cache.get("wf_123") is None:
+        ...     cache.put("wf_123", compressed_messages)  # 代次未变才写入
+        >>> cache.append("wf_123", message)
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: int = 900,
+        max_messages_per_workflow: int = 50,
+        max_bytes: int = 64 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+        mmap_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化共享缓存（连接延迟到首次使用时打开，fork 后的子进程会重新连接）
+
+        Args:
+            db_path: SQLite 文件路径（同一主机的所有 worker 使用同一路径）
+            ttl_seconds: TTL 时长（秒）
+            max_messages_per_workflow: 每个 workflow 最多缓存消息数
+            max_bytes: 所有条目估算内存占用上限（字节）
+            busy_timeout_ms: 写锁等待超时（毫秒）
+            mmap_bytes: PRAGMA mmap_size（0 表示不使用内存映射读取）
+            clock: 墙上时钟（测试可注入）
+        """
+        self._db_path = db_path
+        self._ttl = float(ttl_seconds)
+        self._max_messages = max_messages_per_workflow
+        self._max_bytes = max_bytes
+        self._busy_timeout_ms = busy_timeout_ms
+        self._mmap_bytes = mmap_bytes
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        # 未命中时观察到的代次：workflow_id → generation
+        self._observed: dict[str, int] = {}
+
+        # 进程内监控指标
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._stale_puts = 0
+
+    def get(self, workflow_id: str) -> list[ChatMessage] | None:
+        """
+        获取缓存的消息列表（未命中时记录当前代次）
+
+        Args:
+            workflow_id: 工作流 ID
+
+        Returns:
+            - list[ChatMessage]: 缓存命中
+            - None: 缓存未命中/过期/失效
+        """
+        with self._lock:
+            conn = self._connection()
+            now = self._clock()
+            row = conn.execute(
+                "SELECT generation, live, last_access FROM memory_cache_entries "
+                "WHERE workflow_id = ?",
+                (workflow_id,),
+            ).fetchone()
+            if row is None or not row[1] or now - row[2] > self._ttl:
+                self._observed[workflow_id] = row[0] if row is not None else 0
+                self._misses += 1
+                return None
+
+            payloads = conn.execute(
+                "SELECT payload FROM memory_cache_messages WHERE workflow_id = ? ORDER BY seq",
+                (workflow_id,),
+            ).fetchall()
+            # 滑动 TTL：访问时间变化不足 TTL 的 1/20 时不写回，避免每次命中都争用写锁
+            if now - row[2] >= self._ttl / 20:
+                conn.execute(
+                    "UPDATE memory_cache_entries SET last_access = ? WHERE workflow_id = ?",
+                    (now, workflow_id),
+                )
+            self._hits += 1
+            return [ChatMessage.from_dict(json.loads(payload)) for (payload,) in payloads]
+
+    def put(self, workflow_id: str, messages: Iterable[ChatMessage]) -> None:
+        """
+        写入 workflow 的消息窗口（只保留最后 N 条）
+
+        若本进程此前未命中时观察到的代次已被其他进程递增（期间发生 invalidate），
+        放弃写入，避免覆盖为过期数据。
+
+        Args:
+            workflow_id: 工作流 ID
+            messages: 要缓存的消息列表
+        """
+        window = list(messages)[-self._max_messages :]
+        rows = []
+        for seq, msg in enumerate(window):
+            payload = json.dumps(msg.to_dict(), ensure_ascii=False)
+            rows.append((workflow_id, seq, estimate_message_bytes(msg), payload))
+        size = sum(row[2] for row in rows)
+
+        with self._lock:
+            conn = self._connection()
+            observed = self._observed.pop(workflow_id, None)
+            with self._transaction(conn):
+                row = conn.execute(
+                    "SELECT generation FROM memory_cache_entries WHERE workflow_id = ?",
+                    (workflow_id,),
+                ).fetchone()
+                generation = row[0] if row is not None else 0
+                if observed is not None and observed != generation:
+                    self._stale_puts += 1
+                    return
+
+                conn.execute(
+                    "DELETE FROM memory_cache_messages WHERE workflow_id = ?", (workflow_id,)
+                )
+                conn.executemany(
+                    "INSERT INTO memory_cache_messages (workflow_id, seq, size_bytes, payload) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute(
+                    """
+                    INSERT INTO memory_cache_entries
+                        (workflow_id, generation, live, next_seq, size_bytes, last_access)
+                    VALUES (?, ?, 1, ?, ?, ?)
+                    ON CONFLICT(workflow_id) DO UPDATE SET
+                        live = 1, next_seq = excluded.next_seq,
+                        size_bytes = excluded.size_bytes, last_access = excluded.last_access
+                    """,
+                    (workflow_id, generation, len(rows), size, self._clock()),
+                )
+                self._enforce_budget(conn, workflow_id)
+
+    def append(self, workflow_id: str, message: ChatMessage) -> bool:
+        """
+        向已缓存的 workflow 追加一条消息（插入一行，删除超出窗口的最旧行）
+
+        Args:
+            workflow_id: 工作流 ID
+            message: 要追加的消息
+
+        条目不存在/已过期时不追加，但递增代次：其他进程此时可能正在回溯，
+        它在这条消息之前加载的窗口不能再写回缓存。
+
+        Returns:
+            是否已追加（条目不存在/已过期时返回 False）
+        """
+        payload = json.dumps(message.to_dict(), ensure_ascii=False)
+        size = estimate_message_bytes(message)
+
+        with self._lock:
+            conn = self._connection()
+            now = self._clock()
+            with self._transaction(conn):
+                row = conn.execute(
+                    "SELECT live, next_seq, last_access FROM memory_cache_entries "
+                    "WHERE workflow_id = ?",
+                    (workflow_id,),
+                ).fetchone()
+                if row is None or not row[0] or now - row[2] > self._ttl:
+                    self._drop(conn, workflow_id)
+                    return False
+
+                seq = row[1]
+                conn.execute(
+                    "INSERT INTO memory_cache_messages (workflow_id, seq, size_bytes, payload) "
+                    "VALUES (?, ?, ?, ?)",
+                    (workflow_id, seq, size, payload),
+                )
+                dropped = conn.execute(
+                    "DELETE FROM memory_cache_messages WHERE workflow_id = ? AND seq <= ? "
+                    "RETURNING size_bytes",
+                    (workflow_id, seq - self._max_messages),
+                ).fetchall()
+                conn.execute(
+                    "UPDATE memory_cache_entries SET next_seq = ?, last_access = ?, "
+                    "size_bytes = size_bytes + ? WHERE workflow_id = ?",
+                    (seq + 1, now, size - sum(r[0] for r in dropped), workflow_id),
+                )
+                self._enforce_budget(conn, workflow_id)
+            return True
+
+    def invalidate(self, workflow_id: str) -> None:
+        """
+        主动失效指定 workflow 的缓存（递增代次并删除消息，幂等）
+
+        Args:
+            workflow_id: 工作流 ID
+        """
+        with self._lock:
+            conn = self._connection()
+            with self._transaction(conn):
+                self._drop(conn, workflow_id)
+
+    def is_valid(self, workflow_id: str) -> bool:
+        """
+        检查缓存有效性
+
+        Args:
+            workflow_id: 工作流 ID
+
+        Returns:
+            - True: 缓存存在且未过期
+            - False: 缓存不存在/已过期/已失效
+        """
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT live, last_access FROM memory_cache_entries WHERE workflow_id = ?",
+                    (workflow_id,),
+                )
+                .fetchone()
+            )
+            return row is not None and bool(row[0]) and self._clock() - row[1] <= self._ttl
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        获取缓存统计指标
+
+        Returns:
+            - hits / misses / hit_rate: 本进程命中统计
+            - evictions: 本进程触发的淘汰次数
+            - stale_puts: 因代次变化被放弃的写入次数
+            - cached_workflows / bytes: 共享缓存的条目数与估算字节数
+            - max_bytes / ttl_seconds: 配置
+        """
+        with self._lock:
+            cached, size = (
+                self._connection()
+                .execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM memory_cache_entries "
+                    "WHERE live = 1"
+                )
+                .fetchone()
+            )
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total > 0 else 0.0,
+                "evictions": self._evictions,
+                "stale_puts": self._stale_puts,
+                "cached_workflows": cached,
+                "bytes": size,
+                "max_bytes": self._max_bytes,
+                "ttl_seconds": self._ttl,
+            }
+
+    def close(self) -> None:
+        """关闭本进程的连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ==================== 内部方法（调用方持有锁） ====================
+
+    def _connection(self) -> sqlite3.Connection:
+        """返回本进程的连接；fork 后的子进程不复用父进程的连接"""
+        pid = os.getpid()
+        if self._conn is not None and self._pid == pid:
+            return self._conn
+
+        Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=self._busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {int(self._mmap_bytes)}")
+        with self._transaction(conn):
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+        self._conn = conn
+        self._pid = pid
+        self._observed.clear()
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE 事务（读后写前先拿写锁，避免锁升级失败）"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _drop(self, conn: sqlite3.Connection, workflow_id: str) -> None:
+        """删除消息并递增代次（代次行不存在时创建，供进行中的 put 判断是否过期）"""
+        conn.execute("DELETE FROM memory_cache_messages WHERE workflow_id = ?", (workflow_id,))
+        conn.execute(
+            """
+            INSERT INTO memory_cache_entries (workflow_id, generation, live)
+            VALUES (?, 1, 0)
+            ON CONFLICT(workflow_id) DO UPDATE SET
+                generation = generation + 1, live = 0, next_seq = 0, size_bytes = 0
+            """,
+            (workflow_id,),
+        )
+
+    def _enforce_budget(self, conn: sqlite3.Connection, workflow_id: str) -> None:
+        """超出字节预算时按最后访问时间淘汰其他 workflow；过期条目优先清理"""
+        (total,) = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM memory_cache_entries WHERE live = 1"
+        ).fetchone()
+        if total <= self._max_bytes:
+            return
+
+        candidates = conn.execute(
+            "SELECT workflow_id, size_bytes FROM memory_cache_entries "
+            "WHERE live = 1 AND workflow_id != ? ORDER BY last_access",
+            (workflow_id,),
+        ).fetchall()
+        for victim, size in candidates:
+            if total <= self._max_bytes:
+                break
+            self._drop(conn, victim)
+            self._evictions += 1
+            total -= size
+        if total > self._max_bytes:
+            # 当前条目单独超出预算：不缓存
+            self._drop(conn, workflow_id)
+            self._evictions += 1
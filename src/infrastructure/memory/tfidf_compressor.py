@@ -4,16 +4,58 @@ TF-IDF Message Compressor
 基于 TF-IDF 的智能消息压缩算法。
 根据消息的信息量（TF-IDF 分数）和时间新鲜度进行压缩。
 
+增量统计：
+- 每个 workflow 维护一份统计模型：按消息 ID 缓存 token 数与词频向量，
+  并维护文档频率（DF）计数与总 token 数
+- 新消息（append 时 observe，或 compress 时首次出现）只分词一次；
+  离开窗口的消息从 DF 中扣除
+- 每次压缩的分词/估算开销与新增消息数成正比，而不是与整个历史成正比
+
 Author: Claude Code
 Date: 2025-11-30
 """
 
+import heapq
 import math
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 
 from src.domain.entities.chat_message import ChatMessage
 
 
+@dataclass(slots=True)
+class _MessageStats:
+    """单条消息的缓存统计（content 用于检测消息被修改）"""
+
+    content: str
+    tokens: int
+    term_counts: Counter
+    total_terms: int
+
+
+@dataclass
+class _WorkflowModel:
+    """单个 workflow 的增量 TF-IDF 模型"""
+
+    messages: dict[str, _MessageStats] = field(default_factory=dict)
+    document_frequency: Counter = field(default_factory=Counter)
+    total_tokens: int = 0
+
+    def add(self, message_id: str, stats: _MessageStats) -> None:
+        self.messages[message_id] = stats
+        self.document_frequency.update(stats.term_counts.keys())
+        self.total_tokens += stats.tokens
+
+    def remove(self, message_id: str) -> None:
+        stats = self.messages.pop(message_id)
+        self.document_frequency.subtract(stats.term_counts.keys())
+        for term in stats.term_counts:
+            if self.document_frequency[term] <= 0:
+                del self.document_frequency[term]
+        self.total_tokens -= stats.tokens
+
+
 class TFIDFCompressor:
     """
     基于 TF-IDF 的消息重要性评估与压缩
@@ -32,6 +74,39 @@ class TFIDFCompressor:
         20
     """
 
+    def __init__(self, max_workflows: int = 1000):
+        """
+        初始化压缩器
+
+        Args:
+            max_workflows: 最多保留统计模型的 workflow 数（LRU 淘汰）
+        """
+        self._max_workflows = max_workflows
+        self._models: OrderedDict[str, _WorkflowModel] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, message: ChatMessage) -> None:
+        """
+        追加消息时增量更新统计（只对已有模型的 workflow 生效）
+
+        Args:
+            message: 新追加的消息
+        """
+        with self._lock:
+            model = self._models.get(message.workflow_id)
+            if model is not None and message.id not in model.messages:
+                model.add(message.id, self._message_stats(message.content))
+
+    def forget(self, workflow_id: str) -> None:
+        """
+        丢弃 workflow 的统计模型（清空历史时调用）
+
+        Args:
+            workflow_id: 工作流 ID
+        """
+        with self._lock:
+            self._models.pop(workflow_id, None)
+
     def compress(
         self, messages: list[ChatMessage], max_tokens: int = 4000, min_messages: int = 2
     ) -> list[ChatMessage]:
@@ -58,45 +133,128 @@ class TFIDFCompressor:
         if len(messages) <= min_messages:
             return messages
 
-        # 1. 计算每条消息的 token 数
-        message_tokens = [self._estimate_tokens(msg.content) for msg in messages]
-        total_tokens = sum(message_tokens)
+        with self._lock:
+            # 1. 同步增量模型（只处理新增/修改/移出窗口的消息）
+            model = self._sync_model(messages)
 
-        if total_tokens <= max_tokens:
-            return messages
+            if model.total_tokens <= max_tokens:
+                return messages
 
-        # 2. 计算 TF-IDF 分数
-        scores = self._calculate_tfidf_scores(messages)
+            # 2. 计算 TF-IDF 分数（复用缓存的词频向量与 DF）
+            stats = [model.messages[msg.id] for msg in messages]
+            scores = self._score(stats, model.document_frequency, len(messages))
 
         # 3. 按时间倒序排序（索引，最新的在前）
-        sorted_indices = list(range(len(messages)))
-        sorted_indices.sort(key=lambda i: messages[i].timestamp, reverse=True)
+        sorted_indices = sorted(
+            range(len(messages)), key=lambda i: messages[i].timestamp, reverse=True
+        )
 
         # 4. 贪心选择：优先保留最近 + 高分消息
         selected = []
         current_tokens = 0
 
         # 强制保留最近 min_messages 条
-        for i in range(min(min_messages, len(messages))):
-            idx = sorted_indices[i]
+        for idx in sorted_indices[:min_messages]:
             selected.append(idx)
-            current_tokens += message_tokens[idx]
-
-        # 按分数选择剩余消息
-        remaining = [(idx, scores[idx]) for idx in sorted_indices[min_messages:]]
-        remaining.sort(key=lambda x: x[1], reverse=True)  # 按分数降序
-
-        for idx, _score in remaining:
-            if current_tokens + message_tokens[idx] <= max_tokens:
-                selected.append(idx)
-                current_tokens += message_tokens[idx]
-            else:
+            current_tokens += stats[idx].tokens
+
+        # 按分数从堆中依次取出剩余消息（分数相同时较新的优先），放不下即停止
+        heap = [(-scores[idx], rank, idx) for rank, idx in enumerate(sorted_indices[min_messages:])]
+        heapq.heapify(heap)
+        while heap:
+            _neg_score, _rank, idx = heapq.heappop(heap)
+            if current_tokens + stats[idx].tokens > max_tokens:
                 break
+            selected.append(idx)
+            current_tokens += stats[idx].tokens
 
         # 5. 按时间顺序返回
         selected.sort()
         return [messages[i] for i in selected]
 
+    def _sync_model(self, messages: list[ChatMessage]) -> _WorkflowModel:
+        """
+        将 workflow 模型与本次消息窗口对齐
+
+        新消息只分词一次；内容变化的消息重新统计；不在窗口中的消息从 DF 中扣除。
+        消息 ID 重复时无法按 ID 对齐，使用一次性模型（同一 ID 只计一次）。
+
+        Args:
+            messages: 本次压缩的消息列表
+
+        Returns:
+            包含 messages 全部消息的统计模型
+        """
+        current = {msg.id: msg for msg in messages}
+        if len(current) != len(messages):
+            model = _WorkflowModel()
+            for message_id, msg in current.items():
+                model.add(message_id, self._message_stats(msg.content))
+            return model
+
+        workflow_id = messages[0].workflow_id
+        model = self._models.get(workflow_id)
+        if model is None:
+            model = self._models[workflow_id] = _WorkflowModel()
+            while len(self._models) > self._max_workflows:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(workflow_id)
+
+        for message_id in [mid for mid in model.messages if mid not in current]:
+            model.remove(message_id)
+
+        for message_id, msg in current.items():
+            cached = model.messages.get(message_id)
+            if cached is not None and cached.content == msg.content:
+                continue
+            if cached is not None:
+                model.remove(message_id)
+            model.add(message_id, self._message_stats(msg.content))
+
+        return model
+
+    def _message_stats(self, content: str) -> _MessageStats:
+        """分词并估算 token（每条消息只执行一次）"""
+        words = self._tokenize(content)
+        return _MessageStats(
+            content=content,
+            tokens=self._estimate_tokens(content),
+            term_counts=Counter(words),
+            total_terms=len(words),
+        )
+
+    @staticmethod
+    def _score(
+        stats: list[_MessageStats], document_frequency: Counter, num_docs: int
+    ) -> list[float]:
+        """
+        基于缓存的词频向量与 DF 计算 TF-IDF 分数
+
+        Args:
+            stats: 每条消息的统计
+            document_frequency: 词 → 包含该词的消息数
+            num_docs: 消息总数
+
+        Returns:
+            每条消息的 TF-IDF 分数列表
+        """
+        log_docs = math.log(num_docs)
+        idf: dict[str, float] = {}
+        scores = []
+        for entry in stats:
+            if entry.total_terms == 0:
+                scores.append(0.0)
+                continue
+            tfidf_sum = 0.0
+            for word, count in entry.term_counts.items():
+                weight = idf.get(word)
+                if weight is None:
+                    weight = idf[word] = log_docs - math.log(document_frequency[word])
+                tfidf_sum += count * weight
+            scores.append(tfidf_sum / entry.total_terms)
+        return scores
+
     def _estimate_tokens(self, text: str) -> int:
         """
         估算 token 数量（启发式）
@@ -129,39 +287,11 @@ class TFIDFCompressor:
         Returns:
             每条消息的 TF-IDF 分数列表
         """
-        # 构建词频表
-        all_words = []
-        message_words = []
-
-        for msg in messages:
-            words = self._tokenize(msg.content)
-            message_words.append(words)
-            all_words.extend(words)
-
-        # 计算 IDF
-        word_doc_count = Counter()
-        for words in message_words:
-            word_doc_count.update(set(words))
-
-        num_docs = len(messages)
-        idf = {word: math.log(num_docs / count) for word, count in word_doc_count.items()}
-
-        # 计算每条消息的 TF-IDF 得分
-        scores = []
-        for words in message_words:
-            word_count = Counter(words)
-            total_words = len(words)
-
-            if total_words == 0:
-                scores.append(0.0)
-                continue
-
-            tfidf_sum = sum(
-                (count / total_words) * idf.get(word, 0.0) for word, count in word_count.items()
-            )
-            scores.append(tfidf_sum)
-
-        return scores
+        stats = [self._message_stats(msg.content) for msg in messages]
+        document_frequency: Counter = Counter()
+        for entry in stats:
+            document_frequency.update(entry.term_counts.keys())
+        return self._score(stats, document_frequency, len(messages))
 
     def _tokenize(self, text: str) -> list[str]:
         """
@@ -0,0 +1,469 @@
+"""
+Write-Behind Journal
+
+对话消息的写后（write-behind）日志，提供：
+- 本地追加式日志（JSON Lines）：append 只写本地文件，不等待数据库提交
+- 后台线程按批次把消息刷入数据库（一次事务提交一批）
+- 崩溃恢复：启动时重放日志中尚未确认落库的消息
+- 读一致性：未落库的消息可按 workflow 查询，供读取路径合并
+
+日志格式：
+- 消息记录：{"seq": 1, "id": ..., "workflow_id": ..., "content": ..., "is_user": ..., "timestamp": ...}
+- 落库检查点：{"flushed": 42}（seq <= 42 的消息已提交到数据库，或已转入死信文件）
+- 丢弃记录：{"discard": "wf_123", "through": 57}（清空记忆时丢弃该 workflow seq <= 57 的待写消息）
+- 检查点丢失只会导致重放已落库的消息，数据库按 id merge，重放是幂等的
+- 死信：同一批次连续失败 max_batch_retries 次后转入 journal-N.dead.jsonl（原始日志行），
+  不再阻塞后续消息，需人工排查后重放
+
+多进程：
+- 日志目录下按槽位（journal-0.jsonl、journal-1.jsonl ...）分文件，每个进程用
+  flock 独占一个槽位；进程崩溃后锁自动释放，重启的进程接管该槽位并重放其内容
+- 无 fcntl 的平台（Windows）不加锁，仅支持单 worker
+
+Author: Claude Code
+Date: 2025-12-20
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import IO
+
+from src.domain.entities.chat_message import ChatMessage
+
+try:  # pragma: no cover - 平台相关
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+BatchWriter = Callable[[list[ChatMessage]], None]
+
+
+class JournalUnavailableError(Exception):
+    """没有可用的日志槽位（所有槽位都被其他进程占用）"""
+
+    pass
+
+
+class JournalFlushError(Exception):
+    """待写消息未能刷入数据库（依赖全量数据的操作不能继续）"""
+
+    pass
+
+
+class WriteBehindJournal:
+    """
+    写后日志 + 后台批量刷库
+
+    Features:
+        - append 只做本地顺序写（可选 fsync），不经过数据库
+        - 后台线程每 flush_interval 秒或积累 batch_size 条时批量刷库
+        - 刷库失败保留待写消息并指数退避重试；同一批次失败次数超过上限时转入死信文件
+        - 启动时重放未确认的记录（崩溃恢复）
+        - 日志超过 compact_bytes 时重写为只含待写记录
+
+    Example:
+        >>> journal = WriteBehindJournal("data/memory_journal", writer=write_batch)
+        >>> journal.start()
+        >>> journal.append(ChatMessage.create("wf_123", "Hello", is_user=True))
+        >>> journal.pending("wf_123")  # 尚未落库的消息
+        >>> journal.stop()  # 刷完剩余消息后关闭
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        writer: BatchWriter,
+        *,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        fsync: bool = True,
+        compact_bytes: int = 8 * 1024 * 1024,
+        max_slots: int = 64,
+        max_batch_retries: int = 20,
+    ):
+        """
+        初始化日志并重放未落库的记录
+
+        Args:
+            directory: 日志目录
+            writer: 批量写入函数（负责事务提交，失败时抛异常）
+            batch_size: 单批最大消息数，默认 200
+            flush_interval: 后台刷库间隔（秒），默认 0.05
+            fsync: 每次追加后是否 fsync（False 时只保证进程崩溃不丢，不保证掉电不丢）
+            compact_bytes: 日志文件超过该大小时压缩，默认 8 MiB
+            max_slots: 最多尝试的槽位数，默认 64
+            max_batch_retries: 同一批次连续失败多少次后转入死信文件，默认 20
+
+        Raises:
+            JournalUnavailableError: 所有槽位都被占用时
+        """
+        self._directory = Path(directory)
+        self._writer = writer
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._compact_bytes = compact_bytes
+        self._max_batch_retries = max(1, max_batch_retries)
+
+        self._lock = threading.Lock()  # 保护日志文件与待写队列
+        self._flush_lock = threading.Lock()  # 同一时间只有一个刷库者
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        # 待写队列：(seq, message, 序列化后的日志行)，按 seq 递增
+        self._pending: deque[tuple[int, ChatMessage, str]] = deque()
+        self._by_workflow: defaultdict[str, deque[ChatMessage]] = defaultdict(deque)
+        self._seq = 0
+        self._flushed_seq = 0
+        self._file_bytes = 0
+        # 队首批次的连续失败次数：(队首 seq, 次数)
+        self._head_failures: tuple[int, int] = (0, 0)
+
+        # 监控指标
+        self._appended = 0
+        self._flushed = 0
+        self._batches = 0
+        self._failures = 0
+        self._recovered = 0
+        self._dead_lettered = 0
+        self._discarded = 0
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file, self._path = self._claim_slot(max_slots)
+        self._file = self._recover()
+
+    # ==================== 公共接口 ====================
+
+    @property
+    def path(self) -> Path:
+        """当前进程占用的日志文件路径"""
+        return self._path
+
+    @property
+    def dead_letter_path(self) -> Path:
+        """死信文件路径（多次刷库失败的原始日志行）"""
+        return self._path.with_suffix(".dead.jsonl")
+
+    def start(self) -> None:
+        """启动后台刷库线程（幂等）"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._thread.start()
+        if self._pending:
+            self._wakeup.set()
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """
+        停止后台线程，刷完剩余消息并关闭日志
+
+        Args:
+            timeout: 等待后台线程退出的超时时间（秒）
+
+        Returns:
+            剩余消息是否全部落库（False 时保留在日志中，下次启动重放）
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        flushed = self.flush()
+        self.close()
+        return flushed
+
+    def close(self) -> None:
+        """关闭日志文件并释放槽位（不刷库；未落库记录留待下次启动重放）"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            self._lock_file.close()
+
+    def append(self, message: ChatMessage) -> None:
+        """
+        追加消息到日志（不访问数据库）
+
+        Args:
+            message: 聊天消息
+
+        Raises:
+            OSError: 日志写入失败时
+        """
+        with self._lock:
+            seq = self._seq + 1
+            line = _encode_message(seq, message)
+            self._write(line, sync=self._fsync)
+            self._seq = seq
+            self._pending.append((seq, message, line))
+            self._by_workflow[message.workflow_id].append(message)
+            self._appended += 1
+            backlog = len(self._pending)
+
+        if backlog >= self._batch_size:
+            self._wakeup.set()
+
+    def pending(self, workflow_id: str) -> list[ChatMessage]:
+        """
+        获取指定 workflow 尚未落库的消息（按追加顺序）
+
+        Args:
+            workflow_id: 工作流 ID
+
+        Returns:
+            未落库消息列表
+        """
+        with self._lock:
+            queue = self._by_workflow.get(workflow_id)
+            return list(queue) if queue else []
+
+    def discard(self, workflow_id: str) -> int:
+        """
+        丢弃指定 workflow 尚未落库的消息（清空记忆时使用，不会再刷库或被重放）
+
+        等待在途批次完成后执行，因此调用返回后不会再有该 workflow 的旧消息落库。
+
+        Args:
+            workflow_id: 工作流 ID
+
+        Returns:
+            丢弃的消息数
+        """
+        with self._flush_lock, self._lock:
+            if not self._by_workflow.get(workflow_id):
+                return 0
+            through = self._seq
+            self._write(
+                json.dumps({"discard": workflow_id, "through": through}, ensure_ascii=False) + "\n",
+                sync=self._fsync,
+            )
+            kept = deque(entry for entry in self._pending if entry[1].workflow_id != workflow_id)
+            dropped = len(self._pending) - len(kept)
+            self._pending = kept
+            del self._by_workflow[workflow_id]
+            self._discarded += dropped
+            return dropped
+
+    def flush(self) -> bool:
+        """
+        在调用线程中把截至当前的消息全部刷入数据库
+
+        Returns:
+            是否全部落库成功
+        """
+        with self._lock:
+            target = self._seq
+        with self._flush_lock:
+            while self._flushed_seq < target:
+                try:
+                    if self._drain_once() == 0:
+                        break
+                except Exception as e:
+                    logger.error(f"Write-behind flush failed: {e}")
+                    return False
+        return True
+
+    def get_stats(self) -> dict:
+        """
+        获取日志统计指标
+
+        Returns:
+            包含以下字段的字典：
+            - pending: 尚未落库的消息数
+            - appended: 累计追加消息数
+            - flushed: 累计落库消息数
+            - batches: 累计刷库批次数
+            - failures: 刷库失败次数
+            - recovered: 启动时重放的消息数
+            - dead_lettered: 转入死信文件的消息数
+            - discarded: 清空记忆时丢弃的待写消息数
+            - journal_bytes: 当前日志文件大小（字节）
+            - path: 日志文件路径
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "appended": self._appended,
+                "flushed": self._flushed,
+                "batches": self._batches,
+                "failures": self._failures,
+                "recovered": self._recovered,
+                "dead_lettered": self._dead_lettered,
+                "discarded": self._discarded,
+                "journal_bytes": self._file_bytes,
+                "path": str(self._path),
+            }
+
+    # ==================== 后台刷库 ====================
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stopping.is_set():
+            delay = min(self._flush_interval * (2**failures), 5.0)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            with self._flush_lock:
+                try:
+                    while not self._stopping.is_set() and self._drain_once():
+                        pass
+                    failures = 0
+                except Exception as e:
+                    failures = min(failures + 1, 10)
+                    logger.warning(f"Write-behind batch failed (retry #{failures}): {e}")
+
+    def _drain_once(self) -> int:
+        """刷一批消息到数据库，返回本批数量（调用方持有 _flush_lock）"""
+        with self._lock:
+            batch = list(itertools.islice(self._pending, self._batch_size))
+        if not batch:
+            return 0
+
+        dead_lettered = False
+        try:
+            self._writer([message for _, message, _ in batch])
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                head, count = self._head_failures
+                count = count + 1 if head == batch[0][0] else 1
+                self._head_failures = (batch[0][0], count)
+                if count < self._max_batch_retries:
+                    raise
+                # 同一批次反复失败（如数据不合法）：转入死信，避免永久阻塞后续消息
+                logger.error(
+                    f"Write-behind batch failed {count} times, moving {len(batch)} "
+                    f"messages to {self.dead_letter_path}: {e}"
+                )
+                with open(self.dead_letter_path, "a", encoding="utf-8") as dead:
+                    dead.writelines(line for _, _, line in batch)
+                    dead.flush()
+                    os.fsync(dead.fileno())
+                self._dead_lettered += len(batch)
+                dead_lettered = True
+
+        with self._lock:
+            for _ in batch:
+                _, message, _ = self._pending.popleft()
+                queue = self._by_workflow[message.workflow_id]
+                queue.popleft()
+                if not queue:
+                    del self._by_workflow[message.workflow_id]
+            self._flushed_seq = batch[-1][0]
+            if not dead_lettered:
+                self._flushed += len(batch)
+                self._batches += 1
+            # 检查点无需 fsync：丢失只会导致幂等重放
+            self._write(json.dumps({"flushed": self._flushed_seq}) + "\n", sync=False)
+            if self._file_bytes > self._compact_bytes:
+                self._compact()
+        return len(batch)
+
+    # ==================== 文件操作（调用方持有 _lock） ====================
+
+    def _write(self, line: str, *, sync: bool) -> None:
+        self._file.write(line)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+        self._file_bytes += len(line.encode("utf-8"))
+
+    def _compact(self) -> None:
+        """把日志重写为只含待写记录（先写临时文件再原子替换）"""
+        tmp_path = self._path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            lines = [line for _, _, line in self._pending]
+            tmp.writelines(lines)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        self._file.close()
+        os.replace(tmp_path, self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._file_bytes = sum(len(line.encode("utf-8")) for line in lines)
+
+    def _claim_slot(self, max_slots: int) -> tuple[IO[str], Path]:
+        for slot in range(max_slots):
+            lock_file = open(self._directory / f"journal-{slot}.lock", "a", encoding="utf-8")
+            if fcntl is None:
+                return lock_file, self._directory / f"journal-{slot}.jsonl"
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            return lock_file, self._directory / f"journal-{slot}.jsonl"
+        raise JournalUnavailableError(f"No free journal slot in {self._directory}")
+
+    def _recover(self) -> IO[str]:
+        """读取日志，重建未落库的待写队列，并压缩掉已落库记录与损坏的尾行"""
+        records: list[tuple[int, ChatMessage, str]] = []
+        discarded: dict[str, int] = {}
+        flushed = 0
+        if self._path.exists():
+            with open(self._path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时写了一半的行
+                        logger.warning(f"Skipping torn record in {self._path}")
+                        continue
+                    if "flushed" in record:
+                        flushed = max(flushed, record["flushed"])
+                        continue
+                    if "discard" in record:
+                        discarded[record["discard"]] = record["through"]
+                        continue
+                    records.append((record["seq"], _decode_message(record), line))
+
+        for seq, message, line in records:
+            self._seq = max(self._seq, seq)
+            if seq > flushed and seq > discarded.get(message.workflow_id, 0):
+                self._pending.append((seq, message, line))
+                self._by_workflow[message.workflow_id].append(message)
+        self._flushed_seq = flushed
+        self._recovered = len(self._pending)
+        if self._recovered:
+            logger.info(f"Recovered {self._recovered} unflushed messages from {self._path}")
+
+        # 重写日志：去掉已落库记录和损坏的尾行，避免后续追加接在半行之后
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._compact()
+        return self._file
+
+
+def _encode_message(seq: int, message: ChatMessage) -> str:
+    return (
+        json.dumps(
+            {
+                "seq": seq,
+                "id": message.id,
+                "workflow_id": message.workflow_id,
+                "content": message.content,
+                "is_user": message.is_user,
+                "timestamp": message.timestamp.isoformat(),
+            },
+            ensure_ascii=False,
+        )
+        + "\n"
+    )
+
+
+def _decode_message(record: dict) -> ChatMessage:
+    return ChatMessage(
+        id=record["id"],
+        workflow_id=record["workflow_id"],
+        content=record["content"],
+        is_user=record["is_user"],
+        timestamp=datetime.fromisoformat(record["timestamp"]),
+    )
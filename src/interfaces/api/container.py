@@ -123,7 +123,11 @@ class AdapterFactory:
 
             from src.infrastructure.adapters.llm_replay_adapter import LLMReplayAdapter
 
-            return LLMReplayAdapter(replay_file=settings.llm_replay_file)
+            return LLMReplayAdapter(
+                replay_file=settings.llm_replay_file,
+                normalize_prompts=settings.llm_replay_normalize,
+                time_scale=settings.llm_replay_time_scale,
+            )
 
         elif adapter_type == "openai":
             # 模式C: Full-real - 真实API
@@ -134,12 +138,28 @@ class AdapterFactory:
                 )
 
             from src.infrastructure.adapters.llm_openai_adapter import LLMOpenAIAdapter
+            from src.interfaces.api.dependencies.clients import get_client_registry
+            from src.interfaces.api.dependencies.llm import (
+                get_llm_rate_limiter,
+                get_llm_response_cache,
+            )
 
-            return LLMOpenAIAdapter(
+            adapter = LLMOpenAIAdapter(
                 api_key=settings.openai_api_key,
                 model=settings.openai_model,
                 base_url=settings.openai_base_url,
+                response_cache=get_llm_response_cache(),
+                client_registry=get_client_registry(),
+                rate_limiter=get_llm_rate_limiter(),
             )
+            if settings.llm_record_file:
+                # 录制真实会话(含TTFT/token间隔), 供离线replay与压测使用
+                from src.infrastructure.adapters.llm_recording_adapter import (
+                    LLMRecordingAdapter,
+                )
+
+                return LLMRecordingAdapter(adapter, record_file=settings.llm_record_file)
+            return adapter
 
         else:
             raise ValueError(
@@ -199,8 +219,9 @@ class AdapterFactory:
         elif adapter_type == "httpx":
             # 模式C: Full-real - 真实HTTP
             from src.infrastructure.adapters.http_httpx_adapter import HTTPHttpxAdapter
+            from src.interfaces.api.dependencies.clients import get_client_registry
 
-            return HTTPHttpxAdapter()
+            return HTTPHttpxAdapter(client_registry=get_client_registry())
 
         else:
             raise ValueError(
@@ -0,0 +1,36 @@
+"""共享客户端依赖
+
+提供进程级 ClientRegistry（LLM SDK 客户端 + httpx 连接池），
+由 LLM / HTTP 节点执行器与 Adapter 共享，并在 lifespan 关闭时释放连接。
+"""
+
+from __future__ import annotations
+
+from src.config import settings
+from src.infrastructure.adapters.client_registry import ClientRegistry
+
+_client_registry: ClientRegistry | None = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """获取进程级客户端注册表（首次调用时按配置创建）"""
+    global _client_registry
+
+    if _client_registry is None:
+        _client_registry = ClientRegistry(
+            max_connections=settings.http_pool_max_connections,
+            max_keepalive_connections=settings.http_pool_max_keepalive_connections,
+            keepalive_expiry=settings.http_pool_keepalive_expiry_seconds,
+            # 仅在安装了 h2 时启用 HTTP/2
+            http2=None if settings.http_pool_http2 else False,
+        )
+    return _client_registry
+
+
+async def shutdown_client_registry() -> None:
+    """关闭所有共享客户端并释放连接"""
+    global _client_registry
+
+    if _client_registry is not None:
+        await _client_registry.aclose()
+    _client_registry = None
@@ -0,0 +1,98 @@
+"""LLM 依赖
+
+提供进程级 LLM 响应缓存与客户端限流器，供 LLM 节点执行器与 LLM Adapter 共享。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from src.config import settings
+from src.infrastructure.adapters.llm_rate_limiter import LLMRateLimiter, RateLimits
+from src.infrastructure.adapters.llm_response_cache import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+_llm_response_cache: LLMResponseCache | None = None
+_llm_rate_limiter: LLMRateLimiter | None = None
+
+
+def get_llm_response_cache() -> LLMResponseCache | None:
+    """获取进程级 LLM 响应缓存（llm_response_cache_enabled 关闭时返回 None）"""
+    global _llm_response_cache
+
+    if not settings.llm_response_cache_enabled:
+        return None
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache(
+            db_path=settings.llm_response_cache_path or None,
+            max_memory_entries=settings.llm_response_cache_memory_entries,
+            default_ttl_seconds=settings.llm_response_cache_ttl_seconds,
+        )
+    return _llm_response_cache
+
+
+def get_llm_cache_metrics() -> dict:
+    """获取 LLM 响应缓存指标（命中、未命中、绕过、节省的 token）"""
+    cache = get_llm_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+
+def get_llm_rate_limiter() -> LLMRateLimiter | None:
+    """获取进程级 LLM 限流器（llm_rate_limit_enabled 关闭时返回 None）"""
+    global _llm_rate_limiter
+
+    if not settings.llm_rate_limit_enabled:
+        return None
+    if _llm_rate_limiter is None:
+        _llm_rate_limiter = LLMRateLimiter(
+            RateLimits(
+                requests_per_minute=settings.llm_rate_limit_requests_per_minute,
+                tokens_per_minute=settings.llm_rate_limit_tokens_per_minute,
+                max_concurrency=settings.llm_rate_limit_max_concurrency,
+            ),
+            max_retries=settings.llm_rate_limit_max_retries,
+        )
+    return _llm_rate_limiter
+
+
+def configure_llm_rate_limiter(session_factory: Callable[[], Any]) -> int:
+    """从已启用的 LLMProvider 记录加载 config["rate_limits"]，返回加载的提供商数"""
+    limiter = get_llm_rate_limiter()
+    if limiter is None:
+        return 0
+
+    from src.infrastructure.database.repositories.llm_provider_repository import (
+        SQLAlchemyLLMProviderRepository,
+    )
+
+    session = session_factory()
+    try:
+        providers = SQLAlchemyLLMProviderRepository(session).find_enabled()
+    except Exception as exc:  # pragma: no cover - 表不存在时使用默认限流
+        logger.warning(f"Failed to load LLM provider rate limits: {exc}")
+        return 0
+    finally:
+        session.close()
+    return limiter.configure_providers(providers)
+
+
+def get_llm_rate_limit_metrics() -> dict:
+    """获取 LLM 限流指标（各 provider/model 的并发上限、排队数、429 次数）"""
+    limiter = get_llm_rate_limiter()
+    if limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **limiter.get_stats()}
+
+
+def shutdown_llm_response_cache() -> None:
+    """关闭 LLM 响应缓存的 SQLite 连接"""
+    global _llm_response_cache
+
+    if _llm_response_cache is not None:
+        _llm_response_cache.close()
+    _llm_response_cache = None
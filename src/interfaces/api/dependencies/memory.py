@@ -9,35 +9,129 @@ Author: Claude Code
 Date: 2025-12-17 (P1-1 Fix: Ports/Adapters Compliance)
 """
 
+from collections.abc import Callable
 from functools import lru_cache
 from typing import Annotated
 
 from fastapi import Depends
+from sqlalchemy.orm import Session
 
 from src.application.services.composite_memory_service import CompositeMemoryService
+from src.config import settings
+from src.domain.entities.chat_message import ChatMessage
+from src.domain.ports.memory_cache import MemoryCache
 from src.domain.ports.memory_service import MemoryServicePort
 from src.infrastructure.database.engine import get_db_session
 from src.infrastructure.memory.database_memory_store import DatabaseMemoryStore
 from src.infrastructure.memory.in_memory_cache import InMemoryCache
+from src.infrastructure.memory.sqlite_shared_cache import SQLiteSharedMemoryCache
 from src.infrastructure.memory.tfidf_compressor import TFIDFCompressor
+from src.infrastructure.memory.write_behind_journal import WriteBehindJournal
 from src.interfaces.api.container import ApiContainer
 from src.interfaces.api.dependencies.container import get_container
 
 
 @lru_cache
-def get_global_memory_cache() -> InMemoryCache:
+def get_global_memory_cache() -> MemoryCache:
     """
     获取全局单例缓存
 
     Returns:
-        InMemoryCache 实例（全局共享）
+        MemoryCache 实现（全局共享）：
+        - memory_cache_backend="memory"：进程内 InMemoryCache
+        - memory_cache_backend="sqlite"：同主机所有 worker 共享的 SQLiteSharedMemoryCache
 
     Configuration:
         - TTL: 15 分钟
-        - 最大 workflow 数: 1000
+        - 最大 workflow 数: 1000（仅进程内缓存）
         - 每个 workflow 最大消息数: 50
+        - 字节预算: settings.memory_cache_max_bytes
     """
-    return InMemoryCache(ttl_seconds=900, max_workflows=1000, max_messages_per_workflow=50)
+    if settings.memory_cache_backend == "sqlite":
+        return SQLiteSharedMemoryCache(
+            settings.memory_cache_path,
+            ttl_seconds=900,
+            max_messages_per_workflow=50,
+            max_bytes=settings.memory_cache_max_bytes,
+        )
+    return InMemoryCache(
+        ttl_seconds=900,
+        max_workflows=1000,
+        max_messages_per_workflow=50,
+        max_bytes=settings.memory_cache_max_bytes,
+    )
+
+
+@lru_cache
+def get_global_tfidf_compressor() -> TFIDFCompressor:
+    """
+    获取全局单例压缩器
+
+    压缩器按 workflow 维护增量 TF-IDF 统计，需要跨请求共享才能复用。
+
+    Returns:
+        TFIDFCompressor 实例（全局共享）
+    """
+    return TFIDFCompressor(max_workflows=1000)
+
+
+_memory_journal: WriteBehindJournal | None = None
+
+
+def start_memory_journal(
+    container: ApiContainer, session_factory: Callable[[], Session]
+) -> WriteBehindJournal | None:
+    """
+    启动写后日志（应用启动时调用，重放上次未落库的消息）
+
+    未开启 settings.memory_write_behind 时返回 None，内存服务保持同步写库。
+
+    Args:
+        container: API 容器（提供 ChatMessage 仓储）
+        session_factory: Session 工厂，每批刷库使用独立事务
+
+    Returns:
+        WriteBehindJournal 实例或 None
+    """
+    global _memory_journal
+
+    if not settings.memory_write_behind or _memory_journal is not None:
+        return _memory_journal
+
+    def write_batch(messages: list[ChatMessage]) -> None:
+        session = session_factory()
+        try:
+            DatabaseMemoryStore(container.chat_message_repository(session)).append_many(messages)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    _memory_journal = WriteBehindJournal(
+        settings.memory_journal_dir,
+        write_batch,
+        batch_size=settings.memory_write_behind_batch_size,
+        flush_interval=settings.memory_write_behind_interval_ms / 1000,
+        fsync=settings.memory_journal_fsync,
+    )
+    _memory_journal.start()
+    return _memory_journal
+
+
+def get_memory_journal() -> WriteBehindJournal | None:
+    """获取已启动的写后日志（未启用写后模式时为 None）"""
+    return _memory_journal
+
+
+def shutdown_memory_journal() -> None:
+    """停止写后日志：刷完剩余消息（失败的留在日志中，下次启动重放）"""
+    global _memory_journal
+
+    if _memory_journal is not None:
+        _memory_journal.stop()
+    _memory_journal = None
 
 
 def _create_memory_service_impl(session=None, *, container: ApiContainer) -> CompositeMemoryService:
@@ -57,10 +151,14 @@ def _create_memory_service_impl(session=None, *, container: ApiContainer) -> Com
     repository = container.chat_message_repository(session)
     db_store = DatabaseMemoryStore(repository)
     cache = get_global_memory_cache()
-    compressor = TFIDFCompressor()
+    compressor = get_global_tfidf_compressor()
 
     return CompositeMemoryService(
-        db_store=db_store, cache=cache, compressor=compressor, max_context_tokens=4000
+        db_store=db_store,
+        cache=cache,
+        compressor=compressor,
+        max_context_tokens=4000,
+        journal=get_memory_journal(),
     )
 
 
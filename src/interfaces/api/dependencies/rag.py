@@ -16,14 +16,52 @@ from src.config import settings
 from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
 from src.domain.knowledge_base.ports.retriever_service import RetrieverService
 from src.domain.ports.rag_service_port import RAGServicePort
+from src.infrastructure.knowledge_base.embedding_cache import EmbeddingCache
+from src.infrastructure.knowledge_base.hybrid_retriever_service import HybridRetrieverService
 from src.infrastructure.knowledge_base.rag_config_manager import RAGConfigManager
+from src.infrastructure.knowledge_base.rerankers import create_reranker
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
 from src.infrastructure.knowledge_base.sqlite_knowledge_repository import SQLiteKnowledgeRepository
+from src.infrastructure.knowledge_base.sqlite_retriever_service import (
+    SQLiteRetrieverService,
+    create_embeddings,
+)
 
 logger = logging.getLogger(__name__)
 
 # 全局RAG服务实例
 _rag_service: RAGService | None = None
 _initialized = False
+_embedding_cache: EmbeddingCache | None = None
+_retrieval_cache: RetrievalCache | None = None
+
+
+def _get_embedding_cache() -> EmbeddingCache | None:
+    """获取进程级嵌入缓存（rag_cache_enabled 关闭时返回 None）"""
+    global _embedding_cache
+
+    if not settings.rag_cache_enabled:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            db_path=settings.embedding_cache_path or None,
+            max_memory_entries=settings.embedding_cache_memory_entries,
+        )
+    return _embedding_cache
+
+
+def _get_retrieval_cache() -> RetrievalCache | None:
+    """获取进程级检索结果缓存（rag_cache_enabled 关闭时返回 None）"""
+    global _retrieval_cache
+
+    if not settings.rag_cache_enabled:
+        return None
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache(
+            ttl_seconds=settings.rag_cache_ttl,
+            max_entries=settings.rag_retrieval_cache_entries,
+        )
+    return _retrieval_cache
 
 
 async def _create_rag_service_impl() -> RAGService:
@@ -74,7 +112,11 @@ async def _create_rag_service_impl() -> RAGService:
                     if vector_type == "sqlite"
                     else settings.sqlite_vector_db_path
                 )
-                knowledge_repository = SQLiteKnowledgeRepository(db_path=db_path)
+                knowledge_repository = SQLiteKnowledgeRepository(
+                    db_path=db_path,
+                    ann_min_vectors=settings.rag_ann_min_vectors,
+                    ann_nprobe=settings.rag_ann_nprobe,
+                )
             else:
                 # 对于其他向量存储类型，创建相应的仓储
                 # 这里可以扩展为QdrantRepository, FAISSRepository等
@@ -99,17 +141,60 @@ async def _create_rag_service_impl() -> RAGService:
                     chroma_path=vector_config["path"],
                     chunk_size=settings.rag_chunk_size,
                     chunk_overlap=settings.rag_chunk_overlap,
+                    embedding_batch_size=embedding_config.get("batch_size", 64),
+                    embedding_cache=_get_embedding_cache(),
+                    embedding_dimension=embedding_config.get("dimension", 0),
+                    retrieval_cache=_get_retrieval_cache(),
+                    reranker=create_reranker(
+                        settings.rag_reranker,
+                        mmr_lambda=settings.rag_mmr_lambda,
+                        model_name=settings.rag_cross_encoder_model,
+                    ),
                 )
+                if settings.rag_hybrid_enabled:
+                    retriever_service = HybridRetrieverService(
+                        base=retriever_service,
+                        knowledge_repository=knowledge_repository,
+                        rrf_k=settings.rag_rrf_k,
+                        prefilter_min_chunks=settings.rag_lexical_prefilter_min_chunks,
+                    )
             elif vector_type == "sqlite":
-                # 对于SQLite向量存储，使用SQLite仓储的自定义检索方法
-                # 这里可以实现SQLiteVectorRetrieverService
-                retriever_service = NoOpRetrieverService()
+                # 向量存放在 SQLite 仓储的本地向量索引中，检索直接走仓储
+                retriever_service = SQLiteRetrieverService(
+                    knowledge_repository=knowledge_repository,
+                    embeddings=create_embeddings(
+                        embedding_config.get("model", "text-embedding-3-small"),
+                        api_key=embedding_config.get("api_key"),
+                        base_url=embedding_config.get("base_url"),
+                    ),
+                    model_name=embedding_config.get("model", "text-embedding-3-small"),
+                    chunk_size=settings.rag_chunk_size,
+                    chunk_overlap=settings.rag_chunk_overlap,
+                    embedding_batch_size=embedding_config.get("batch_size", 64),
+                    embedding_cache=_get_embedding_cache(),
+                    embedding_dimension=embedding_config.get("dimension", 0),
+                    retrieval_cache=_get_retrieval_cache(),
+                    reranker=create_reranker(
+                        settings.rag_reranker,
+                        mmr_lambda=settings.rag_mmr_lambda,
+                        model_name=settings.rag_cross_encoder_model,
+                    ),
+                )
+                if settings.rag_hybrid_enabled:
+                    retriever_service = HybridRetrieverService(
+                        base=retriever_service,
+                        knowledge_repository=knowledge_repository,
+                        rrf_k=settings.rag_rrf_k,
+                        prefilter_min_chunks=settings.rag_lexical_prefilter_min_chunks,
+                    )
             else:
                 retriever_service = NoOpRetrieverService()
 
             # 创建RAG服务
             _rag_service = RAGService(
-                knowledge_repository=knowledge_repository, retriever_service=retriever_service
+                knowledge_repository=knowledge_repository,
+                retriever_service=retriever_service,
+                retrieval_cache=_get_retrieval_cache(),
             )
 
             _initialized = True
@@ -203,6 +288,30 @@ def is_rag_enabled() -> bool:
     return (settings.kb_global_enabled or settings.kb_per_workflow_enabled) and _initialized
 
 
+async def shutdown_rag_service() -> None:
+    """释放RAG服务持有的资源（知识库连接池、嵌入缓存连接）"""
+    global _rag_service, _initialized, _embedding_cache
+
+    if _rag_service is not None:
+        await _rag_service.repository.close()
+    if _embedding_cache is not None:
+        _embedding_cache.close()
+    _rag_service = None
+    _embedding_cache = None
+    _initialized = False
+
+
+def get_rag_metrics() -> dict:
+    """获取RAG缓存与连接池指标"""
+    repository = _rag_service.repository if _rag_service is not None else None
+    pool_stats = getattr(repository, "get_pool_stats", None)
+    return {
+        "embedding_cache": _embedding_cache.get_stats() if _embedding_cache is not None else None,
+        "retrieval_cache": _retrieval_cache.get_stats() if _retrieval_cache is not None else None,
+        "knowledge_repository_pool": pool_stats() if pool_stats is not None else None,
+    }
+
+
 def get_rag_config() -> dict:
     """获取RAG配置信息"""
     vector_store = RAGConfigManager.get_vector_store_config()
@@ -225,6 +334,8 @@ def get_rag_config() -> dict:
             "auto_indexing": settings.kb_auto_indexing,
             "cache": settings.rag_cache_enabled,
             "metrics": settings.rag_metrics_enabled,
+            "hybrid_retrieval": settings.rag_hybrid_enabled,
+            "reranker": settings.rag_reranker,
         },
     }
 
@@ -26,6 +26,15 @@ from src.infrastructure.definitions.yaml_node_definition_source import YamlNodeD
 from src.infrastructure.executors import create_executor_registry
 from src.interfaces.api.container import ApiContainer
 from src.interfaces.api.dependencies.agents import set_event_bus
+from src.interfaces.api.dependencies.clients import get_client_registry, shutdown_client_registry
+from src.interfaces.api.dependencies.llm import (
+    configure_llm_rate_limiter,
+    get_llm_rate_limiter,
+    get_llm_response_cache,
+    shutdown_llm_response_cache,
+)
+from src.interfaces.api.dependencies.memory import shutdown_memory_journal, start_memory_journal
+from src.interfaces.api.dependencies.rag import shutdown_rag_service
 from src.interfaces.api.dependencies.scheduler import (
     clear_scheduler_service,
     set_scheduler_service,
@@ -300,10 +309,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as exc:  # pragma: no cover - best effort startup helper
         print(f"[DB] 数据库初始化失败（请运行 Alembic 迁移）: {exc}")
 
+    # LLM 客户端限流：加载各提供商的 rate_limits 配置
+    if configure_llm_rate_limiter(_create_session):
+        print("[LLM] 已加载提供商限流配置")
+
     executor_registry = create_executor_registry(
         openai_api_key=settings.openai_api_key or None,
         anthropic_api_key=getattr(settings, "anthropic_api_key", None),
         session_factory=_create_session,
+        llm_response_cache=get_llm_response_cache(),
+        client_registry=get_client_registry(),
+        llm_rate_limiter=get_llm_rate_limiter(),
     )
 
     catalog = CapabilityCatalogService(
@@ -410,6 +426,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.event_recorder = event_recorder
     print("[RECORDER] 异步事件录制器已启动")
 
+    # 对话记忆写后日志（可选）：重放上次未落库的消息并启动后台批量刷库
+    memory_journal = start_memory_journal(app.state.container, _create_session)
+    if memory_journal is not None:
+        print(f"[MEMORY] 写后日志已启动: {memory_journal.get_stats()}")
+
     try:
         yield
     finally:
@@ -431,6 +452,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         if _scheduler_service is not None:
             _scheduler_service.stop()
         clear_scheduler_service()
+        # 刷完对话记忆写后日志
+        shutdown_memory_journal()
+        # 关闭LLM响应缓存
+        shutdown_llm_response_cache()
+        # 关闭共享LLM/HTTP客户端连接池
+        await shutdown_client_registry()
+        # 关闭RAG知识库连接池
+        await shutdown_rag_service()
         # Avoid emojis so Windows consoles (GBK codepage) don't raise UnicodeEncodeError.
         print(f"[SHUTDOWN] {settings.app_name} 关闭中...")
 
@@ -3,6 +3,9 @@
 定义 LLMProvider 相关的 API 端点：
 - POST /api/llm-providers - 注册提供商
 - GET /api/llm-providers - 列出所有提供商
+- GET /api/llm-providers/cache/metrics - LLM 响应缓存指标
+- GET /api/llm-providers/rate-limits/metrics - LLM 客户端限流指标
+- GET /api/llm-providers/prompt-prefix/metrics - 提示词可缓存前缀指标
 - GET /api/llm-providers/{provider_id} - 获取提供商详情
 - PUT /api/llm-providers/{provider_id} - 更新提供商
 - DELETE /api/llm-providers/{provider_id} - 删除提供商
@@ -23,9 +26,14 @@ from sqlalchemy.orm import Session
 from src.domain.entities.llm_provider import LLMProvider
 from src.domain.exceptions import DomainError, NotFoundError
 from src.domain.ports.llm_provider_repository import LLMProviderRepository
+from src.domain.services.stable_prompt import get_prompt_prefix_metrics
 from src.infrastructure.database.engine import get_db_session
 from src.interfaces.api.container import ApiContainer
 from src.interfaces.api.dependencies.container import get_container
+from src.interfaces.api.dependencies.llm import (
+    get_llm_cache_metrics,
+    get_llm_rate_limit_metrics,
+)
 from src.interfaces.api.dto import (
     DisableLLMProviderRequest,
     EnableLLMProviderRequest,
@@ -157,6 +165,36 @@ def list_llm_providers(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
 
 
+@router.get("/cache/metrics")
+def llm_cache_metrics() -> dict:
+    """获取 LLM 响应缓存指标
+
+    返回：
+        命中 / 未命中 / 绕过次数、命中率、节省的 token 数；缓存关闭时仅返回 enabled=False
+    """
+    return get_llm_cache_metrics()
+
+
+@router.get("/rate-limits/metrics")
+def llm_rate_limit_metrics() -> dict:
+    """获取 LLM 客户端限流指标
+
+    返回：
+        各 provider/model 的当前并发上限、在途 / 排队请求数、429 次数；限流关闭时仅返回 enabled=False
+    """
+    return get_llm_rate_limit_metrics()
+
+
+@router.get("/prompt-prefix/metrics")
+def prompt_prefix_metrics() -> dict:
+    """获取提示词可缓存前缀指标
+
+    返回：
+        各提示词来源的请求数、平均可缓存前缀长度与占比、前缀变化（缓存失效）次数
+    """
+    return get_prompt_prefix_metrics().get_stats()
+
+
 @router.get("/{provider_id}", response_model=LLMProviderResponse)
 def get_llm_provider(
     provider_id: str,
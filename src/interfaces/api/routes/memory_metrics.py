@@ -23,6 +23,10 @@ class MemoryMetricsResponse(BaseModel):
     fallback_count: int
     compression_ratio: float
     avg_fallback_time_ms: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_evictions: int = 0
+    cache_bytes: int = 0
     last_updated: str
 
     class Config:
@@ -32,6 +36,10 @@ class MemoryMetricsResponse(BaseModel):
                 "fallback_count": 10,
                 "compression_ratio": 0.6,
                 "avg_fallback_time_ms": 125.5,
+                "cache_hits": 30,
+                "cache_misses": 10,
+                "cache_evictions": 2,
+                "cache_bytes": 524288,
                 "last_updated": "2025-11-30T10:30:00Z",
             }
         }
@@ -56,6 +64,9 @@ async def get_memory_metrics(
         - fallback_count: 回溯到数据库的次数
         - compression_ratio: 平均压缩比
         - avg_fallback_time_ms: 平均回溯耗时（毫秒）
+        - cache_hits / cache_misses: 缓存命中/未命中次数
+        - cache_evictions: 因数量/字节预算被淘汰的缓存条目数
+        - cache_bytes: 缓存当前估算内存占用（字节）
     """
     metrics = memory_service.get_metrics()
 
@@ -64,6 +75,10 @@ async def get_memory_metrics(
         fallback_count=metrics.fallback_count,
         compression_ratio=metrics.compression_ratio,
         avg_fallback_time_ms=metrics.avg_fallback_time_ms,
+        cache_hits=getattr(metrics, "cache_hits", 0),
+        cache_misses=getattr(metrics, "cache_misses", 0),
+        cache_evictions=getattr(metrics, "cache_evictions", 0),
+        cache_bytes=getattr(metrics, "cache_bytes", 0),
         last_updated=metrics.last_updated.isoformat(),
     )
 
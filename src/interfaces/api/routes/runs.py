@@ -456,6 +456,8 @@ def create_run(
                     created_at=datetime.now(),
                 )
             )
+            # SessionLocal 关闭了 autoflush：先 flush，repo.save() 才能查到该 Agent 而不会重复插入
+            db.flush()
             run.agent_id = agent_id
 
         repo.save(run)
@@ -46,6 +46,7 @@ from src.interfaces.api.container import ApiContainer
 from src.interfaces.api.dependencies.agents import get_event_bus
 from src.interfaces.api.dependencies.container import get_container
 from src.interfaces.api.dependencies.current_user import get_current_user_optional
+from src.interfaces.api.dependencies.llm import get_llm_rate_limiter
 from src.interfaces.api.dependencies.rag import get_rag_service
 from src.interfaces.api.dto.workflow_dto import (
     ChatCreateRequest,
@@ -218,6 +219,7 @@ def get_workflow_chat_llm() -> WorkflowChatLLM:
             model=settings.openai_model,
             base_url=settings.openai_base_url,
             temperature=0.0,
+            rate_limiter=get_llm_rate_limiter(),
         )
     except ValueError as exc:
         raise HTTPException(
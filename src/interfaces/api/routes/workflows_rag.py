@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends
 from src.interfaces.api.dependencies.rag import (
     check_rag_health,
     get_rag_config,
+    get_rag_metrics,
     get_rag_service,
     is_rag_enabled,
 )
@@ -28,6 +29,13 @@ async def rag_config() -> dict:
     return get_rag_config()
 
 
+@router.get("/metrics")
+async def rag_metrics() -> dict:
+    """Return RAG cache metrics (hits, misses, hit rate)."""
+
+    return get_rag_metrics()
+
+
 @router.get("/enabled")
 async def rag_enabled() -> dict[str, bool]:
     """Return whether RAG features are enabled."""
@@ -23,6 +23,7 @@ from src.domain.exceptions import DomainError
 from src.domain.ports.run_repository import RunRepository
 from src.domain.ports.workflow_repository import WorkflowRepository
 from src.domain.ports.workflow_run_execution_entry import WorkflowRunExecutionEntryPort
+from src.infrastructure.adapters.llm_rate_limiter import LLMPriority, llm_priority
 from src.infrastructure.database.models import AgentModel
 from src.infrastructure.database.repositories.workflow_repository import (
     SQLAlchemyWorkflowRepository,
@@ -52,8 +53,9 @@ class WorkflowExecutorAdapter:
         session_factory: Callable[[], Session],
         executor_registry: Any | None = None,
         *,
-        workflow_run_execution_entry_factory: Callable[[Session], WorkflowRunExecutionEntryPort]
-        | None = None,
+        workflow_run_execution_entry_factory: (
+            Callable[[Session], WorkflowRunExecutionEntryPort] | None
+        ) = None,
         workflow_repository_factory: Callable[[Session], WorkflowRepository] | None = None,
         run_repository_factory: Callable[[Session], RunRepository] | None = None,
     ):
@@ -101,16 +103,20 @@ class WorkflowExecutorAdapter:
     ) -> dict[str, Any]:
         """执行工作流（非流式）
 
-        实现 WorkflowExecutorPort.execute 接口
+        实现 WorkflowExecutorPort.execute 接口；调度任务的 LLM 调用走最低优先级通道，
+        不与交互式请求争抢限流配额
         """
-        if not settings.disable_run_persistence:
-            return await self._execute_via_run_entry(workflow_id=workflow_id, input_data=input_data)
-        self._audit_run_persistence_rollback(workflow_id=workflow_id, mode="execute")
-        with self._create_facade() as facade:
-            return await facade.execute(
-                workflow_id=workflow_id,
-                input_data=input_data,
-            )
+        with llm_priority(LLMPriority.SCHEDULED):
+            if not settings.disable_run_persistence:
+                return await self._execute_via_run_entry(
+                    workflow_id=workflow_id, input_data=input_data
+                )
+            self._audit_run_persistence_rollback(workflow_id=workflow_id, mode="execute")
+            with self._create_facade() as facade:
+                return await facade.execute(
+                    workflow_id=workflow_id,
+                    input_data=input_data,
+                )
 
     async def execute_workflow(self, workflow_id: str, input_data: Any = None) -> dict[str, Any]:
         """Legacy-compatible alias used by scheduler/tests."""
@@ -0,0 +1,80 @@
+"""近似最近邻索引基准测试
+
+测试目标：
+1. IVF-PQ 检索的 recall@10（相对精确检索）不低于 0.95
+2. 单向量常驻内存相对 float32 原始向量下降 8-32 倍
+3. 对比 IVF-PQ 与精确检索的单次查询延迟
+
+运行命令：
+    pytest tests/performance/test_ann_index_benchmark.py -v -s
+
+数据为带簇结构、低内在维度的合成向量（接近真实嵌入分布）；
+纯随机高维噪声没有近邻结构，任何近似索引在其上都没有意义。
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.infrastructure.knowledge_base.ivfpq_index import IVFPQIndex
+
+N_VECTORS = 30_000
+DIM = 256
+N_QUERIES = 100
+TOP_K = 10
+
+
+def synthetic_embeddings(n: int, dim: int, seed: int) -> np.ndarray:
+    """生成带簇结构的归一化向量"""
+    fixed = np.random.default_rng(7)
+    latent_dim = 32
+    centers = fixed.standard_normal((64, latent_dim)).astype(np.float32)
+    basis = fixed.standard_normal((latent_dim, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    latent = centers[rng.integers(0, 64, n)] + 0.6 * rng.standard_normal((n, latent_dim))
+    vectors = (latent @ basis + 0.1 * rng.standard_normal((n, dim))).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestIVFPQBenchmark:
+    """IVF-PQ 召回率/延迟/内存基准"""
+
+    @pytest.fixture(scope="class")
+    def dataset(self):
+        vectors = synthetic_embeddings(N_VECTORS, DIM, seed=0)
+        queries = synthetic_embeddings(N_QUERIES, DIM, seed=1)
+        start = time.perf_counter()
+        index = IVFPQIndex.train(vectors, nlist=int(np.sqrt(N_VECTORS)))
+        train_seconds = time.perf_counter() - start
+        return vectors, queries, index, train_seconds
+
+    @pytest.mark.parametrize("nprobe", [8, 16])
+    def test_recall_and_latency_against_exact_search(self, dataset, nprobe):
+        vectors, queries, index, train_seconds = dataset
+
+        exact_times, ann_times, recalls = [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            scores = vectors @ query
+            top = np.argpartition(-scores, TOP_K)[:TOP_K]
+            exact_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rows, _ = index.search(query, TOP_K, nprobe=nprobe, refine=vectors)
+            ann_times.append(time.perf_counter() - start)
+
+            recalls.append(len(set(rows.tolist()) & set(top.tolist())) / TOP_K)
+
+        recall = float(np.mean(recalls))
+        compression = DIM * 4 / index.bytes_per_vector
+
+        print(f"\n=== IVF-PQ {N_VECTORS}x{DIM}, nlist={index.nlist}, nprobe={nprobe} ===")
+        print(f"  训练耗时: {train_seconds:.2f}s")
+        print(f"  recall@{TOP_K}: {recall:.3f}")
+        print(f"  精确检索: {np.mean(exact_times) * 1000:.3f}ms/查询")
+        print(f"  IVF-PQ:   {np.mean(ann_times) * 1000:.3f}ms/查询")
+        print(f"  字节/向量: {index.bytes_per_vector} (压缩 {compression:.1f}x)")
+
+        assert recall >= 0.95
+        assert 8 <= compression <= 32
@@ -0,0 +1,161 @@
+"""流式接口压测脚本测试
+
+覆盖：
+- ASGI 传输层逐块交付响应（TTFB 早于流结束），SSE 事件计数与间隔
+- error 事件 / HTTP 错误计为失败样本
+- 阈值与 baseline 回归判定、Markdown 报告
+
+运行命令：
+    pytest tests/performance/test_streaming_load_harness.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from scripts.load_test_streams import (
+    ASGIStreamTransport,
+    SSEEventSplitter,
+    StreamRequest,
+    build_report,
+    check_regressions,
+    check_thresholds,
+    measure_stream,
+    percentile,
+    render_markdown,
+    run_scenario,
+)
+
+
+def _create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/stream")
+    async def stream(body: dict):
+        async def events():
+            for index in range(body.get("events", 3)):
+                if index:
+                    await asyncio.sleep(body.get("gap", 0.0))
+                yield f'data: {{"type": "{body.get("type", "progress")}", "i": {index}}}\n\n'
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class FixedScenario:
+    name = "fixed"
+
+    def __init__(self, body: dict):
+        self.body = body
+        self.prepared = 0
+
+    async def setup(self, transport):
+        return None
+
+    async def prepare(self, transport, index):
+        self.prepared += 1
+        return StreamRequest("POST", "/stream", self.body)
+
+
+@pytest.mark.asyncio
+async def test_asgi_transport_delivers_events_before_stream_ends():
+    transport = ASGIStreamTransport(_create_app())
+
+    sample = await measure_stream(
+        transport, StreamRequest("POST", "/stream", {"events": 3, "gap": 0.05})
+    )
+    await transport.aclose()
+
+    assert sample.ok
+    assert sample.events == 3
+    assert sample.ttfb_ms < sample.duration_ms - 80
+    assert len(sample.inter_arrival_ms) == 2
+    assert min(sample.inter_arrival_ms) >= 40
+
+
+@pytest.mark.asyncio
+async def test_error_events_and_http_errors_are_failed_samples():
+    transport = ASGIStreamTransport(_create_app())
+
+    error_sample = await measure_stream(
+        transport, StreamRequest("POST", "/stream", {"events": 1, "type": "workflow_error"})
+    )
+    missing_sample = await measure_stream(transport, StreamRequest("POST", "/missing", {}))
+    await transport.aclose()
+
+    assert not error_sample.ok
+    assert not missing_sample.ok
+    assert missing_sample.error == "HTTP 404"
+
+
+@pytest.mark.asyncio
+async def test_run_scenario_excludes_warmup_from_summary():
+    transport = ASGIStreamTransport(_create_app())
+    scenario = FixedScenario({"events": 2})
+
+    summary = await run_scenario(transport, scenario, concurrency=4, requests=10, warmup=3)
+    await transport.aclose()
+
+    assert scenario.prepared == 13
+    assert summary["requests"] == 10
+    assert summary["error_rate"] == 0.0
+    assert summary["events_per_stream"] == 2.0
+
+
+def test_sse_splitter_handles_events_split_across_chunks():
+    splitter = SSEEventSplitter()
+
+    assert splitter.feed(b'data: {"a": 1}\r\n\r\ndata: {"b"') == ['data: {"a": 1}']
+    assert splitter.feed(b": 2}\n\n") == ['data: {"b": 2}']
+
+
+def test_percentile_interpolates_between_ranks():
+    assert percentile([10, 20, 30, 40], 50) == pytest.approx(25)
+    assert percentile([5], 99) == 5
+    assert percentile([], 99) == 0.0
+
+
+def _summary(ttfb_p99: float, error_rate: float = 0.0) -> dict:
+    distribution = {"p50": 10.0, "p95": ttfb_p99, "p99": ttfb_p99, "max": ttfb_p99}
+    return {
+        "requests": 10,
+        "concurrency": 2,
+        "errors": 0,
+        "error_rate": error_rate,
+        "throughput_rps": 5.0,
+        "ttfb_ms": distribution,
+        "duration_ms": distribution,
+        "inter_arrival_ms": distribution,
+        "events_per_stream": 3.0,
+        "error_samples": {},
+    }
+
+
+def test_thresholds_and_regressions_gate_the_report():
+    current = {"execute_stream": _summary(ttfb_p99=130.0, error_rate=0.1)}
+    baseline = {"execute_stream": _summary(ttfb_p99=100.0)}
+
+    violations = check_thresholds(
+        current, {"execute_stream": {"ttfb_ms.p99": 120, "duration_ms.p42": 1}}
+    )
+    violations += check_regressions(current, baseline, max_regression=0.2)
+    report = build_report(current, config={"target": "in-process"}, violations=violations)
+
+    assert any("ttfb_ms.p99=130 exceeds threshold 120" in v for v in violations)
+    assert any("unknown metric 'duration_ms.p42'" in v for v in violations)
+    assert any("ttfb_ms.p99 regressed 100 -> 130" in v for v in violations)
+    assert any("error_rate regressed" in v for v in violations)
+    assert not report["passed"]
+    markdown = render_markdown(report)
+    assert "| execute_stream | 10 | 2 | 10.00 |" in markdown
+    assert "- FAIL:" in markdown
+
+
+def test_small_absolute_changes_are_not_regressions():
+    current = {"chat_create_stream": _summary(ttfb_p99=3.0)}
+    baseline = {"chat_create_stream": _summary(ttfb_p99=1.0)}
+
+    assert check_regressions(current, baseline, max_regression=0.2, min_delta_ms=5.0) == []
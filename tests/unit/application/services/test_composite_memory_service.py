@@ -58,17 +58,15 @@ class TestCompositeMemoryService:
         mock_db_store.append.assert_called_once_with(message)
 
     def test_append_writes_to_cache_after_db_success(self, service, mock_db_store, mock_cache):
-        """测试：DB 成功后应该写入 Cache"""
+        """测试：DB 成功后应该 O(1) 追加到 Cache（不读取、不整体重写）"""
         message = ChatMessage.create("wf_123", "Hello", is_user=True)
 
-        # Mock cache.get 返回现有消息
-        mock_cache.get.return_value = []
-
         service.append(message)
 
-        # 验证调用了 Cache
-        mock_cache.get.assert_called_once_with("wf_123")
-        mock_cache.put.assert_called_once()
+        # 验证调用了 Cache 追加
+        mock_cache.append.assert_called_once_with("wf_123", message)
+        mock_cache.get.assert_not_called()
+        mock_cache.put.assert_not_called()
 
     def test_append_raises_exception_when_db_fails(self, service, mock_db_store):
         """测试：DB 写入失败时应该抛出异常"""
@@ -87,11 +85,8 @@ class TestCompositeMemoryService:
         """测试：Cache 写入失败时应该标记失效"""
         message = ChatMessage.create("wf_123", "Hello", is_user=True)
 
-        # Mock cache.get 返回空
-        mock_cache.get.return_value = []
-
-        # Mock cache.put 失败
-        mock_cache.put.side_effect = Exception("Cache error")
+        # Mock cache.append 失败
+        mock_cache.append.side_effect = Exception("Cache error")
 
         # 应该不抛异常（Cache 失败不影响主流程）
         service.append(message)
@@ -288,3 +283,89 @@ class TestCompositeMemoryService:
 
         # 压缩比应该是 10/20 = 0.5
         assert 0.4 < metrics.compression_ratio < 0.6
+
+
+class TestCompositeMemoryServiceWriteBehind:
+    """写后模式：append 只写日志，读取合并未落库的消息"""
+
+    @pytest.fixture
+    def mock_db_store(self):
+        return Mock()
+
+    @pytest.fixture
+    def mock_cache(self):
+        return Mock()
+
+    @pytest.fixture
+    def mock_journal(self):
+        journal = Mock()
+        journal.pending.return_value = []
+        return journal
+
+    @pytest.fixture
+    def service(self, mock_db_store, mock_cache, mock_journal):
+        from src.application.services.composite_memory_service import CompositeMemoryService
+
+        compressor = Mock()
+        compressor.compress.side_effect = lambda messages, **_: messages
+        return CompositeMemoryService(
+            db_store=mock_db_store, cache=mock_cache, compressor=compressor, journal=mock_journal
+        )
+
+    def test_append_writes_journal_instead_of_db(
+        self, service, mock_db_store, mock_cache, mock_journal
+    ):
+        """测试：写后模式下 append 不同步写库"""
+        message = ChatMessage.create("wf_123", "Hello", is_user=True)
+
+        service.append(message)
+
+        mock_journal.append.assert_called_once_with(message)
+        mock_db_store.append.assert_not_called()
+        mock_cache.append.assert_called_once_with("wf_123", message)
+
+    def test_load_recent_merges_pending_messages(
+        self, service, mock_db_store, mock_cache, mock_journal
+    ):
+        """测试：缓存未命中时合并未落库消息，并按 id 去重"""
+        stored = [ChatMessage.create("wf_123", f"stored {i}", is_user=True) for i in range(2)]
+        pending = [ChatMessage.create("wf_123", "pending", is_user=False)]
+        mock_cache.get.return_value = None
+        mock_db_store.load_recent.return_value = stored
+        mock_journal.pending.return_value = [stored[1], *pending]
+
+        result = service.load_recent("wf_123", last_n=10)
+
+        assert result == [*stored, *pending]
+
+    def test_search_flushes_pending_before_db_query(self, service, mock_db_store, mock_journal):
+        """测试：存在未落库消息时，搜索前先刷库"""
+        mock_journal.pending.return_value = [ChatMessage.create("wf_123", "x", is_user=True)]
+        mock_db_store.search.return_value = []
+
+        service.search("x", "wf_123")
+
+        mock_journal.flush.assert_called_once()
+        mock_db_store.search.assert_called_once_with("x", "wf_123", 0.5)
+
+    def test_search_raises_when_pending_flush_fails(self, service, mock_db_store, mock_journal):
+        """测试：待写消息刷库失败时拒绝返回缺失最新消息的搜索结果"""
+        from src.infrastructure.memory.write_behind_journal import JournalFlushError
+
+        mock_journal.pending.return_value = [ChatMessage.create("wf_123", "x", is_user=True)]
+        mock_journal.flush.return_value = False
+
+        with pytest.raises(JournalFlushError):
+            service.search("x", "wf_123")
+        mock_db_store.search.assert_not_called()
+
+    def test_clear_discards_pending_instead_of_flushing(
+        self, service, mock_db_store, mock_cache, mock_journal
+    ):
+        """测试：clear 丢弃待写消息（不依赖刷库成功），再清空 DB 与缓存"""
+        service.clear("wf_123")
+
+        mock_journal.discard.assert_called_once_with("wf_123")
+        mock_journal.flush.assert_not_called()
+        mock_db_store.clear.assert_called_once_with("wf_123")
+        mock_cache.invalidate.assert_called_once_with("wf_123")
@@ -0,0 +1,216 @@
+"""RAGService 单元测试
+
+测试范围:
+1. ingest_document：一次批量嵌入、按批写入仓储与检索服务、文档状态更新
+2. retrieve_context：检索结果缓存命中、导入/删除文档后失效
+3. delete_document：同时删除检索服务自身向量存储中的分块
+
+测试原则:
+- 仓储/检索服务全部使用 AsyncMock，不依赖真实向量存储
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.application.services.rag_service import RAGService
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.domain.knowledge_base.ports.retriever_service import RetrieverService
+from src.domain.value_objects.document_source import DocumentSource
+from src.domain.value_objects.document_status import DocumentStatus
+from src.domain.value_objects.query_context import QueryContext
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
+
+
+@pytest.fixture
+def repository() -> Mock:
+    repo = Mock()
+    repo.save_document = AsyncMock()
+    repo.update_document = AsyncMock()
+    repo.save_document_chunks = AsyncMock()
+    return repo
+
+
+@pytest.fixture
+def retriever() -> Mock:
+    svc = Mock()
+    svc.chunk_document = AsyncMock(return_value=[f"chunk-{i}" for i in range(5)])
+    svc.embed_many = AsyncMock(side_effect=lambda texts: [[float(i)] for i in range(len(texts))])
+    svc.generate_embedding = AsyncMock()
+    svc.add_document_chunks = AsyncMock()
+    svc.delete_document_chunks = AsyncMock()
+    return svc
+
+
+class InMemoryRetriever(RetrieverService):
+    """自带向量存储的检索服务（模拟 Chroma 等独立存储）"""
+
+    def __init__(self):
+        self.chunks: dict[str, DocumentChunk] = {}
+
+    async def generate_embedding(self, text: str) -> list[float]:
+        return [1.0]
+
+    async def chunk_document(
+        self, content: str, chunk_size: int = 1000, chunk_overlap: int = 200
+    ) -> list[str]:
+        return [content]
+
+    async def retrieve_relevant_chunks(
+        self,
+        query: str,
+        workflow_id: str | None = None,
+        top_k: int = 5,
+        filters: dict[str, Any] | None = None,
+    ) -> list[tuple[DocumentChunk, float]]:
+        return [(chunk, 1.0) for chunk in self.chunks.values()][:top_k]
+
+    async def rerank_chunks(
+        self, query: str, chunks: list[DocumentChunk], top_k: int = 5
+    ) -> list[tuple[DocumentChunk, float]]:
+        return [(chunk, 1.0) for chunk in chunks[:top_k]]
+
+    async def add_document_chunks(self, chunks: list[DocumentChunk]) -> None:
+        self.chunks.update((chunk.id, chunk) for chunk in chunks)
+
+    async def delete_document_chunks(self, document_id: str) -> None:
+        self.chunks = {
+            key: chunk for key, chunk in self.chunks.items() if chunk.document_id != document_id
+        }
+
+    async def get_context_for_query(
+        self, query: str, workflow_id: str | None = None, max_tokens: int = 4000
+    ) -> str:
+        return "\n".join(chunk.content for chunk in self.chunks.values())
+
+
+class TestIngestDocument:
+    """测试文档导入的批量嵌入与批量写入"""
+
+    @pytest.mark.asyncio
+    async def test_ingest_embeds_once_and_writes_chunks_per_batch(
+        self, repository: Mock, retriever: Mock
+    ):
+        """测试：5 个分块、batch=2 时应嵌入一次，并分 3 批写入仓储和检索服务
+
+        Given: chunk_document 返回 5 个分块，ingest_batch_size=2
+        When: 调用 ingest_document
+        Then:
+          - embed_many 被调用一次，不再逐条 generate_embedding
+          - save_document_chunks / add_document_chunks 各被调用 3 次（2/2/1）
+          - chunk_index 连续，文档被标记为已处理
+        """
+        # Given
+        service = RAGService(repository, retriever, ingest_batch_size=2)
+
+        # When
+        document_id = await service.ingest_document(
+            title="标题", content="内容", source=DocumentSource.UPLOAD, workflow_id="wf_1"
+        )
+
+        # Then
+        retriever.embed_many.assert_awaited_once_with([f"chunk-{i}" for i in range(5)])
+        retriever.generate_embedding.assert_not_awaited()
+
+        saved_batches = [call.args[0] for call in repository.save_document_chunks.await_args_list]
+        indexed_batches = [call.args[0] for call in retriever.add_document_chunks.await_args_list]
+        assert [len(batch) for batch in saved_batches] == [2, 2, 1]
+        assert saved_batches == indexed_batches
+        assert [c.chunk_index for batch in saved_batches for c in batch] == [0, 1, 2, 3, 4]
+        assert all(c.document_id == document_id for batch in saved_batches for c in batch)
+
+        updated = repository.update_document.await_args.args[0]
+        assert updated.status == DocumentStatus.PROCESSED
+
+
+class TestRetrievalCache:
+    """测试 retrieve_context 的检索结果缓存与导入/删除时的失效"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_retrieval_served_from_cache_until_ingest(
+        self, repository: Mock, retriever: Mock
+    ):
+        """测试：重复查询不再调用检索服务；同工作流导入文档后重新检索
+
+        Given: 配置 RetrievalCache 的 RAGService
+        When: 两次 retrieve_context（查询仅大小写/空白不同），随后向 wf_1 导入文档再检索
+        Then: 检索服务只在首次和导入后被调用；缓存返回的是副本
+        """
+        # Given
+        retriever.retrieve_relevant_chunks = AsyncMock(return_value=[])
+        retriever.get_context_for_query = AsyncMock(return_value="ctx")
+        service = RAGService(repository, retriever, retrieval_cache=RetrievalCache())
+
+        # When
+        first = await service.retrieve_context(
+            QueryContext(query="What is RAG", workflow_id="wf_1")
+        )
+        first.sources.append({"mutated": "yes"})
+        second = await service.retrieve_context(
+            QueryContext(query=" what  is rag ", workflow_id="wf_1")
+        )
+
+        # Then
+        assert retriever.retrieve_relevant_chunks.await_count == 1
+        assert second.formatted_context == "ctx"
+        assert second.sources == []
+
+        await service.ingest_document(
+            title="标题", content="内容", source=DocumentSource.UPLOAD, workflow_id="wf_1"
+        )
+        await service.retrieve_context(QueryContext(query="What is RAG", workflow_id="wf_1"))
+        assert retriever.retrieve_relevant_chunks.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_document_invalidates_its_workflow(
+        self, repository: Mock, retriever: Mock
+    ):
+        """测试：删除文档后，文档所属工作流的缓存失效"""
+        # Given
+        cache = RetrievalCache()
+        repository.find_document_by_id = AsyncMock(return_value=Mock(workflow_id="wf_1"))
+        repository.delete_document = AsyncMock()
+        service = RAGService(repository, retriever, retrieval_cache=cache)
+        version = cache.version("wf_1")
+
+        # When
+        assert await service.delete_document("doc_1") is True
+
+        # Then
+        assert cache.version("wf_1") == version + 1
+
+
+class TestDeleteDocument:
+    """测试删除文档时同步清理检索服务的向量存储"""
+
+    @pytest.mark.asyncio
+    async def test_deleted_document_is_no_longer_retrievable(self, repository: Mock):
+        """测试：删除文档后，检索服务中的分块被删除，再次检索不再返回该文档
+
+        Given: 自带向量存储的检索服务 + 检索缓存，已导入一篇文档并检索过一次
+        When: delete_document
+        Then: 检索服务中的分块被删除；再次检索（缓存已失效）结果为空
+        """
+        # Given
+        retriever = InMemoryRetriever()
+        repository.find_document_by_id = AsyncMock(return_value=None)
+        repository.delete_document = AsyncMock()
+        service = RAGService(repository, retriever, retrieval_cache=RetrievalCache())
+        document_id = await service.ingest_document(
+            title="标题", content="内容", source=DocumentSource.UPLOAD, workflow_id="wf_1"
+        )
+        query = QueryContext(query="内容", workflow_id="wf_1")
+        assert len((await service.retrieve_context(query)).chunks) == 1
+
+        # When
+        assert await service.delete_document(document_id) is True
+
+        # Then
+        repository.delete_document.assert_awaited_once_with(document_id)
+        assert retriever.chunks == {}
+        retrieved = await service.retrieve_context(query)
+        assert retrieved.chunks == []
+        assert retrieved.formatted_context == ""
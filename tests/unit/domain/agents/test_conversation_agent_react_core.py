@@ -18,6 +18,7 @@ Total: 28 tests targeting ~70-80% coverage
 
 from __future__ import annotations
 
+import asyncio
 import importlib
 from unittest.mock import AsyncMock, MagicMock
 
@@ -999,3 +1000,217 @@ class TestExecuteStep:
         # 验证 think 成功，但 action 使用降级值
         assert result.thought == "思考结果"
         assert result.action == {"action_type": "continue"}
+
+
+# =============================================================================
+# TestFusedReActStep - Single-call think + decide + continue
+# =============================================================================
+
+
+class TestFusedReActStep:
+    """Test fused single-call ReAct step with three-call fallback"""
+
+    @pytest.mark.asyncio
+    async def test_fused_step_replaces_three_calls(self, mock_agent):
+        """Test: one react_step call per iteration; think/decide/should_continue unused"""
+        mock_agent.fused_react_step = True
+        mock_agent.emitter = None
+        mock_agent.llm.react_step = AsyncMock(
+            side_effect=[
+                {"thought": "t1", "action": {"action_type": "continue"}, "should_continue": True},
+                {
+                    "thought": "t2",
+                    "action": {"action_type": "continue", "response": "done"},
+                    "should_continue": False,
+                },
+            ]
+        )
+
+        result = await mock_agent.run_async("test input")
+
+        assert result.completed is True
+        assert result.final_response == "done"
+        assert [step.thought for step in result.steps] == ["t1", "t2"]
+        assert mock_agent.llm.react_step.await_count == 2
+        mock_agent.llm.think.assert_not_called()
+        mock_agent.llm.decide_action.assert_not_called()
+        mock_agent.llm.should_continue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_fused_output_falls_back_to_three_calls(self, mock_agent):
+        """Test: malformed fused output falls back to think/decide_action for that iteration"""
+        mock_agent.fused_react_step = True
+        mock_agent.emitter = None
+        mock_agent.llm.react_step = AsyncMock(return_value="I think we should respond")
+        mock_agent.llm.think = AsyncMock(return_value="fallback thought")
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value={"action_type": "respond", "response": "ok"}
+        )
+
+        result = await mock_agent.run_async("test input")
+
+        assert result.completed is True
+        assert result.steps[0].thought == "fallback thought"
+        assert mock_agent._fused_step_fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_streamed_fused_step_emits_partial_thinking(self, mock_agent):
+        """Test: react_step_stream pushes thought deltas to emitter before the action is known"""
+
+        async def stream(context):
+            for chunk in [
+                '{"thought": "先',
+                '回复"',
+                ', "action": {"action_type": "respond",',
+                ' "response": "hi"}, "should_continue": false}',
+            ]:
+                yield chunk
+
+        mock_agent.fused_react_step = True
+        mock_agent.llm.react_step_stream = stream
+
+        result = await mock_agent.run_async("test input")
+
+        assert result.final_response == "hi"
+        assert result.steps[0].thought == "先回复"
+        thinking = [call.args[0] for call in mock_agent.emitter.emit_thinking.await_args_list]
+        assert thinking == ["先", "回复"]
+        mock_agent.llm.think.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_malformed_unicode_escape_in_stream_falls_back(self, mock_agent):
+        """Test: an invalid \\u escape in the streamed thought falls back instead of erroring"""
+
+        async def stream(context):
+            for chunk in ['{"thought": "先\\u12', 'zz", "action": {"action_type": "respond"}}']:
+                yield chunk
+
+        mock_agent.fused_react_step = True
+        mock_agent.llm.react_step_stream = stream
+        mock_agent.llm.think = AsyncMock(return_value="fallback thought")
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value={"action_type": "respond", "response": "ok"}
+        )
+
+        result = await mock_agent.run_async("test input")
+
+        assert result.final_response == "ok"
+        assert result.steps[0].thought == "fallback thought"
+        assert mock_agent._fused_step_fallbacks == 1
+        mock_agent.emitter.emit_error.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fallback_after_streamed_thinking_does_not_stream_again(self, mock_agent):
+        """Test: unparseable streamed output falls back without re-emitting thinking"""
+
+        async def stream(context):
+            for chunk in ['{"thought": "先', '回复", "action": ']:
+                yield chunk
+
+        mock_agent.fused_react_step = True
+        mock_agent.llm.react_step_stream = stream
+        mock_agent.llm.think = AsyncMock(return_value="fallback thought")
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value={"action_type": "respond", "response": "ok"}
+        )
+
+        result = await mock_agent.run_async("test input")
+
+        assert result.steps[0].thought == "fallback thought"
+        assert mock_agent._fused_step_fallbacks == 1
+        thinking = [call.args[0] for call in mock_agent.emitter.emit_thinking.await_args_list]
+        assert thinking == ["先", "回复"]
+
+
+# =============================================================================
+# TestConcurrentToolCalls - Independent tool calls within one iteration
+# =============================================================================
+
+
+class TestConcurrentToolCalls:
+    """Test concurrent execution of a tool_calls batch"""
+
+    @staticmethod
+    def _batch_action(*calls):
+        return {"action_type": "tool_call", "tool_calls": list(calls)}
+
+    @staticmethod
+    def _slow_executor(delays, log):
+        class Executor:
+            async def execute(self, *, tool_name, tool_call_id, arguments):
+                log.append(("start", tool_call_id))
+                await asyncio.sleep(delays.get(tool_name, 0))
+                log.append(("end", tool_call_id))
+                return {"success": True, "result": {"tool": tool_name}}
+
+        return Executor()
+
+    @pytest.mark.asyncio
+    async def test_independent_calls_run_concurrently_and_emit_on_completion(self, mock_agent):
+        """Test: a slow tool no longer serializes cheap ones; transcript keeps request order"""
+        log: list[tuple[str, str]] = []
+        mock_agent.parallel_tool_calls = True
+        mock_agent.tool_call_executor = self._slow_executor({"search": 0.05}, log)
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value=self._batch_action(
+                {"tool_name": "search", "tool_id": "t_search", "arguments": {"q": "x"}},
+                {"tool_name": "calculator", "tool_id": "t_calc", "arguments": {}},
+            )
+        )
+        mock_agent.llm.should_continue = AsyncMock(return_value=False)
+
+        result = await mock_agent.run_async("test input")
+
+        assert log[:2] == [("start", "t_search"), ("start", "t_calc")]
+        emitted = [
+            call.kwargs["tool_id"] for call in mock_agent.emitter.emit_tool_result.await_args_list
+        ]
+        assert emitted == ["t_calc", "t_search"]
+        transcript = [
+            call.args[0]["tool_call_id"]
+            for call in mock_agent.session_context.add_message.call_args_list
+        ]
+        assert transcript == ["t_search", "t_calc"]
+        assert result.steps[0].observation.splitlines()[0].startswith("search[t_search] ok")
+        assert mock_agent.tool_concurrency_controller.get_metrics().max_concurrent_observed == 2
+
+    @pytest.mark.asyncio
+    async def test_dependent_call_waits_for_its_dependency(self, mock_agent):
+        """Test: a call referencing another call's id runs in a later wave"""
+        log: list[tuple[str, str]] = []
+        mock_agent.parallel_tool_calls = True
+        mock_agent.tool_call_executor = self._slow_executor({"search": 0.02}, log)
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value=self._batch_action(
+                {"tool_name": "search", "tool_id": "t_search", "arguments": {}},
+                {
+                    "tool_name": "summarize",
+                    "tool_id": "t_sum",
+                    "arguments": {"text": "{{t_search}}"},
+                },
+                {"tool_name": "calculator", "tool_id": "t_calc", "arguments": {}},
+            )
+        )
+        mock_agent.llm.should_continue = AsyncMock(return_value=False)
+
+        await mock_agent.run_async("test input")
+
+        assert log.index(("end", "t_search")) < log.index(("start", "t_sum"))
+        assert log.index(("start", "t_calc")) < log.index(("end", "t_search"))
+
+    @pytest.mark.asyncio
+    async def test_batch_runs_sequentially_when_parallel_disabled(self, mock_agent):
+        """Test: without parallel_tool_calls the batch runs one call at a time"""
+        log: list[tuple[str, str]] = []
+        mock_agent.tool_call_executor = self._slow_executor({}, log)
+        mock_agent.llm.decide_action = AsyncMock(
+            return_value=self._batch_action(
+                {"tool_name": "a", "tool_id": "t_a", "arguments": {}},
+                {"tool_name": "b", "tool_id": "t_b", "arguments": {}},
+            )
+        )
+        mock_agent.llm.should_continue = AsyncMock(return_value=False)
+
+        await mock_agent.run_async("test input")
+
+        assert log == [("start", "t_a"), ("end", "t_a"), ("start", "t_b"), ("end", "t_b")]
@@ -0,0 +1,96 @@
+"""Fused ReAct step unit tests
+
+Coverage for src.domain.agents.conversation_agent_react_step:
+- parse_fused_react_step: dict / JSON / fenced JSON input, malformed output rejection
+- PartialThoughtExtractor: incremental decoding across chunk boundaries and escapes
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from src.domain.agents.conversation_agent_react_step import (
+    FusedReActStep,
+    PartialThoughtExtractor,
+    parse_fused_react_step,
+)
+
+
+class TestParseFusedReActStep:
+    def test_parses_dict_payload(self):
+        step = parse_fused_react_step(
+            {
+                "thought": "直接回复",
+                "action": {"action_type": "respond", "response": "hi"},
+                "should_continue": False,
+            }
+        )
+
+        assert step == FusedReActStep(
+            thought="直接回复",
+            action={"action_type": "respond", "response": "hi"},
+            should_continue=False,
+        )
+
+    def test_parses_fenced_json_string(self):
+        raw = '```json\n{"thought": "t", "action": {"action_type": "continue"}, "should_continue": true}\n```'
+
+        step = parse_fused_react_step(raw)
+
+        assert step.action == {"action_type": "continue"}
+        assert step.should_continue is True
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            "not json",
+            '["thought"]',
+            {"action": {"action_type": "respond"}, "should_continue": False},
+            {"thought": "t", "action": {}, "should_continue": False},
+            {"thought": "t", "action": {"action_type": "respond"}},
+            {"thought": "t", "action": {"action_type": "respond"}, "should_continue": "no"},
+        ],
+    )
+    def test_rejects_malformed_output(self, payload):
+        with pytest.raises(ValueError):
+            parse_fused_react_step(payload)
+
+
+class TestPartialThoughtExtractor:
+    def test_streams_thought_across_chunks(self):
+        extractor = PartialThoughtExtractor()
+        chunks = ['{"tho', 'ught": "先', "查询", '天气", "action": {"action_type": "respond"}}']
+
+        deltas = [extractor.feed(chunk) for chunk in chunks]
+
+        assert deltas == ["", "先", "查询", "天气"]
+        assert extractor.buffer == "".join(chunks)
+
+    def test_decodes_escapes_split_across_chunks(self):
+        extractor = PartialThoughtExtractor()
+
+        deltas = [extractor.feed(chunk) for chunk in ['{"thought": "a\\', "nb \\u4f", '60"}']]
+
+        assert "".join(deltas) == "a\nb 你"
+        assert deltas[0] == "a"
+
+    def test_combines_surrogate_pairs_split_across_chunks(self):
+        extractor = PartialThoughtExtractor()
+
+        deltas = [extractor.feed(chunk) for chunk in ['{"thought": "ok \\ud83d', "\\ude00", '!"}']]
+
+        assert deltas == ["ok ", "\U0001f600", "!"]
+
+    def test_lone_surrogate_is_replaced(self):
+        extractor = PartialThoughtExtractor()
+
+        assert extractor.feed('{"thought": "a\\udc00b\\ud83dc"}') == "a\ufffdb\ufffdc"
+
+    def test_malformed_unicode_escape_stops_extraction(self):
+        extractor = PartialThoughtExtractor()
+        text = '{"thought": "a\\u12zz b", "action": {"action_type": "respond"}}'
+
+        assert extractor.feed(text) == "a"
+        assert extractor.feed("more") == ""
+        with pytest.raises(ValueError):
+            parse_fused_react_step(extractor.buffer)
@@ -325,6 +325,32 @@ class TestPromptTemplateComposition:
         assert "HTTP" in result
         assert "JSON" in result
 
+    def test_module_renders_are_cached_across_compositions(self) -> None:
+        """测试：变量不变的模块渲染结果走缓存，变量变化时重新渲染"""
+        from src.domain.services.prompt_template_system import (
+            PromptModule,
+            PromptTemplateComposer,
+            PromptTemplateRegistry,
+        )
+
+        registry = PromptTemplateRegistry()
+        registry.register(
+            PromptModule(
+                name="rules",
+                version="1.0.0",
+                description="规则",
+                template="规则：{rule}",
+                variables=["rule"],
+                applicable_agents=["conversation"],
+            )
+        )
+        composer = PromptTemplateComposer(registry)
+
+        assert composer.compose(modules=["rules"], variables={"rule": "只读"}) == "规则：只读"
+        assert composer.compose(modules=["rules"], variables={"rule": "只读"}) == "规则：只读"
+        assert composer.compose(modules=["rules"], variables={"rule": "可写"}) == "规则：可写"
+        assert composer.render_cache.get_stats()["hits"] == 1
+
 
 # =============================================================================
 # 第四部分：YAML 文件加载测试
@@ -0,0 +1,63 @@
+"""StablePrompt / PromptRenderCache / PromptPrefixMetrics 单元测试"""
+
+from src.domain.services.stable_prompt import (
+    PromptPrefixMetrics,
+    PromptRenderCache,
+    StablePrompt,
+)
+
+
+class TestStablePrompt:
+    def test_text_appends_volatile_after_static(self):
+        prompt = StablePrompt(static="规则", volatile="状态")
+
+        assert prompt.text == "规则\n\n状态"
+        assert prompt.cacheable_prefix_chars == len("规则")
+
+    def test_empty_segments_are_not_joined(self):
+        assert StablePrompt(static="规则").text == "规则"
+        assert StablePrompt(static="", volatile="状态").text == "状态"
+
+
+class TestPromptRenderCache:
+    def test_same_key_renders_once(self):
+        cache = PromptRenderCache()
+        calls = 0
+
+        def render():
+            nonlocal calls
+            calls += 1
+            return "static"
+
+        assert cache.get_or_render("k", render) == "static"
+        assert cache.get_or_render("k", render) == "static"
+
+        assert calls == 1
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PromptRenderCache(max_entries=2)
+        cache.get_or_render("a", lambda: "A")
+        cache.get_or_render("b", lambda: "B")
+        cache.get_or_render("a", lambda: "A")  # a 变为最近使用
+        cache.get_or_render("c", lambda: "C")
+
+        assert cache.get_or_render("a", lambda: "A2") == "A"
+        assert cache.get_or_render("b", lambda: "B2") == "B2"
+
+
+class TestPromptPrefixMetrics:
+    def test_prefix_changes_counts_static_drift_only(self):
+        metrics = PromptPrefixMetrics()
+
+        report = metrics.record("chat", StablePrompt(static="规则", volatile="状态1"))
+        metrics.record("chat", StablePrompt(static="规则", volatile="状态2"))
+        metrics.record("chat", StablePrompt(static="规则v2", volatile="状态2"))
+
+        assert report["prefix_chars"] == 2
+        assert 0 < report["prefix_ratio"] < 1
+        stats = metrics.get_stats()["chat"]
+        assert stats["requests"] == 3
+        assert stats["prefix_changes"] == 1
@@ -295,6 +295,38 @@ class TestBasicConcurrencyControl:
         assert slot3 is None
         assert controller.current_concurrent == 2
 
+    @pytest.mark.asyncio
+    async def test_acquire_slot_wait_blocks_until_release(self):
+        """测试：达到并发限制时 acquire_slot_wait 等待槽位释放而不是拒绝"""
+        from src.domain.services.tool_concurrency_controller import (
+            ConcurrencyConfig,
+            ToolConcurrencyController,
+        )
+
+        controller = ToolConcurrencyController(ConcurrencyConfig(max_concurrent=1))
+        slot1 = await controller.acquire_slot_wait(
+            tool_name="tool1",
+            caller_id="agent_1",
+            caller_type="conversation_agent",
+        )
+
+        waiter = asyncio.create_task(
+            controller.acquire_slot_wait(
+                tool_name="tool2",
+                caller_id="agent_1",
+                caller_type="conversation_agent",
+            )
+        )
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await controller.release_slot(slot1.slot_id)
+        slot2 = await asyncio.wait_for(waiter, timeout=1)
+
+        assert slot2.tool_name == "tool2"
+        assert controller.current_concurrent == 1
+        assert controller.get_metrics().total_rejected == 0
+
     @pytest.mark.asyncio
     async def test_release_slot(self):
         """测试：释放槽位"""
@@ -341,6 +341,27 @@ def test_build_system_prompt_only_includes_main_subgraph_nodes_and_edges(mock_ll
     assert "edge_sub" not in prompt
 
 
+def test_build_system_prompt_keeps_static_prefix_identical_across_workflows(
+    mock_llm, mock_repository, sample_workflow
+):
+    """测试：工作流状态与 RAG 上下文位于固定前缀之后，前缀跨工作流逐字节一致"""
+    start = Node.create(type=NodeType.START, name="开始", config={}, position=Position(x=0, y=0))
+    start.id = "node_other_start"
+    other = Workflow.create(name="另一个工作流", description="", nodes=[start], edges=[])
+    service = EnhancedWorkflowChatService(
+        workflow_id="wf_test", llm=mock_llm, chat_message_repository=mock_repository
+    )
+
+    first = service._build_stable_system_prompt(sample_workflow, rag_context="")
+    second = service._build_stable_system_prompt(other, rag_context="相关知识")
+
+    assert first.static == second.static
+    assert "node_1" not in first.static
+    assert "node_1" in first.volatile
+    assert "相关知识" in second.volatile
+    assert first.text.startswith(first.static)
+
+
 def test_chat_service_identifies_intent_correctly(mock_llm, mock_repository, sample_workflow):
     """测试：服务应该正确识别用户意图"""
     # 模拟 LLM 识别意图
@@ -0,0 +1,187 @@
+"""ClientRegistry 单元测试
+
+覆盖：
+- 相同 (provider, base_url, 凭据) 复用同一客户端，不同凭据隔离
+- 事件循环关闭后自动重建（httpx 连接绑定到事件循环），旧客户端被关闭
+- 两个同时运行的事件循环（主循环 + 调度器线程循环）各用各的客户端，互不关闭
+- 共享客户端不保存 Cookie（不同工作流之间不串会话）
+- aclose() 关闭所有客户端
+- HttpExecutor 注入注册表后跨请求复用连接池
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+from httpx import AsyncClient as RealAsyncClient
+
+from src.domain.entities.node import Node
+from src.domain.value_objects.node_type import NodeType
+from src.domain.value_objects.position import Position
+from src.infrastructure.adapters.client_registry import ClientRegistry
+from src.infrastructure.executors.http_executor import HttpExecutor
+
+
+def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"ok": True})
+
+
+class MockTransportRegistry(ClientRegistry):
+    """使用 httpx.MockTransport 的注册表（离线）
+
+    单元测试的 autouse fixture 会 patch httpx.AsyncClient，这里使用导入时保存的真实类。
+    """
+
+    def __init__(self, handler=_ok, **kwargs):
+        super().__init__(http2=False, **kwargs)
+        self.handler = handler
+
+    def _new_httpx_client(self, **kwargs):
+        return RealAsyncClient(transport=httpx.MockTransport(self.handler), **kwargs)
+
+
+class TestClientRegistry:
+    @pytest.mark.asyncio
+    async def test_http_client_is_reused(self):
+        registry = MockTransportRegistry()
+
+        first = registry.http_client()
+        second = registry.http_client()
+
+        assert first is second
+        assert registry.get_stats()["created"] == 1
+        assert registry.get_stats()["reused"] == 1
+        await registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_openai_clients_are_keyed_by_credentials_and_base_url(self, monkeypatch):
+        pytest.importorskip("openai")
+        # SDK 会对 http_client 做 isinstance(httpx.AsyncClient) 校验
+        monkeypatch.setattr(httpx, "AsyncClient", RealAsyncClient)
+        registry = MockTransportRegistry()
+
+        a = registry.openai_client("sk-a")
+        assert registry.openai_client("sk-a") is a
+        assert registry.openai_client("sk-b") is not a
+        assert registry.openai_client("sk-a", base_url="http://localhost:1/v1") is not a
+        keys = [key for clients in registry._clients.values() for key in clients]
+        assert all("sk-a" not in part for key in keys for part in key)
+        await registry.aclose()
+
+    def test_client_is_rebuilt_after_event_loop_closes(self):
+        registry = MockTransportRegistry()
+
+        async def get():
+            return registry.http_client()
+
+        first = asyncio.run(get())
+        second = asyncio.run(get())
+
+        assert first is not second
+        assert registry.get_stats()["clients"] == 1
+
+    def test_stale_client_is_closed_when_replaced(self):
+        registry = MockTransportRegistry()
+
+        async def get():
+            client = registry.http_client()
+            await asyncio.sleep(0)
+            return client
+
+        first = asyncio.run(get())
+        asyncio.run(get())
+
+        assert first.is_closed
+
+    @pytest.mark.asyncio
+    async def test_live_event_loops_keep_their_own_clients(self):
+        registry = MockTransportRegistry()
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+        thread.start()
+
+        async def get():
+            client = registry.http_client()
+            await asyncio.sleep(0)
+            return client
+
+        def get_on_other_loop():
+            return asyncio.run_coroutine_threadsafe(get(), other_loop).result(timeout=5)
+
+        try:
+            seen = []
+            for _ in range(3):
+                seen.append((await get(), get_on_other_loop()))
+
+            main_clients = {id(main) for main, _ in seen}
+            other_clients = {id(other) for _, other in seen}
+            assert len(main_clients) == len(other_clients) == 1
+            assert main_clients != other_clients
+            main, other = seen[0]
+            assert not main.is_closed and not other.is_closed
+            assert registry.get_stats()["created"] == 2
+
+            # 调度器线程循环的 aclose 只关闭它自己的客户端
+            asyncio.run_coroutine_threadsafe(registry.aclose(), other_loop).result(timeout=5)
+            assert other.is_closed and not main.is_closed
+        finally:
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join(timeout=5)
+            other_loop.close()
+        await registry.aclose()
+        assert main.is_closed
+
+    @pytest.mark.asyncio
+    async def test_shared_http_client_does_not_persist_cookies(self):
+        seen_cookies: list[str | None] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen_cookies.append(request.headers.get("cookie"))
+            return httpx.Response(200, headers={"Set-Cookie": "session=tenantA; Path=/"})
+
+        registry = MockTransportRegistry(handler)
+        client = registry.http_client()
+
+        await client.get("https://example.com/a")
+        await registry.http_client().get("https://example.com/b")
+
+        assert seen_cookies == [None, None]
+        await registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_clients(self):
+        registry = MockTransportRegistry()
+        client = registry.http_client()
+
+        await registry.aclose()
+
+        assert client.is_closed
+        assert registry.get_stats()["clients"] == 0
+
+
+class TestHttpExecutorWithRegistry:
+    @pytest.mark.asyncio
+    async def test_requests_share_one_pooled_client(self):
+        seen: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(200, json={"ok": True})
+
+        registry = MockTransportRegistry(handler)
+        executor = HttpExecutor(timeout=5.0, client_registry=registry)
+        node = Node.create(
+            type=NodeType.HTTP_REQUEST,
+            name="http",
+            config={"url": "https://example.com/api", "method": "POST", "body": '{"a": 1}'},
+            position=Position(x=0, y=0),
+        )
+
+        assert await executor.execute(node, inputs={}, context={}) == {"ok": True}
+        assert await executor.execute(node, inputs={}, context={}) == {"ok": True}
+
+        assert len(seen) == 2
+        assert seen[0].method == "POST"
+        assert registry.get_stats()["created"] == 1
+        await registry.aclose()
@@ -0,0 +1,321 @@
+"""LLMRateLimiter 单元测试
+
+覆盖：
+- 令牌桶按注入时钟补充；AIMD 在 429 时减半并发上限
+- 优先级：并发受限时交互式请求先于调度请求放行
+- run()：429 退避后重试成功；重试耗尽时抛出原异常
+- 取消：排队 / 已放行的调用方被取消时归还并发配额
+- 跨线程：不同线程的事件循环共享限流器时，释放方能唤醒其他循环中的等待方
+- 配置：provider 级配置与 models 覆盖合并
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.infrastructure.adapters.llm_rate_limiter import (
+    AIMDConcurrency,
+    LLMPriority,
+    LLMRateLimiter,
+    ModelRateLimiter,
+    RateLimits,
+    TokenBucket,
+    is_rate_limit_error,
+    llm_priority,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class TestTokenBucket:
+    def test_bucket_refills_at_per_minute_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock)
+
+        bucket.consume(60)
+        assert bucket.wait_time(1) == pytest.approx(1.0)
+
+        clock.now = 30
+        assert bucket.wait_time(30) == 0.0
+        assert bucket.wait_time(31) == pytest.approx(1.0)
+
+    def test_refund_is_capped_at_capacity(self):
+        bucket = TokenBucket(10, FakeClock())
+
+        bucket.consume(5)
+        bucket.refund(100)
+
+        assert bucket.wait_time(10) == 0.0
+        assert bucket.wait_time(11) == 0.0  # 大于容量的请求按容量计算
+
+
+class TestAIMDConcurrency:
+    def test_rate_limit_halves_limit_once_per_cooldown(self):
+        clock = FakeClock()
+        concurrency = AIMDConcurrency(RateLimits(max_concurrency=16), clock)
+
+        concurrency.on_rate_limited()
+        concurrency.on_rate_limited()  # 冷却期内的连续 429 只减一次
+        assert concurrency.limit == 8
+
+        clock.now = 2
+        concurrency.on_rate_limited()
+        assert concurrency.limit == 4
+
+    def test_success_grows_limit_back_to_max(self):
+        clock = FakeClock()
+        concurrency = AIMDConcurrency(RateLimits(max_concurrency=4), clock)
+        concurrency.on_rate_limited()
+        assert concurrency.limit == 2
+
+        for _ in range(10):
+            concurrency.on_success(0.1)
+
+        assert concurrency.limit == 4
+
+
+class TestModelRateLimiter:
+    @pytest.mark.asyncio
+    async def test_interactive_requests_are_granted_before_scheduled(self):
+        limiter = ModelRateLimiter(RateLimits(max_concurrency=1))
+        holder = await limiter.acquire(priority=LLMPriority.WORKFLOW)
+
+        order: list[str] = []
+
+        async def worker(name: str, priority: LLMPriority):
+            permit = await limiter.acquire(priority=priority)
+            order.append(name)
+            limiter.release(permit)
+
+        tasks = [
+            asyncio.create_task(worker("scheduled", LLMPriority.SCHEDULED)),
+            asyncio.create_task(worker("workflow", LLMPriority.WORKFLOW)),
+            asyncio.create_task(worker("interactive", LLMPriority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["queued"] == {"interactive": 1, "workflow": 1, "scheduled": 1}
+
+        limiter.release(holder)
+        await asyncio.gather(*tasks)
+
+        assert order == ["interactive", "workflow", "scheduled"]
+
+    @pytest.mark.asyncio
+    async def test_priority_defaults_to_context_lane(self):
+        limiter = ModelRateLimiter(RateLimits(max_concurrency=1))
+        holder = await limiter.acquire()
+
+        with llm_priority(LLMPriority.SCHEDULED):
+            task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        assert limiter.get_stats()["queued"]["scheduled"] == 1
+        limiter.release(holder)
+        limiter.release(await task)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_a_slot(self):
+        limiter = ModelRateLimiter(RateLimits(max_concurrency=1))
+        holder = await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release(holder)
+        permit = await asyncio.wait_for(limiter.acquire(), timeout=1)
+        assert limiter.get_stats()["in_flight"] == 1
+        limiter.release(permit)
+        assert limiter.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_delays_excess_requests(self):
+        limiter = ModelRateLimiter(RateLimits(requests_per_minute=1))
+        limiter.release(await limiter.acquire())
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.05)
+
+        assert not waiter.done()
+        waiter.cancel()
+
+    def test_release_wakes_waiter_on_another_event_loop(self):
+        limiter = ModelRateLimiter(RateLimits(max_concurrency=1))
+        holder_ready = threading.Event()
+        waiter_queued = threading.Event()
+        results: list[str] = []
+
+        def holder_thread():
+            async def run():
+                permit = await limiter.acquire()
+                holder_ready.set()
+                while not waiter_queued.is_set():
+                    await asyncio.sleep(0.01)
+                limiter.release(permit)
+
+            asyncio.run(run())
+
+        def waiter_thread():
+            async def run():
+                holder_ready.wait(5)
+                task = asyncio.create_task(limiter.acquire())
+                await asyncio.sleep(0.01)
+                waiter_queued.set()
+                permit = await asyncio.wait_for(task, timeout=5)
+                results.append("granted")
+                limiter.release(permit)
+
+            asyncio.run(run())
+
+        threads = [threading.Thread(target=holder_thread), threading.Thread(target=waiter_thread)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert results == ["granted"]
+        assert limiter.get_stats()["in_flight"] == 0
+
+    def test_refill_timer_runs_on_the_waiting_loop(self):
+        limiter = ModelRateLimiter(RateLimits(requests_per_minute=600))  # 每 0.1s 补充一个
+        for _ in range(600):
+            limiter.release(asyncio.run(limiter.acquire()))  # 在已关闭的循环中耗尽令牌
+        results: list[str] = []
+
+        def waiter_thread():
+            async def run():
+                permit = await asyncio.wait_for(limiter.acquire(), timeout=5)
+                results.append("granted")
+                limiter.release(permit)
+
+            asyncio.run(run())
+
+        thread = threading.Thread(target=waiter_thread)
+        thread.start()
+        thread.join(10)
+
+        assert results == ["granted"]
+
+
+class TestLLMRateLimiterRun:
+    @pytest.mark.asyncio
+    async def test_retries_after_rate_limit_then_succeeds(self, monkeypatch):
+        sleeps: list[float] = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        limiter = LLMRateLimiter(RateLimits(max_concurrency=4), max_retries=2)
+        attempts = 0
+
+        async def fetch():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RateLimitError("429")
+            return "ok"
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        result = await limiter.run("openai", "gpt-4o-mini", fetch)
+
+        assert result == "ok"
+        assert attempts == 2
+        assert len(sleeps) == 1
+        stats = limiter.get_stats()
+        assert stats["retries"] == 1
+        model_stats = stats["limiters"]["openai/gpt-4o-mini"]
+        assert model_stats["rate_limited"] == 1
+        assert model_stats["concurrency_limit"] == 2
+        assert model_stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_raises_when_retries_are_exhausted(self, monkeypatch):
+        async def fake_sleep(delay):
+            return None
+
+        async def fetch():
+            raise RateLimitError("429")
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        limiter = LLMRateLimiter(max_retries=1)
+
+        with pytest.raises(RateLimitError):
+            await limiter.run("openai", "gpt-4o-mini", fetch)
+        assert limiter.get_stats()["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        limiter = LLMRateLimiter()
+        attempts = 0
+
+        async def fetch():
+            nonlocal attempts
+            attempts += 1
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await limiter.run("openai", "gpt-4o-mini", fetch)
+        assert attempts == 1
+        assert limiter.limiter("openai", "gpt-4o-mini").get_stats()["in_flight"] == 0
+
+
+class TestLLMRateLimiterConfig:
+    def test_model_overrides_are_merged_over_provider_config(self):
+        limiter = LLMRateLimiter(RateLimits(max_concurrency=16))
+        limiter.configure(
+            "OpenAI",
+            {
+                "requests_per_minute": 500,
+                "max_concurrency": 8,
+                "models": {"gpt-4o": {"tokens_per_minute": 30000, "max_concurrency": 2}},
+            },
+        )
+
+        assert limiter.limits_for("openai", "gpt-4o-mini") == RateLimits(
+            requests_per_minute=500, max_concurrency=8
+        )
+        assert limiter.limits_for("openai", "gpt-4o") == RateLimits(
+            requests_per_minute=500, tokens_per_minute=30000, max_concurrency=2
+        )
+        assert limiter.limits_for("anthropic", "claude") == RateLimits(max_concurrency=16)
+
+    def test_configure_providers_reads_rate_limits_from_entity_config(self):
+        class Provider:
+            def __init__(self, name, config):
+                self.name = name
+                self.config = config
+
+        limiter = LLMRateLimiter()
+        count = limiter.configure_providers(
+            [
+                Provider("openai", {"rate_limits": {"max_concurrency": 3}}),
+                Provider("ollama", {}),
+            ]
+        )
+
+        assert count == 1
+        assert limiter.limiter("openai", "gpt-4o-mini").limits.max_concurrency == 3
+
+    def test_is_rate_limit_error_detects_status_on_response(self):
+        class Response:
+            status_code = 429
+
+        class HTTPError(Exception):
+            response = Response()
+
+        assert is_rate_limit_error(HTTPError())
+        assert is_rate_limit_error(RateLimitError())
+        assert not is_rate_limit_error(ValueError())
@@ -0,0 +1,214 @@
+"""LLMReplayAdapter / LLMRecordingAdapter 单元测试
+
+覆盖：
+- 哈希索引查找、归一化匹配、同一 prompt 多条录制轮转
+- 按录制的 TTFT / token 间隔复现流式节奏（time_scale 缩放）
+- 录制器记录分块与时序，按 JSONL 逐条追加写出，写出的文件可被回放
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.infrastructure.adapters.llm_recording_adapter import LLMRecordingAdapter
+from src.infrastructure.adapters.llm_replay_adapter import LLMReplayAdapter, normalize_prompt
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _write(tmp_path, recordings):
+    path = tmp_path / "recordings.json"
+    path.write_text(json.dumps(recordings, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays: list[float] = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return delays
+
+
+class TestReplayLookup:
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_cycles_through_recordings(self, tmp_path):
+        replay = LLMReplayAdapter(
+            _write(
+                tmp_path,
+                [
+                    {"prompt": "next?", "response": "first"},
+                    {"prompt": "other", "response": "x"},
+                    {"prompt": "next?", "response": "second"},
+                ],
+            )
+        )
+
+        assert [await replay.generate("next?") for _ in range(3)] == ["first", "second", "first"]
+        assert replay.get_stats()["unique_prompts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_normalized_matching_ignores_ids_timestamps_and_whitespace(self, tmp_path):
+        replay = LLMReplayAdapter(
+            _write(
+                tmp_path,
+                [
+                    {
+                        "prompt": "run 123e4567-e89b-12d3-a456-426614174000\n at 2026-01-01T00:00:00Z",
+                        "response": "ok",
+                    }
+                ],
+            ),
+            normalize_prompts=True,
+        )
+
+        prompt = "run  9f1c2d3e-0000-4000-8000-000000000001 at 2026-10-18T09:30:12.5+08:00 "
+        assert await replay.generate(prompt) == "ok"
+        assert normalize_prompt(prompt) == "run <uuid> at <timestamp>"
+
+    @pytest.mark.asyncio
+    async def test_miss_raises_unless_default_response_is_set(self, tmp_path):
+        path = _write(tmp_path, [{"prompt": "hello", "response": "world"}])
+
+        with pytest.raises(ValueError, match="No recording found"):
+            await LLMReplayAdapter(path).generate("unknown")
+
+        replay = LLMReplayAdapter(path, default_response="fallback")
+        assert await replay.generate("unknown") == "fallback"
+        assert replay.get_stats()["misses"] == 1
+
+
+class TestReplayTiming:
+    @pytest.mark.asyncio
+    async def test_streaming_reproduces_ttft_and_inter_token_gaps(self, tmp_path, sleeps):
+        replay = LLMReplayAdapter(
+            _write(
+                tmp_path,
+                [
+                    {
+                        "prompt": "p",
+                        "response": "abc",
+                        "chunks": ["a", "b", "c"],
+                        "ttft_ms": 400,
+                        "inter_token_ms": [20, 40],
+                    }
+                ],
+            ),
+            time_scale=0.5,
+        )
+
+        chunks = [chunk async for chunk in replay.generate_streaming("p")]
+
+        assert chunks == ["a", "b", "c"]
+        assert sleeps == pytest.approx([0.2, 0.01, 0.02])
+
+    @pytest.mark.asyncio
+    async def test_generate_waits_recorded_latency_and_zero_scale_disables(self, tmp_path, sleeps):
+        path = _write(tmp_path, [{"prompt": "p", "response": "r", "latency_ms": 1500}])
+
+        await LLMReplayAdapter(path).generate("p")
+        await LLMReplayAdapter(path, time_scale=0).generate("p")
+
+        assert sleeps == pytest.approx([1.5])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeStreamingLLM:
+    model = "gpt-4o-mini"
+
+    def __init__(self, clock: FakeClock):
+        self._clock = clock
+
+    async def generate(self, prompt, **kwargs):
+        self._clock.now += 1.2
+        return f"echo:{prompt}"
+
+    async def generate_streaming(self, prompt, **kwargs):
+        for step, chunk in ((0.3, "he"), (0.05, "ll"), (0.1, "o")):
+            self._clock.now += step
+            yield chunk
+
+
+class TestRecordingAdapter:
+    @pytest.mark.asyncio
+    async def test_recorded_session_replays_with_same_chunks_and_timing(self, tmp_path, sleeps):
+        clock = FakeClock()
+        record_file = tmp_path / "session.jsonl"
+        recorder = LLMRecordingAdapter(
+            FakeStreamingLLM(clock), record_file=str(record_file), clock=clock
+        )
+
+        assert [c async for c in recorder.generate_streaming("hi")] == ["he", "ll", "o"]
+        assert await recorder.generate("ping") == "echo:ping"
+        assert recorder.model == "gpt-4o-mini"
+
+        recorded = _read_jsonl(record_file)
+        assert len(recorded) == 2
+        assert recorded[0]["ttft_ms"] == pytest.approx(300)
+        assert recorded[0]["inter_token_ms"] == pytest.approx([50, 100])
+        assert recorded[1]["latency_ms"] == pytest.approx(1200)
+
+        replay = LLMReplayAdapter(str(record_file))
+        assert [c async for c in replay.generate_streaming("hi")] == ["he", "ll", "o"]
+        assert sleeps == pytest.approx([0.3, 0.05, 0.1])
+
+    @pytest.mark.asyncio
+    async def test_existing_recordings_are_preserved(self, tmp_path):
+        record_file = tmp_path / "session.json"
+        record_file.write_text(json.dumps([{"prompt": "old", "response": "r"}]), encoding="utf-8")
+
+        recorder = LLMRecordingAdapter(
+            FakeStreamingLLM(FakeClock()), record_file=str(record_file), clock=FakeClock()
+        )
+        await recorder.generate("new")
+
+        # 旧的 JSON 列表文件先转换为 JSONL，新录制追加在后
+        assert [r["prompt"] for r in _read_jsonl(record_file)] == ["old", "new"]
+        assert LLMReplayAdapter(str(record_file)).get_stats()["recordings"] == 2
+
+    @pytest.mark.asyncio
+    async def test_each_call_appends_one_line(self, tmp_path):
+        record_file = tmp_path / "session.jsonl"
+        record_file.write_text('{"prompt": "old", "response": "r"}\n', encoding="utf-8")
+
+        recorder = LLMRecordingAdapter(
+            FakeStreamingLLM(FakeClock()), record_file=str(record_file), clock=FakeClock()
+        )
+        await recorder.generate("a")
+        await recorder.generate("b")
+
+        assert record_file.read_text(encoding="utf-8").splitlines()[0] == (
+            '{"prompt": "old", "response": "r"}'
+        )
+        assert [r["prompt"] for r in _read_jsonl(record_file)] == ["old", "a", "b"]
+        assert [r["prompt"] for r in recorder.recordings] == ["old", "a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_save_reads_back_from_the_record_file(self, tmp_path):
+        record_file = tmp_path / "session.jsonl"
+        record_file.write_text('{"prompt": "old", "response": "r"}\n', encoding="utf-8")
+        recorder = LLMRecordingAdapter(
+            FakeStreamingLLM(FakeClock()), record_file=str(record_file), clock=FakeClock()
+        )
+        await recorder.generate("a")
+
+        # 录制只存在文件中，导出与查看都从文件读回
+        assert "recordings" not in vars(recorder)
+        recorder.save(tmp_path / "export.json")
+
+        exported = json.loads((tmp_path / "export.json").read_text(encoding="utf-8"))
+        assert [r["prompt"] for r in exported] == ["old", "a"]
+        assert LLMReplayAdapter(str(tmp_path / "export.json")).get_stats()["recordings"] == 2
@@ -0,0 +1,152 @@
+"""LLMResponseCache 单元测试
+
+覆盖：
+- 缓存键对请求参数敏感、对 dict 顺序不敏感
+- TTL 过期（注入时钟）与 ttl<=0 不写入
+- SQLite 持久化（跨实例命中）
+- 命中率与节省 token 统计
+- 流式回放
+"""
+
+import pytest
+
+from src.infrastructure.adapters.llm_response_cache import (
+    CachedLLMResponse,
+    LLMResponseCache,
+    llm_cache_key,
+    replay_stream,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _request(**overrides):
+    request = {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": "hi"}],
+        "temperature": 0,
+        "max_tokens": 100,
+    }
+    request.update(overrides)
+    return request
+
+
+class TestLlmCacheKey:
+    def test_key_ignores_dict_order(self):
+        a = {"model": "m", "temperature": 0}
+        b = {"temperature": 0, "model": "m"}
+        assert llm_cache_key("openai", a) == llm_cache_key("openai", b)
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [
+            {"model": "gpt-4o"},
+            {"temperature": 0.5},
+            {"max_tokens": 101},
+            {"messages": [{"role": "user", "content": "hello"}]},
+            {"response_format": {"type": "json_object"}},
+            {"tools": [{"type": "function", "function": {"name": "f"}}]},
+        ],
+    )
+    def test_any_parameter_change_changes_key(self, overrides):
+        assert llm_cache_key("openai", _request()) != llm_cache_key("openai", _request(**overrides))
+
+    def test_provider_is_part_of_key(self):
+        assert llm_cache_key("openai", _request()) != llm_cache_key("anthropic", _request())
+
+    def test_endpoint_and_credential_are_part_of_key(self):
+        official = llm_cache_key("openai", _request(), base_url="https://api.openai.com/v1/")
+        gateway = llm_cache_key("openai", _request(), base_url="https://gateway.internal/v1")
+        other_key = llm_cache_key(
+            "openai", _request(), base_url="https://api.openai.com/v1", api_key="sk-other"
+        )
+
+        assert official != gateway
+        assert official == llm_cache_key("openai", _request(), base_url="https://api.openai.com/v1")
+        assert other_key != official
+
+
+class TestLLMResponseCache:
+    @pytest.mark.asyncio
+    async def test_memory_hit_and_stats(self):
+        cache = LLMResponseCache()
+        key = llm_cache_key("openai", _request())
+
+        assert await cache.aget(key) is None
+        await cache.aput(key, "hello", prompt_tokens=10, completion_tokens=2)
+        cached = await cache.aget(key)
+
+        assert cached is not None and cached.content == "hello"
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["saved_tokens"] == 12
+        assert stats["persistent"] is False
+
+    @pytest.mark.asyncio
+    async def test_entry_expires_after_ttl(self):
+        clock = FakeClock()
+        cache = LLMResponseCache(default_ttl_seconds=60, clock=clock)
+        await cache.aput("k", "v")
+
+        clock.now += 59
+        assert await cache.aget("k") is not None
+        clock.now += 2
+        assert await cache.aget("k") is None
+
+    @pytest.mark.asyncio
+    async def test_non_positive_ttl_skips_write(self):
+        cache = LLMResponseCache()
+        await cache.aput("k", "v", ttl_seconds=0)
+
+        assert await cache.aget("k") is None
+        assert cache.get_stats()["writes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_sqlite_persists_across_instances(self, tmp_path):
+        db_path = str(tmp_path / "llm_cache.db")
+        first = LLMResponseCache(db_path)
+        await first.aput("k", "persisted", chunks=["per", "sisted"], prompt_tokens=5)
+        first.close()
+
+        second = LLMResponseCache(db_path)
+        cached = await second.aget("k")
+        second.close()
+
+        assert cached is not None
+        assert cached.content == "persisted"
+        assert cached.chunks == ["per", "sisted"]
+        assert second.get_stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_purge_expired_removes_disk_rows(self, tmp_path):
+        clock = FakeClock()
+        cache = LLMResponseCache(str(tmp_path / "c.db"), clock=clock)
+        await cache.aput("short", "a", ttl_seconds=1)
+        await cache.aput("long", "b", ttl_seconds=100)
+
+        clock.now += 10
+        assert cache.purge_expired() == 1
+        assert await cache.aget("long") is not None
+        cache.close()
+
+
+class TestReplayStream:
+    @pytest.mark.asyncio
+    async def test_replays_recorded_chunks(self):
+        response = CachedLLMResponse(content="abc", chunks=["a", "bc"])
+        assert [c async for c in replay_stream(response)] == ["a", "bc"]
+
+    @pytest.mark.asyncio
+    async def test_splits_content_without_chunks(self):
+        response = CachedLLMResponse(content="abcdefg")
+        chunks = [c async for c in replay_stream(response, chunk_chars=3)]
+        assert chunks == ["abc", "def", "g"]
@@ -0,0 +1,190 @@
+"""SingleFlight 单元测试
+
+覆盖：
+- 并发相同请求只调用一次上游，结果 / 异常分发给所有等待者
+- 取消语义：单个等待者取消不影响其他等待者；全部取消时取消上游并移除键
+- 流式合并：晚加入的订阅者回放已缓存的分片；全部订阅者离开时取消上游流
+- 事件循环隔离：多个线程的事件循环共享同一实例时，只在各自循环内合并
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.infrastructure.adapters.single_flight import SingleFlight
+
+
+class TestSingleFlightDo:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_upstream_call(self):
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.create_task(flight.do("k", fetch)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ["result"] * 10
+        assert calls == 1
+        assert flight.get_stats() == {"leaders": 1, "coalesced": 9, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            return 1
+
+        await flight.do("k", fetch)
+        await flight.do("k", fetch)
+
+        assert flight.get_stats()["leaders"] == 2
+
+    def test_calls_on_different_event_loops_are_not_coalesced(self):
+        flight = SingleFlight()
+        both_in_flight = threading.Barrier(2)
+        results: list[str] = []
+
+        async def fetch():
+            # 两个线程的调用同时在途，才能证明没有跨事件循环合并
+            await asyncio.to_thread(both_in_flight.wait, 5)
+            return threading.current_thread().name
+
+        def worker():
+            results.append(asyncio.run(flight.do("k", fetch)))
+
+        threads = [threading.Thread(target=worker, name=f"loop-{i}") for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert sorted(results) == ["loop-0", "loop-1"]
+        assert flight.get_stats() == {"leaders": 2, "coalesced": 0, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_error_is_raised_to_all_waiters(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            raise RuntimeError("upstream failed")
+
+        waiters = [asyncio.create_task(flight.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_call_alive(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "ok"
+
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "ok"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_cancelling_all_waiters_cancels_upstream(self):
+        flight = SingleFlight()
+        upstream_cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        await asyncio.wait_for(upstream_cancelled.wait(), timeout=1)
+        assert flight.get_stats()["in_flight"] == 0
+
+
+class TestSingleFlightStream:
+    @pytest.mark.asyncio
+    async def test_stream_is_consumed_once_and_fanned_out(self):
+        flight = SingleFlight()
+        opened = 0
+        step = asyncio.Event()
+
+        async def upstream():
+            nonlocal opened
+            opened += 1
+            yield "a"
+            await step.wait()
+            yield "b"
+            yield "c"
+
+        async def collect():
+            return [chunk async for chunk in flight.stream("k", upstream)]
+
+        early = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        # 晚加入的订阅者：上游已产出 "a"
+        late = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        step.set()
+
+        assert await early == ["a", "b", "c"]
+        assert await late == ["a", "b", "c"]
+        assert opened == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_error_reaches_subscribers_after_buffered_chunks(self):
+        flight = SingleFlight()
+
+        async def upstream():
+            yield "a"
+            raise RuntimeError("boom")
+
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for chunk in flight.stream("k", upstream):
+                received.append(chunk)
+        assert received == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_cancels_upstream(self):
+        flight = SingleFlight()
+        closed = asyncio.Event()
+
+        async def upstream():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+                yield "b"
+            finally:
+                closed.set()
+
+        stream = flight.stream("k", upstream)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+
+        await asyncio.wait_for(closed.wait(), timeout=1)
+        assert flight.get_stats()["in_flight"] == 0
@@ -4,9 +4,10 @@
 1. Save Operations: save_new_message, save_existing_message, timezone_preservation (3 tests)
 2. Find Operations: find_by_workflow_id (empty/ordered/limit) (3 tests)
 3. Search Operations: threshold_filter, boost_score, tokenization, relevance_sorting (6 tests)
-4. Delete Operations: delete_by_workflow_id (idempotent/isolated) (3 tests)
-5. Count Operations: count_by_workflow_id (empty/after_saves_deletes) (2 tests)
-6. Helper Methods: model_to_entity, tokenize (3 tests)
+4. Full-Text Search: trigger_sync, bm25_limit, short_query_fallback, backfill (4 tests)
+5. Delete Operations: delete_by_workflow_id (idempotent/isolated) (3 tests)
+6. Count Operations: count_by_workflow_id (empty/after_saves_deletes) (2 tests)
+7. Helper Methods: model_to_entity, tokenize (3 tests)
 
 测试原则:
 - 使用真实的 SQLite 内存数据库（transaction-per-test）
@@ -26,11 +27,16 @@ from __future__ import annotations
 from datetime import UTC, datetime
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session
 
 from src.domain.entities.chat_message import ChatMessage
 from src.infrastructure.database.base import Base
+from src.infrastructure.database.chat_message_fts import (
+    CHAT_MESSAGE_FTS_DROP,
+    ensure_chat_message_fts,
+    has_chat_message_fts,
+)
 from src.infrastructure.database.models import ChatMessageModel, WorkflowModel
 from src.infrastructure.database.repositories.chat_message_repository import (
     SQLAlchemyChatMessageRepository,
@@ -547,6 +553,117 @@ class TestChatMessageRepositorySearch:
         assert len(results) >= 0  # 可能返回消息，也可能为空（取决于实现）
 
 
+class TestChatMessageRepositoryFullTextSearch:
+    """测试 FTS5 全文索引（触发器同步、BM25 排序、回退路径）"""
+
+    @staticmethod
+    def _save(repo: SQLAlchemyChatMessageRepository, msg_id: str, content: str, minute: int = 0):
+        repo.save(
+            ChatMessage(
+                id=msg_id,
+                workflow_id="wf_test",
+                content=content,
+                is_user=True,
+                timestamp=datetime(2025, 1, 1, 10, minute, 0, tzinfo=UTC),
+            )
+        )
+
+    def test_triggers_keep_index_in_sync_with_updates_and_deletes(
+        self,
+        chat_repository: SQLAlchemyChatMessageRepository,
+        session: Session,
+        workflow_row: WorkflowModel,
+    ):
+        """
+        测试：INSERT / UPDATE / DELETE 后索引与 chat_messages 保持一致
+
+        Given: 建表时已创建 chat_messages_fts 与触发器
+        When: 新增、修改（merge）、删除消息
+        Then: 全文检索结果随之变化
+        """
+        assert has_chat_message_fts(session.connection())
+
+        self._save(chat_repository, "msg_1", "添加HTTP节点")
+        session.flush()
+        assert [m.id for m, _ in chat_repository.search("wf_test", "HTTP节点")] == ["msg_1"]
+
+        self._save(chat_repository, "msg_1", "添加LLM节点")
+        session.flush()
+        assert chat_repository.search("wf_test", "HTTP节点") == []
+        assert [m.id for m, _ in chat_repository.search("wf_test", "llm节点")] == ["msg_1"]
+
+        chat_repository.delete_by_workflow_id("wf_test")
+        session.flush()
+        assert chat_repository.search("wf_test", "LLM节点") == []
+
+    def test_bm25_ranking_is_limited_in_sql(
+        self,
+        chat_repository: SQLAlchemyChatMessageRepository,
+        session: Session,
+        workflow_row: WorkflowModel,
+    ):
+        """
+        测试：只有 BM25 排名前 limit 的候选参与 Python 打分
+
+        Given: 多条包含查询词的消息，其中一条多次提及
+        When: 调用search(limit=2)
+        Then: 只返回 2 条，且多次提及的消息排在前面
+        """
+        for i in range(5):
+            self._save(chat_repository, f"msg_{i}", f"第{i}次对话：请求节点配置说明", minute=i)
+        self._save(chat_repository, "msg_hot", "请求节点 请求节点 请求节点", minute=10)
+        session.flush()
+
+        results = chat_repository.search("wf_test", "请求节点", threshold=0.0, limit=2)
+
+        assert len(results) == 2
+        assert results[0][0].id == "msg_hot"
+
+    def test_short_query_falls_back_to_like(
+        self,
+        chat_repository: SQLAlchemyChatMessageRepository,
+        session: Session,
+        workflow_row: WorkflowModel,
+    ):
+        """
+        测试：短于 trigram 长度的查询回退到 LIKE，结果与原实现一致
+
+        Given: 保存包含"节点"的消息
+        When: 调用search("节点")
+        Then: 消息被返回（包含查询词加分）
+        """
+        self._save(chat_repository, "msg_short", "HTTP节点配置")
+        session.flush()
+
+        results = chat_repository.search("wf_test", "节点", threshold=0.5)
+
+        assert [m.id for m, _ in results] == ["msg_short"]
+        assert results[0][1] >= 0.6
+
+    def test_ensure_backfills_existing_database(
+        self, session: Session, workflow_row: WorkflowModel
+    ):
+        """
+        测试：对已有数据的库补建索引时回填历史消息
+
+        Given: 删除索引后写入消息（模拟升级前的库）
+        When: 调用ensure_chat_message_fts
+        Then: 新建索引并能检索到历史消息
+        """
+        conn = session.connection()
+        for statement in CHAT_MESSAGE_FTS_DROP:
+            conn.execute(text(statement))
+        repo = SQLAlchemyChatMessageRepository(session)
+        self._save(repo, "msg_old", "历史中的Webhook节点")
+        session.flush()
+
+        assert ensure_chat_message_fts(conn) is True
+        assert ensure_chat_message_fts(conn) is False
+
+        results = SQLAlchemyChatMessageRepository(session).search("wf_test", "webhook")
+        assert [m.id for m, _ in results] == ["msg_old"]
+
+
 # ====================
 # 测试类：DeleteByWorkflowId（删除消息）
 # ====================
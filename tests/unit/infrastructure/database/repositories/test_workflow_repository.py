@@ -26,7 +26,7 @@ from __future__ import annotations
 from datetime import UTC, datetime
 
 import pytest
-from sqlalchemy import create_engine, select
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import Session
 
 from src.domain.entities.edge import Edge
@@ -299,6 +299,145 @@ class TestWorkflowRepositorySave:
         assert loaded.updated_at == datetime(2025, 1, 1, 11, 0, 0, tzinfo=UTC)
 
 
+# ====================
+# 测试类：IncrementalSave（增量持久化）
+# ====================
+
+
+@pytest.fixture
+def captured_statements(in_memory_db_engine):
+    """捕获执行的 SQL 语句（用于验证写放大）"""
+    statements: list[str] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.strip())
+
+    event.listen(in_memory_db_engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(in_memory_db_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def _writes(statements: list[str]) -> list[str]:
+    return [s for s in statements if s.split()[0].upper() in {"INSERT", "UPDATE", "DELETE"}]
+
+
+class TestWorkflowRepositoryIncrementalSave:
+    """测试增量保存：只对变化的 Node/Edge 发出写语句"""
+
+    def _make_graph(self, node_count: int) -> Workflow:
+        nodes = [
+            make_node(
+                node_id=f"node_{i}",
+                node_type=NodeType.HTTP,
+                name=f"节点{i}",
+                x=float(i),
+                y=float(i),
+            )
+            for i in range(node_count)
+        ]
+        edges = [
+            make_edge(
+                edge_id=f"edge_{i}", source_node_id=f"node_{i}", target_node_id=f"node_{i + 1}"
+            )
+            for i in range(node_count - 1)
+        ]
+        return make_workflow(
+            workflow_id="wf_incremental",
+            name="增量保存",
+            description="",
+            nodes=nodes,
+            edges=edges,
+            created_at=datetime(2025, 1, 1, 10, 0, 0, tzinfo=UTC),
+            updated_at=datetime(2025, 1, 1, 10, 0, 0, tzinfo=UTC),
+        )
+
+    def test_moving_one_node_only_updates_that_node(
+        self,
+        workflow_repository: SQLAlchemyWorkflowRepository,
+        session: Session,
+        captured_statements: list[str],
+    ):
+        """
+        测试：拖动一个节点后保存，只应 UPDATE 该节点（不重写其他 Node/Edge）
+
+        Given: 已保存包含50个节点的工作流
+        When: 修改其中一个节点的位置后再次save
+        Then: 只有一条 nodes UPDATE，没有 INSERT/DELETE，也没有 edges 写入
+        """
+        workflow = self._make_graph(50)
+        workflow_repository.save(workflow)
+        session.flush()
+        captured_statements.clear()
+
+        workflow.nodes[7].position = Position(x=700.0, y=800.0)
+        workflow_repository.save(workflow)
+        session.flush()
+
+        writes = _writes(captured_statements)
+        assert len(writes) == 1
+        assert writes[0].startswith("UPDATE") and "nodes" in writes[0]
+
+        loaded = workflow_repository.get_by_id("wf_incremental")
+        moved = next(n for n in loaded.nodes if n.id == "node_7")
+        assert moved.position == Position(x=700.0, y=800.0)
+
+    def test_unchanged_workflow_issues_no_writes(
+        self,
+        workflow_repository: SQLAlchemyWorkflowRepository,
+        session: Session,
+        captured_statements: list[str],
+    ):
+        """
+        测试：未变化的工作流再次保存时不应产生任何写语句
+        """
+        workflow = self._make_graph(10)
+        workflow_repository.save(workflow)
+        session.flush()
+        captured_statements.clear()
+
+        workflow_repository.save(workflow)
+        session.flush()
+
+        assert _writes(captured_statements) == []
+
+    def test_added_and_removed_children_are_inserted_and_deleted(
+        self,
+        workflow_repository: SQLAlchemyWorkflowRepository,
+        session: Session,
+    ):
+        """
+        测试：新增/删除的 Node 和 Edge 应分别被插入和删除
+
+        Given: 已保存包含3个节点、2条边的工作流，且已通过 get_by_id 加载到 Session
+        When: 删除 node_2/edge_1，新增 node_new/edge_new 后保存
+        Then: 重新加载的聚合与实体一致（身份映射中的旧对象不会残留）
+        """
+        workflow = self._make_graph(3)
+        workflow_repository.save(workflow)
+        session.flush()
+        workflow_repository.get_by_id("wf_incremental")
+
+        workflow.nodes = [n for n in workflow.nodes if n.id != "node_2"]
+        workflow.edges = [e for e in workflow.edges if e.id != "edge_1"]
+        workflow.nodes.append(
+            make_node(node_id="node_new", node_type=NodeType.END, name="结束", x=9.0, y=9.0)
+        )
+        workflow.edges.append(
+            make_edge(edge_id="edge_new", source_node_id="node_1", target_node_id="node_new")
+        )
+        workflow.nodes[0].name = "重命名"
+        workflow_repository.save(workflow)
+        session.flush()
+
+        loaded = workflow_repository.get_by_id("wf_incremental")
+        assert {n.id for n in loaded.nodes} == {"node_0", "node_1", "node_new"}
+        assert {e.id for e in loaded.edges} == {"edge_0", "edge_new"}
+        assert next(n for n in loaded.nodes if n.id == "node_0").name == "重命名"
+        assert session.scalars(select(NodeModel).where(NodeModel.id == "node_2")).first() is None
+
+
 # ====================
 # 测试类：GetById（根据ID获取）
 # ====================
@@ -44,6 +44,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
 from collections.abc import Callable
@@ -57,6 +58,8 @@ from src.domain.entities.node import Node
 from src.domain.exceptions import DomainError
 from src.domain.value_objects.node_type import NodeType
 from src.domain.value_objects.position import Position
+from src.infrastructure.adapters.llm_rate_limiter import LLMRateLimiter, RateLimits
+from src.infrastructure.adapters.llm_response_cache import LLMResponseCache
 from src.infrastructure.executors.llm_executor import LlmExecutor
 
 # ====================
@@ -750,3 +753,125 @@ class TestLlmExecutorParameterPropagation:
 
         kwargs = fake_llm.openai_create_calls[-1]
         assert kwargs["messages"] == [{"role": "user", "content": str(value)}]
+
+
+class TestLlmExecutorResponseCache:
+    """测试注入 LLMResponseCache 后的缓存行为。"""
+
+    @pytest.mark.asyncio
+    async def test_deterministic_request_is_served_from_cache(self, node_factory, fake_llm):
+        """Given: temperature=0 的节点 + 响应缓存
+        When: 相同请求执行两次
+        Then: 只调用一次 SDK，第二次命中缓存
+        """
+        cache = LLMResponseCache()
+        executor = LlmExecutor(api_key="k", response_cache=cache)
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4", "temperature": 0})
+
+        first = await executor.execute(node, inputs={}, context={})
+        second = await executor.execute(node, inputs={}, context={})
+
+        assert first == second == "ok"
+        assert len(fake_llm.openai_create_calls) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sampling_request_is_not_cached_by_default(self, node_factory, fake_llm):
+        """Given: temperature>0 且未显式开启 cache
+        When: 相同请求执行两次
+        Then: 两次都调用 SDK
+        """
+        executor = LlmExecutor(api_key="k", response_cache=LLMResponseCache())
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4", "temperature": 0.7})
+
+        await executor.execute(node, inputs={}, context={})
+        await executor.execute(node, inputs={}, context={})
+
+        assert len(fake_llm.openai_create_calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_bypass_flag_skips_cache(self, node_factory, fake_llm):
+        """Given: 节点配置 cache=False
+        When: 确定性请求执行两次
+        Then: 两次都调用 SDK，并记录绕过次数
+        """
+        cache = LLMResponseCache()
+        executor = LlmExecutor(api_key="k", response_cache=cache)
+        node = node_factory(
+            {"prompt": "hi", "model": "anthropic/claude", "temperature": 0, "cache": False}
+        )
+
+        await executor.execute(node, inputs={}, context={})
+        await executor.execute(node, inputs={}, context={})
+
+        assert len(fake_llm.anthropic_create_calls) == 2
+        assert cache.get_stats()["bypasses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_not_shared_across_api_keys(self, node_factory, fake_llm):
+        """Given: 两个执行器共享同一响应缓存，但使用不同的 API key
+        When: 执行相同的确定性请求
+        Then: 各自调用 SDK，不复用对方的缓存响应
+        """
+        cache = LLMResponseCache()
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4", "temperature": 0})
+
+        await LlmExecutor(api_key="k1", response_cache=cache).execute(node, inputs={}, context={})
+        await LlmExecutor(api_key="k2", response_cache=cache).execute(node, inputs={}, context={})
+
+        assert len(fake_llm.openai_create_calls) == 2
+        assert cache.get_stats()["hits"] == 0
+
+
+class TestLlmExecutorSingleFlight:
+    """测试并发相同请求的在途合并。"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_are_coalesced(self, node_factory, fake_llm):
+        """Given: 未注入响应缓存的 LlmExecutor
+        When: 相同的确定性请求并发执行
+        Then: 只调用一次 SDK，结果分发给所有调用方
+        """
+        executor = LlmExecutor(api_key="k")
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4", "temperature": 0})
+
+        results = await asyncio.gather(
+            *(executor.execute(node, inputs={}, context={}) for _ in range(5))
+        )
+
+        assert results == ["ok"] * 5
+        assert len(fake_llm.openai_create_calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sampled_requests_are_not_coalesced(self, node_factory, fake_llm):
+        """Given: temperature>0 且未显式开启 cache
+        When: 相同请求并发执行
+        Then: 每个调用方各自调用 SDK（得到独立的采样结果）
+        """
+        executor = LlmExecutor(api_key="k", response_cache=LLMResponseCache())
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4", "temperature": 0.7})
+
+        await asyncio.gather(*(executor.execute(node, inputs={}, context={}) for _ in range(3)))
+
+        assert len(fake_llm.openai_create_calls) == 3
+        assert executor.single_flight.get_stats()["leaders"] == 0
+
+
+class TestLlmExecutorRateLimit:
+    """测试客户端限流接入。"""
+
+    @pytest.mark.asyncio
+    async def test_upstream_call_goes_through_rate_limiter(self, node_factory, fake_llm):
+        """Given: 注入限流器的 LlmExecutor
+        When: execute
+        Then: 调用在 provider/model 维度获得配额并在完成后释放
+        """
+        limiter = LLMRateLimiter(RateLimits(max_concurrency=2))
+        executor = LlmExecutor(api_key="k", rate_limiter=limiter)
+        node = node_factory({"prompt": "hi", "model": "openai/gpt-4"})
+
+        assert await executor.execute(node, inputs={}, context={}) == "ok"
+
+        stats = limiter.get_stats()["limiters"]["openai/gpt-4"]
+        assert stats["granted"] == 1
+        assert stats["in_flight"] == 0
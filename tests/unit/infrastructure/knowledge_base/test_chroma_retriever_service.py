@@ -2,7 +2,7 @@
 
 测试范围:
 1. 初始化：Chroma/Embeddings/Tokenizer/Collection wiring（使用 monkeypatch 隔离外部依赖）
-2. 生成向量：generate_embedding 委托调用验证
+2. 生成向量：generate_embedding 委托调用验证；embed_many 去重、分批与并发上限
 3. 文档切分：chunk_document 参数回退与 length_function wiring
 4. 检索：where clause 构建、空结果处理、距离→相似度、排序、metadata 清洗与 chunk_index 兜底、错误分支
 5. 重排序：跳过无 embedding 的 chunk、余弦相似度排序与 top_k 截断
@@ -20,6 +20,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime
 from types import SimpleNamespace
@@ -29,8 +30,12 @@ import pytest
 from pydantic import SecretStr
 
 import src.infrastructure.knowledge_base.chroma_retriever_service as chroma_mod
+from src.domain.exceptions import DomainError
 from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.infrastructure.adapters.single_flight import SingleFlight
 from src.infrastructure.knowledge_base.chroma_retriever_service import ChromaRetrieverService
+from src.infrastructure.knowledge_base.embedding_cache import EmbeddingCache
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache
 
 # ====================
 # Fakes
@@ -297,6 +302,146 @@ class TestGenerateEmbedding:
         # Then
         assert embedding == expected
 
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_share_one_provider_call(
+        self, service: ChromaRetrieverService
+    ):
+        """测试：并发的相同查询只调用一次提供方
+
+        Given: 启用在途合并，aembed_query 需要一次事件循环切换才返回
+        When: 并发 generate_embedding 同一文本 5 次
+        Then: aembed_query 只被调用一次，每个调用方拿到独立副本
+        """
+        # Given
+        calls = 0
+
+        async def aembed_query(text: str) -> list[float]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return [0.5]
+
+        service.embeddings = SimpleNamespace(aembed_query=aembed_query)
+        service.embedding_single_flight = SingleFlight()
+
+        # When
+        vectors = await asyncio.gather(*(service.generate_embedding("q") for _ in range(5)))
+
+        # Then
+        assert calls == 1
+        assert vectors == [[0.5]] * 5
+        assert vectors[0] is not vectors[1]
+
+
+class TestEmbedMany:
+    """测试批量嵌入：去重、分批、并发上限"""
+
+    @pytest.mark.asyncio
+    async def test_embed_many_dedupes_by_content_and_batches_requests(
+        self, service: ChromaRetrieverService
+    ):
+        """测试：相同文本只嵌入一次，且按 embedding_batch_size 分批调用 aembed_documents
+
+        Given: 5 条文本（其中 2 条重复），batch_size=2
+        When: 调用 embed_many
+        Then: 只发送 3 条唯一文本（2 批），结果与输入一一对应
+        """
+        # Given
+        calls: list[list[str]] = []
+
+        async def aembed_documents(texts: list[str]) -> list[list[float]]:
+            calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+        service.embeddings = SimpleNamespace(aembed_documents=aembed_documents)
+        service.embedding_batch_size = 2
+
+        # When
+        vectors = await service.embed_many(["a", "bb", "a", "ccc", "bb"])
+
+        # Then
+        assert sorted(text for batch in calls for text in batch) == ["a", "bb", "ccc"]
+        assert [len(batch) for batch in calls] == [2, 1]
+        assert vectors == [[1.0], [2.0], [1.0], [3.0], [2.0]]
+        assert vectors[0] is not vectors[2]
+
+    @pytest.mark.asyncio
+    async def test_embed_many_bounds_in_flight_batches(self, service: ChromaRetrieverService):
+        """测试：同时在途的批次数不超过 embedding_concurrency"""
+        # Given
+        in_flight = 0
+        peak = 0
+
+        async def aembed_documents(texts: list[str]) -> list[list[float]]:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [[0.0] for _ in texts]
+
+        service.embeddings = SimpleNamespace(aembed_documents=aembed_documents)
+        service.embedding_batch_size = 1
+        service.embedding_concurrency = 3
+
+        # When
+        vectors = await service.embed_many([f"t{i}" for i in range(10)])
+
+        # Then
+        assert len(vectors) == 10
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_embed_many_falls_back_to_aembed_query_and_maps_errors(
+        self, service: ChromaRetrieverService
+    ):
+        """测试：embeddings 不支持批量接口时退化为单条调用；异常转换为 DomainError"""
+        # Given
+        service.embeddings = SimpleNamespace(aembed_query=AsyncMock(return_value=[0.5]))
+
+        # When / Then
+        assert await service.embed_many(["x", "y"]) == [[0.5], [0.5]]
+        assert await service.embed_many([]) == []
+
+        service.embeddings = SimpleNamespace(aembed_query=AsyncMock(side_effect=RuntimeError()))
+        with pytest.raises(DomainError):
+            await service.embed_many(["x"])
+
+    @pytest.mark.asyncio
+    async def test_embedding_cache_skips_provider_for_known_texts(
+        self, service: ChromaRetrieverService
+    ):
+        """测试：配置嵌入缓存后，已嵌入过的文本不再调用提供方
+
+        Given: 内存嵌入缓存，先 embed_many(["a", "bb"])
+        When: 再 embed_many(["a", "bb", "ccc"]) 并 generate_embedding("a")
+        Then: 第二次只发送 "ccc"；generate_embedding 直接命中缓存
+        """
+        # Given
+        calls: list[list[str]] = []
+
+        async def aembed_documents(texts: list[str]) -> list[list[float]]:
+            calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+        service.embeddings = SimpleNamespace(
+            aembed_documents=aembed_documents, aembed_query=AsyncMock(return_value=[9.0])
+        )
+        service.embedding_cache = EmbeddingCache(db_path=None)
+        service.embedding_dimension = 1
+        await service.embed_many(["a", "bb"])
+
+        # When
+        vectors = await service.embed_many(["a", "bb", "ccc"])
+        single = await service.generate_embedding("a")
+
+        # Then
+        assert calls == [["a", "bb"], ["ccc"]]
+        assert vectors == [[1.0], [2.0], [3.0]]
+        assert single == [1.0]
+        service.embeddings.aembed_query.assert_not_awaited()
+        assert service.embedding_cache.get_stats()["hits"] == 3
+
 
 # ====================
 # Tests: chunk_document
@@ -992,3 +1137,80 @@ class TestPersistenceOperations:
 
         assert service.add_document_chunks.await_count == 1
         service.add_document_chunks.assert_awaited_with([chunk_b])
+
+
+# ====================
+# Tests: retrieval cache
+# ====================
+
+
+class TestRetrievalCache:
+    """测试检索结果缓存：重复查询命中、写入/删除分块后按工作流失效"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_query_hits_cache_until_workflow_corpus_changes(
+        self, service: ChromaRetrieverService, fake_collection: FakeCollection
+    ):
+        """测试：相同（规范化后）查询只查询一次 collection；同工作流写入分块后重新查询
+
+        Given: 配置 RetrievalCache，collection 返回一个结果
+        When: 依次检索 "Hello  World" / "hello world"，再向 wf_1 写入分块后检索
+        Then: 前两次只触发 1 次 query；写入后触发第 2 次 query；wf_2 的写入不影响 wf_1
+        """
+        # Given
+        service.retrieval_cache = RetrievalCache(ttl_seconds=60)
+        service.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+        fake_collection.query_result = {
+            "ids": [["c1"]],
+            "documents": [["content"]],
+            "metadatas": [[{"document_id": "doc1", "chunk_index": 0}]],
+            "distances": [[0.25]],
+            "embeddings": [[[0.1, 0.2]]],
+        }
+
+        def _chunk(workflow_id: str) -> DocumentChunk:
+            return DocumentChunk(
+                id=f"new-{workflow_id}",
+                document_id="doc2",
+                content="new",
+                embedding=[0.3, 0.4],
+                chunk_index=0,
+                created_at=datetime(2025, 1, 1, 0, 0, 0),
+                metadata={"workflow_id": workflow_id},
+            )
+
+        # When / Then
+        first = await service.retrieve_relevant_chunks("Hello  World", workflow_id="wf_1")
+        second = await service.retrieve_relevant_chunks("hello world", workflow_id="wf_1")
+        assert len(fake_collection.query_calls) == 1
+        assert [c.id for c, _ in second] == [c.id for c, _ in first]
+
+        await service.add_document_chunks([_chunk("wf_2")])
+        await service.retrieve_relevant_chunks("hello world", workflow_id="wf_1")
+        assert len(fake_collection.query_calls) == 1
+
+        await service.add_document_chunks([_chunk("wf_1")])
+        await service.retrieve_relevant_chunks("hello world", workflow_id="wf_1")
+        assert len(fake_collection.query_calls) == 2
+
+        stats = service.retrieval_cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["stale"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_workflows_of_deleted_chunks(
+        self, service: ChromaRetrieverService, fake_collection: FakeCollection
+    ):
+        """测试：删除分块后，按被删分块 metadata 中的 workflow_id 失效"""
+        # Given
+        cache = RetrievalCache(ttl_seconds=60)
+        service.retrieval_cache = cache
+        fake_collection.get_result = {"ids": ["c1"], "metadatas": [{"workflow_id": "wf_1"}]}
+        key = cache.make_key("chunks", "wf_1", "q", 5)
+        cache.put(key, [])
+
+        # When
+        await service.delete_document_chunks("doc1")
+
+        # Then
+        assert cache.get(key) is None
@@ -0,0 +1,136 @@
+"""EmbeddingCache单元测试
+
+测试范围:
+1. 内存 LRU：命中、淘汰、统计
+2. SQLite 持久化：跨实例复用、float32 往返
+3. 缓存键：模型与维度隔离
+4. 并发：磁盘线程不修改内存 LRU，多线程读写时 LRU 不越界
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.infrastructure.knowledge_base.embedding_cache import EmbeddingCache, content_hash
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    return str(tmp_path / "cache" / "embeddings.db")
+
+
+class TestMemoryLayer:
+    """测试内存 LRU 层"""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit_and_stats(self):
+        """测试：首次未命中，写入后命中，统计正确"""
+        cache = EmbeddingCache(db_path=None)
+        key = content_hash("hello")
+
+        assert await cache.aget_many("m", 2, [key]) == [None]
+        await cache.aput_many("m", 2, {key: [0.5, 0.25]})
+        assert await cache.aget_many("m", 2, [key]) == [[0.5, 0.25]]
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["persistent"] is False
+
+    def test_lru_evicts_least_recently_used(self):
+        """测试：超出容量时淘汰最久未访问的向量"""
+        cache = EmbeddingCache(db_path=None, max_memory_entries=2)
+        cache.put_many("m", 1, {"a": [1.0], "b": [2.0]})
+        cache.get_many("m", 1, ["a"])  # a 变为最近使用
+        cache.put_many("m", 1, {"c": [3.0]})
+
+        assert cache.get_many("m", 1, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+    def test_key_includes_model_and_dimension(self):
+        """测试：不同模型/维度之间不共享向量"""
+        cache = EmbeddingCache(db_path=None)
+        cache.put_many("m1", 2, {"h": [1.0, 0.0]})
+
+        assert cache.get_many("m2", 2, ["h"]) == [None]
+        assert cache.get_many("m1", 3, ["h"]) == [None]
+
+
+class TestPersistence:
+    """测试 SQLite 持久层"""
+
+    @pytest.mark.asyncio
+    async def test_vectors_survive_new_instance(self, db_path: str):
+        """测试：新实例（空内存）从 SQLite 读回向量，并计为磁盘命中"""
+        writer = EmbeddingCache(db_path=db_path)
+        await writer.aput_many("m", 3, {"h1": [0.5, -1.0, 2.0], "h2": [0.0, 0.0, 1.0]})
+        writer.close()
+
+        reader = EmbeddingCache(db_path=db_path)
+        result = await reader.aget_many("m", 3, ["h2", "missing", "h1"])
+
+        assert result == [[0.0, 0.0, 1.0], None, [0.5, -1.0, 2.0]]
+        stats = reader.get_stats()
+        assert stats["disk_hits"] == 2
+        assert stats["misses"] == 1
+
+        # 磁盘命中的向量会回填内存层
+        await reader.aget_many("m", 3, ["h1"])
+        assert reader.get_stats()["memory_hits"] == 1
+        reader.close()
+
+    def test_large_batches_are_chunked(self, db_path: str):
+        """测试：超过 SQLite 绑定参数上限的批量查询也能完成"""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0)
+        items = {f"h{i}": [float(i)] for i in range(2000)}
+        cache.put_many("m", 1, items)
+
+        result = cache.get_many("m", 1, list(items))
+
+        assert result == [[float(i)] for i in range(2000)]
+        cache.close()
+
+
+class TestConcurrency:
+    """测试多线程访问"""
+
+    def test_disk_lookup_does_not_touch_memory_lru(self, db_path: str):
+        """测试：_load_from_disk 只读 SQLite，回填内存由调用方完成"""
+        writer = EmbeddingCache(db_path=db_path)
+        writer.put_many("m", 1, {"h1": [1.0]})
+        writer.close()
+
+        reader = EmbeddingCache(db_path=db_path)
+        assert reader._load_from_disk("m", 1, ["h1"]) == {"h1": [1.0]}
+        assert reader.get_stats()["memory_entries"] == 0
+        assert reader.get_many("m", 1, ["h1"]) == [[1.0]]
+        assert reader.get_stats()["memory_entries"] == 1
+        reader.close()
+
+    def test_concurrent_threads_keep_lru_within_bound(self, db_path: str):
+        """测试：多线程同时读写（含磁盘回填）时 LRU 不越界且不抛异常"""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=50)
+        errors: list[BaseException] = []
+
+        def worker(offset: int) -> None:
+            try:
+                for i in range(200):
+                    key = f"h{(offset * 200 + i) % 300}"
+                    cache.put_many("m", 1, {key: [float(i)]})
+                    cache.get_many("m", 1, [key, f"h{i % 300}"])
+            except BaseException as e:  # noqa: BLE001
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert cache.get_stats()["memory_entries"] <= 50
+        cache.close()
@@ -0,0 +1,137 @@
+"""HybridRetrieverService单元测试
+
+测试范围:
+1. RRF 融合：两路都命中的分块排在前面，按 (document_id, chunk_index) 对齐
+2. 召回路径：小语料走底层向量检索；大语料走词法预筛选 + 候选向量打分
+3. 过滤条件与委托
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.infrastructure.knowledge_base.hybrid_retriever_service import (
+    HybridRetrieverService,
+    reciprocal_rank_fusion,
+)
+
+
+def make_chunk(chunk_id: str, chunk_index: int, metadata: dict | None = None) -> DocumentChunk:
+    return DocumentChunk(
+        id=chunk_id,
+        document_id="doc",
+        content=f"content-{chunk_index}",
+        embedding=[1.0],
+        chunk_index=chunk_index,
+        created_at=datetime(2025, 1, 1),
+        metadata=metadata or {},
+    )
+
+
+@pytest.fixture
+def base() -> Mock:
+    svc = Mock()
+    svc.retrieve_relevant_chunks = AsyncMock(return_value=[])
+    svc.generate_embedding = AsyncMock(return_value=[1.0])
+    svc.rerank_chunks = AsyncMock(return_value=[])
+    svc.format_context = Mock(return_value="ctx")
+    return svc
+
+
+@pytest.fixture
+def repository() -> Mock:
+    repo = Mock()
+    repo.search_chunks_lexical = AsyncMock(return_value=[])
+    repo.search_similar_chunks = AsyncMock(return_value=[])
+    repo.count_chunks = AsyncMock(return_value=0)
+    return repo
+
+
+class TestReciprocalRankFusion:
+    def test_items_in_both_rankings_rank_first(self):
+        """测试：两路都命中的分块优先；向量侧返回的分块ID不同也能对齐"""
+        vector = [(make_chunk("v0", 0), 0.9), (make_chunk("v1", 1), 0.8)]
+        lexical = [(make_chunk("l2", 2), 7.0), (make_chunk("l1", 1), 3.0)]
+
+        fused = reciprocal_rank_fusion([vector, lexical], rrf_k=60)
+
+        assert [c.chunk_index for c, _ in fused] == [1, 0, 2]
+        assert fused[0][0].id == "v1"
+        assert fused[0][1] == pytest.approx(1 / 62 + 1 / 62)
+
+
+class TestRetrieveRelevantChunks:
+    @pytest.mark.asyncio
+    async def test_small_corpus_fuses_base_vector_and_lexical_results(
+        self, base: Mock, repository: Mock
+    ):
+        """测试：小语料时向量通道使用底层检索服务，结果融合后截断到 top_k"""
+        base.retrieve_relevant_chunks.return_value = [
+            (make_chunk("v0", 0), 0.9),
+            (make_chunk("v1", 1), 0.8),
+        ]
+        repository.search_chunks_lexical.return_value = [(make_chunk("l1", 1), 3.0)]
+        service = HybridRetrieverService(base, repository, candidate_pool=20)
+
+        results = await service.retrieve_relevant_chunks("q", workflow_id="wf", top_k=2)
+
+        base.retrieve_relevant_chunks.assert_awaited_once_with(
+            query="q", workflow_id="wf", top_k=20, filters=None
+        )
+        repository.search_similar_chunks.assert_not_awaited()
+        assert [c.chunk_index for c, _ in results] == [1, 0]
+        assert results[0][1] == pytest.approx((61 / 62 + 1) / 2)
+        assert all(0.0 < score <= 1.0 for _, score in results)
+
+    @pytest.mark.asyncio
+    async def test_large_corpus_prefilters_vector_scoring_with_lexical_candidates(
+        self, base: Mock, repository: Mock
+    ):
+        """测试：分块数超过阈值且词法召回足够时，只对词法候选做向量打分"""
+        lexical = [(make_chunk(f"l{i}", i), 10.0 - i) for i in range(3)]
+        repository.search_chunks_lexical.return_value = lexical
+        repository.count_chunks.return_value = 50_000
+        repository.search_similar_chunks.return_value = [(lexical[2][0], 0.9)]
+        service = HybridRetrieverService(base, repository, prefilter_min_chunks=10_000)
+
+        results = await service.retrieve_relevant_chunks("q", workflow_id="wf", top_k=2)
+
+        base.retrieve_relevant_chunks.assert_not_awaited()
+        kwargs = repository.search_similar_chunks.await_args.kwargs
+        assert kwargs["candidate_ids"] == ["l0", "l1", "l2"]
+        assert kwargs["workflow_id"] == "wf"
+        assert [c.id for c, _ in results] == ["l2", "l0"]
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_to_lexical_hits(self, base: Mock, repository: Mock):
+        """测试：metadata 过滤条件同样作用于词法通道"""
+        repository.search_chunks_lexical.return_value = [
+            (make_chunk("l0", 0, {"source": "upload"}), 2.0),
+            (make_chunk("l1", 1, {"source": "web"}), 1.0),
+        ]
+        service = HybridRetrieverService(base, repository)
+
+        results = await service.retrieve_relevant_chunks("q", filters={"source": "web"})
+
+        assert [c.id for c, _ in results] == ["l1"]
+
+
+class TestDelegation:
+    @pytest.mark.asyncio
+    async def test_context_uses_hybrid_results_and_base_formatting(
+        self, base: Mock, repository: Mock
+    ):
+        repository.search_chunks_lexical.return_value = [(make_chunk("l0", 0), 2.0)]
+        service = HybridRetrieverService(base, repository)
+
+        assert await service.get_context_for_query("q", max_tokens=100) == "ctx"
+        chunks_with_scores, max_tokens = base.format_context.call_args.args
+        assert [c.id for c, _ in chunks_with_scores] == ["l0"]
+        assert max_tokens == 100
+
+        await service.rerank_chunks("q", [], top_k=3)
+        base.rerank_chunks.assert_awaited_once_with("q", [], 3)
@@ -0,0 +1,113 @@
+"""scripts/ingest_docs.py 增量导入测试
+
+覆盖（使用桩嵌入模型，不访问网络）：
+- mtime 与大小未变化的文件直接跳过，不再嵌入
+- 内容变化的文件重新嵌入并替换旧分块
+- 目录中已删除的文件，删除其文档、分块与清单记录
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+from scripts import ingest_docs
+from scripts.ingest_docs import DocumentIngester
+
+
+class StubEmbeddings:
+    """记录每次批量嵌入的文本，返回固定维度的向量"""
+
+    instances: list[StubEmbeddings] = []
+
+    def __init__(self, **kwargs):
+        self.calls: list[list[str]] = []
+        StubEmbeddings.instances.append(self)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    @property
+    def embedded(self) -> list[str]:
+        return [text for batch in self.calls for text in batch]
+
+
+class WhitespaceTokenizer:
+    def encode(self, text: str) -> list[str]:
+        return text.split()
+
+
+@pytest.fixture
+async def ingester(tmp_path: Path, monkeypatch) -> AsyncIterator[DocumentIngester]:
+    monkeypatch.setattr(ingest_docs, "OpenAIEmbeddings", StubEmbeddings)
+    monkeypatch.setattr(
+        ingest_docs.tiktoken, "encoding_for_model", lambda model: WhitespaceTokenizer()
+    )
+    instance = DocumentIngester(
+        db_path=str(tmp_path / "kb.db"), openai_api_key="test", parse_workers=0
+    )
+    yield instance
+    await instance.close()
+
+
+def _write(path: Path, text: str, mtime_ns: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def docs(tmp_path: Path) -> Path:
+    root = tmp_path / "docs"
+    root.mkdir()
+    _write(root / "a.txt", "alpha document", 1_000_000_000)
+    _write(root / "b.txt", "beta document", 1_000_000_000)
+    return root
+
+
+async def _chunk_contents(ingester: DocumentIngester, path: Path) -> list[str]:
+    document_id = ingester._file_document_id(str(path), None)
+    chunks = await ingester.repository.find_chunks_by_document_id(document_id)
+    return [chunk.content for chunk in chunks]
+
+
+class TestIncrementalIngest:
+    @pytest.mark.asyncio
+    async def test_unchanged_files_are_skipped(self, ingester: DocumentIngester, docs: Path):
+        await ingester.ingest_directory(str(docs))
+        embeddings = StubEmbeddings.instances[-1]
+        assert sorted(embeddings.embedded) == ["alpha document", "beta document"]
+
+        document_ids = await ingester.ingest_directory(str(docs))
+
+        assert document_ids == []
+        assert len(embeddings.embedded) == 2
+
+    @pytest.mark.asyncio
+    async def test_modified_file_is_re_embedded(self, ingester: DocumentIngester, docs: Path):
+        await ingester.ingest_directory(str(docs))
+        embeddings = StubEmbeddings.instances[-1]
+        embeddings.calls.clear()
+
+        _write(docs / "a.txt", "alpha document, second edition", 2_000_000_000)
+        document_ids = await ingester.ingest_directory(str(docs))
+
+        assert document_ids == [ingester._file_document_id(str(docs / "a.txt"), None)]
+        assert embeddings.embedded == ["alpha document, second edition"]
+        assert await _chunk_contents(ingester, docs / "a.txt") == ["alpha document, second edition"]
+
+    @pytest.mark.asyncio
+    async def test_deleted_file_is_removed(self, ingester: DocumentIngester, docs: Path):
+        await ingester.ingest_directory(str(docs))
+        removed = docs / "b.txt"
+        document_id = ingester._file_document_id(str(removed), None)
+
+        removed.unlink()
+        await ingester.ingest_directory(str(docs))
+
+        assert await ingester.repository.find_document_by_id(document_id) is None
+        assert await _chunk_contents(ingester, removed) == []
+        assert str(removed) not in ingester.manifest.load(None, str(docs))
@@ -0,0 +1,185 @@
+"""IVFPQIndex单元测试
+
+测试范围:
+1. k-means / 子空间分配的基本性质
+2. 训练 + 检索：精排后与精确检索一致、墓碑过滤、压缩比
+3. 增量追加、subset、持久化（内存映射加载）
+4. LocalVectorIndex 集成：达到阈值启用近似索引、追加/压缩/重载后保持一致
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.infrastructure.knowledge_base.ivfpq_index import (
+    IVFPQIndex,
+    assign_subspaces,
+    default_subquantizers,
+    kmeans,
+)
+from src.infrastructure.knowledge_base.local_vector_index import LocalVectorIndex
+
+
+def clustered(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    """带簇结构、低内在维度的归一化向量（接近真实嵌入分布）"""
+    fixed = np.random.default_rng(42)
+    centers = fixed.standard_normal((8, 8)).astype(np.float32)
+    basis = fixed.standard_normal((8, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    latent = centers[rng.integers(0, 8, n)] + 0.5 * rng.standard_normal((n, 8))
+    vectors = (latent @ basis + 0.05 * rng.standard_normal((n, dim))).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top(vectors: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    return np.argsort(-(vectors @ query), kind="stable")[:k].tolist()
+
+
+class TestQuantizers:
+    def test_kmeans_separates_well_separated_clusters(self):
+        data = np.concatenate(
+            [np.zeros((50, 2)), np.full((50, 2), 10.0)], dtype=np.float32
+        ) + np.random.default_rng(0).normal(0, 0.1, (100, 2)).astype(np.float32)
+
+        centroids = kmeans(data, 2, seed=1)
+
+        assert sorted(np.round(centroids[:, 0]).tolist()) == [0.0, 10.0]
+
+    def test_assign_subspaces_matches_bruteforce(self):
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((50, 8)).astype(np.float32)
+        codebooks = rng.standard_normal((2, 5, 4)).astype(np.float32)
+
+        codes = assign_subspaces(data, codebooks)
+
+        for j in range(2):
+            sub = data[:, j * 4 : (j + 1) * 4]
+            expected = np.argmin(((sub[:, None, :] - codebooks[j][None]) ** 2).sum(-1), axis=1)
+            assert codes[:, j].tolist() == expected.tolist()
+
+    def test_default_subquantizers_divides_dimension(self):
+        assert default_subquantizers(1536) == 192
+        assert default_subquantizers(100) == 10
+        assert default_subquantizers(4) == 1
+
+
+class TestIVFPQIndex:
+    def test_refined_search_matches_exact_top_k(self):
+        vectors = clustered(2000)
+        index = IVFPQIndex.train(vectors, nlist=16)
+        queries = clustered(20, seed=1)
+
+        recall = np.mean(
+            [
+                len(
+                    set(index.search(q, 10, nprobe=8, refine=vectors)[0].tolist())
+                    & set(exact_top(vectors, q, 10))
+                )
+                / 10
+                for q in queries
+            ]
+        )
+
+        assert recall >= 0.95
+        assert vectors.shape[1] * 4 / index.bytes_per_vector >= 8
+
+    def test_dead_rows_are_excluded_and_scores_sorted(self):
+        vectors = clustered(500)
+        index = IVFPQIndex.train(vectors, nlist=8)
+        best = exact_top(vectors, vectors[0], 1)[0]
+        dead = np.zeros(500, dtype=bool)
+        dead[best] = True
+
+        rows, scores = index.search(vectors[0], 5, nprobe=8, dead=dead, refine=vectors)
+
+        assert best not in rows.tolist()
+        assert scores.tolist() == sorted(scores.tolist(), reverse=True)
+
+    def test_add_subset_and_memory_mapped_round_trip(self, tmp_path: Path):
+        vectors = clustered(600)
+        index = IVFPQIndex.train(vectors[:400], nlist=8)
+        index.add(vectors[400:])
+        assert index.size == 600 and index.trained_size == 400
+
+        keep = np.arange(600) % 2 == 0
+        half = index.subset(keep)
+        assert half.size == 300
+        assert half.codes.tolist() == index.codes[keep].tolist()
+
+        stem = tmp_path / "wf.ivfpq"
+        half.save(stem)
+        loaded = IVFPQIndex.load(stem, trained_size=400)
+
+        assert loaded is not None
+        assert isinstance(loaded.codes, np.memmap)
+        query = vectors[2]
+        assert (
+            loaded.search(query, 5, refine=vectors[keep])[0].tolist()
+            == half.search(query, 5, refine=vectors[keep])[0].tolist()
+        )
+        IVFPQIndex.remove_files(stem)
+        assert IVFPQIndex.load(stem) is None
+
+
+class TestLocalVectorIndexIntegration:
+    @pytest.fixture
+    def index(self, tmp_path: Path) -> LocalVectorIndex:
+        return LocalVectorIndex(tmp_path / "vectors", ann_min_vectors=200, ann_nprobe=8)
+
+    def test_ann_enabled_above_threshold_and_kept_in_sync(self, index: LocalVectorIndex):
+        vectors = clustered(300)
+        ids = [f"c{i}" for i in range(300)]
+        index.rebuild("small", 1, ids[:100], vectors[:100])
+        index.rebuild("wf", 1, ids, vectors)
+
+        assert index.ann_stats("small") is None
+        stats = index.ann_stats("wf")
+        assert stats is not None and stats["vectors"] == 300
+
+        extra = clustered(5, seed=7)
+        index.append("wf", 2, ["new0", "new1", "new2", "new3", "new4"], extra)
+        assert index.ann_stats("wf")["vectors"] == 305
+        assert index.search("wf", extra[3], limit=1)[0][0] == "new3"
+
+        index.delete("wf", 3, ["new3"])
+        assert "new3" not in [c for c, _ in index.search("wf", extra[3], limit=5)]
+        assert index.search("wf", vectors[10], limit=1)[0][0] == "c10"
+
+    def test_compaction_and_reload_reuse_ann(self, tmp_path: Path, index: LocalVectorIndex):
+        vectors = clustered(300)
+        ids = [f"c{i}" for i in range(300)]
+        index.rebuild("wf", 1, ids, vectors)
+        index.compaction_threshold = 0.1
+        index.delete("wf", 2, ids[:50])
+
+        assert index.ann_stats("wf")["vectors"] == 250
+        assert index.search("wf", vectors[60], limit=1)[0][0] == "c60"
+
+        reloaded = LocalVectorIndex(tmp_path / "vectors", ann_min_vectors=200)
+        assert reloaded.load("wf", 2)
+        assert reloaded.ann_stats("wf")["vectors"] == 250
+        assert reloaded.search("wf", vectors[299], limit=1)[0][0] == "c299"
+
+    def test_append_keeps_saved_ann_and_reload_encodes_new_rows(
+        self, tmp_path: Path, index: LocalVectorIndex, monkeypatch
+    ):
+        saves: list[Path] = []
+        save = IVFPQIndex.save
+        monkeypatch.setattr(
+            IVFPQIndex, "save", lambda self, stem: (saves.append(stem), save(self, stem))
+        )
+        vectors = clustered(300)
+        index.rebuild("wf", 1, [f"c{i}" for i in range(300)], vectors)
+        assert len(saves) == 1
+
+        extra = clustered(5, seed=7)
+        index.append("wf", 2, [f"new{i}" for i in range(5)], extra)
+        assert len(saves) == 1
+
+        reloaded = LocalVectorIndex(tmp_path / "vectors", ann_min_vectors=200, ann_nprobe=8)
+        assert reloaded.load("wf", 2)
+        assert reloaded.ann_stats("wf")["vectors"] == 305
+        assert reloaded.search("wf", extra[3], limit=1)[0][0] == "new3"
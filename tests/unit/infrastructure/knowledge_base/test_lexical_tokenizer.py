@@ -0,0 +1,33 @@
+"""lexical_tokenizer单元测试"""
+
+from __future__ import annotations
+
+from src.infrastructure.knowledge_base.lexical_tokenizer import (
+    to_fts_document,
+    to_fts_query,
+    tokenize,
+)
+
+
+class TestTokenize:
+    def test_cjk_runs_become_bigrams(self):
+        assert tokenize("检索增强") == ["检索", "索增", "增强"]
+        assert tokenize("我 爱") == ["我", "爱"]
+
+    def test_identifiers_kept_whole_and_split_into_parts(self):
+        tokens = tokenize("Node http_request failed: E-1001 (v1.2)")
+
+        assert tokens[:4] == ["node", "http_request", "http", "request"]
+        assert "e-1001" in tokens
+        assert "1001" in tokens
+        assert "v1.2" in tokens
+
+    def test_mixed_text_and_punctuation(self):
+        assert tokenize("调用API失败，请重试") == ["调用", "api", "失败", "请重", "重试"]
+
+
+class TestFtsHelpers:
+    def test_document_and_query_forms(self):
+        assert to_fts_document("RAG 检索") == "rag 检索"
+        assert to_fts_query("rag rag 检索") == '"rag" OR "检索"'
+        assert to_fts_query("，。！") == ""
@@ -0,0 +1,154 @@
+"""LocalVectorIndex单元测试
+
+测试范围:
+1. rebuild + search：精确 top-k 余弦检索、阈值过滤、维度不匹配
+2. append / delete：增量追加、墓碑、自动压缩
+3. 版本校验：版本跳跃、维度不一致、矩阵文件被其他进程替换时丢弃分区
+4. load：sidecar 版本一致时从磁盘恢复
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.infrastructure.knowledge_base.local_vector_index import (
+    LocalVectorIndex,
+    decode_embedding,
+    encode_embedding,
+)
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> LocalVectorIndex:
+    return LocalVectorIndex(tmp_path / "vectors", compaction_threshold=0.5)
+
+
+def _vectors() -> np.ndarray:
+    return np.array(
+        [
+            [1.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0],
+            [0.7, 0.7, 0.0],
+            [0.0, 0.0, 2.0],
+        ],
+        dtype=np.float32,
+    )
+
+
+class TestSearch:
+    def test_search_returns_exact_top_k_in_descending_order(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a", "b", "ab", "c"], _vectors())
+
+        hits = index.search("wf", np.array([1.0, 0.1, 0.0]), limit=2)
+
+        assert [chunk_id for chunk_id, _ in hits] == ["a", "ab"]
+        assert hits[0][1] == pytest.approx(1.0 / np.sqrt(1.01), rel=1e-5)
+        assert hits[0][1] >= hits[1][1]
+
+    def test_search_applies_threshold_and_handles_dimension_mismatch(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a", "b", "ab", "c"], _vectors())
+
+        assert [c for c, _ in index.search("wf", np.array([0.0, 0.0, 1.0]), 4, 0.5)] == ["c"]
+        assert index.search("wf", np.array([1.0, 0.0]), limit=3) == []
+        assert index.search("missing", np.array([1.0, 0.0, 0.0]), limit=3) == []
+
+    def test_search_restricted_to_candidates(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a", "b", "ab", "c"], _vectors())
+        index.delete("wf", 2, ["ab"])
+
+        hits = index.search("wf", np.array([1.0, 0.1, 0.0]), 3, candidates=["c", "ab", "b", "x"])
+
+        assert [chunk_id for chunk_id, _ in hits] == ["b", "c"]
+        assert index.search("wf", np.array([1.0, 0.0, 0.0]), 3, candidates=["x"]) == []
+
+
+class TestIncrementalUpdates:
+    def test_append_and_delete_are_visible_to_search(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a", "b"], _vectors()[:2])
+
+        index.append("wf", 2, ["c"], _vectors()[3:])
+        index.delete("wf", 3, ["a"])
+
+        hits = index.search("wf", np.array([1.0, 0.0, 1.0]), limit=5)
+        assert [chunk_id for chunk_id, _ in hits] == ["c", "b"]
+        assert index.live_count("wf") == 2
+        assert index.version("wf") == 3
+
+    def test_delete_beyond_threshold_compacts_matrix_file(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a", "b", "ab", "c"], _vectors())
+        matrix_file = index.index_dir / "wf.f32"
+
+        index.delete("wf", 2, ["a", "b", "ab"])
+
+        assert matrix_file.stat().st_size == 3 * 4
+        assert index.search("wf", np.array([0.0, 0.0, 1.0]), limit=5)[0][0] == "c"
+
+    def test_version_gap_drops_partition(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a"], _vectors()[:1])
+
+        index.append("wf", 5, ["b"], _vectors()[1:2])
+
+        assert index.version("wf") is None
+
+    def test_dimension_mismatch_on_append_drops_partition(self, index: LocalVectorIndex):
+        index.rebuild("wf", 1, ["a"], _vectors()[:1])
+
+        index.append("wf", 2, ["b"], np.array([[1.0, 0.0]], dtype=np.float32))
+
+        assert index.version("wf") is None
+
+    def test_append_after_matrix_file_replaced_by_other_writer_drops_partition(
+        self, tmp_path: Path
+    ):
+        first = LocalVectorIndex(tmp_path / "vectors")
+        other = LocalVectorIndex(tmp_path / "vectors")
+        first.rebuild("wf", 1, ["a", "b"], _vectors()[:2])
+        other.rebuild("wf", 2, ["a", "b", "c"], _vectors()[[0, 1, 3]])
+
+        first.append("wf", 2, ["x"], _vectors()[2:3])
+
+        assert first.version("wf") is None
+        assert (tmp_path / "vectors" / "wf.f32").stat().st_size == 3 * 3 * 4
+
+    def test_append_writes_sidecar_metadata(self, tmp_path: Path):
+        first = LocalVectorIndex(tmp_path / "vectors")
+        first.rebuild("wf", 1, ["a", "b"], _vectors()[:2])
+        first.append("wf", 2, ["c"], _vectors()[3:])
+
+        second = LocalVectorIndex(tmp_path / "vectors")
+        assert second.load("wf", 2) is True
+        assert second.live_count("wf") == 3
+
+
+class TestPersistence:
+    def test_load_reuses_matrix_when_version_matches(self, tmp_path: Path):
+        first = LocalVectorIndex(tmp_path / "vectors")
+        first.rebuild("wf", 1, ["a", "b"], _vectors()[:2])
+        first.append("wf", 2, ["c"], _vectors()[3:])
+        first.flush()
+
+        second = LocalVectorIndex(tmp_path / "vectors")
+        assert second.load("wf", 1) is False
+        assert second.load("wf", 2) is True
+        assert second.search("wf", np.array([0.0, 0.0, 1.0]), limit=1)[0][0] == "c"
+
+    def test_append_persists_ids_incrementally(self, tmp_path: Path):
+        index = LocalVectorIndex(tmp_path / "vectors")
+        index.rebuild("wf", 1, ["a", "b"], _vectors()[:2])
+        index.append("wf", 2, ["c"], _vectors()[3:])
+
+        meta = json.loads((tmp_path / "vectors" / "wf.json").read_text(encoding="utf-8"))
+        ids = (tmp_path / "vectors" / "wf.ids").read_text(encoding="utf-8").splitlines()
+        assert "ids" not in meta and meta["size"] == 3
+        assert [json.loads(line) for line in ids] == ["a", "b", "c"]
+
+    def test_embedding_blob_round_trip(self):
+        blob = encode_embedding([0.25, -1.5, 3.0])
+
+        assert len(blob) == 12
+        assert decode_embedding(blob) == [0.25, -1.5, 3.0]
+        assert decode_embedding(None) == []
@@ -0,0 +1,136 @@
+"""重排序器单元测试
+
+测试范围:
+1. CosineReranker：向量化余弦、零向量、维度不匹配
+2. MMRReranker：多样化选择、λ=1 退化为相关性排序
+3. CrossEncoderReranker：可插拔打分函数、词项重叠替身
+4. ChromaRetrieverService 使用注入的重排序器
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+import src.infrastructure.knowledge_base.rerankers as rerankers_mod
+from src.domain.exceptions import DomainError
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.infrastructure.knowledge_base.chroma_retriever_service import ChromaRetrieverService
+from src.infrastructure.knowledge_base.rerankers import (
+    CosineReranker,
+    CrossEncoderReranker,
+    MMRReranker,
+    create_reranker,
+    lexical_overlap_scorer,
+)
+
+
+def make_chunk(chunk_id: str, embedding: list[float], content: str = "") -> DocumentChunk:
+    return DocumentChunk(
+        id=chunk_id,
+        document_id="doc",
+        content=content or chunk_id,
+        embedding=embedding,
+        chunk_index=0,
+        created_at=datetime(2025, 1, 1),
+        metadata={},
+    )
+
+
+class TestCosineReranker:
+    @pytest.mark.asyncio
+    async def test_scores_and_orders_by_cosine(self):
+        chunks = [
+            make_chunk("orthogonal", [0.0, 1.0]),
+            make_chunk("same", [2.0, 0.0]),
+            make_chunk("zero", [0.0, 0.0]),
+            make_chunk("diagonal", [1.0, 1.0]),
+        ]
+
+        ranked = await CosineReranker().rerank("q", [1.0, 0.0], chunks, top_k=3)
+
+        assert [c.id for c, _ in ranked] == ["same", "diagonal", "orthogonal"]
+        assert ranked[0][1] == pytest.approx(1.0)
+        assert ranked[1][1] == pytest.approx(2**-0.5)
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_raises(self):
+        with pytest.raises(ValueError):
+            await CosineReranker().rerank("q", [1.0, 0.0], [make_chunk("c", [1.0])], top_k=1)
+
+
+class TestMMRReranker:
+    @pytest.mark.asyncio
+    async def test_prefers_diverse_chunk_over_near_duplicate(self):
+        """测试：λ=0.5 时第二个结果选择与第一个不重复的分块"""
+        chunks = [
+            make_chunk("a", [1.0, 0.1]),
+            make_chunk("a_dup", [1.0, 0.12]),
+            make_chunk("b", [0.7, -0.7]),
+        ]
+
+        diverse = await MMRReranker(lambda_mult=0.5).rerank("q", [1.0, 0.0], chunks, 2)
+        relevant = await MMRReranker(lambda_mult=1.0).rerank("q", [1.0, 0.0], chunks, 2)
+
+        assert [c.id for c, _ in diverse] == ["a", "b"]
+        assert diverse[1][1] == pytest.approx(2**-0.5, rel=1e-5)
+        assert [c.id for c, _ in relevant] == ["a", "a_dup"]
+
+
+class TestCrossEncoderReranker:
+    @pytest.mark.asyncio
+    async def test_custom_scorer_receives_pairs(self):
+        seen: list[list[tuple[str, str]]] = []
+
+        def scorer(pairs: list[tuple[str, str]]) -> list[float]:
+            seen.append(pairs)
+            return [float(len(text)) for _, text in pairs]
+
+        chunks = [make_chunk("s", [1.0], "ab"), make_chunk("l", [1.0], "abcd")]
+        ranked = await CrossEncoderReranker(scorer, run_in_thread=True).rerank(
+            "q", [], chunks, top_k=1
+        )
+
+        assert seen == [[("q", "ab"), ("q", "abcd")]]
+        assert [(c.id, s) for c, s in ranked] == [("l", 4.0)]
+
+    def test_lexical_overlap_scorer_prefers_covering_text(self):
+        scores = lexical_overlap_scorer(
+            [
+                ("错误码 E-1001", "节点返回错误码 E-1001"),
+                ("错误码 E-1001", "错误码说明"),
+                ("错误码 E-1001", "无关内容"),
+            ]
+        )
+
+        assert scores[0] > scores[1] > scores[2] == 0.0
+        assert scores[0] <= 1.0
+
+    def test_factory_and_missing_dependency(self, monkeypatch: pytest.MonkeyPatch):
+        assert isinstance(create_reranker("mmr"), MMRReranker)
+        assert isinstance(create_reranker("cross_encoder"), CrossEncoderReranker)
+        assert isinstance(create_reranker("cosine"), CosineReranker)
+
+        monkeypatch.setattr(rerankers_mod, "CrossEncoder", None)
+        with pytest.raises(DomainError):
+            create_reranker("cross_encoder", model_name="local-model")
+
+
+class TestRetrieverIntegration:
+    @pytest.mark.asyncio
+    async def test_rerank_chunks_delegates_to_injected_reranker(self):
+        service = ChromaRetrieverService.__new__(ChromaRetrieverService)
+        service.generate_embedding = AsyncMock(return_value=[1.0, 0.0])
+        service.reranker = MMRReranker(lambda_mult=0.5)
+        chunks = [
+            make_chunk("a", [1.0, 0.1]),
+            make_chunk("no_embedding", []),
+            make_chunk("a_dup", [1.0, 0.12]),
+            make_chunk("b", [0.7, -0.7]),
+        ]
+
+        ranked = await service.rerank_chunks("q", chunks, top_k=2)
+
+        assert [c.id for c, _ in ranked] == ["a", "b"]
@@ -0,0 +1,108 @@
+"""RetrievalCache单元测试
+
+测试范围:
+1. 缓存键：查询规范化、filters 顺序无关
+2. 版本失效：工作流分区、全局分区、全库查询
+3. TTL 与 LRU 淘汰、统计指标
+"""
+
+from __future__ import annotations
+
+import pytest
+
+import src.infrastructure.knowledge_base.retrieval_cache as cache_mod
+from src.infrastructure.knowledge_base.retrieval_cache import RetrievalCache, normalize_query
+
+
+class TestKeys:
+    """测试缓存键构造"""
+
+    def test_normalize_query_collapses_whitespace_and_case(self):
+        assert normalize_query("  What IS\tRAG?\n") == "what is rag?"
+
+    def test_filters_order_does_not_matter(self):
+        a = RetrievalCache.make_key("chunks", "wf", "q", 5, {"a": "1", "b": "2"})
+        b = RetrievalCache.make_key("chunks", "wf", "q", 5, {"b": "2", "a": "1"})
+        c = RetrievalCache.make_key("chunks", "wf", "q", 3, {"a": "1", "b": "2"})
+
+        assert a == b
+        assert a != c
+
+
+class TestInvalidation:
+    """测试语料版本失效"""
+
+    def test_bump_only_invalidates_same_workflow(self):
+        """测试：wf_2 变更不影响 wf_1；wf_1 变更后 wf_1 条目失效"""
+        cache = RetrievalCache()
+        key = cache.make_key("chunks", "wf_1", "q", 5)
+        cache.put(key, ["result"])
+
+        cache.bump("wf_2")
+        assert cache.get(key) == ["result"]
+
+        cache.bump("wf_1")
+        assert cache.get(key) is None
+        assert cache.get_stats()["stale"] == 1
+
+    def test_global_partition_change_invalidates_workflow_queries(self):
+        """测试：全局知识库分区变更会使工作流查询失效"""
+        cache = RetrievalCache()
+        key = cache.make_key("chunks", "wf_1", "q", 5)
+        cache.put(key, ["result"])
+
+        cache.bump(None)
+
+        assert cache.get(key) is None
+
+    def test_unscoped_query_invalidated_by_any_change(self):
+        """测试：不带 workflow_id 的查询在任何工作流变更后失效"""
+        cache = RetrievalCache()
+        key = cache.make_key("chunks", None, "q", 5)
+        cache.put(key, ["result"])
+
+        cache.bump("wf_9")
+
+        assert cache.get(key) is None
+
+    def test_bump_all_clears_entries(self):
+        cache = RetrievalCache()
+        cache.put(cache.make_key("chunks", "wf_1", "q", 5), ["result"])
+
+        cache.bump_all()
+
+        assert cache.get_stats()["entries"] == 0
+
+
+class TestExpiryAndEviction:
+    """测试 TTL 与 LRU"""
+
+    def test_entry_expires_after_ttl(self, monkeypatch: pytest.MonkeyPatch):
+        now = [100.0]
+        monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+        cache = RetrievalCache(ttl_seconds=10)
+        key = cache.make_key("chunks", "wf_1", "q", 5)
+        cache.put(key, ["result"])
+
+        now[0] = 105.0
+        assert cache.get(key) == ["result"]
+
+        now[0] = 111.0
+        assert cache.get(key) is None
+        assert cache.get_stats()["expired"] == 1
+
+    def test_lru_eviction_and_stats(self):
+        cache = RetrievalCache(max_entries=2)
+        keys = [cache.make_key("chunks", "wf", f"q{i}", 5) for i in range(3)]
+        cache.put(keys[0], 0)
+        cache.put(keys[1], 1)
+        assert cache.get(keys[0]) == 0  # keys[0] 变为最近使用
+        cache.put(keys[2], 2)
+
+        assert cache.get(keys[1]) is None
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 2
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
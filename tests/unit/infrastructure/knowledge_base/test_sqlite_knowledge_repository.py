@@ -3,6 +3,7 @@
 测试范围:
 1. KnowledgeBase: save, find_by_id, find_by_owner
 2. Document: save, find_by_id, find_by_workflow_id, update, delete, count
+3. DocumentChunk: save, find_by_document_id, search_similar, delete（本地向量索引）
 
 测试原则:
 - 使用真实的 SQLite 文件数据库 (tmp_path)
@@ -20,12 +21,17 @@
 
 from __future__ import annotations
 
+import asyncio
+import threading
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from src.domain.knowledge_base.entities.document import Document
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
 from src.domain.knowledge_base.entities.knowledge_base import KnowledgeBase
 from src.domain.value_objects.document_source import DocumentSource
 from src.domain.value_objects.document_status import DocumentStatus
@@ -46,9 +52,11 @@ def sqlite_db_path(tmp_path: Path) -> str:
 
 
 @pytest.fixture
-async def repo(sqlite_db_path: str) -> SQLiteKnowledgeRepository:
-    """创建SQLiteKnowledgeRepository实例"""
-    return SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+async def repo(sqlite_db_path: str) -> AsyncIterator[SQLiteKnowledgeRepository]:
+    """创建SQLiteKnowledgeRepository实例（测试结束时关闭连接池）"""
+    repository = SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+    yield repository
+    await repository.close()
 
 
 # ====================
@@ -390,3 +398,374 @@ class TestDocumentCount:
         assert wf1_count == 2
         assert wf2_count == 1
         assert missing_count == 0
+
+
+# ====================
+# Test classes: DocumentChunk（本地向量索引）
+# ====================
+
+
+def make_chunk(
+    *,
+    chunk_id: str,
+    document_id: str,
+    embedding: list[float],
+    chunk_index: int = 0,
+    content: str | None = None,
+) -> DocumentChunk:
+    """创建测试分块（固定ID + 确定性时间戳）"""
+    return DocumentChunk(
+        id=chunk_id,
+        document_id=document_id,
+        content=content or f"内容-{chunk_id}",
+        embedding=embedding,
+        chunk_index=chunk_index,
+        created_at=datetime(2025, 3, 1, 8, 0, 0),
+        metadata={"k": chunk_id},
+    )
+
+
+class TestDocumentChunkOperations:
+    """测试文档分块与向量检索"""
+
+    @pytest.mark.asyncio
+    async def test_save_and_find_chunks_round_trip_embedding_as_float32(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：分块应按 chunk_index 排序返回，向量以 float32 round-trip"""
+        await repo.save_document(make_document(doc_id="doc_1", workflow_id="wf_1"))
+        await repo.save_document_chunks(
+            [
+                make_chunk(
+                    chunk_id="c2", document_id="doc_1", embedding=[0.5, 0.25], chunk_index=1
+                ),
+                make_chunk(chunk_id="c1", document_id="doc_1", embedding=[1.0, 0.0], chunk_index=0),
+            ]
+        )
+
+        chunks = await repo.find_chunks_by_document_id("doc_1")
+
+        assert [c.id for c in chunks] == ["c1", "c2"]
+        assert chunks[1].embedding == [0.5, 0.25]
+        assert chunks[1].metadata == {"k": "c2"}
+
+    @pytest.mark.asyncio
+    async def test_search_similar_chunks_scopes_by_workflow_and_threshold(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：检索应限定工作流、按相似度降序并应用阈值；workflow_id=None 时全局检索"""
+        await repo.save_document(make_document(doc_id="doc_a", workflow_id="wf_a"))
+        await repo.save_document(make_document(doc_id="doc_b", workflow_id="wf_b"))
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="a1", document_id="doc_a", embedding=[1.0, 0.0])
+        )
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="a2", document_id="doc_a", embedding=[0.0, 1.0])
+        )
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="b1", document_id="doc_b", embedding=[0.9, 0.1])
+        )
+
+        scoped = await repo.search_similar_chunks([1.0, 0.0], workflow_id="wf_a", threshold=0.5)
+        everywhere = await repo.search_similar_chunks([1.0, 0.0], limit=2, threshold=0.0)
+
+        assert [(c.id, round(score, 4)) for c, score in scoped] == [("a1", 1.0)]
+        assert [c.id for c, _ in everywhere] == ["a1", "b1"]
+
+    @pytest.mark.asyncio
+    async def test_delete_document_removes_chunks_from_search(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：删除文档后其分块不再出现在检索结果中"""
+        await repo.save_document(make_document(doc_id="doc_d", workflow_id="wf_d"))
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="d1", document_id="doc_d", embedding=[1.0, 0.0])
+        )
+        assert len(await repo.search_similar_chunks([1.0, 0.0], workflow_id="wf_d")) == 1
+
+        await repo.delete_document("doc_d")
+
+        assert await repo.search_similar_chunks([1.0, 0.0], workflow_id="wf_d") == []
+        assert await repo.find_chunks_by_document_id("doc_d") == []
+
+    @pytest.mark.asyncio
+    async def test_index_rebuilds_from_sqlite_for_new_repository_instance(
+        self, sqlite_db_path: str
+    ):
+        """测试：其他实例写入的分块应通过版本校验被检索到"""
+        writer = SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+        reader = SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+        await writer.save_document(make_document(doc_id="doc_r", workflow_id="wf_r"))
+        await writer.save_document_chunk(
+            make_chunk(chunk_id="r1", document_id="doc_r", embedding=[0.0, 1.0])
+        )
+        assert len(await reader.search_similar_chunks([0.0, 1.0], workflow_id="wf_r")) == 1
+
+        await writer.save_document_chunk(
+            make_chunk(chunk_id="r2", document_id="doc_r", embedding=[0.1, 1.0])
+        )
+        results = await reader.search_similar_chunks([0.0, 1.0], workflow_id="wf_r")
+        await writer.close()
+        await reader.close()
+
+        assert [c.id for c, _ in results] == ["r1", "r2"]
+
+    @pytest.mark.asyncio
+    async def test_index_writes_run_off_the_event_loop(self, repo: SQLiteKnowledgeRepository):
+        """测试：向量索引的追加与删除（含压缩、元数据落盘）在工作线程中执行"""
+        await repo.save_document(make_document(doc_id="doc_t", workflow_id="wf_t"))
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="t0", document_id="doc_t", embedding=[0.0, 1.0])
+        )
+        await repo.search_similar_chunks([0.0, 1.0], workflow_id="wf_t")
+        threads: list[tuple[str, int]] = []
+        index = repo.vector_index
+        append, delete = index.append, index.delete
+
+        def recording_append(*args):
+            threads.append(("append", threading.get_ident()))
+            return append(*args)
+
+        def recording_delete(*args):
+            threads.append(("delete", threading.get_ident()))
+            return delete(*args)
+
+        index.append = recording_append  # type: ignore[method-assign]
+        index.delete = recording_delete  # type: ignore[method-assign]
+
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="t1", document_id="doc_t", embedding=[1.0, 0.0], chunk_index=1)
+        )
+        await repo.delete_chunks_by_document_id("doc_t")
+
+        loop_thread = threading.get_ident()
+        assert [name for name, _ in threads] == ["append", "delete"]
+        assert all(ident != loop_thread for _, ident in threads)
+        assert await repo.search_similar_chunks([1.0, 0.0], workflow_id="wf_t") == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_searches_load_partition_once(self, sqlite_db_path: str):
+        """测试：新实例上并发检索同一分区时只读取/重建一次（在工作线程中执行）"""
+        writer = SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+        await writer.save_document(make_document(doc_id="doc_c", workflow_id="wf_c"))
+        await writer.save_document_chunk(
+            make_chunk(chunk_id="c1", document_id="doc_c", embedding=[1.0, 0.0])
+        )
+        reader = SQLiteKnowledgeRepository(db_path=sqlite_db_path)
+        reads: list[str] = []
+        read_partition = reader.vector_index.read_partition
+
+        def counting_read(key: str, version: int):
+            reads.append(key)
+            return read_partition(key, version)
+
+        reader.vector_index.read_partition = counting_read  # type: ignore[method-assign]
+
+        results = await asyncio.gather(
+            *(reader.search_similar_chunks([1.0, 0.0], workflow_id="wf_c") for _ in range(5))
+        )
+        await writer.close()
+        await reader.close()
+
+        assert reads == ["wf_c"]
+        assert all([c.id for c, _ in hits] == ["c1"] for hits in results)
+
+    @pytest.mark.asyncio
+    async def test_ann_is_trained_in_background_while_search_stays_exact(self, sqlite_db_path: str):
+        """测试：达到阈值后近似索引在后台训练，训练完成前检索走精确扫描"""
+        repo = SQLiteKnowledgeRepository(db_path=sqlite_db_path, ann_min_vectors=200)
+        await repo.save_document(make_document(doc_id="doc_n", workflow_id="wf_n"))
+        vectors = np.random.default_rng(0).normal(size=(256, 16)).astype(np.float32)
+        await repo.save_document_chunks(
+            [
+                make_chunk(chunk_id=f"n{i}", document_id="doc_n", embedding=v.tolist())
+                for i, v in enumerate(vectors)
+            ]
+        )
+
+        assert repo.vector_index.ann_stats("wf_n") is None
+        hits = await repo.search_similar_chunks(vectors[7].tolist(), workflow_id="wf_n", limit=1)
+        assert hits[0][0].id == "n7"
+
+        await asyncio.gather(*repo._ann_training.values())
+        stats = repo.vector_index.ann_stats("wf_n")
+        hits = await repo.search_similar_chunks(vectors[9].tolist(), workflow_id="wf_n", limit=1)
+        await repo.close()
+
+        assert stats is not None and stats["vectors"] == 256
+        assert hits[0][0].id == "n9"
+
+
+class TestLexicalSearch:
+    """测试 FTS5 词法索引（BM25）"""
+
+    @pytest.mark.asyncio
+    async def test_lexical_search_matches_identifiers_and_cjk_bigrams(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：精确标识符与中文片段都能命中，并按工作流限定范围"""
+        await repo.save_document(make_document(doc_id="doc_a", workflow_id="wf_a"))
+        await repo.save_document(make_document(doc_id="doc_b", workflow_id="wf_b"))
+        await repo.save_document_chunks(
+            [
+                make_chunk(
+                    chunk_id="a1",
+                    document_id="doc_a",
+                    embedding=[1.0, 0.0],
+                    content="节点 http_request 返回错误码 E-1001",
+                ),
+                make_chunk(
+                    chunk_id="a2",
+                    document_id="doc_a",
+                    embedding=[0.0, 1.0],
+                    chunk_index=1,
+                    content="知识库检索增强生成",
+                ),
+            ]
+        )
+        await repo.save_document_chunk(
+            make_chunk(
+                chunk_id="b1", document_id="doc_b", embedding=[1.0, 0.0], content="错误码 E-1001"
+            )
+        )
+
+        by_code = await repo.search_chunks_lexical("E-1001 是什么", workflow_id="wf_a")
+        by_cjk = await repo.search_chunks_lexical("检索增强")
+        everywhere = await repo.search_chunks_lexical("e-1001")
+
+        assert [c.id for c, _ in by_code] == ["a1"]
+        assert by_code[0][1] > 0
+        assert [c.id for c, _ in by_cjk] == ["a2"]
+        assert {c.id for c, _ in everywhere} == {"a1", "b1"}
+        assert await repo.search_chunks_lexical("？！") == []
+
+    @pytest.mark.asyncio
+    async def test_lexicon_follows_chunk_replacement_and_deletion(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：同ID分块重写后旧词项失效；删除文档后词法检索不再返回"""
+        await repo.save_document(make_document(doc_id="doc_l", workflow_id="wf_l"))
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="l1", document_id="doc_l", embedding=[1.0], content="alpha")
+        )
+        await repo.save_document_chunk(
+            make_chunk(chunk_id="l1", document_id="doc_l", embedding=[1.0], content="beta")
+        )
+
+        assert await repo.search_chunks_lexical("alpha") == []
+        assert [c.id for c, _ in await repo.search_chunks_lexical("beta")] == ["l1"]
+        assert await repo.count_chunks("wf_l") == 1
+
+        await repo.delete_document("doc_l")
+
+        assert await repo.search_chunks_lexical("beta") == []
+        assert await repo.count_chunks() == 0
+
+    @pytest.mark.asyncio
+    async def test_search_similar_chunks_with_candidates(self, repo: SQLiteKnowledgeRepository):
+        """测试：candidate_ids 限定向量打分范围"""
+        await repo.save_document(make_document(doc_id="doc_c", workflow_id="wf_c"))
+        await repo.save_document_chunks(
+            [
+                make_chunk(chunk_id="c1", document_id="doc_c", embedding=[1.0, 0.0]),
+                make_chunk(chunk_id="c2", document_id="doc_c", embedding=[0.6, 0.8]),
+            ]
+        )
+
+        results = await repo.search_similar_chunks(
+            [1.0, 0.0], workflow_id="wf_c", threshold=0.0, candidate_ids=["c2"]
+        )
+
+        assert [c.id for c, _ in results] == ["c2"]
+
+
+# ====================
+# Test classes: Connection pool & batch writes
+# ====================
+
+
+class TestConnectionPool:
+    """测试连接池复用、一次性建表与批量写入"""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused_and_schema_created_once(
+        self, repo: SQLiteKnowledgeRepository, monkeypatch: pytest.MonkeyPatch
+    ):
+        """测试：顺序调用复用同一连接，建表只执行一次"""
+        calls = 0
+        ensure_tables = repo._ensure_tables
+
+        async def counting_ensure_tables(conn):
+            nonlocal calls
+            calls += 1
+            await ensure_tables(conn)
+
+        monkeypatch.setattr(repo, "_ensure_tables", counting_ensure_tables)
+
+        await repo.save_document(make_document(doc_id="doc_p", workflow_id="wf_p"))
+        for _ in range(10):
+            assert await repo.count_documents_by_workflow("wf_p") == 1
+
+        assert calls == 1
+        assert repo.get_pool_stats()["opened"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_bounded_by_pool_size(self, sqlite_db_path: str):
+        """测试：并发调用最多打开 pool_size 个连接"""
+        repo = SQLiteKnowledgeRepository(db_path=sqlite_db_path, pool_size=2)
+        await repo.save_document(make_document(doc_id="doc_c", workflow_id="wf_c"))
+
+        counts = await asyncio.gather(
+            *(repo.count_documents_by_workflow("wf_c") for _ in range(10))
+        )
+        stats = repo.get_pool_stats()
+        await repo.close()
+
+        assert counts == [1] * 10
+        assert 1 <= stats["opened"] <= 2
+
+    @pytest.mark.asyncio
+    async def test_failed_operation_rolls_back_and_pool_stays_usable(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：借出期间抛出异常时回滚未提交写入，连接仍可继续使用"""
+        await repo.count_documents_by_workflow("wf")
+
+        with pytest.raises(RuntimeError):
+            async with repo._connection() as conn:
+                await conn.execute(
+                    "INSERT INTO documents (id, title, content, source, status, created_at) "
+                    "VALUES ('doc_x', 't', 'c', 'upload', 'pending', '2025-01-01T00:00:00')"
+                )
+                raise RuntimeError("boom")
+
+        assert await repo.find_document_by_id("doc_x") is None
+        assert repo.get_pool_stats()["opened"] == 1
+
+    @pytest.mark.asyncio
+    async def test_close_then_reuse_reopens_connection(self, repo: SQLiteKnowledgeRepository):
+        """测试：close 后再次调用会重新建立连接"""
+        await repo.save_document(make_document(doc_id="doc_r", workflow_id="wf_r"))
+        await repo.close()
+
+        assert repo.get_pool_stats()["idle"] == 0
+        assert await repo.count_documents_by_workflow("wf_r") == 1
+
+    @pytest.mark.asyncio
+    async def test_save_documents_and_update_documents_in_batch(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        """测试：批量保存与批量更新"""
+        documents = [make_document(doc_id=f"doc_{i}", workflow_id="wf_b") for i in range(5)]
+        await repo.save_documents(documents)
+
+        assert await repo.count_documents_by_workflow("wf_b") == 5
+
+        for document in documents:
+            document.status = DocumentStatus.PROCESSED
+        await repo.update_documents(documents)
+        await repo.save_documents([])
+
+        stored = await repo.find_documents_by_workflow_id("wf_b")
+        assert sorted(d.id for d in stored) == [f"doc_{i}" for i in range(5)]
+        assert {d.status for d in stored} == {DocumentStatus.PROCESSED}
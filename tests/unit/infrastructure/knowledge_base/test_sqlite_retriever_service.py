@@ -0,0 +1,135 @@
+"""SQLiteRetrieverService单元测试
+
+测试范围:
+1. 检索：在真实 SQLiteKnowledgeRepository 的本地向量索引上返回最相近的分块，支持 metadata 过滤
+2. 批量嵌入：按内容去重并分批调用嵌入模型
+3. create_embeddings：无 API Key 时退化为确定性嵌入
+4. 嵌入缓存按提供方隔离：确定性嵌入写入的向量不会被真实提供方复用
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+from src.domain.knowledge_base.entities.document_chunk import DocumentChunk
+from src.infrastructure.knowledge_base.embedding_cache import EmbeddingCache
+from src.infrastructure.knowledge_base.sqlite_knowledge_repository import (
+    SQLiteKnowledgeRepository,
+)
+from src.infrastructure.knowledge_base.sqlite_retriever_service import (
+    DeterministicEmbeddings,
+    SQLiteRetrieverService,
+    create_embeddings,
+)
+
+
+class CountingEmbeddings(DeterministicEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return await super().aembed_documents(texts)
+
+
+class ProviderEmbeddings:
+    """模拟配置 API Key 后的真实提供方"""
+
+    def __init__(self):
+        self.calls: list[str] = []
+
+    async def aembed_query(self, text: str) -> list[float]:
+        self.calls.append(text)
+        return [9.0] * 16
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [await self.aembed_query(text) for text in texts]
+
+
+@pytest.fixture
+async def repo(tmp_path: Path) -> AsyncIterator[SQLiteKnowledgeRepository]:
+    repository = SQLiteKnowledgeRepository(db_path=str(tmp_path / "kb.db"))
+    yield repository
+    await repository.close()
+
+
+async def _save_chunks(
+    repo: SQLiteKnowledgeRepository, embeddings: DeterministicEmbeddings, texts: dict[str, str]
+) -> None:
+    chunks = [
+        DocumentChunk.create(
+            document_id="doc",
+            content=text,
+            embedding=await embeddings.aembed_query(text),
+            chunk_index=index,
+            metadata={"lang": lang},
+        )
+        for index, (text, lang) in enumerate(texts.items())
+    ]
+    await repo.save_document_chunks(chunks)
+
+
+class TestRetrieveRelevantChunks:
+    @pytest.mark.asyncio
+    async def test_returns_nearest_chunks_from_repository_index(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        embeddings = DeterministicEmbeddings()
+        await _save_chunks(repo, embeddings, {"alpha": "en", "beta": "en", "gamma": "zh"})
+        service = SQLiteRetrieverService(repo, embeddings)
+
+        results = await service.retrieve_relevant_chunks("beta", top_k=2)
+
+        assert len(results) == 2
+        assert results[0][0].content == "beta"
+        assert results[0][1] == pytest.approx(1.0, rel=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_filters_by_chunk_metadata(self, repo: SQLiteKnowledgeRepository):
+        embeddings = DeterministicEmbeddings()
+        await _save_chunks(repo, embeddings, {"alpha": "en", "beta": "en", "gamma": "zh"})
+        service = SQLiteRetrieverService(repo, embeddings)
+
+        results = await service.retrieve_relevant_chunks("beta", top_k=3, filters={"lang": "zh"})
+
+        assert [chunk.content for chunk, _ in results] == ["gamma"]
+        assert "[文档片段] gamma" in await service.get_context_for_query("gamma")
+
+
+class TestEmbedMany:
+    @pytest.mark.asyncio
+    async def test_deduplicates_and_batches_provider_calls(self, repo: SQLiteKnowledgeRepository):
+        embeddings = CountingEmbeddings()
+        service = SQLiteRetrieverService(repo, embeddings, embedding_batch_size=2)
+
+        vectors = await service.embed_many(["a", "b", "a", "c"])
+
+        assert embeddings.batches == [["a", "b"], ["c"]]
+        assert vectors[0] == vectors[2]
+        assert len(vectors) == 4
+
+    @pytest.mark.asyncio
+    async def test_embedding_cache_is_not_shared_across_providers(
+        self, repo: SQLiteKnowledgeRepository
+    ):
+        cache = EmbeddingCache(db_path=None)
+        fallback = SQLiteRetrieverService(
+            repo, DeterministicEmbeddings(), embedding_cache=cache, embedding_dimension=16
+        )
+        fake = await fallback.generate_embedding("alpha")
+        await fallback.embed_many(["beta"])
+
+        provider = ProviderEmbeddings()
+        real = SQLiteRetrieverService(repo, provider, embedding_cache=cache, embedding_dimension=16)
+
+        assert await real.generate_embedding("alpha") == [9.0] * 16 != fake
+        assert await real.embed_many(["beta"]) == [[9.0] * 16]
+        assert provider.calls == ["alpha", "beta"]
+
+
+def test_create_embeddings_without_api_key_is_deterministic():
+    assert isinstance(create_embeddings("text-embedding-3-small"), DeterministicEmbeddings)
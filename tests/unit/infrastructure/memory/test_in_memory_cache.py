@@ -242,3 +242,78 @@ class TestInMemoryCache:
         assert callable(cache.put)
         assert callable(cache.invalidate)
         assert callable(cache.is_valid)
+
+
+class TestInMemoryCacheBudget:
+    """字节预算、O(1) 追加与单调时钟测试"""
+
+    @staticmethod
+    def _message(workflow_id: str, content: str) -> ChatMessage:
+        return ChatMessage.create(workflow_id=workflow_id, content=content, is_user=True)
+
+    def test_append_extends_live_entry_and_tracks_bytes(self):
+        """测试：append 在已有条目上追加，超出条数时丢弃最旧消息并同步字节数"""
+        from src.infrastructure.memory.in_memory_cache import (
+            InMemoryCache,
+            estimate_message_bytes,
+        )
+
+        cache = InMemoryCache(max_messages_per_workflow=3)
+        messages = [self._message("wf", f"m{i}") for i in range(3)]
+
+        assert cache.append("wf", messages[0]) is False
+        assert cache.get("wf") is None
+
+        cache.put("wf", messages)
+        extra = self._message("wf", "m3")
+        assert cache.append("wf", extra) is True
+
+        assert [m.content for m in cache.get("wf")] == ["m1", "m2", "m3"]
+        assert cache.get_stats()["bytes"] == sum(
+            estimate_message_bytes(m) for m in [*messages[1:], extra]
+        )
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        """测试：超出字节预算时按 LRU 淘汰其他 workflow"""
+        from src.infrastructure.memory.in_memory_cache import InMemoryCache
+
+        big = "x" * 4000
+        cache = InMemoryCache(max_workflows=100, max_bytes=10_000)
+        cache.put("wf_a", [self._message("wf_a", big)])
+        cache.put("wf_b", [self._message("wf_b", big)])
+        cache.get("wf_a")
+        cache.put("wf_c", [self._message("wf_c", big)])
+
+        stats = cache.get_stats()
+        assert cache.is_valid("wf_b") is False
+        assert cache.is_valid("wf_a") and cache.is_valid("wf_c")
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= 10_000
+
+    def test_oversized_entry_keeps_newest_messages_within_budget(self):
+        """测试：单个条目超出预算时丢弃其最旧的消息"""
+        from src.infrastructure.memory.in_memory_cache import InMemoryCache
+
+        cache = InMemoryCache(max_bytes=10_000)
+        cache.put("wf", [self._message("wf", str(i) * 4000) for i in range(5)])
+
+        result = cache.get("wf")
+        assert [m.content[0] for m in result] == ["3", "4"]
+        assert cache.get_stats()["bytes"] <= 10_000
+
+    def test_ttl_uses_injected_monotonic_clock(self):
+        """测试：TTL 基于注入的单调时钟，过期条目计入 expirations"""
+        from src.infrastructure.memory.in_memory_cache import InMemoryCache
+
+        now = [100.0]
+        cache = InMemoryCache(ttl_seconds=10, clock=lambda: now[0])
+        cache.put("wf", [self._message("wf", "hello")])
+
+        now[0] += 9
+        assert cache.get("wf") is not None
+        now[0] += 11
+        assert cache.append("wf", self._message("wf", "late")) is False
+
+        stats = cache.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["bytes"] == 0
@@ -0,0 +1,114 @@
+"""
+Unit tests for SQLiteSharedMemoryCache
+
+测试目标：验证跨进程共享缓存的窗口、追加、代次失效、TTL 与字节预算
+"""
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from src.domain.entities.chat_message import ChatMessage
+from src.infrastructure.memory.sqlite_shared_cache import SQLiteSharedMemoryCache
+
+
+def _message(workflow_id: str, content: str) -> ChatMessage:
+    return ChatMessage.create(workflow_id=workflow_id, content=content, is_user=True)
+
+
+def _worker_put(db_path: str) -> None:
+    """子进程：模拟另一个 worker 回溯后写入共享缓存"""
+    cache = SQLiteSharedMemoryCache(db_path)
+    assert cache.get("wf_shared") is None
+    cache.put("wf_shared", [_message("wf_shared", "来自其他 worker")])
+    cache.close()
+
+
+class TestSQLiteSharedMemoryCache:
+    """SQLiteSharedMemoryCache 单元测试"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path: Path) -> str:
+        return str(tmp_path / "memory_cache.db")
+
+    @pytest.fixture
+    def cache(self, db_path: str):
+        cache = SQLiteSharedMemoryCache(db_path, max_messages_per_workflow=3)
+        yield cache
+        cache.close()
+
+    def test_put_get_and_append_keep_last_window(self, cache):
+        """测试：put 保留最后 N 条，append 追加并滑动窗口，往返保留字段"""
+        messages = [_message("wf", f"m{i}") for i in range(4)]
+        cache.put("wf", messages)
+
+        assert [m.content for m in cache.get("wf")] == ["m1", "m2", "m3"]
+
+        assert cache.append("wf", _message("wf", "m4")) is True
+        result = cache.get("wf")
+        assert [m.content for m in result] == ["m2", "m3", "m4"]
+        assert result[0] == messages[2]
+
+        assert cache.append("wf_missing", _message("wf_missing", "x")) is False
+        assert cache.get("wf_missing") is None
+
+    def test_instances_share_entries_across_processes(self, db_path, cache):
+        """测试：另一个进程写入的窗口在本进程直接命中"""
+        process = multiprocessing.get_context("spawn").Process(target=_worker_put, args=(db_path,))
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+        result = cache.get("wf_shared")
+        assert [m.content for m in result] == ["来自其他 worker"]
+        assert cache.get_stats()["cached_workflows"] == 1
+
+    def test_put_after_concurrent_invalidate_is_dropped(self, db_path, cache):
+        """测试：未命中后其他 worker 执行了 invalidate，本 worker 的回溯结果不写回"""
+        other = SQLiteSharedMemoryCache(db_path)
+        other.put("wf", [_message("wf", "old")])
+        other.invalidate("wf")
+
+        assert cache.get("wf") is None  # 记录代次
+        other.put("wf", [_message("wf", "fresh")])
+        other.invalidate("wf")  # 期间又发生了一次失效
+
+        cache.put("wf", [_message("wf", "stale")])
+
+        assert cache.get("wf") is None
+        assert cache.get_stats()["stale_puts"] == 1
+        other.close()
+
+    def test_put_after_concurrent_append_miss_is_dropped(self, db_path, cache):
+        """测试：未命中后其他 worker 追加消息（未命中返回 False），本 worker 的旧窗口不写回"""
+        other = SQLiteSharedMemoryCache(db_path)
+
+        assert cache.get("wf") is None  # B 未命中，开始回溯
+        assert other.append("wf", _message("wf", "new")) is False  # A 追加的消息不在 B 的窗口里
+        cache.put("wf", [_message("wf", "loaded before append")])
+
+        assert cache.get("wf") is None
+        assert cache.get_stats()["stale_puts"] == 1
+        other.close()
+
+    def test_ttl_and_byte_budget(self, db_path):
+        """测试：TTL 基于注入时钟；超出字节预算时淘汰最久未访问的 workflow"""
+        now = [1000.0]
+        cache = SQLiteSharedMemoryCache(
+            db_path, ttl_seconds=10, max_bytes=10_000, clock=lambda: now[0]
+        )
+        big = "x" * 4000
+        cache.put("wf_a", [_message("wf_a", big)])
+        now[0] += 1
+        cache.put("wf_b", [_message("wf_b", big)])
+        now[0] += 1
+        cache.put("wf_c", [_message("wf_c", big)])
+
+        assert cache.is_valid("wf_a") is False
+        assert cache.is_valid("wf_b") and cache.is_valid("wf_c")
+        assert cache.get_stats()["bytes"] <= 10_000
+
+        now[0] += 11
+        assert cache.get("wf_c") is None
+        cache.close()
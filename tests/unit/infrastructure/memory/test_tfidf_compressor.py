@@ -5,6 +5,8 @@ Unit tests for TFIDFCompressor
 TDD Phase: RED
 """
 
+from datetime import UTC, datetime, timedelta
+
 import pytest
 
 from src.domain.entities.chat_message import ChatMessage
@@ -186,3 +188,76 @@ class TestTFIDFCompressor:
         # 第二条消息（高多样性）应该得分更高
         # 因为它包含更多独特词汇，每个词的 IDF 权重都更高
         assert scores[1] > scores[0]
+
+
+class TestTFIDFCompressorIncremental:
+    """增量 TF-IDF 统计测试"""
+
+    @pytest.fixture
+    def compressor(self):
+        from src.infrastructure.memory.tfidf_compressor import TFIDFCompressor
+
+        return TFIDFCompressor()
+
+    @staticmethod
+    def _history(count: int, offset: int = 0) -> list[ChatMessage]:
+        base = datetime(2025, 1, 1, tzinfo=UTC)
+        return [
+            ChatMessage(
+                id=f"msg_{i}",
+                workflow_id="wf_123",
+                content=f"第{i}轮 HTTP节点 参数{i % 7} 调用 API retry{i % 3}",
+                is_user=i % 2 == 0,
+                timestamp=base + timedelta(seconds=i),
+            )
+            for i in range(offset, offset + count)
+        ]
+
+    def test_sliding_window_only_tokenizes_new_messages(self, compressor, monkeypatch):
+        """测试：窗口滑动时只对新消息分词，结果与全新压缩器一致"""
+        from src.infrastructure.memory.tfidf_compressor import TFIDFCompressor
+
+        compressor.compress(self._history(40), max_tokens=60, min_messages=2)
+        calls = []
+        original = compressor._tokenize
+        monkeypatch.setattr(
+            compressor, "_tokenize", lambda text: calls.append(text) or original(text)
+        )
+
+        window = self._history(40, offset=3)
+        result = compressor.compress(window, max_tokens=60, min_messages=2)
+
+        assert len(calls) == 3
+        expected = TFIDFCompressor().compress(window, max_tokens=60, min_messages=2)
+        assert [m.id for m in result] == [m.id for m in expected]
+
+    def test_observe_and_modified_content_update_statistics(self, compressor, monkeypatch):
+        """测试：observe 预先统计新消息；内容被修改的消息重新统计"""
+        history = self._history(20)
+        compressor.compress(history, max_tokens=30, min_messages=2)
+
+        new_message = self._history(1, offset=20)[0]
+        compressor.observe(new_message)
+        history[0] = ChatMessage(
+            id="msg_0",
+            workflow_id="wf_123",
+            content="修改后的内容",
+            is_user=True,
+            timestamp=history[0].timestamp,
+        )
+
+        calls = []
+        original = compressor._tokenize
+        monkeypatch.setattr(
+            compressor, "_tokenize", lambda text: calls.append(text) or original(text)
+        )
+        compressor.compress([*history, new_message], max_tokens=30, min_messages=2)
+
+        assert calls == ["修改后的内容"]
+
+    def test_forget_drops_workflow_model(self, compressor):
+        """测试：forget 后重新从窗口建立统计"""
+        compressor.compress(self._history(10), max_tokens=10, min_messages=2)
+        compressor.forget("wf_123")
+
+        assert "wf_123" not in compressor._models
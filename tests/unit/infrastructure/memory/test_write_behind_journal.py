@@ -0,0 +1,157 @@
+"""
+Unit tests for WriteBehindJournal
+
+测试目标：验证写后日志的批量刷库、待写查询、崩溃恢复、槽位独占、死信与丢弃
+"""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.domain.entities.chat_message import ChatMessage
+from src.infrastructure.memory.write_behind_journal import WriteBehindJournal
+
+
+def _message(workflow_id: str, content: str) -> ChatMessage:
+    return ChatMessage.create(workflow_id=workflow_id, content=content, is_user=True)
+
+
+class RecordingWriter:
+    """记录每批写入；fail=True 时模拟数据库不可用"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches: list[list[ChatMessage]] = []
+        self.written = threading.Event()
+
+    def __call__(self, messages: list[ChatMessage]) -> None:
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(messages))
+        self.written.set()
+
+    @property
+    def messages(self) -> list[ChatMessage]:
+        return [msg for batch in self.batches for msg in batch]
+
+
+class TestWriteBehindJournal:
+    """WriteBehindJournal 单元测试"""
+
+    @pytest.fixture
+    def journal_dir(self, tmp_path: Path) -> Path:
+        return tmp_path / "journal"
+
+    def test_append_is_pending_until_flushed_in_batches(self, journal_dir: Path):
+        """测试：append 不写库，flush 按批次落库并清空待写队列"""
+        writer = RecordingWriter()
+        journal = WriteBehindJournal(journal_dir, writer, batch_size=2, fsync=False)
+        messages = [_message("wf_a", f"m{i}") for i in range(5)]
+        for msg in messages:
+            journal.append(msg)
+        journal.append(_message("wf_b", "other"))
+
+        assert writer.batches == []
+        assert journal.pending("wf_a") == messages
+
+        assert journal.flush() is True
+        assert [len(batch) for batch in writer.batches] == [2, 2, 2]
+        assert journal.pending("wf_a") == []
+        assert journal.get_stats()["flushed"] == 6
+        journal.close()
+
+    def test_background_thread_flushes(self, journal_dir: Path):
+        """测试：后台线程无需显式 flush 即可落库，stop 刷完剩余消息"""
+        writer = RecordingWriter()
+        journal = WriteBehindJournal(journal_dir, writer, flush_interval=0.01, fsync=False)
+        journal.start()
+        journal.append(_message("wf_a", "hello"))
+
+        assert writer.written.wait(timeout=5)
+        journal.append(_message("wf_a", "bye"))
+        assert journal.stop() is True
+        assert [msg.content for msg in writer.messages] == ["hello", "bye"]
+
+    def test_recovery_replays_unflushed_messages(self, journal_dir: Path):
+        """测试：刷库失败后进程退出，下次启动重放未落库的消息（含损坏尾行）"""
+        writer = RecordingWriter()
+        journal = WriteBehindJournal(journal_dir, writer)
+        journal.append(_message("wf_a", "已落库"))
+        assert journal.flush() is True
+
+        writer.fail = True
+        lost = [_message("wf_a", f"未落库 {i}") for i in range(3)]
+        for msg in lost:
+            journal.append(msg)
+        assert journal.flush() is False
+        journal.close()  # 模拟崩溃：不刷库直接释放
+
+        with open(journal.path, "a", encoding="utf-8") as fh:
+            fh.write('{"seq": 99, "id": "msg_torn"')
+
+        recovered = RecordingWriter()
+        reopened = WriteBehindJournal(journal_dir, recovered)
+        assert reopened.path == journal.path
+        assert reopened.get_stats()["recovered"] == 3
+        assert [msg.id for msg in reopened.pending("wf_a")] == [msg.id for msg in lost]
+
+        after = _message("wf_a", "恢复后追加")
+        reopened.append(after)
+        assert reopened.flush() is True
+        assert [msg.id for msg in recovered.messages] == [msg.id for msg in [*lost, after]]
+        assert recovered.messages[0].timestamp == lost[0].timestamp
+        reopened.close()
+
+    def test_live_journal_slot_is_not_shared(self, journal_dir: Path):
+        """测试：同一目录下每个实例独占一个槽位文件"""
+        first = WriteBehindJournal(journal_dir, RecordingWriter())
+        second = WriteBehindJournal(journal_dir, RecordingWriter())
+
+        assert first.path != second.path
+        first.close()
+        second.close()
+
+    def test_batch_failing_repeatedly_is_dead_lettered(self, journal_dir: Path):
+        """测试：同一批次连续失败达到上限后转入死信文件，不再阻塞后续消息"""
+        writer = RecordingWriter(fail=True)
+        journal = WriteBehindJournal(journal_dir, writer, fsync=False, max_batch_retries=2)
+        poisoned = _message("wf_a", "bad")
+        journal.append(poisoned)
+
+        assert journal.flush() is False
+        assert journal.flush() is True  # 第二次失败：转入死信
+        assert journal.pending("wf_a") == []
+        dead = [json.loads(line) for line in journal.dead_letter_path.read_text().splitlines()]
+        assert [record["id"] for record in dead] == [poisoned.id]
+
+        writer.fail = False
+        journal.append(_message("wf_a", "good"))
+        assert journal.flush() is True
+        assert [msg.content for msg in writer.messages] == ["good"]
+        stats = journal.get_stats()
+        assert (stats["dead_lettered"], stats["flushed"]) == (1, 1)
+        journal.close()
+
+        reopened = WriteBehindJournal(journal_dir, RecordingWriter())
+        assert reopened.get_stats()["recovered"] == 0
+        reopened.close()
+
+    def test_discard_drops_pending_messages_and_is_not_replayed(self, journal_dir: Path):
+        """测试：discard 丢弃指定 workflow 的待写消息，重启后也不会重放"""
+        writer = RecordingWriter(fail=True)
+        journal = WriteBehindJournal(journal_dir, writer, fsync=False)
+        journal.append(_message("wf_a", "cleared"))
+        kept = _message("wf_b", "kept")
+        journal.append(kept)
+
+        assert journal.discard("wf_a") == 1
+        assert journal.pending("wf_a") == []
+        assert journal.pending("wf_b") == [kept]
+        journal.close()
+
+        reopened = WriteBehindJournal(journal_dir, RecordingWriter())
+        assert reopened.pending("wf_a") == []
+        assert [msg.id for msg in reopened.pending("wf_b")] == [kept.id]
+        reopened.close()
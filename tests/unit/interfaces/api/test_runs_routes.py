@@ -143,3 +143,73 @@ class TestGetRun:
         assert response.status_code == 404
         data = response.json()
         assert "detail" in data
+
+
+class TestCreateRunPersistence:
+    """测试 POST /api/projects/{project_id}/workflows/{workflow_id}/runs - 真实数据库
+
+    业务场景：与生产 SessionLocal 一致（autoflush=False）的会话上创建 Run
+
+    测试覆盖：
+    - 路由合成的 Agent 与 Run 一起落库，不因重复插入 Agent 而失败
+    """
+
+    def test_create_run_with_autoflush_disabled_session(self):
+        """测试：autoflush 关闭时创建 Run 成功，Run 与合成的 Agent 都已落库"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        from src.domain.entities.edge import Edge
+        from src.domain.entities.node import Node
+        from src.domain.entities.workflow import Workflow
+        from src.domain.value_objects.node_type import NodeType
+        from src.domain.value_objects.position import Position
+        from src.infrastructure.database.base import Base
+        from src.infrastructure.database.engine import get_db_session
+        from src.infrastructure.database.models import AgentModel, RunModel
+        from src.infrastructure.database.repositories.workflow_repository import (
+            SQLAlchemyWorkflowRepository,
+        )
+        from src.interfaces.api.main import app
+
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        start = Node.create(
+            type=NodeType.START, name="开始", config={}, position=Position(x=0, y=0)
+        )
+        end = Node.create(type=NodeType.END, name="结束", config={}, position=Position(x=100, y=0))
+        workflow = Workflow.create(
+            name="wf",
+            description="",
+            nodes=[start, end],
+            edges=[Edge.create(source_node_id=start.id, target_node_id=end.id)],
+        )
+        with session_factory() as db:
+            SQLAlchemyWorkflowRepository(db).save(workflow)
+            db.commit()
+
+        def override_get_db_session():
+            with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db_session] = override_get_db_session
+        try:
+            response = TestClient(app).post(
+                f"/api/projects/proj_1/workflows/{workflow.id}/runs", json={}
+            )
+        finally:
+            app.dependency_overrides.pop(get_db_session, None)
+
+        assert response.status_code == 200
+        with session_factory() as db:
+            run = db.get(RunModel, response.json()["id"])
+            assert run is not None
+            assert db.get(AgentModel, run.agent_id) is not None
+        engine.dispose()
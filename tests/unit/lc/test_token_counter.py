@@ -246,3 +246,42 @@ class TestTokenCounterWithDifferentModels:
         counter = TokenCounter(provider="unknown", model="unknown-model")
 
         assert counter.context_limit == 4096  # 默认值
+
+
+class TestTokenCounterSharing:
+    """测试共享编码器、计数记忆与单条消息计数"""
+
+    def test_shortcut_functions_reuse_shared_counter(self):
+        """测试：快捷函数按 provider/model 复用同一个 TokenCounter"""
+        from src.lc.token_counter import get_token_counter
+
+        shared = get_token_counter("deepseek", "deepseek-chat")
+
+        assert get_token_counter("deepseek", "deepseek-chat") is shared
+        assert count_text_tokens(
+            "hello world", provider="deepseek", model="deepseek-chat"
+        ) == shared.count_text("hello world")
+
+    def test_repeated_text_is_served_from_memo(self):
+        """测试：重复计数同一内容命中记忆表，结果不变"""
+        from src.infrastructure.lc_adapters.token_counter import _token_memo
+
+        counter = TokenCounter(provider="deepseek", model="deepseek-chat")
+        text = "memo test " * 50
+        first = counter.count_text(text)
+        hits = _token_memo.hits
+
+        assert counter.count_text(text) == first
+        assert _token_memo.hits == hits + 1
+
+    def test_count_message_sums_to_count_messages(self):
+        """测试：逐条计数之和 + 对话固定开销 == count_messages"""
+        counter = TokenCounter(provider="deepseek", model="deepseek-chat")
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": "你好，请帮我创建一个工作流"},
+        ]
+
+        total = sum(counter.count_message(message) for message in messages) + 3
+
+        assert total == counter.count_messages(messages)